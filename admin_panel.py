@@ -1,8 +1,42 @@
+import argparse
+import datetime
+import os
 import tkinter as tk
-from tkinter import messagebox, ttk
-
-from database import SessionLocal
-from models import Product, ProductType
+from tkinter import filedialog, messagebox, ttk
+
+from catalog_snapshot import write_snapshot
+from config import LIVE_ORDERS_MAX_ROWS
+from database import SessionLocal, current_tenant, get_session_factory, use_tenant
+from delivery import bump_zones_version, format_polygon, parse_polygon
+from forecasting import get_day_forecast
+from live_orders import LiveOrdersPoller
+from media import store_product_image
+from models import (
+    DeliveryZone,
+    Product,
+    ProductType,
+    Promotion,
+    StaffSubscription,
+)
+from promotions import KINDS, bump_promotions_version, parse_hours, parse_ids
+from reporting import (
+    get_daily_revenue,
+    get_hourly_load,
+    get_top_products,
+    to_local_time,
+)
+from services import bump_catalog_version, get_catalog_version, search_feedback
+
+# Виды акций: подпись в интерфейсе -> models.Promotion.kind
+PROMOTION_KINDS = dict(
+    zip(("Скидка, %", "Цена за штуку", "Комбо-набор за цену"), KINDS)
+)
+
+# Методы прогноза спроса: подпись в интерфейсе -> параметр forecasting
+FORECAST_METHODS = {
+    "Экспоненциальное сглаживание": "ses",
+    "Скользящее среднее (4 недели)": "ma",
+}
 
 
 class AdminPanel:
@@ -29,6 +63,8 @@ class AdminPanel:
         self.product_name_entry = None
         self.product_cost_entry = None
         self.product_type_combobox = None
+        self.product_image_path = ""
+        self.product_image_label = None
 
         # Проверка БД (теперь static method)
         self._initialize_database()
@@ -44,11 +80,13 @@ class AdminPanel:
         """
         from pathlib import Path
 
-        from database import Base, engine
+        from database import init_db
 
         db_file = Path("app.db")
-        if not db_file.exists():
-            Base.metadata.create_all(bind=engine)
+        created = not db_file.exists()
+        # create_all создаёт только недостающие таблицы, поэтому безопасен для старых БД
+        init_db()
+        if created:
             print("БД создана автоматически!")
 
     def initialize_ui(self):
@@ -59,6 +97,7 @@ class AdminPanel:
         """
         self.setup_types_section()
         self.setup_products_section()
+        self.setup_reports_section()
         self.load_data()
 
     def load_data(self):
@@ -169,6 +208,13 @@ class AdminPanel:
         self.product_type_combobox = ttk.Combobox(input_frame, width=20)
         self.product_type_combobox.grid(row=0, column=5, padx=5)
 
+        tk.Label(input_frame, text="Фото:").grid(row=1, column=0, pady=5)
+        self.product_image_label = tk.Label(input_frame, text="не выбрано", anchor="w")
+        self.product_image_label.grid(row=1, column=1, sticky="w", padx=5)
+        tk.Button(
+            input_frame, text="Выбрать...", command=self.choose_product_image
+        ).grid(row=1, column=2, columnspan=2, sticky="w")
+
         btn_frame = tk.Frame(frame_products)
         btn_frame.pack()
 
@@ -179,6 +225,790 @@ class AdminPanel:
             side="left", padx=5
         )
 
+    def choose_product_image(self):
+        """Открывает диалог выбора изображения для продукта."""
+        path = filedialog.askopenfilename(
+            title="Фото продукта",
+            filetypes=[
+                ("Изображения", "*.jpg *.jpeg *.png *.webp"),
+                ("Все файлы", "*"),
+            ],
+        )
+        if path:
+            self.product_image_path = path
+            self.product_image_label.config(text=os.path.basename(path))
+
+    def setup_reports_section(self):
+        """
+        Устанавливает раздел с отчётами.
+
+        Создает кнопку открытия отчёта о продажах, построенного по агрегатам.
+        """
+        frame_reports = tk.LabelFrame(self.master, text="Отчёты", padx=10, pady=5)
+        frame_reports.pack(fill="x", padx=10, pady=5)
+
+        tk.Button(
+            frame_reports, text="Отчёт по продажам", command=self.open_sales_report
+        ).pack(side="left", padx=5)
+        tk.Button(
+            frame_reports, text="Обратная связь", command=self.open_feedback_view
+        ).pack(side="left", padx=5)
+        tk.Button(
+            frame_reports, text="Прогноз спроса", command=self.open_forecast_view
+        ).pack(side="left", padx=5)
+        tk.Button(
+            frame_reports, text="Зоны доставки", command=self.open_delivery_zones
+        ).pack(side="left", padx=5)
+        tk.Button(frame_reports, text="Акции", command=self.open_promotions).pack(
+            side="left", padx=5
+        )
+        tk.Button(
+            frame_reports, text="Заказы онлайн", command=self.open_live_orders
+        ).pack(side="left", padx=5)
+        tk.Button(frame_reports, text="Персонал", command=self.open_staff_chats).pack(
+            side="left", padx=5
+        )
+
+    def open_sales_report(self):
+        """
+        Открывает окно отчёта о продажах.
+
+        Показывает выручку по дням, топ продуктов и нагрузку по часам за выбранный период.
+        Данные читаются из агрегатов, поэтому отчёт строится быстро при любом числе заказов.
+        """
+        window = tk.Toplevel(self.master)
+        window.title("Отчёт по продажам")
+        window.geometry("700x600")
+
+        period_frame = tk.Frame(window)
+        period_frame.pack(fill="x", padx=10, pady=5)
+        tk.Label(period_frame, text="Период (дней):").pack(side="left")
+        days_entry = tk.Entry(period_frame, width=5)
+        days_entry.insert(0, "7")
+        days_entry.pack(side="left", padx=5)
+
+        notebook = ttk.Notebook(window)
+        notebook.pack(fill="both", expand=True, padx=10, pady=5)
+
+        trees = {}
+        for key, title, columns in (
+            ("daily", "По дням", ("Дата", "Заказов", "Выручка")),
+            ("products", "Топ продуктов", ("Продукт", "Количество", "Выручка")),
+            ("hourly", "По часам", ("Час", "Заказов", "Выручка")),
+        ):
+            tree = ttk.Treeview(notebook, columns=columns, show="headings")
+            for column in columns:
+                tree.heading(column, text=column)
+                tree.column(column, width=150, anchor="center")
+            notebook.add(tree, text=title)
+            trees[key] = tree
+
+        def refresh():
+            try:
+                days = max(int(days_entry.get()), 1)
+            except ValueError:
+                messagebox.showerror("Ошибка", "Период должен быть числом!")
+                return
+            date_to = to_local_time(None).date()
+            date_from = date_to - datetime.timedelta(days=days - 1)
+            for tree in trees.values():
+                tree.delete(*tree.get_children())
+
+            with SessionLocal() as db:
+                for stat in get_daily_revenue(db, date_from, date_to):
+                    trees["daily"].insert(
+                        "",
+                        tk.END,
+                        values=(stat.day, stat.orders_count, f"{stat.revenue:.2f}"),
+                    )
+                for _, name, units, revenue in get_top_products(db, date_from, date_to):
+                    trees["products"].insert(
+                        "", tk.END, values=(name, units, f"{revenue:.2f}")
+                    )
+                for hour, orders_count, revenue in get_hourly_load(
+                    db, date_from, date_to
+                ):
+                    trees["hourly"].insert(
+                        "",
+                        tk.END,
+                        values=(f"{hour:02d}:00", orders_count, f"{revenue:.2f}"),
+                    )
+
+        tk.Button(period_frame, text="Показать", command=refresh).pack(
+            side="left", padx=5
+        )
+        refresh()
+
+    def open_forecast_view(self):
+        """
+        Открывает окно прогноза спроса на день.
+
+        Показывает ожидаемое количество каждого продукта по часам выбранного дня,
+        чтобы кухня могла заранее подготовить заготовки.
+        """
+        window = tk.Toplevel(self.master)
+        window.title("Прогноз спроса")
+        window.geometry("900x500")
+
+        params_frame = tk.Frame(window)
+        params_frame.pack(fill="x", padx=10, pady=5)
+        tk.Label(params_frame, text="Дата (ГГГГ-ММ-ДД):").pack(side="left")
+        date_entry = tk.Entry(params_frame, width=12)
+        tomorrow = to_local_time(None).date() + datetime.timedelta(days=1)
+        date_entry.insert(0, tomorrow.isoformat())
+        date_entry.pack(side="left", padx=5)
+        method_combobox = ttk.Combobox(
+            params_frame, width=25, state="readonly", values=list(FORECAST_METHODS)
+        )
+        method_combobox.current(0)
+        method_combobox.pack(side="left", padx=5)
+
+        tree_frame = tk.Frame(window)
+        tree_frame.pack(fill="both", expand=True, padx=10, pady=5)
+        columns = ("Продукт", "За день", *(f"{hour:02d}" for hour in range(24)))
+        tree = ttk.Treeview(tree_frame, columns=columns, show="headings")
+        for column in columns:
+            tree.heading(column, text=column)
+            tree.column(column, width=40, anchor="center", stretch=False)
+        tree.column("Продукт", width=160, anchor="w")
+        tree.column("За день", width=60)
+        scrollbar = ttk.Scrollbar(tree_frame, orient="horizontal", command=tree.xview)
+        tree.configure(xscrollcommand=scrollbar.set)
+        scrollbar.pack(side="bottom", fill="x")
+        tree.pack(fill="both", expand=True)
+
+        def refresh():
+            try:
+                day = datetime.date.fromisoformat(date_entry.get().strip())
+            except ValueError:
+                messagebox.showerror("Ошибка", "Дата должна быть в формате ГГГГ-ММ-ДД!")
+                return
+            tree.delete(*tree.get_children())
+            with SessionLocal() as db:
+                rows = get_day_forecast(
+                    db, day, FORECAST_METHODS[method_combobox.get()]
+                )
+            for name, hourly in rows:
+                tree.insert(
+                    "",
+                    tk.END,
+                    values=(name, f"{sum(hourly):.1f}", *(f"{v:g}" for v in hourly)),
+                )
+
+        tk.Button(params_frame, text="Показать", command=refresh).pack(
+            side="left", padx=5
+        )
+        refresh()
+
+    def open_feedback_view(self):
+        """
+        Открывает окно просмотра обратной связи и отзывов.
+
+        Записи выводятся постранично (новые первыми) с поиском по тексту.
+        """
+        window = tk.Toplevel(self.master)
+        window.title("Обратная связь")
+        window.geometry("800x500")
+        page_size = 50
+        state = {"offset": 0, "total": 0}
+
+        search_frame = tk.Frame(window)
+        search_frame.pack(fill="x", padx=10, pady=5)
+        tk.Label(search_frame, text="Поиск:").pack(side="left")
+        search_entry = tk.Entry(search_frame, width=40)
+        search_entry.pack(side="left", padx=5)
+
+        columns = ("ID", "Дата", "Пользователь", "Заказ", "Текст")
+        tree = ttk.Treeview(window, columns=columns, show="headings")
+        for column, width in zip(columns, (50, 120, 100, 60, 450)):
+            tree.heading(column, text=column)
+            tree.column(column, width=width, anchor="w")
+        tree.pack(fill="both", expand=True, padx=10, pady=5)
+
+        nav_frame = tk.Frame(window)
+        nav_frame.pack(pady=5)
+        page_label = tk.Label(nav_frame)
+
+        def load_page():
+            with SessionLocal() as db:
+                entries, state["total"] = search_feedback(
+                    db, search_entry.get().strip(), state["offset"], page_size
+                )
+            tree.delete(*tree.get_children())
+            for entry in entries:
+                tree.insert(
+                    "",
+                    tk.END,
+                    values=(
+                        entry.id,
+                        to_local_time(entry.created_at).strftime("%d.%m.%Y %H:%M"),
+                        entry.user_id,
+                        entry.order_id or "-",
+                        entry.text,
+                    ),
+                )
+            pages = max((state["total"] + page_size - 1) // page_size, 1)
+            page_label.config(
+                text=f"Страница {state['offset'] // page_size + 1} из {pages}"
+                f" (всего {state['total']})"
+            )
+
+        def search():
+            state["offset"] = 0
+            load_page()
+
+        def previous_page():
+            if state["offset"] > 0:
+                state["offset"] = max(state["offset"] - page_size, 0)
+                load_page()
+
+        def next_page():
+            if state["offset"] + page_size < state["total"]:
+                state["offset"] += page_size
+                load_page()
+
+        tk.Button(search_frame, text="Найти", command=search).pack(side="left")
+        search_entry.bind("<Return>", lambda event: search())
+        tk.Button(nav_frame, text="◀", command=previous_page).pack(side="left")
+        page_label.pack(side="left", padx=10)
+        tk.Button(nav_frame, text="▶", command=next_page).pack(side="left")
+        load_page()
+
+    def open_delivery_zones(self):
+        """
+        Открывает окно редактирования зон доставки.
+
+        Зона задаётся названием, кухней, стоимостью доставки, суммой бесплатной
+        доставки, приоритетом (для пересекающихся зон) и вершинами многоугольника
+        "широта, долгота" по одной в строке. Боты перестраивают индекс зон по версии.
+        """
+        window = tk.Toplevel(self.master)
+        window.title("Зоны доставки")
+        window.geometry("900x600")
+
+        columns = ("ID", "Название", "Кухня", "Доставка", "Бесплатно от", "Приоритет")
+        columns += ("Вершин", "Активна")
+        tree = ttk.Treeview(window, columns=columns, show="headings", height=10)
+        for column, width in zip(columns, (50, 180, 150, 80, 100, 80, 70, 70)):
+            tree.heading(column, text=column)
+            tree.column(column, width=width, anchor="center")
+        tree.pack(fill="both", expand=True, padx=10, pady=5)
+
+        form = tk.Frame(window)
+        form.pack(fill="x", padx=10, pady=5)
+        entries = {}
+        for index, (key, label, width) in enumerate(
+            (
+                ("name", "Название:", 25),
+                ("kitchen", "Кухня:", 20),
+                ("fee", "Доставка:", 8),
+                ("free_from", "Бесплатно от:", 8),
+                ("priority", "Приоритет:", 5),
+            )
+        ):
+            tk.Label(form, text=label).grid(row=index // 3, column=index % 3 * 2)
+            entries[key] = tk.Entry(form, width=width)
+            entries[key].grid(row=index // 3, column=index % 3 * 2 + 1, padx=5, pady=2)
+        active = tk.BooleanVar(value=True)
+        tk.Checkbutton(form, text="Активна", variable=active).grid(row=1, column=4)
+        tk.Label(window, text="Вершины (широта, долгота — по одной в строке):").pack(
+            anchor="w", padx=10
+        )
+        polygon_text = tk.Text(window, height=8)
+        polygon_text.pack(fill="x", padx=10, pady=5)
+
+        def load_zones():
+            tree.delete(*tree.get_children())
+            with SessionLocal() as db:
+                for zone in db.query(DeliveryZone).order_by(DeliveryZone.id):
+                    tree.insert(
+                        "",
+                        tk.END,
+                        values=(
+                            zone.id,
+                            zone.name,
+                            zone.kitchen,
+                            f"{zone.fee:.2f}",
+                            f"{zone.free_from:.2f}",
+                            zone.priority,
+                            len(zone.polygon or []),
+                            "да" if zone.active else "нет",
+                        ),
+                    )
+
+        def selected_id():
+            selected = tree.selection()
+            return tree.item(selected[0])["values"][0] if selected else None
+
+        def show_selected(event=None):
+            zone_id = selected_id()
+            if zone_id is None:
+                return
+            with SessionLocal() as db:
+                zone = db.get(DeliveryZone, zone_id)
+                values = {
+                    "name": zone.name,
+                    "kitchen": zone.kitchen,
+                    "fee": f"{zone.fee:g}",
+                    "free_from": f"{zone.free_from:g}",
+                    "priority": str(zone.priority),
+                }
+                polygon = format_polygon(zone.polygon)
+                active.set(zone.active)
+            for key, entry in entries.items():
+                entry.delete(0, tk.END)
+                entry.insert(0, values[key])
+            polygon_text.delete("1.0", tk.END)
+            polygon_text.insert("1.0", polygon)
+
+        def read_form():
+            name = entries["name"].get().strip()
+            if not name:
+                messagebox.showwarning(
+                    "Ошибка", "Введите название зоны!", parent=window
+                )
+                return None
+            try:
+                return {
+                    "name": name,
+                    "kitchen": entries["kitchen"].get().strip(),
+                    "fee": float(entries["fee"].get().strip() or 0),
+                    "free_from": float(entries["free_from"].get().strip() or 0),
+                    "priority": int(entries["priority"].get().strip() or 0),
+                    "active": active.get(),
+                    "polygon": parse_polygon(polygon_text.get("1.0", tk.END)),
+                }
+            except ValueError as e:
+                messagebox.showerror("Ошибка", str(e), parent=window)
+                return None
+
+        def save(zone_id=None, delete=False):
+            fields = None if delete else read_form()
+            if not delete and fields is None:
+                return
+            with SessionLocal() as db:
+                zone = db.get(DeliveryZone, zone_id) if zone_id else DeliveryZone()
+                if delete:
+                    db.delete(zone)
+                else:
+                    for key, value in fields.items():
+                        setattr(zone, key, value)
+                    db.add(zone)
+                bump_zones_version(db)
+                db.commit()
+            load_zones()
+
+        def update():
+            zone_id = selected_id()
+            if zone_id is None:
+                messagebox.showwarning("Ошибка", "Выберите зону!", parent=window)
+                return
+            save(zone_id)
+
+        def remove():
+            zone_id = selected_id()
+            if zone_id is None:
+                messagebox.showwarning("Ошибка", "Выберите зону!", parent=window)
+                return
+            if messagebox.askyesno("Удаление", "Удалить зону?", parent=window):
+                save(zone_id, delete=True)
+
+        buttons = tk.Frame(window)
+        buttons.pack(pady=5)
+        tk.Button(buttons, text="Добавить", command=save).pack(side="left", padx=5)
+        tk.Button(buttons, text="Обновить", command=update).pack(side="left", padx=5)
+        tk.Button(buttons, text="Удалить", command=remove).pack(side="left", padx=5)
+        tree.bind("<<TreeviewSelect>>", show_selected)
+        load_zones()
+
+    def open_promotions(self):
+        """
+        Открывает окно редактирования акций.
+
+        Скидка в процентах и цена за штуку действуют на перечисленные продукты (ID)
+        и категории (названия); без них скидка действует на весь каталог. Комбо-набор —
+        ID продуктов набора (с повторами) за указанную цену. Часы и дни недели задают
+        «счастливые часы». Боты перекомпилируют акции по версии.
+        """
+        window = tk.Toplevel(self.master)
+        window.title("Акции")
+        window.geometry("1000x550")
+
+        columns = ("ID", "Название", "Вид", "Значение", "Продукты", "Категории")
+        columns += ("Часы", "Дни", "Период", "Активна")
+        tree = ttk.Treeview(window, columns=columns, show="headings", height=12)
+        for column, width in zip(
+            columns, (40, 180, 130, 70, 120, 120, 60, 70, 150, 60)
+        ):
+            tree.heading(column, text=column)
+            tree.column(column, width=width, anchor="center")
+        tree.pack(fill="both", expand=True, padx=10, pady=5)
+
+        form = tk.Frame(window)
+        form.pack(fill="x", padx=10, pady=5)
+        entries = {}
+        fields = (
+            ("name", "Название:", 25),
+            ("value", "Значение:", 10),
+            ("products", "ID продуктов:", 25),
+            ("categories", "Категории:", 25),
+            ("hours", "Часы (12-16):", 10),
+            ("weekdays", "Дни (1-7):", 10),
+            ("valid_from", "С (ГГГГ-ММ-ДД):", 12),
+            ("valid_to", "По (ГГГГ-ММ-ДД):", 12),
+        )
+        for index, (key, label, width) in enumerate(fields):
+            tk.Label(form, text=label).grid(row=index // 4, column=index % 4 * 2)
+            entries[key] = tk.Entry(form, width=width)
+            entries[key].grid(row=index // 4, column=index % 4 * 2 + 1, padx=5, pady=2)
+        tk.Label(form, text="Вид:").grid(row=2, column=0)
+        kind_combobox = ttk.Combobox(
+            form, width=22, state="readonly", values=list(PROMOTION_KINDS)
+        )
+        kind_combobox.current(0)
+        kind_combobox.grid(row=2, column=1, padx=5, pady=2)
+        active = tk.BooleanVar(value=True)
+        tk.Checkbutton(form, text="Активна", variable=active).grid(row=2, column=2)
+        kind_labels = {kind: label for label, kind in PROMOTION_KINDS.items()}
+
+        def category_names(db):
+            return dict(db.query(ProductType.id, ProductType.name))
+
+        def load_promotions():
+            tree.delete(*tree.get_children())
+            with SessionLocal() as db:
+                names = category_names(db)
+                for promo in db.query(Promotion).order_by(Promotion.id):
+                    hours = (
+                        f"{promo.start_hour}-{promo.end_hour}"
+                        if promo.start_hour is not None
+                        else ""
+                    )
+                    period = " — ".join(
+                        str(day or "…") for day in (promo.valid_from, promo.valid_to)
+                    )
+                    tree.insert(
+                        "",
+                        tk.END,
+                        values=(
+                            promo.id,
+                            promo.name,
+                            kind_labels.get(promo.kind, promo.kind),
+                            f"{promo.value:g}",
+                            ", ".join(map(str, promo.product_ids or [])),
+                            ", ".join(
+                                names.get(c, str(c)) for c in promo.category_ids or []
+                            ),
+                            hours,
+                            promo.weekdays,
+                            period if promo.valid_from or promo.valid_to else "",
+                            "да" if promo.active else "нет",
+                        ),
+                    )
+
+        def selected_id():
+            selected = tree.selection()
+            return tree.item(selected[0])["values"][0] if selected else None
+
+        def show_selected(event=None):
+            promo_id = selected_id()
+            if promo_id is None:
+                return
+            with SessionLocal() as db:
+                promo = db.get(Promotion, promo_id)
+                names = category_names(db)
+                values = {
+                    "name": promo.name,
+                    "value": f"{promo.value:g}",
+                    "products": ", ".join(map(str, promo.product_ids or [])),
+                    "categories": ", ".join(
+                        names.get(c, str(c)) for c in promo.category_ids or []
+                    ),
+                    "hours": (
+                        f"{promo.start_hour}-{promo.end_hour}"
+                        if promo.start_hour is not None
+                        else ""
+                    ),
+                    "weekdays": promo.weekdays or "",
+                    "valid_from": str(promo.valid_from or ""),
+                    "valid_to": str(promo.valid_to or ""),
+                }
+                kind_combobox.set(kind_labels.get(promo.kind, ""))
+                active.set(promo.active)
+            for key, entry in entries.items():
+                entry.delete(0, tk.END)
+                entry.insert(0, values[key])
+
+        def read_form(db):
+            name = entries["name"].get().strip()
+            if not name:
+                raise ValueError("Введите название акции!")
+            try:
+                value = float(entries["value"].get().strip() or 0)
+            except ValueError:
+                raise ValueError("Значение должно быть числом!") from None
+            category_ids = []
+            ids_by_name = {name: id for id, name in category_names(db).items()}
+            for category in entries["categories"].get().split(","):
+                category = category.strip()
+                if not category:
+                    continue
+                if category not in ids_by_name:
+                    raise ValueError(f"Категория «{category}» не найдена!")
+                category_ids.append(ids_by_name[category])
+            start_hour, end_hour = parse_hours(entries["hours"].get())
+            dates = {}
+            for key in ("valid_from", "valid_to"):
+                text = entries[key].get().strip()
+                try:
+                    dates[key] = datetime.date.fromisoformat(text) if text else None
+                except ValueError:
+                    raise ValueError("Дата должна быть в формате ГГГГ-ММ-ДД!") from None
+            kind = PROMOTION_KINDS[kind_combobox.get()]
+            product_ids = parse_ids(entries["products"].get())
+            if kind == "combo" and not product_ids:
+                raise ValueError("Укажите ID продуктов комбо-набора!")
+            return {
+                "name": name,
+                "kind": kind,
+                "value": value,
+                "product_ids": product_ids,
+                "category_ids": category_ids,
+                "start_hour": start_hour,
+                "end_hour": end_hour,
+                "weekdays": "".join(
+                    sorted(set(c for c in entries["weekdays"].get() if c in "1234567"))
+                ),
+                "active": active.get(),
+                **dates,
+            }
+
+        def save(promo_id=None, delete=False):
+            with SessionLocal() as db:
+                promo = db.get(Promotion, promo_id) if promo_id else Promotion()
+                if delete:
+                    db.delete(promo)
+                else:
+                    try:
+                        fields = read_form(db)
+                    except ValueError as e:
+                        messagebox.showerror("Ошибка", str(e), parent=window)
+                        return
+                    for key, value in fields.items():
+                        setattr(promo, key, value)
+                    db.add(promo)
+                bump_promotions_version(db)
+                db.commit()
+            load_promotions()
+
+        def update():
+            promo_id = selected_id()
+            if promo_id is None:
+                messagebox.showwarning("Ошибка", "Выберите акцию!", parent=window)
+                return
+            save(promo_id)
+
+        def remove():
+            promo_id = selected_id()
+            if promo_id is None:
+                messagebox.showwarning("Ошибка", "Выберите акцию!", parent=window)
+                return
+            if messagebox.askyesno("Удаление", "Удалить акцию?", parent=window):
+                save(promo_id, delete=True)
+
+        buttons = tk.Frame(window)
+        buttons.pack(pady=5)
+        tk.Button(buttons, text="Добавить", command=save).pack(side="left", padx=5)
+        tk.Button(buttons, text="Обновить", command=update).pack(side="left", padx=5)
+        tk.Button(buttons, text="Удалить", command=remove).pack(side="left", padx=5)
+        tree.bind("<<TreeviewSelect>>", show_selected)
+        load_promotions()
+
+    def open_live_orders(self):
+        """
+        Открывает окно живой ленты заказов.
+
+        Новые заказы добавляются в начало таблицы по мере оформления, счётчики
+        (заказов в минуту, заказов и выручка за сегодня, ожидают оплаты) обновляются
+        вместе с ними. Опрос базы идёт в фоновом потоке и приостанавливается,
+        пока окно свёрнуто.
+        """
+        window = tk.Toplevel(self.master)
+        window.title("Заказы онлайн")
+        window.geometry("900x600")
+        poller = LiveOrdersPoller()
+
+        stats_label = tk.Label(window, anchor="w", font=("TkDefaultFont", 11, "bold"))
+        stats_label.pack(fill="x", padx=10, pady=5)
+
+        columns = ("Заказ", "Время", "Пользователь", "Позиций", "Сумма", "Кухня")
+        columns += ("Оплата",)
+        tree = ttk.Treeview(window, columns=columns, show="headings")
+        for column, width in zip(columns, (70, 140, 110, 70, 100, 150, 90)):
+            tree.heading(column, text=column)
+            tree.column(column, width=width, anchor="center")
+        tree.pack(fill="both", expand=True, padx=10, pady=5)
+
+        def apply_updates():
+            if not window.winfo_exists():
+                return
+            for update in poller.drain():
+                for order in update.orders:
+                    tree.insert(
+                        "",
+                        0,
+                        iid=str(order.id),
+                        values=(
+                            order.id,
+                            to_local_time(order.created_at).strftime("%d.%m %H:%M:%S"),
+                            order.user_id,
+                            order.units,
+                            f"{order.total:.2f}",
+                            order.kitchen or "-",
+                            "оплачен" if order.paid else "ожидает",
+                        ),
+                    )
+                for order_id in update.resolved:
+                    if tree.exists(str(order_id)):
+                        tree.set(str(order_id), "Оплата", "оплачен")
+                # Таблица хранит только последние LIVE_ORDERS_MAX_ROWS заказов
+                extra = tree.get_children()[LIVE_ORDERS_MAX_ROWS:]
+                if extra:
+                    tree.delete(*extra)
+                stats = update.stats
+                stats_label.config(
+                    text=f"Заказов в минуту: {stats.orders_per_minute:.1f}   "
+                    f"Сегодня: {stats.orders_today} на {stats.revenue_today:.2f}₽   "
+                    f"Ожидают оплаты: {stats.pending}"
+                )
+            window.after(200, apply_updates)
+
+        def on_visibility(event):
+            # События дочерних виджетов тоже доходят до окна — реагируем только на само окно
+            if event.widget is not window:
+                return
+            if event.type == tk.EventType.Unmap:
+                poller.pause()
+            else:
+                poller.resume()
+
+        def close():
+            poller.stop()
+            window.destroy()
+
+        window.bind("<Map>", on_visibility)
+        window.bind("<Unmap>", on_visibility)
+        window.protocol("WM_DELETE_WINDOW", close)
+        poller.start()
+        apply_updates()
+
+    def open_staff_chats(self):
+        """
+        Открывает окно подписок чатов персонала на новые заказы.
+
+        Чат получает сводки заказов ресторана: всех, только кухни или только
+        с продуктами категории. ID чата бот сообщает по команде /chatid.
+        Подписки хранятся в основной базе вместе с кодом ресторана.
+        """
+        window = tk.Toplevel(self.master)
+        window.title("Уведомления персонала")
+        window.geometry("700x450")
+        tenant = current_tenant() or ""
+        staff_session = get_session_factory(None)
+
+        columns = ("ID", "Чат", "Название", "Кухня", "Категория")
+        tree = ttk.Treeview(window, columns=columns, show="headings", height=12)
+        for column, width in zip(columns, (50, 140, 180, 140, 140)):
+            tree.heading(column, text=column)
+            tree.column(column, width=width, anchor="center")
+        tree.pack(fill="both", expand=True, padx=10, pady=5)
+
+        form = tk.Frame(window)
+        form.pack(fill="x", padx=10, pady=5)
+        entries = {}
+        for index, (key, label, width) in enumerate(
+            (
+                ("chat_id", "ID чата:", 16),
+                ("title", "Название:", 20),
+                ("kitchen", "Кухня:", 16),
+            )
+        ):
+            tk.Label(form, text=label).grid(row=0, column=index * 2)
+            entries[key] = tk.Entry(form, width=width)
+            entries[key].grid(row=0, column=index * 2 + 1, padx=5, pady=2)
+        with SessionLocal() as db:
+            categories = dict(db.query(ProductType.name, ProductType.id))
+        tk.Label(form, text="Категория:").grid(row=1, column=0)
+        category_combobox = ttk.Combobox(
+            form, width=18, state="readonly", values=["Все", *categories]
+        )
+        category_combobox.current(0)
+        category_combobox.grid(row=1, column=1, padx=5, pady=2)
+        category_names = {category_id: name for name, category_id in categories.items()}
+
+        def load_subscriptions():
+            tree.delete(*tree.get_children())
+            with staff_session() as db:
+                for subscription in (
+                    db.query(StaffSubscription)
+                    .filter(StaffSubscription.tenant == tenant)
+                    .order_by(StaffSubscription.id)
+                ):
+                    tree.insert(
+                        "",
+                        tk.END,
+                        values=(
+                            subscription.id,
+                            subscription.chat_id,
+                            subscription.title,
+                            subscription.kitchen or "все",
+                            category_names.get(subscription.category_id, "все"),
+                        ),
+                    )
+
+        def add():
+            try:
+                chat_id = int(entries["chat_id"].get().strip())
+            except ValueError:
+                messagebox.showerror(
+                    "Ошибка", "ID чата должен быть числом!", parent=window
+                )
+                return
+            with staff_session() as db:
+                db.add(
+                    StaffSubscription(
+                        chat_id=chat_id,
+                        tenant=tenant,
+                        title=entries["title"].get().strip(),
+                        kitchen=entries["kitchen"].get().strip(),
+                        category_id=categories.get(category_combobox.get()),
+                    )
+                )
+                db.commit()
+            for entry in entries.values():
+                entry.delete(0, tk.END)
+            load_subscriptions()
+
+        def remove():
+            selected = tree.selection()
+            if not selected:
+                messagebox.showwarning("Ошибка", "Выберите подписку!", parent=window)
+                return
+            subscription_id = tree.item(selected[0])["values"][0]
+            if messagebox.askyesno("Удаление", "Удалить подписку?", parent=window):
+                with staff_session() as db:
+                    db.query(StaffSubscription).filter(
+                        StaffSubscription.id == subscription_id
+                    ).delete()
+                    db.commit()
+                load_subscriptions()
+
+        buttons = tk.Frame(window)
+        buttons.pack(pady=5)
+        tk.Button(buttons, text="Добавить", command=add).pack(side="left", padx=5)
+        tk.Button(buttons, text="Удалить", command=remove).pack(side="left", padx=5)
+        load_subscriptions()
+
     def load_types(self):
         """Загружает все доступные типы продуктов из базы данных и отображает их в списке и комбобоксе."""
         db = SessionLocal()
@@ -225,7 +1055,9 @@ class AdminPanel:
         db = SessionLocal()
         new_type = ProductType(name=type_name)
         db.add(new_type)
+        bump_catalog_version(db)
         db.commit()
+        self.publish_snapshot(db)
         db.close()
 
         self.new_type_entry.delete(0, tk.END)
@@ -259,7 +1091,12 @@ class AdminPanel:
         new_product = Product(name=name, cost=cost, product_type=product_type.id)
 
         db.add(new_product)
+        if self.product_image_path:
+            db.flush()  # нужен id продукта для имени файла
+            store_product_image(new_product, self.product_image_path)
+        bump_catalog_version(db)
         db.commit()
+        self.publish_snapshot(db)
         db.close()
 
         self.clear_fields()
@@ -305,8 +1142,12 @@ class AdminPanel:
             product.name = name
             product.cost = cost
             product.product_type = product_type.id
+            if self.product_image_path:
+                store_product_image(product, self.product_image_path)
+            bump_catalog_version(db)
 
             db.commit()
+            self.publish_snapshot(db)
             self.load_products()
             messagebox.showinfo("Успех", "Продукт обновлен!")
             self.clear_fields()  # ← Добавляем очистку полей здесь!
@@ -317,14 +1158,41 @@ class AdminPanel:
         finally:
             db.close()
 
+    def publish_snapshot(self, db):
+        """Перезаписывает снимок каталога, который читают процессы бота."""
+        try:
+            write_snapshot(db, get_catalog_version(db))
+        except OSError as e:
+            # Боты перезапишут отставший снимок сами при очередной сверке версии
+            messagebox.showwarning("Снимок каталога", f"Не удалось записать: {e}")
+
     def clear_fields(self):
         """Очищает поля ввода для добавления и обновления продуктов."""
         self.product_name_entry.delete(0, tk.END)
         self.product_cost_entry.delete(0, tk.END)
         self.product_type_combobox.set("")
+        self.product_image_path = ""
+        self.product_image_label.config(text="не выбрано")
 
 
 if __name__ == "__main__":
-    main_window = tk.Tk()  # Переименовали для ясности
-    app = AdminPanel(main_window)
-    main_window.mainloop()
+    parser = argparse.ArgumentParser(description="Панель администратора TeleFood")
+    parser.add_argument(
+        "--tenant", default=None, help="код ресторана (по умолчанию основная база)"
+    )
+    args = parser.parse_args()
+    if args.tenant:
+        from database import init_db
+        from tenancy import TenantRegistry
+
+        init_db()
+        if args.tenant not in TenantRegistry().tenants():
+            parser.error(f"Ресторан {args.tenant} не зарегистрирован")
+
+    # Все сессии главного потока работают с базой выбранного ресторана
+    with use_tenant(args.tenant):
+        main_window = tk.Tk()  # Переименовали для ясности
+        app = AdminPanel(main_window)
+        if args.tenant:
+            main_window.title(f"Управление продуктами и типами — {args.tenant}")
+        main_window.mainloop()
@@ -0,0 +1,222 @@
+"""
+Архивирование старых заказов TeleFood.
+
+Оперативная таблица orders хранит только свежие заказы; заказы старше
+ARCHIVE_AFTER_DAYS дней переносятся в таблицу orders_archive той же базы.
+Перенос идёт пачками: каждая пачка (INSERT ... SELECT и DELETE) — отдельная
+короткая транзакция, поэтому запись бота не ждёт окончания всей архивации.
+В боте архивация выполняется фоновым потоком (OrderArchiver) раз в ARCHIVE_INTERVAL
+секунд; её можно запустить и вручную:
+
+    python archive.py --days 180
+    python archive.py --days 365 --all-tenants
+
+История заказов пользователя читает архив, только когда страницы оперативной
+таблицы закончились (services.get_orders_by_user). Пересчёты по всей истории
+(отчёты, рекомендации, прогноз) читают обе таблицы через order_batches.
+"""
+
+import argparse
+import datetime
+import logging
+import threading
+import time
+from typing import Callable, Iterable, Iterator, List, Optional
+
+from sqlalchemy import delete, insert, literal, or_, select
+from sqlalchemy.orm import Session
+from sqlalchemy.types import DateTime
+
+from config import ARCHIVE_AFTER_DAYS, ARCHIVE_BATCH_SIZE, ARCHIVE_INTERVAL
+from database import use_tenant, writes
+from models import ArchivedOrder, Order
+
+logger = logging.getLogger("TeleFoodBot")
+
+# Пауза между пачками, чтобы запись бота успевала между транзакциями архивации
+ARCHIVE_PAUSE = 0.05
+
+
+def archive_cutoff(days: int = ARCHIVE_AFTER_DAYS) -> datetime.datetime:
+    """Получить границу архивации: заказы, оформленные раньше, уходят в архив (UTC)."""
+    return datetime.datetime.utcnow() - datetime.timedelta(days=days)
+
+
+@writes
+def archive_orders(
+    db: Session,
+    cutoff: datetime.datetime,
+    batch_size: int = ARCHIVE_BATCH_SIZE,
+    pause: float = 0.0,
+    stop_event: Optional[threading.Event] = None,
+) -> int:
+    """Перенести заказы, оформленные до cutoff, в архив.
+
+    Заказы без времени оформления (созданные до появления created_at) старше любых
+    других и тоже переносятся.
+    :param db: SQLAlchemy сессия
+    :param cutoff: граница по времени оформления (UTC)
+    :param batch_size: количество заказов в одной транзакции
+    :param pause: пауза между пачками в секундах
+    :param stop_event: событие досрочной остановки между пачками
+    :return: количество перенесённых заказов
+    """
+    columns = [column.name for column in Order.__table__.columns]
+    source = [Order.__table__.c[name] for name in columns]
+    moved = 0
+    while stop_event is None or not stop_event.is_set():
+        # Старые заказы имеют наименьшие id, поэтому поиск по id быстро находит пачку
+        ids = [
+            order_id
+            for (order_id,) in db.query(Order.id)
+            .filter(or_(Order.created_at < cutoff, Order.created_at.is_(None)))
+            .order_by(Order.id)
+            .limit(batch_size)
+        ]
+        if not ids:
+            break
+        now = literal(datetime.datetime.utcnow(), DateTime)
+        db.execute(
+            insert(ArchivedOrder).from_select(
+                columns + ["archived_at"],
+                select(*source, now).where(Order.id.in_(ids)),
+            )
+        )
+        db.execute(
+            delete(Order).where(Order.id.in_(ids)),
+            execution_options={"synchronize_session": False},
+        )
+        db.commit()
+        moved += len(ids)
+        if pause:
+            time.sleep(pause)
+    return moved
+
+
+def order_batches(
+    db: Session,
+    columns: Iterable[str],
+    after_id: int = 0,
+    batch_size: int = ARCHIVE_BATCH_SIZE,
+) -> Iterator[List[tuple]]:
+    """Читать заказы архива, затем оперативной таблицы пачками по возрастанию id.
+
+    :param db: SQLAlchemy сессия
+    :param columns: имена столбцов; первым должен быть "id"
+    :param after_id: читать только заказы с id больше этого
+    :param batch_size: количество заказов в одной пачке
+    :return: итератор пачек кортежей значений столбцов
+    """
+    columns = list(columns)
+    for model in (ArchivedOrder, Order):
+        fields = [getattr(model, name) for name in columns]
+        last_id = after_id
+        while True:
+            batch = (
+                db.query(*fields)
+                .filter(model.id > last_id)
+                .order_by(model.id)
+                .limit(batch_size)
+                .all()
+            )
+            if not batch:
+                break
+            yield batch
+            last_id = batch[-1][0]
+
+
+class OrderArchiver:
+    """
+    Фоновая периодическая архивация заказов во всех базах ресторанов.
+    """
+
+    def __init__(
+        self,
+        session_factory,
+        tenants: Callable[[], Iterable[Optional[str]]] = lambda: [None],
+        after_days: int = ARCHIVE_AFTER_DAYS,
+        interval: float = ARCHIVE_INTERVAL,
+        batch_size: int = ARCHIVE_BATCH_SIZE,
+    ):
+        self.session_factory = session_factory
+        self.tenants = tenants
+        self.after_days = after_days
+        self.interval = interval
+        self.batch_size = batch_size
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def run_once(self) -> int:
+        """Архивировать старые заказы во всех базах.
+
+        :return: количество перенесённых заказов
+        """
+        cutoff = archive_cutoff(self.after_days)
+        moved = 0
+        for slug in self.tenants():
+            if self._stop_event.is_set():
+                break
+            try:
+                with use_tenant(slug), self.session_factory() as db:
+                    moved += archive_orders(
+                        db, cutoff, self.batch_size, ARCHIVE_PAUSE, self._stop_event
+                    )
+            except Exception as e:
+                logger.error(f"Order archiving error for {slug or 'main'}: {str(e)}")
+        if moved:
+            logger.info(f"Archived {moved} orders older than {cutoff:%Y-%m-%d}")
+        return moved
+
+    def start(self):
+        """Запустить фоновый поток архивации (ничего не делает при interval <= 0)."""
+        if self.interval <= 0:
+            return
+
+        def worker():
+            while not self._stop_event.wait(self.interval):
+                self.run_once()
+
+        self._thread = threading.Thread(
+            target=worker, name="order-archiver", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        """Остановить фоновый поток после текущей пачки."""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+
+if __name__ == "__main__":
+    from database import SessionLocal, init_db
+    from tenancy import TenantRegistry
+
+    parser = argparse.ArgumentParser(description="Архивирование заказов TeleFood")
+    parser.add_argument(
+        "--days",
+        type=int,
+        default=ARCHIVE_AFTER_DAYS,
+        help="архивировать заказы старше DAYS дней",
+    )
+    parser.add_argument("--batch-size", type=int, default=ARCHIVE_BATCH_SIZE)
+    parser.add_argument(
+        "--all-tenants", action="store_true", help="также базы всех ресторанов"
+    )
+    args = parser.parse_args()
+
+    init_db()
+    tenant_slugs = [None]
+    if args.all_tenants:
+        tenant_slugs += list(TenantRegistry().tenants())
+    archiver = OrderArchiver(
+        SessionLocal,
+        tenants=lambda: tenant_slugs,
+        after_days=args.days,
+        batch_size=args.batch_size,
+    )
+    started = time.perf_counter()
+    total = archiver.run_once()
+    print(
+        f"Перенесено в архив: {total} заказов за {time.perf_counter() - started:.1f} с"
+    )
@@ -0,0 +1,98 @@
+"""
+Замер размера и стоимости обновления содержимого корзины TeleFood.
+
+Для корзин разного размера сравнивает исходный формат {"products": [...]}
+и компактный {"items": {...}}: размер сериализованного JSON в байтах и время
+одного добавления продукта (новое содержимое + сериализация) со стандартным json
+и с orjson, а также полное обновление корзины через SQLAlchemy в SQLite в памяти.
+
+    python bench_content.py --units 5 20 100 --distinct 8
+"""
+
+import argparse
+import random
+import time
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+import content_codec
+from bench_recommendations import measure
+from content_codec import add_product, dumps, encode_counts, loads
+from models import Base, Cart, User
+from services import add_product_to_cart
+
+FORMATS = (("list", False), ("compact", True))
+
+
+def synthetic_cart(units: int, distinct: int, seed: int = 42) -> dict:
+    """Сгенерировать количества: units единиц из distinct продуктов каталога."""
+    rng = random.Random(seed)
+    counts = {}
+    for _ in range(units):
+        pid = rng.randint(1, distinct) * 17
+        counts[pid] = counts.get(pid, 0) + 1
+    return counts
+
+
+def codecs():
+    """Доступные сериализаторы: (название, модуль orjson или None)."""
+    available = [("json", None)]
+    if content_codec.orjson is not None:
+        available.append(("orjson", content_codec.orjson))
+    return available
+
+
+def bench_update(counts: dict, compact: bool, repeat: int) -> float:
+    """Среднее время добавления продукта и сериализации корзины, мкс."""
+    content = encode_counts(counts, compact)
+    pid = next(iter(counts))
+    started = time.perf_counter()
+    for _ in range(repeat):
+        dumps(add_product(content, pid))
+    return (time.perf_counter() - started) / repeat * 1e6
+
+
+def bench_orm(counts: dict, repeat: int):
+    """Полное обновление корзины через SQLAlchemy (add_product_to_cart + commit)."""
+    engine = create_engine(
+        "sqlite:///:memory:", json_serializer=dumps, json_deserializer=loads
+    )
+    Base.metadata.create_all(engine)
+    with sessionmaker(bind=engine)() as db:
+        db.add(User(id=1, name="Bench"))
+        db.add(Cart(user_id=1, content=encode_counts(counts)))
+        db.commit()
+        pid = next(iter(counts))
+        measure(
+            f"  ORM: добавление в корзину ({content_codec.CART_CONTENT_FORMAT})",
+            lambda: add_product_to_cart(db, 1, pid),
+            repeat=repeat,
+        )
+    engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Бенчмарк содержимого корзины")
+    parser.add_argument("--units", type=int, nargs="+", default=[5, 20, 100])
+    parser.add_argument("--distinct", type=int, default=8)
+    parser.add_argument("--repeat", type=int, default=20000)
+    args = parser.parse_args()
+
+    installed_orjson = content_codec.orjson
+    for units in args.units:
+        counts = synthetic_cart(units, args.distinct)
+        print(f"Корзина: {units} шт., {len(counts)} разных продуктов")
+        for name, compact in FORMATS:
+            size = len(dumps(encode_counts(counts, compact)).encode())
+            timings = []
+            for codec, module in codecs():
+                content_codec.orjson = module
+                timings.append(
+                    f"{codec} {bench_update(counts, compact, args.repeat):6.2f} мкс"
+                )
+            content_codec.orjson = installed_orjson
+            print(f"  {name:<8} {size:6d} байт   " + "   ".join(timings))
+        for name, _ in FORMATS:
+            content_codec.CART_CONTENT_FORMAT = name
+            bench_orm(counts, args.repeat // 10)
@@ -0,0 +1,134 @@
+"""
+Замер расчёта корзины TeleFood по акциям.
+
+Генерирует каталог и набор действующих акций (скидки в процентах и фиксированные
+цены на продукты и категории, «счастливые часы», комбо-наборы), затем для корзин
+разного размера сравнивает время расчёта скомпилированными правилами
+(PromotionRules.evaluate) и перебором всех акций на каждую позицию корзины.
+
+    python bench_promotions.py --rules 1000 --products 2000 --lines 3 10 50
+"""
+
+import argparse
+import datetime
+import random
+
+from bench_recommendations import measure
+from models import Promotion
+from promotions import PromotionRules, window_of
+
+# Понедельник, 13:30 — «счастливые часы» действуют
+MOMENT = datetime.datetime(2026, 3, 2, 13, 30)
+
+
+def synthetic_catalog(products: int, categories: int, seed: int = 42) -> dict:
+    """Каталог {id продукта: (цена, id категории)}."""
+    rng = random.Random(seed)
+    return {
+        pid: (float(rng.randrange(100, 1500, 10)), rng.randint(1, categories))
+        for pid in range(1, products + 1)
+    }
+
+
+def synthetic_promotions(count: int, catalog: dict, categories: int, seed: int = 42):
+    """Акции: 60% на продукты, 20% на категории, 10% фиксированные цены, 10% комбо."""
+    rng = random.Random(seed)
+    pids = list(catalog)
+    promotions = []
+    for promo_id in range(1, count + 1):
+        share = promo_id % 10
+        fields = {"id": promo_id, "name": f"Promo{promo_id}", "kind": "percent"}
+        if share < 6:
+            fields.update(value=rng.randint(5, 30), product_ids=rng.sample(pids, 3))
+        elif share < 8:
+            fields.update(
+                value=rng.randint(5, 15), category_ids=[rng.randint(1, categories)]
+            )
+        elif share < 9:
+            pid = rng.choice(pids)
+            fields.update(
+                kind="price",
+                value=catalog[pid][0] * 0.7,
+                product_ids=[pid],
+                start_hour=12,
+                end_hour=16,
+                weekdays="12345",
+            )
+        else:
+            components = rng.sample(pids, rng.randint(2, 3))
+            base = sum(catalog[pid][0] for pid in components)
+            fields.update(kind="combo", value=base * 0.8, product_ids=components)
+        promotions.append(Promotion(**fields))
+    return promotions
+
+
+def synthetic_cart(lines: int, catalog: dict, seed: int = 42) -> dict:
+    """Корзина из lines разных продуктов по 1–3 штуки."""
+    rng = random.Random(seed)
+    return {pid: rng.randint(1, 3) for pid in rng.sample(list(catalog), lines)}
+
+
+def naive_rules(promotions) -> list:
+    """Акции для перебора: (продукты, категории, акция, время действия), без комбо."""
+    return [
+        (set(p.product_ids or ()), set(p.category_ids or ()), p, window_of(p))
+        for p in promotions
+        if p.kind != "combo"
+    ]
+
+
+def naive_evaluate(rules: list, counts: dict, catalog: dict, moment) -> float:
+    """Скидка перебором: для каждой позиции проверяются все акции."""
+    discount = 0.0
+    for pid, qty in counts.items():
+        price, category = catalog[pid]
+        best = 0.0
+        for products, categories, promotion, window in rules:
+            if products or categories:
+                if pid not in products and category not in categories:
+                    continue
+            if promotion.kind == "percent":
+                unit = price * promotion.value / 100
+            else:
+                unit = max(price - promotion.value, 0.0)
+            if unit > best and window.active(moment):
+                best = unit
+        discount += best * qty
+    return discount
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Бенчмарк расчёта акций")
+    parser.add_argument("--rules", type=int, default=1000)
+    parser.add_argument("--products", type=int, default=2000)
+    parser.add_argument("--categories", type=int, default=40)
+    parser.add_argument("--lines", type=int, nargs="+", default=[3, 10, 50])
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args()
+
+    catalog = synthetic_catalog(args.products, args.categories)
+    promotions = synthetic_promotions(args.rules, catalog, args.categories)
+    rules = measure(
+        f"Компиляция {args.rules} акций", lambda: PromotionRules(promotions), repeat=10
+    )
+    singles = PromotionRules(p for p in promotions if p.kind != "combo")
+    scan = naive_rules(promotions)
+    for lines in args.lines:
+        counts = synthetic_cart(lines, catalog)
+        print(f"Корзина: {lines} позиций, {sum(counts.values())} шт.")
+        measure(
+            "  правила с комбо",
+            lambda: rules.evaluate(counts, catalog, MOMENT),
+            repeat=args.repeat,
+        )
+        indexed = measure(
+            "  правила без комбо",
+            lambda: singles.evaluate(counts, catalog, MOMENT),
+            repeat=args.repeat,
+        )
+        naive = measure(
+            "  перебор всех акций (без комбо)",
+            lambda: naive_evaluate(scan, counts, catalog, MOMENT),
+            repeat=max(args.repeat // 20, 1),
+        )
+        assert abs(indexed.discount - min(round(naive, 2), indexed.subtotal)) < 0.05
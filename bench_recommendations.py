@@ -0,0 +1,71 @@
+"""
+Замер производительности модели рекомендаций TeleFood на синтетической истории.
+
+Генерирует историю заказов (по умолчанию миллион) с неравномерной популярностью
+продуктов и измеряет полное построение матрицы совместных покупок, инкрементальное
+обновление при оформлении заказа и подбор рекомендаций к корзине. База данных
+не используется.
+
+    python bench_recommendations.py --orders 1000000 --products 300
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from recommendations import CooccurrenceModel
+
+
+def synthetic_baskets(orders: int, products: int, seed: int = 42):
+    """Сгенерировать корзины: 1–6 позиций, популярность продуктов по закону Ципфа."""
+    rng = np.random.default_rng(seed)
+    weights = 1.0 / np.arange(1, products + 1)
+    weights /= weights.sum()
+    sizes = rng.integers(1, 7, size=orders)
+    items = rng.choice(products, size=int(sizes.sum()), p=weights) + 1
+    bounds = np.cumsum(sizes)[:-1]
+    return [basket.tolist() for basket in np.split(items, bounds)]
+
+
+def measure(label: str, func, repeat: int = 1):
+    """Выполнить func repeat раз и напечатать среднее время."""
+    started = time.perf_counter()
+    for _ in range(repeat):
+        result = func()
+    elapsed = (time.perf_counter() - started) / repeat
+    unit, value = ("мкс", elapsed * 1e6) if elapsed < 1e-3 else ("с", elapsed)
+    print(f"{label:<40} {value:10.2f} {unit}")
+    return result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Бенчмарк модели рекомендаций")
+    parser.add_argument("--orders", type=int, default=1_000_000)
+    parser.add_argument("--products", type=int, default=300)
+    parser.add_argument("--batch-size", type=int, default=50_000)
+    args = parser.parse_args()
+
+    baskets = measure(
+        f"Генерация {args.orders} заказов",
+        lambda: synthetic_baskets(args.orders, args.products),
+    )
+
+    def build():
+        model = CooccurrenceModel(range(1, args.products + 1))
+        for start in range(0, len(baskets), args.batch_size):
+            model.add_baskets(baskets[start : start + args.batch_size])
+        return model
+
+    model = measure("Полное построение матрицы", build)
+    print(f"Хранение: {'плотное' if model.dense else 'разреженное'}")
+
+    recent = baskets[:1000]
+    counter = iter(range(len(recent)))
+    measure(
+        "Инкрементальное обновление (1 заказ)",
+        lambda: model.add_order(args.orders + 1, recent[next(counter)]),
+        repeat=len(recent),
+    )
+    cart = baskets[1]
+    measure("Рекомендации к корзине", lambda: model.recommend(cart), repeat=10000)
@@ -5,18 +5,68 @@
 и запускает цикл опроса бота для обработки входящих сообщений и callback-запросов.
 """
 
+import datetime
 import logging
+import threading
 
-import telebot
 from telebot import types
 
-from config import API_TOKEN, MENU
-from database import SessionLocal
+from archive import OrderArchiver
+from config import (
+    API_TOKEN,
+    BOT_WORKERS,
+    CART_COMPACT_AFTER_DAYS,
+    CART_COMPACT_INTERVAL,
+    CATALOG_REFRESH_INTERVAL,
+    DEDUP_CACHE_SIZE,
+    DEDUP_TTL,
+    FAST_START,
+    FLOOD_LIMITS,
+    FLOOD_TRACKED_USERS,
+    MENU,
+    METRICS_LOG_INTERVAL,
+    RECOMMENDATIONS_PATH,
+    SHUTDOWN_DRAIN_TIMEOUT,
+    TELEGRAM_BREAKER_RECOVERY,
+    TELEGRAM_BREAKER_THRESHOLD,
+    TELEGRAM_CONNECT_TIMEOUT,
+    TELEGRAM_MAX_RETRIES,
+    TELEGRAM_POOL_SIZE,
+    TELEGRAM_READ_TIMEOUT,
+)
+from database import (
+    SessionLocal,
+    dispose_engines,
+    get_session_factory,
+    init_db,
+    use_tenant,
+    warm_engines,
+)
+from delivery import DeliveryZones
+from dispatch import (
+    DispatchTeleBot,
+    DuplicateUpdateFilter,
+    FloodControlFilter,
+    parse_limits,
+)
+from feedback_store import FeedbackBuffer
 from handlers.cart_handler import CartHandler
 from handlers.feedback_handler import FeedbackHandler
+from handlers.inline_handler import InlineHandler
 from handlers.menu_handler import MenuHandler
 from handlers.order_handler import OrderHandler
-from services import create_user_if_not_exists
+from handlers.staff_handler import StaffHandler
+from handlers.tenant_handler import TenantHandler
+from metrics import MetricsReporter
+from notifications import PAID_CALLBACK, StaffNotifier
+from polling import UpdatePoller
+from promotions import Promotions
+from scheduler import Scheduler
+from search_index import TenantCatalogSearch
+from services import compact_empty_carts, create_user_if_not_exists
+from startup import StartupProfile
+from tenancy import TenantRegistry
+from transport import BotTransport
 
 # Configure logging
 logging.basicConfig(
@@ -36,28 +86,210 @@ class TeleFoodBot:
     и регистрацию хендлеров для обработки входящих сообщений и callback-запросов от пользователей.
     """
 
-    def __init__(self, token):
+    def __init__(self, token, profile=None):
         """
         Инициализирует бот с указанным токеном и настраивает обработчики.
 
         Args:
             token (str): Токен API Telegram бота.
+            profile (StartupProfile): Профиль запуска для замеров фаз (необязательно).
         """
-        self.bot = telebot.TeleBot(token)
+        self.profile = profile or StartupProfile()
+        with self.profile.phase("transport"):
+            self.transport = BotTransport(
+                pool_size=TELEGRAM_POOL_SIZE,
+                connect_timeout=TELEGRAM_CONNECT_TIMEOUT,
+                read_timeout=TELEGRAM_READ_TIMEOUT,
+                max_retries=TELEGRAM_MAX_RETRIES,
+                failure_threshold=TELEGRAM_BREAKER_THRESHOLD,
+                recovery_time=TELEGRAM_BREAKER_RECOVERY,
+            )
+            self.transport.install()
+            # Обработчики выполняет пул UpdatePoller, а не внутренний пул telebot
+            self.bot = DispatchTeleBot(token, threaded=False)
+            self.duplicate_filter = DuplicateUpdateFilter(DEDUP_CACHE_SIZE, DEDUP_TTL)
+            self.bot.add_update_filter(self.duplicate_filter)
+            self.flood_filter = FloodControlFilter(
+                self.bot, parse_limits(FLOOD_LIMITS), FLOOD_TRACKED_USERS
+            )
+            self.bot.add_update_filter(self.flood_filter)
+            # Каждое обновление обрабатывается в базе ресторана пользователя
+            self.tenant_registry = TenantRegistry()
+            self.bot.update_context = self.tenant_registry.update_context
         self.user_states = {}
         self.main_menu = types.ReplyKeyboardMarkup(resize_keyboard=True)
         self.main_menu.add(MENU["menu"], MENU["cart"])
         self.main_menu.add(MENU["orders"])
-        # Handlers
-        self.menu_handler = MenuHandler(self.bot)
-        self.cart_handler = CartHandler(self.bot, self.main_menu)
-        self.order_handler = OrderHandler(self.bot, self.main_menu)
-        self.feedback_handler = FeedbackHandler(
-            self.bot, self.main_menu, self.user_states
+        # Отложенные задания всех ресторанов хранятся в основной базе
+        self.scheduler = Scheduler(get_session_factory(None))
+        # Модель рекомендаций загружается при прогреве; до этого подсказок нет
+        self.recommender = None
+        # Сводки новых заказов для чатов персонала
+        self.staff_notifier = StaffNotifier(self.bot)
+        self.staff_notifier.start()
+        with self.profile.phase("handlers"):
+            self.menu_handler = MenuHandler(self.bot)
+            self.cart_handler = CartHandler(
+                self.bot,
+                self.main_menu,
+                self.recommender,
+                self.scheduler,
+                DeliveryZones(),
+                Promotions(),
+                self.staff_notifier,
+            )
+            self.staff_handler = StaffHandler(self.bot, self.staff_notifier)
+            self.order_handler = OrderHandler(self.bot, self.main_menu)
+            self.tenant_handler = TenantHandler(
+                self.bot, self.main_menu, self.tenant_registry
+            )
+            self.feedback_buffer = FeedbackBuffer(SessionLocal)
+            self.feedback_buffer.start()
+            self.feedback_handler = FeedbackHandler(
+                self.bot,
+                self.main_menu,
+                self.user_states,
+                self.feedback_buffer,
+                self.scheduler,
+            )
+            self.scheduler.register("compact_carts", self.compact_carts)
+            self.archiver = OrderArchiver(
+                SessionLocal, tenants=lambda: [None, *self.tenant_registry.tenants()]
+            )
+            self.archiver.start()
+            self.metrics_reporter = MetricsReporter(interval=METRICS_LOG_INTERVAL)
+            self.metrics_reporter.start()
+            # Индекс основной базы строится при прогреве или при первом поиске
+            self.catalog_search = TenantCatalogSearch(CATALOG_REFRESH_INTERVAL)
+            self.inline_handler = InlineHandler(
+                self.bot,
+                self.catalog_search,
+                personal=bool(self.tenant_registry.tenants()),
+            )
+        self.poller = UpdatePoller(
+            self.bot,
+            SessionLocal,
+            workers=BOT_WORKERS,
+            drain_timeout=SHUTDOWN_DRAIN_TIMEOUT,
         )
+        self.poller.on_first_update(self.first_update)
+        self.poller.on_shutdown(self.catalog_search.stop)
+        if self.cart_handler.live_summary:
+            self.poller.on_shutdown(self.cart_handler.live_summary.flush_pending)
+        self.poller.on_shutdown(self.feedback_buffer.stop)
+        self.poller.on_shutdown(self.staff_notifier.stop)
+        self.poller.on_shutdown(self.scheduler.stop)
+        self.poller.on_shutdown(self.archiver.stop)
+        self.poller.on_shutdown(self.save_recommender)
+        self.poller.on_shutdown(self.metrics_reporter.stop)
+        self.poller.on_shutdown(dispose_engines)
+        self._profile_logged = threading.Event()
+        if FAST_START:
+            # Опрос начинается сразу, прогрев идёт параллельно
+            threading.Thread(target=self.warm_up, name="warm-up", daemon=True).start()
+        else:
+            self.warm_up()
         self.register_handlers()
         logger.info("TeleFoodBot initialized")
 
+    def warm_up(self):
+        """
+        Прогревает то, без чего бот работает, но медленнее отвечает на первые запросы.
+
+        Открывает соединения пулов основной базы, загружает сохранённые задания
+        планировщика, читает каталог и строит индекс поиска, загружает модель рекомендаций.
+        Ошибка одного шага записывается в лог и не мешает остальным.
+        """
+        steps = [
+            ("connection pool", warm_engines),
+            ("scheduled jobs", self.start_scheduler),
+            ("catalog", self.warm_catalog),
+            ("recommendations", self.load_recommender),
+        ]
+        with self.profile.phase("warm-up"):
+            for name, step in steps:
+                try:
+                    with self.profile.phase(f"warm: {name}"):
+                        step()
+                except Exception as e:
+                    logger.error(f"Warm-up step {name} failed: {str(e)}")
+        self.profile.mark("warm-up done")
+        self.log_profile()
+
+    def start_scheduler(self):
+        """
+        Загружает сохранённые задания и запускает планировщик.
+
+        Задания, запланированные до загрузки, не заменяются сохранёнными.
+        """
+        self.scheduler.start()
+        if CART_COMPACT_INTERVAL > 0 and not self.scheduler.scheduled("compact_carts"):
+            self.scheduler.schedule(
+                "compact_carts", CART_COMPACT_INTERVAL, "compact_carts"
+            )
+
+    def warm_catalog(self):
+        """
+        Читает каталог основной базы и строит его поисковый индекс до первого запроса меню.
+        """
+        self.menu_handler.warm_up()
+        self.catalog_search.get(None)
+
+    def load_recommender(self):
+        """
+        Загружает модель рекомендаций и подключает её к обработчику корзины.
+        """
+        # numpy импортируется только здесь, а не при запуске процесса
+        from recommendations import load_or_build
+
+        with SessionLocal() as db:
+            self.recommender = load_or_build(db, RECOMMENDATIONS_PATH)
+        self.cart_handler.recommender = self.recommender
+
+    def save_recommender(self):
+        """
+        Сохраняет модель рекомендаций, если она успела загрузиться.
+        """
+        if self.recommender is not None:
+            self.recommender.save(RECOMMENDATIONS_PATH)
+
+    def first_update(self):
+        """
+        Отмечает обработку первого обновления в профиле запуска.
+        """
+        self.profile.mark("first update")
+        self.log_profile()
+
+    def log_profile(self):
+        """
+        Пишет профиль запуска в лог, когда обработано первое обновление и завершён прогрев.
+        """
+        if self.profile.elapsed("first update") is None:
+            return
+        if self.profile.elapsed("warm-up done") is None:
+            return
+        if not self._profile_logged.is_set():
+            self._profile_logged.set()
+            self.profile.log()
+
+    def compact_carts(self):
+        """
+        Удаляет давно не изменявшиеся пустые корзины во всех базах (задание планировщика).
+
+        Returns:
+            float: Задержка до следующего запуска в секундах или None, если очистка выключена.
+        """
+        cutoff = datetime.datetime.utcnow() - datetime.timedelta(
+            days=CART_COMPACT_AFTER_DAYS
+        )
+        removed = 0
+        for slug in [None, *self.tenant_registry.tenants()]:
+            with use_tenant(slug), SessionLocal() as db:
+                removed += compact_empty_carts(db, cutoff)
+        if removed:
+            logger.info(f"Removed {removed} empty carts older than {cutoff:%Y-%m-%d}")
+        return CART_COMPACT_INTERVAL if CART_COMPACT_INTERVAL > 0 else None
+
     def register_handlers(self):
         """
         Регистрирует все хендлеры сообщений и callback-кнопок для обработки пользовательских взаимодействий.
@@ -71,15 +303,33 @@ class TeleFoodBot:
 
         @self.bot.message_handler(commands=["start"])
         def handle_start(message):
-            user_id, user_name = create_user_if_not_exists(
-                SessionLocal(), message.from_user.id, message.from_user.first_name
-            )
+            with SessionLocal() as db:
+                user_id, user_name = create_user_if_not_exists(
+                    db, message.from_user.id, message.from_user.first_name
+                )
             self.bot.send_message(
                 message.chat.id,
                 f"Добро пожаловать, {user_name}, в TeleFood!",
                 reply_markup=self.main_menu,
             )
             logger.info(f"User {user_name} (ID: {user_id}) started the bot")
+            if self.tenant_handler.needs_choice(message.from_user.id):
+                self.tenant_handler.choose(message)
+
+        @self.bot.message_handler(commands=["restaurant"])
+        def handle_restaurant(message):
+            logger.info(f"User {message.from_user.id} requested restaurant list")
+            self.tenant_handler.choose(message)
+
+        @self.bot.message_handler(commands=["feedback"])
+        def handle_feedback(message):
+            logger.info(f"User {message.from_user.id} requested feedback form")
+            self.feedback_handler.handle_feedback(message)
+
+        @self.bot.message_handler(commands=["chatid"])
+        def handle_chat_id(message):
+            logger.info(f"User {message.from_user.id} requested chat id")
+            self.staff_handler.show_chat_id(message)
 
         @self.bot.message_handler(func=lambda m: m.text == MENU["menu"])
         def handle_menu(message):
@@ -115,6 +365,11 @@ class TeleFoodBot:
             logger.info(f"User {message.from_user.id} saved review")
             self.feedback_handler.save_review(message)
 
+        @self.bot.callback_query_handler(func=lambda c: c.data.startswith("tenant_"))
+        def select_tenant(call):
+            logger.info(f"User {call.from_user.id} selected restaurant {call.data}")
+            self.tenant_handler.select(call)
+
         @self.bot.callback_query_handler(func=lambda c: c.data == "clear_cart")
         def clear_cart(call):
             logger.info(f"User {call.from_user.id} cleared cart")
@@ -125,6 +380,11 @@ class TeleFoodBot:
             logger.info(f"User {call.from_user.id} initiated checkout")
             self.cart_handler.checkout(call)
 
+        @self.bot.message_handler(content_types=["location"])
+        def checkout_at_location(message):
+            logger.info(f"User {message.from_user.id} sent delivery location")
+            self.cart_handler.checkout_at_location(message)
+
         @self.bot.callback_query_handler(func=lambda c: c.data.startswith("add_"))
         def add_to_cart(call):
             logger.info(f"User {call.from_user.id} added item to cart")
@@ -142,28 +402,49 @@ class TeleFoodBot:
             logger.info(f"User {call.from_user.id} selected cash payment")
             self.cart_handler.pay_cash(call)
 
+        @self.bot.callback_query_handler(
+            func=lambda c: c.data.startswith(PAID_CALLBACK)
+        )
+        def staff_paid(call):
+            logger.info(f"User {call.from_user.id} marked order paid")
+            self.staff_handler.mark_paid(call)
+
+        @self.bot.callback_query_handler(
+            func=lambda c: c.data.startswith("orders_more_")
+        )
+        def more_orders(call):
+            logger.info(f"User {call.from_user.id} paged orders")
+            self.order_handler.more_orders(call)
+
         @self.bot.callback_query_handler(func=lambda c: c.data.startswith("review_"))
         def review_callback(call):
             logger.info(f"User {call.from_user.id} initiated review")
             self.feedback_handler.review_callback(call)
 
+        @self.bot.inline_handler(func=lambda q: True)
+        def inline_search(inline_query):
+            logger.info(f"User {inline_query.from_user.id} searched products")
+            self.inline_handler.answer_query(inline_query)
+
     def run(self):
         """
-        Запускает бесконечный цикл опроса для обработки входящих сообщений и callback-запросов.
+        Запускает цикл опроса для обработки входящих сообщений и callback-запросов.
 
-        Этот метод инициирует работу бота, позволяя ему непрерывно обрабатывать пользовательские
-        взаимодействия. В случае возникновения ошибки в процессе опроса, метод логирует ошибку
-        и пытается перезапустить цикл опроса для обеспечения непрерывной работы бота.
+        Обновления обрабатываются UpdatePoller: прогресс сохраняется в базу данных после
+        каждой пачки обновлений, поэтому перезапуск продолжает работу с места остановки.
+        По SIGTERM/SIGINT опрос прекращается, текущие обновления дорабатываются,
+        после чего метод возвращает управление.
         """
         logger.info("Bot started polling...")
-        try:
-            self.bot.polling(none_stop=True)
-        except Exception as e:
-            logger.error(f"Polling error: {str(e)}")
-            # Можно добавить перезапуск или уведомление администратора
-            self.run()  # Попытка перезапуска в случае ошибки
+        self.profile.mark("polling started")
+        self.poller.install_signal_handlers()
+        self.poller.run()
+        logger.info(f"Bot stopped; transport: {self.transport.stats()}")
 
 
 if __name__ == "__main__":
-    bot = TeleFoodBot(API_TOKEN)
+    startup_profile = StartupProfile()
+    with startup_profile.phase("init_db"):
+        init_db()
+    bot = TeleFoodBot(API_TOKEN, startup_profile)
     bot.run()
@@ -0,0 +1,283 @@
+"""
+Массовые рассылки для Telegram-бота TeleFood.
+
+Модуль отправляет сообщение (акцию, «кухня закрыта» и т.п.) всем пользователям из
+таблицы users. Получатели читаются страницами по возрастанию id (keyset-пагинация),
+отправка идёт в пуле потоков с общим ограничением частоты и учётом retry_after из
+ответов 429. После каждой страницы прогресс и счётчики сохраняются в таблицу
+broadcasts, поэтому после сбоя рассылка продолжается с места остановки.
+
+Если Telegram отклоняет само сообщение (ответ 400, не связанный с получателем),
+рассылка получает статус "paused". Такие рассылки не продолжаются автоматически:
+оператор исправляет текст и запускает рассылку явно по id.
+
+Запуск из командной строки:
+    python broadcast.py --text "Сегодня скидка 20% на пиццу!"
+    python broadcast.py --resume
+    python broadcast.py --resume-id 3
+"""
+
+import argparse
+import datetime
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator, List, Optional
+
+import requests
+from sqlalchemy.orm import Session
+from telebot.apihelper import ApiTelegramException
+
+from database import SessionLocal
+from models import Broadcast, User
+from ratelimit import TokenBucket
+from transport import non_critical
+
+logger = logging.getLogger("TeleFoodBot")
+
+DELIVERED = "delivered"
+BLOCKED = "blocked"
+FAILED = "failed"
+# Telegram отклонил само сообщение: отправка остальным получателям не имеет смысла
+REJECTED = "rejected"
+
+# Ответы 400, означающие, что получателя больше нет (как и любой ответ 403)
+RECIPIENT_GONE_ERRORS = ("chat not found", "user is deactivated")
+
+# Telegram допускает около 30 сообщений в секунду в разные чаты
+BROADCAST_RATE = 25
+BROADCAST_CONCURRENCY = 8
+BROADCAST_PAGE_SIZE = 200
+MAX_ATTEMPTS = 5
+
+
+def iter_recipient_pages(
+    db: Session, after_id: int = 0, page_size: int = BROADCAST_PAGE_SIZE
+) -> Iterator[List[int]]:
+    """Перебрать id пользователей страницами по возрастанию id.
+    :param db: SQLAlchemy сессия
+    :param after_id: id, после которого начинать (курсор)
+    :param page_size: размер страницы
+    :return: Итератор списков id пользователей
+    """
+    while True:
+        page = [
+            user_id
+            for (user_id,) in db.query(User.id)
+            .filter(User.id > after_id)
+            .order_by(User.id)
+            .limit(page_size)
+        ]
+        if not page:
+            return
+        yield page
+        after_id = page[-1]
+
+
+def create_broadcast(db: Session, text: str) -> Broadcast:
+    """Создать новую рассылку.
+    :param db: SQLAlchemy сессия
+    :param text: текст сообщения (HTML)
+    :return: Объект Broadcast
+    """
+    broadcast = Broadcast(text=text, status="pending")
+    db.add(broadcast)
+    db.commit()
+    db.refresh(broadcast)
+    return broadcast
+
+
+class BroadcastEngine:
+    """
+    Исполнитель рассылок с ограничением параллельности и частоты отправки.
+    """
+
+    def __init__(
+        self,
+        bot,
+        session_factory=SessionLocal,
+        concurrency: int = BROADCAST_CONCURRENCY,
+        rate: float = BROADCAST_RATE,
+        page_size: int = BROADCAST_PAGE_SIZE,
+        retry_delay: float = 1.0,
+    ):
+        self.bot = bot
+        self.session_factory = session_factory
+        self.concurrency = concurrency
+        self.page_size = page_size
+        self.retry_delay = retry_delay
+        self.limiter = TokenBucket(rate)
+        self._stop_event = threading.Event()
+        self._rejected = threading.Event()
+
+    def stop(self):
+        """Попросить рассылку остановиться после текущей страницы."""
+        self._stop_event.set()
+
+    def deliver(self, user_id: int, text: str) -> str:
+        """Отправить сообщение одному пользователю с повторными попытками.
+
+        :param user_id: id пользователя (совпадает с id чата)
+        :param text: текст сообщения
+        :return: DELIVERED, BLOCKED, FAILED или REJECTED
+        """
+        for attempt in range(1, MAX_ATTEMPTS + 1):
+            if self._rejected.is_set():
+                return REJECTED
+            self.limiter.acquire()
+            try:
+                with non_critical():
+                    self.bot.send_message(user_id, text, parse_mode="HTML")
+                return DELIVERED
+            except ApiTelegramException as e:
+                if e.error_code == 429:
+                    retry_after = (e.result_json.get("parameters") or {}).get(
+                        "retry_after", self.retry_delay
+                    )
+                    # Пауза общая для всего пула: лимит действует на бота целиком
+                    self.limiter.pause(retry_after)
+                    continue
+                description = (e.description or "").lower()
+                if e.error_code == 403 or any(
+                    error in description for error in RECIPIENT_GONE_ERRORS
+                ):
+                    # Бот заблокирован, пользователь удалён или чат не найден
+                    return BLOCKED
+                if e.error_code == 400:
+                    # Ошибка в тексте сообщения повторится у всех получателей
+                    logger.error(f"Broadcast message rejected: {e.description}")
+                    self._rejected.set()
+                    return REJECTED
+                if e.error_code < 500:
+                    logger.error(f"Broadcast to {user_id} failed: {e.description}")
+                    return FAILED
+            except requests.RequestException as e:
+                logger.warning(f"Broadcast to {user_id} network error: {str(e)}")
+            time.sleep(self.retry_delay * attempt)
+        return FAILED
+
+    def run(self, broadcast_id: int) -> Optional[Broadcast]:
+        """Выполнить (или продолжить) рассылку, в том числе приостановленную.
+
+        :param broadcast_id: id рассылки
+        :return: Объект Broadcast с итоговыми счётчиками или None, если рассылка
+            не найдена
+        """
+        self._stop_event.clear()
+        self._rejected.clear()
+        with self.session_factory() as db:
+            broadcast = db.get(Broadcast, broadcast_id)
+            if broadcast is None:
+                return None
+            if broadcast.status == "finished":
+                return broadcast
+            broadcast.status = "running"
+            db.commit()
+            # Атрибуты читаются до запуска потоков: сессия не потокобезопасна
+            text, last_user_id = broadcast.text, broadcast.last_user_id
+            logger.info(f"Broadcast {broadcast_id} started after user {last_user_id}")
+
+            with ThreadPoolExecutor(
+                max_workers=self.concurrency, thread_name_prefix="broadcast"
+            ) as executor:
+                for page in iter_recipient_pages(db, last_user_id, self.page_size):
+                    results = list(
+                        executor.map(lambda user_id: self.deliver(user_id, text), page)
+                    )
+                    if REJECTED in results:
+                        # Получатели начиная с первого отклонённого будут обработаны
+                        # при продолжении рассылки
+                        first = results.index(REJECTED)
+                        results, page = results[:first], page[:first]
+                    # Контрольная точка: страница (или её начало) обработана
+                    broadcast.delivered += results.count(DELIVERED)
+                    broadcast.blocked += results.count(BLOCKED)
+                    broadcast.failed += results.count(FAILED)
+                    if page:
+                        broadcast.last_user_id = page[-1]
+                    db.commit()
+                    if self._rejected.is_set():
+                        broadcast.status = "paused"
+                        db.commit()
+                        db.refresh(broadcast)
+                        logger.error(
+                            f"Broadcast {broadcast.id} paused: message rejected"
+                        )
+                        return broadcast
+                    if self._stop_event.is_set():
+                        db.refresh(broadcast)
+                        logger.info(f"Broadcast {broadcast.id} paused")
+                        return broadcast
+
+            broadcast.status = "finished"
+            broadcast.finished_at = datetime.datetime.utcnow()
+            db.commit()
+            db.refresh(broadcast)
+            logger.info(
+                f"Broadcast {broadcast.id} finished: delivered {broadcast.delivered}, "
+                f"blocked {broadcast.blocked}, failed {broadcast.failed}"
+            )
+            return broadcast
+
+    def resume_unfinished(self) -> List[Broadcast]:
+        """Продолжить незавершённые рассылки (например, после перезапуска).
+
+        Приостановленные из-за отклонённого сообщения рассылки пропускаются:
+        их продолжают явно через run(broadcast_id).
+        """
+        with self.session_factory() as db:
+            ids = [
+                broadcast_id
+                for (broadcast_id,) in db.query(Broadcast.id)
+                .filter(Broadcast.status.notin_(("finished", "paused")))
+                .order_by(Broadcast.id)
+            ]
+        finished = []
+        for broadcast_id in ids:
+            broadcast = self.run(broadcast_id)
+            if self._stop_event.is_set():
+                break
+            finished.append(broadcast)
+        return finished
+
+
+if __name__ == "__main__":
+    import telebot
+
+    from config import API_TOKEN
+    from database import init_db
+
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Массовая рассылка TeleFood")
+    group = parser.add_mutually_exclusive_group(required=True)
+    group.add_argument("--text", help="текст новой рассылки (HTML)")
+    group.add_argument(
+        "--resume", action="store_true", help="продолжить незавершённые рассылки"
+    )
+    group.add_argument(
+        "--resume-id",
+        type=int,
+        help="продолжить рассылку с указанным id, в том числе приостановленную",
+    )
+    args = parser.parse_args()
+
+    init_db()
+    engine = BroadcastEngine(telebot.TeleBot(API_TOKEN))
+    if args.text:
+        with SessionLocal() as session:
+            new_broadcast_id = create_broadcast(session, args.text).id
+        result = engine.run(new_broadcast_id)
+        print(
+            f"Рассылка №{result.id}: доставлено {result.delivered}, "
+            f"заблокировано {result.blocked}, ошибок {result.failed}"
+        )
+    elif args.resume_id is not None:
+        result = engine.run(args.resume_id)
+        if result is None:
+            print(f"Рассылка №{args.resume_id} не найдена")
+        else:
+            print(f"Рассылка №{result.id}: статус {result.status}")
+    else:
+        for result in engine.resume_unfinished():
+            print(f"Рассылка №{result.id} завершена")
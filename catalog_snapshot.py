@@ -0,0 +1,326 @@
+"""
+Снимок каталога TeleFood в файле, отображаемом в память.
+
+Каталог (категории и продукты) сериализуется в компактный двоичный файл:
+заголовок с версией каталога, таблица категорий, таблица продуктов фиксированного
+размера (продукты одной категории идут подряд) и общий блок строк UTF-8.
+Каждый процесс бота открывает файл через mmap: страницы файла разделяются между
+процессами через страничный кэш ОС, а не копируются в память каждого процесса,
+и строки декодируются только при обращении.
+
+Файл записывается атомарно (временный файл в том же каталоге и os.replace)
+панелью администратора после каждого изменения каталога, а также процессом бота,
+если версия каталога в базе ушла вперёд снимка. При каждом обращении читатель
+сверяет inode и время изменения файла и при замене файла отображает новый;
+старое отображение освобождается, когда на него не остаётся ссылок.
+
+Схема файла (little-endian):
+
+    заголовок   "TFCS", формат u16, 0 u16, версия каталога u64,
+                число категорий u32, число продуктов u32, смещение строк u64
+    категория   id i32, имя (смещение u32, длина u32), первый продукт u32, число u32
+    продукт     id i32, категория i32 (-1 — без категории), цена f64,
+                имя, описание, путь к изображению (смещение u32, длина u32 каждое)
+"""
+
+import logging
+import mmap
+import os
+import struct
+import tempfile
+import threading
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from config import CATALOG_SNAPSHOT_PATH
+from database import tenant_file_path
+from models import Product, ProductType
+
+logger = logging.getLogger("TeleFoodBot")
+
+MAGIC = b"TFCS"
+FORMAT_VERSION = 1
+HEADER = struct.Struct("<4sHHQIIQ")
+CATEGORY = struct.Struct("<iIIII")
+PRODUCT = struct.Struct("<iidIIIIII")
+NO_CATEGORY = -1
+
+
+class SnapshotError(ValueError):
+    """Файл снимка повреждён или записан в неизвестном формате."""
+
+
+class SnapshotCategory(NamedTuple):
+    """Категория из снимка: диапазон её продуктов в таблице продуктов."""
+
+    id: int
+    name: str
+    first: int
+    count: int
+
+
+class SnapshotProduct(NamedTuple):
+    """Продукт из снимка; поля совпадают с одноимёнными полями models.Product."""
+
+    id: int
+    name: str
+    description: str
+    cost: float
+    product_type: Optional[int]
+    image_path: str
+
+
+class _Strings:
+    """Блок строк UTF-8 без повторов."""
+
+    def __init__(self):
+        self.data = bytearray()
+        self._offsets: Dict[bytes, int] = {}
+
+    def add(self, text: Optional[str]) -> Tuple[int, int]:
+        encoded = (text or "").encode("utf-8")
+        offset = self._offsets.get(encoded)
+        if offset is None:
+            offset = self._offsets[encoded] = len(self.data)
+            self.data += encoded
+        return offset, len(encoded)
+
+
+def build_snapshot(categories, products, version: int) -> bytes:
+    """Сериализовать каталог.
+
+    :param categories: пары (id, название) категорий
+    :param products: кортежи (id, название, описание, цена, id категории, путь к изображению)
+    :param version: версия каталога (services.get_catalog_version)
+    :return: содержимое файла снимка
+    """
+    # Порядок категорий — как в меню (services.get_all_categories): по названию
+    categories = sorted(categories, key=lambda c: (c[1] or "", c[0]))
+    known = {category_id: index for index, (category_id, _) in enumerate(categories)}
+    # Продукты без существующей категории идут последними и в меню не попадают
+    products = sorted(products, key=lambda p: (known.get(p[4], len(categories)), p[0]))
+    strings = _Strings()
+    ranges = {}
+    product_rows = bytearray()
+    for position, (pid, name, description, cost, category_id, image) in enumerate(
+        products
+    ):
+        if category_id not in known:
+            category_id = NO_CATEGORY
+        first, count = ranges.get(category_id, (position, 0))
+        ranges[category_id] = (first, count + 1)
+        product_rows += PRODUCT.pack(
+            pid,
+            category_id,
+            cost or 0.0,
+            *strings.add(name),
+            *strings.add(description),
+            *strings.add(image),
+        )
+    category_rows = bytearray()
+    for category_id, name in categories:
+        first, count = ranges.get(category_id, (0, 0))
+        category_rows += CATEGORY.pack(category_id, *strings.add(name), first, count)
+    strings_offset = HEADER.size + len(category_rows) + len(product_rows)
+    header = HEADER.pack(
+        MAGIC,
+        FORMAT_VERSION,
+        0,
+        version,
+        len(categories),
+        len(products),
+        strings_offset,
+    )
+    return b"".join((header, category_rows, product_rows, strings.data))
+
+
+def snapshot_path() -> str:
+    """Путь к снимку каталога текущего ресторана ("" — снимки выключены)."""
+    return tenant_file_path(CATALOG_SNAPSHOT_PATH) if CATALOG_SNAPSHOT_PATH else ""
+
+
+def write_snapshot(db: Session, version: int, path: Optional[str] = None) -> str:
+    """Записать снимок каталога атомарно: во временный файл и переименованием.
+
+    :param db: SQLAlchemy сессия
+    :param version: версия каталога, записываемая в заголовок
+    :param path: путь к файлу (по умолчанию снимок текущего ресторана)
+    :return: путь к записанному файлу
+    """
+    path = path or snapshot_path()
+    categories = db.query(ProductType.id, ProductType.name).all()
+    products = db.query(
+        Product.id,
+        Product.name,
+        Product.description,
+        Product.cost,
+        Product.product_type,
+        Product.image_path,
+    ).all()
+    data = build_snapshot(categories, products, version)
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(prefix=".catalog-", dir=directory)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        # mkstemp создаёт файл только для владельца; снимок читают все процессы бота
+        os.chmod(temp_path, 0o644)
+        # Читатели видят либо старый файл целиком, либо новый целиком
+        os.replace(temp_path, path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+    logger.info(f"Catalog snapshot v{version} written: {len(data)} bytes")
+    return path
+
+
+class CatalogSnapshot:
+    """
+    Снимок каталога, открытый только для чтения через mmap.
+    """
+
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            stat = os.fstat(f.fileno())
+            if stat.st_size < HEADER.size:
+                raise SnapshotError(f"{path}: файл слишком короткий")
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.identity = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        (
+            magic,
+            format_version,
+            _,
+            self.version,
+            self._category_count,
+            self._product_count,
+            self._strings_offset,
+        ) = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or format_version != FORMAT_VERSION:
+            raise SnapshotError(f"{path}: неизвестный формат снимка")
+        self._products_offset = HEADER.size + self._category_count * CATEGORY.size
+        expected = self._products_offset + self._product_count * PRODUCT.size
+        if expected != self._strings_offset or stat.st_size < expected:
+            raise SnapshotError(f"{path}: снимок повреждён")
+
+    def __len__(self):
+        return self._product_count
+
+    def _text(self, offset: int, length: int) -> str:
+        start = self._strings_offset + offset
+        return self._map[start : start + length].decode("utf-8")
+
+    def categories(self) -> List[SnapshotCategory]:
+        """Категории в порядке меню (по названию)."""
+        result = []
+        for index in range(self._category_count):
+            category_id, offset, length, first, count = CATEGORY.unpack_from(
+                self._map, HEADER.size + index * CATEGORY.size
+            )
+            result.append(
+                SnapshotCategory(category_id, self._text(offset, length), first, count)
+            )
+        return result
+
+    def _product(self, position: int) -> SnapshotProduct:
+        (
+            pid,
+            category_id,
+            cost,
+            name_offset,
+            name_length,
+            description_offset,
+            description_length,
+            image_offset,
+            image_length,
+        ) = PRODUCT.unpack_from(
+            self._map, self._products_offset + position * PRODUCT.size
+        )
+        return SnapshotProduct(
+            pid,
+            self._text(name_offset, name_length),
+            self._text(description_offset, description_length),
+            cost,
+            None if category_id == NO_CATEGORY else category_id,
+            self._text(image_offset, image_length),
+        )
+
+    def products(self, category: Optional[SnapshotCategory] = None):
+        """Продукты категории по возрастанию id или все продукты снимка."""
+        if category is None:
+            positions = range(self._product_count)
+        else:
+            positions = range(category.first, category.first + category.count)
+        return [self._product(position) for position in positions]
+
+    def search_rows(self) -> List[tuple]:
+        """Все продукты как кортежи (id, название, описание, цена, название категории)."""
+        names = {category.id: category.name for category in self.categories()}
+        return [
+            (p.id, p.name, p.description, p.cost, names.get(p.product_type, ""))
+            for p in self.products()
+        ]
+
+
+def current_snapshot(db: Session, version: int) -> Optional[CatalogSnapshot]:
+    """Получить снимок каталога версии version, перезаписав его из базы, если он отстал.
+
+    :param db: SQLAlchemy сессия
+    :param version: текущая версия каталога в базе
+    :return: снимок или None, если снимки выключены или файл не удалось записать
+    """
+    if not CATALOG_SNAPSHOT_PATH:
+        return None
+    snapshot = catalog_snapshots.get()
+    if snapshot is None or snapshot.version != version:
+        try:
+            write_snapshot(db, version)
+        except OSError as e:
+            logger.error(f"Catalog snapshot write failed: {str(e)}")
+            return None
+        snapshot = catalog_snapshots.get()
+    return snapshot
+
+
+class CatalogSnapshots:
+    """
+    Открытые снимки каталогов ресторанов в процессе; файл сверяется при каждом обращении.
+    """
+
+    def __init__(self):
+        self._snapshots: Dict[str, CatalogSnapshot] = {}
+        self._lock = threading.Lock()
+
+    def get(self) -> Optional[CatalogSnapshot]:
+        """Получить снимок каталога текущего ресторана или None, если его нет.
+
+        Если файл заменён после открытия, отображается новый файл.
+        """
+        path = snapshot_path()
+        if not path:
+            return None
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        identity = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        snapshot = self._snapshots.get(path)
+        if snapshot is not None and snapshot.identity == identity:
+            return snapshot
+        with self._lock:
+            snapshot = self._snapshots.get(path)
+            if snapshot is None or snapshot.identity != identity:
+                try:
+                    snapshot = CatalogSnapshot(path)
+                except (OSError, ValueError) as e:
+                    logger.error(f"Catalog snapshot {path} unreadable: {str(e)}")
+                    return None
+                # Прежнее отображение закроется, когда его перестанут читать
+                self._snapshots[path] = snapshot
+            return snapshot
+
+
+catalog_snapshots = CatalogSnapshots()
@@ -5,6 +5,7 @@
 используемые в приложении, для улучшения поддерживаемости и удобства обновлений.
 """
 
+import datetime
 import os
 
 from dotenv import load_dotenv
@@ -16,3 +17,152 @@ API_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")
 
 # Menu Constants for Bot Interface
 MENU = {"menu": "🍽️ Меню", "cart": "🛒 Корзина", "orders": "📦 Мои заказы"}
+
+# Часовой пояс ресторана для отчётов и отображения дат (по умолчанию Москва, UTC+3)
+LOCAL_TIMEZONE = datetime.timezone(
+    datetime.timedelta(hours=int(os.getenv("LOCAL_UTC_OFFSET", "3")))
+)
+
+# Интервал проверки версии каталога для перестроения поискового индекса (секунды)
+CATALOG_REFRESH_INTERVAL = float(os.getenv("CATALOG_REFRESH_INTERVAL", "60"))
+
+# Защита от повторной обработки: размер кэша и время жизни ключей (секунды)
+DEDUP_CACHE_SIZE = int(os.getenv("DEDUP_CACHE_SIZE", "10000"))
+DEDUP_TTL = float(os.getenv("DEDUP_TTL", "600"))
+# Максимальное время блокировки повторного оформления заказа (секунды)
+CHECKOUT_LOCK_TTL = float(os.getenv("CHECKOUT_LOCK_TTL", "30"))
+
+# Живая сводка корзины: добавление товара отвечает всплывающим уведомлением,
+# а одно сообщение со сводкой редактируется (частые нажатия объединяются)
+CART_LIVE_SUMMARY = os.getenv("CART_LIVE_SUMMARY", "1") == "1"
+CART_SUMMARY_DEBOUNCE = float(os.getenv("CART_SUMMARY_DEBOUNCE", "1.0"))
+
+# Транспорт Bot API: число потоков-обработчиков бота, пул соединений, таймауты,
+# повторы и выключатель (circuit breaker)
+BOT_WORKERS = int(os.getenv("BOT_WORKERS", "4"))
+TELEGRAM_POOL_SIZE = int(os.getenv("TELEGRAM_POOL_SIZE", str(BOT_WORKERS + 4)))
+TELEGRAM_CONNECT_TIMEOUT = float(os.getenv("TELEGRAM_CONNECT_TIMEOUT", "5"))
+TELEGRAM_READ_TIMEOUT = float(os.getenv("TELEGRAM_READ_TIMEOUT", "30"))
+TELEGRAM_MAX_RETRIES = int(os.getenv("TELEGRAM_MAX_RETRIES", "3"))
+TELEGRAM_BREAKER_THRESHOLD = int(os.getenv("TELEGRAM_BREAKER_THRESHOLD", "5"))
+TELEGRAM_BREAKER_RECOVERY = float(os.getenv("TELEGRAM_BREAKER_RECOVERY", "30"))
+
+# Сколько секунд дорабатывать текущие обновления после SIGTERM перед выходом
+SHUTDOWN_DRAIN_TIMEOUT = float(os.getenv("SHUTDOWN_DRAIN_TIMEOUT", "25"))
+
+# Ограничение частоты действий одного пользователя: маршрут=запросов_в_секунду/всплеск.
+# Маршрут — префикс callback_data (add, checkout, ...), кнопка меню (menu, cart,
+# orders), команда (start), inline или default для всего остального.
+FLOOD_LIMITS = os.getenv(
+    "FLOOD_LIMITS", "default=2/10,add=4/15,cart=1/5,orders=0.5/3,checkout=0.2/2"
+)
+# Число пользователей, для которых хранятся вёдра токенов (LRU)
+FLOOD_TRACKED_USERS = int(os.getenv("FLOOD_TRACKED_USERS", "10000"))
+
+# Период записи счётчиков (metrics) в лог, секунд; итоговый снимок пишется при
+# остановке бота (0 — только при остановке)
+METRICS_LOG_INTERVAL = float(os.getenv("METRICS_LOG_INTERVAL", "300"))
+
+# Каталог для хранения фотографий продуктов
+MEDIA_DIR = os.getenv("MEDIA_DIR", "media")
+
+# Файл модели рекомендаций «С этим также заказывают»
+RECOMMENDATIONS_PATH = os.getenv("RECOMMENDATIONS_PATH", "recommendations.npz")
+
+# Файл почасовой истории продаж для прогноза спроса
+FORECAST_PATH = os.getenv("FORECAST_PATH", "forecast.npz")
+
+# Снимок каталога, общий для всех процессов бота (см. catalog_snapshot.py);
+# пусто — каталог читается из базы каждым процессом
+CATALOG_SNAPSHOT_PATH = os.getenv("CATALOG_SNAPSHOT_PATH", "catalog.snapshot")
+
+# Шаблон адреса базы данных ресторана (арендатора); {tenant} — код ресторана.
+# Для PostgreSQL можно указать, например, "postgresql://user@host/telefood_{tenant}"
+TENANT_DATABASE_URL = os.getenv("TENANT_DATABASE_URL", "sqlite:///tenants/{tenant}.db")
+
+# Адрес базы только для чтения (например, реплики PostgreSQL); пусто — читать
+# из основной базы через отдельный пул соединений query_only.
+READ_DATABASE_URL = os.getenv("READ_DATABASE_URL", "")
+# То же для баз ресторанов; {tenant} — код ресторана
+TENANT_READ_DATABASE_URL = os.getenv("TENANT_READ_DATABASE_URL", "")
+# Размер пула соединений для чтения
+READER_POOL_SIZE = int(os.getenv("READER_POOL_SIZE", "5"))
+
+# Формат содержимого корзин и заказов: list — {"products": [id, id, ...]},
+# compact — {"items": {"id": количество}}; оба формата читаются всегда
+CART_CONTENT_FORMAT = os.getenv("CART_CONTENT_FORMAT", "list")
+
+# Архив заказов: заказы старше ARCHIVE_AFTER_DAYS дней переносятся из orders
+# в orders_archive пачками по ARCHIVE_BATCH_SIZE раз в ARCHIVE_INTERVAL секунд
+# (0 — не архивировать из бота, только через python archive.py)
+ARCHIVE_AFTER_DAYS = int(os.getenv("ARCHIVE_AFTER_DAYS", "180"))
+ARCHIVE_BATCH_SIZE = int(os.getenv("ARCHIVE_BATCH_SIZE", "1000"))
+ARCHIVE_INTERVAL = float(os.getenv("ARCHIVE_INTERVAL", "3600"))
+
+# Выгрузка заказов (export.py): заказов, читаемых из курсора и строк, записываемых
+# за раз; строк в одной группе колоночного файла
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "10000"))
+EXPORT_ROW_GROUP_SIZE = int(os.getenv("EXPORT_ROW_GROUP_SIZE", "100000"))
+
+# Зоны доставки (delivery.py): версия зон в базе сверяется не чаще раза
+# в DELIVERY_ZONES_REFRESH_INTERVAL секунд; DELIVERY_GRID_CELL — размер ячейки сетки
+# индекса в градусах (0 — подбирается по размеру зон)
+DELIVERY_ZONES_REFRESH_INTERVAL = float(
+    os.getenv("DELIVERY_ZONES_REFRESH_INTERVAL", "60")
+)
+DELIVERY_GRID_CELL = float(os.getenv("DELIVERY_GRID_CELL", "0"))
+
+# Акции (promotions.py): версия акций в базе сверяется не чаще раза
+# в PROMOTIONS_REFRESH_INTERVAL секунд
+PROMOTIONS_REFRESH_INTERVAL = float(os.getenv("PROMOTIONS_REFRESH_INTERVAL", "60"))
+
+# Живая лента заказов в панели администратора (live_orders.py): период опроса
+# (секунды), число последних заказов при открытии, заказов за один запрос,
+# окно расчёта заказов в минуту (секунды) и число строк в таблице окна
+LIVE_ORDERS_POLL_INTERVAL = float(os.getenv("LIVE_ORDERS_POLL_INTERVAL", "2"))
+LIVE_ORDERS_BACKLOG = int(os.getenv("LIVE_ORDERS_BACKLOG", "100"))
+LIVE_ORDERS_BATCH_SIZE = int(os.getenv("LIVE_ORDERS_BATCH_SIZE", "500"))
+LIVE_ORDERS_RATE_WINDOW = float(os.getenv("LIVE_ORDERS_RATE_WINDOW", "300"))
+LIVE_ORDERS_MAX_ROWS = int(os.getenv("LIVE_ORDERS_MAX_ROWS", "500"))
+# Число неоплаченных заказов старше ленты пересчитывается раз в столько секунд
+LIVE_ORDERS_RECOUNT_INTERVAL = float(os.getenv("LIVE_ORDERS_RECOUNT_INTERVAL", "60"))
+
+# Уведомления персонала (notifications.py): новые заказы за STAFF_DIGEST_WINDOW
+# секунд объединяются в одно сообщение чату (не больше STAFF_DIGEST_MAX_ORDERS
+# заказов в сообщении); лимиты отправки — сообщений в секунду всего и в один чат
+# (в группы Telegram допускает около 20 сообщений в минуту); записи об отправленных
+# карточках хранятся STAFF_MESSAGE_TTL_DAYS дней
+STAFF_DIGEST_WINDOW = float(os.getenv("STAFF_DIGEST_WINDOW", "3"))
+STAFF_DIGEST_MAX_ORDERS = int(os.getenv("STAFF_DIGEST_MAX_ORDERS", "10"))
+STAFF_SEND_RATE = float(os.getenv("STAFF_SEND_RATE", "20"))
+STAFF_CHAT_RATE = float(os.getenv("STAFF_CHAT_RATE", "0.33"))
+STAFF_MESSAGE_TTL_DAYS = int(os.getenv("STAFF_MESSAGE_TTL_DAYS", "7"))
+
+# Количество заказов на одной странице истории
+ORDERS_PAGE_SIZE = int(os.getenv("ORDERS_PAGE_SIZE", "5"))
+
+# Планировщик отложенных заданий (scheduler.py): изменения сохраняются в базу
+# не чаще раза в SCHEDULER_FLUSH_INTERVAL секунд
+SCHEDULER_FLUSH_INTERVAL = float(os.getenv("SCHEDULER_FLUSH_INTERVAL", "5"))
+
+# Напоминание о брошенной корзине через CART_REMINDER_DELAY секунд после последнего
+# добавления (0 — не напоминать), не чаще REMINDER_RATE сообщений в секунду
+CART_REMINDER_DELAY = float(os.getenv("CART_REMINDER_DELAY", "7200"))
+REMINDER_RATE = float(os.getenv("REMINDER_RATE", "5"))
+
+# Незавершённый ввод отзыва и ожидание местоположения для заказа сбрасываются
+# через USER_STATE_TTL секунд
+USER_STATE_TTL = float(os.getenv("USER_STATE_TTL", "900"))
+
+# Пустые корзины, не изменявшиеся CART_COMPACT_AFTER_DAYS дней, удаляются пачками
+# по CART_COMPACT_BATCH_SIZE раз в CART_COMPACT_INTERVAL секунд (0 — не удалять)
+CART_COMPACT_AFTER_DAYS = int(os.getenv("CART_COMPACT_AFTER_DAYS", "30"))
+CART_COMPACT_BATCH_SIZE = int(os.getenv("CART_COMPACT_BATCH_SIZE", "1000"))
+CART_COMPACT_INTERVAL = float(os.getenv("CART_COMPACT_INTERVAL", "86400"))
+
+# Быстрый запуск: схема базы не проверяется, если сохранённая версия совпадает,
+# а прогрев пула соединений, каталога, модели рекомендаций и загрузка заданий
+# планировщика идут в фоне параллельно с началом опроса
+FAST_START = os.getenv("FAST_START", "1") == "1"
+# Целевое время от запуска процесса до первого обработанного обновления, секунды
+STARTUP_TARGET = float(os.getenv("STARTUP_TARGET", "3"))
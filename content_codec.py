@@ -0,0 +1,113 @@
+"""
+Кодирование содержимого корзин и заказов (столбцы Cart.content и Order.content).
+
+JSON-столбцы сериализуются через orjson, если он установлен, иначе через
+стандартный json в компактном виде; функции dumps и loads передаются в
+create_engine (см. database.create_engines).
+
+Содержимое хранится в одном из двух форматов:
+- {"products": [3, 3, 7]} — список id с повторами (исходный формат);
+- {"items": {"3": 2, "7": 1}} — количество каждого продукта (CART_CONTENT_FORMAT=compact).
+
+Функции чтения понимают оба формата, поэтому существующие строки читаются без
+миграции, а корзина переводится в выбранный формат при первом изменении.
+"""
+
+import json
+from typing import Dict, List, Optional
+
+from config import CART_CONTENT_FORMAT
+
+try:
+    import orjson
+except ImportError:  # orjson — необязательная зависимость
+    orjson = None
+
+PRODUCTS_KEY = "products"
+ITEMS_KEY = "items"
+
+
+def dumps(value) -> str:
+    """Сериализовать значение JSON-столбца."""
+    if orjson is not None:
+        return orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS).decode()
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+
+
+def loads(value: str):
+    """Разобрать значение JSON-столбца."""
+    if orjson is not None:
+        return orjson.loads(value)
+    return json.loads(value)
+
+
+def product_counts(content: Optional[dict]) -> Dict[int, int]:
+    """Получить количество каждого продукта в корзине или заказе.
+
+    :param content: содержимое в любом из форматов (или None)
+    :return: словарь {id продукта: количество} в порядке добавления
+    """
+    counts: Dict[int, int] = {}
+    if not content:
+        return counts
+    for pid, quantity in (content.get(ITEMS_KEY) or {}).items():
+        pid = int(pid)
+        counts[pid] = counts.get(pid, 0) + int(quantity)
+    for pid in content.get(PRODUCTS_KEY) or ():
+        counts[pid] = counts.get(pid, 0) + 1
+    return counts
+
+
+def product_ids(content: Optional[dict]) -> List[int]:
+    """Получить список id продуктов с повторами (по одному на единицу товара)."""
+    if content and not content.get(ITEMS_KEY):
+        return content.get(PRODUCTS_KEY) or []
+    return [
+        pid
+        for pid, quantity in product_counts(content).items()
+        for _ in range(quantity)
+    ]
+
+
+def encode_counts(counts: Dict[int, int], compact: Optional[bool] = None) -> dict:
+    """Закодировать количества продуктов в формат хранения.
+
+    :param counts: словарь {id продукта: количество}
+    :param compact: True — {"items": ...}, False — {"products": [...]},
+        None — формат из CART_CONTENT_FORMAT
+    :return: содержимое для записи в столбец
+    """
+    if compact is None:
+        compact = CART_CONTENT_FORMAT == "compact"
+    if compact:
+        return {ITEMS_KEY: {str(pid): qty for pid, qty in counts.items() if qty > 0}}
+    return {PRODUCTS_KEY: [pid for pid, qty in counts.items() for _ in range(qty)]}
+
+
+def empty_content() -> dict:
+    """Получить содержимое пустой корзины."""
+    return encode_counts({})
+
+
+def add_product(content: Optional[dict], product_id: int, quantity: int = 1) -> dict:
+    """Получить новое содержимое с добавленным продуктом.
+
+    Исходный словарь не изменяется: результат присваивается столбцу целиком,
+    поэтому SQLAlchemy отслеживает изменение без вложенных изменяемых типов.
+    """
+    compact = CART_CONTENT_FORMAT == "compact"
+    if not compact and content and not content.get(ITEMS_KEY):
+        # Исходный формат: добавить id в конец без пересчёта списка
+        return {
+            PRODUCTS_KEY: list(content.get(PRODUCTS_KEY) or ())
+            + [product_id] * quantity
+        }
+    if compact and content and not content.get(PRODUCTS_KEY):
+        # Компактный формат: увеличить количество без разбора остальных позиций
+        items = dict(content.get(ITEMS_KEY) or {})
+        key = str(product_id)
+        items[key] = items.get(key, 0) + quantity
+        return {ITEMS_KEY: items}
+    counts = product_counts(content)
+    counts[product_id] = counts.get(product_id, 0) + quantity
+    return encode_counts(counts, compact)
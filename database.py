@@ -1,37 +1,394 @@
-from sqlalchemy import create_engine
+import functools
+import hashlib
+import inspect
+import os
+import threading
+from contextlib import contextmanager
+from typing import Optional
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
 from sqlalchemy.exc import SQLAlchemyError
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
 from sqlalchemy.sql import text
 
+from config import (
+    FAST_START,
+    READ_DATABASE_URL,
+    READER_POOL_SIZE,
+    TENANT_DATABASE_URL,
+    TENANT_READ_DATABASE_URL,
+)
+from content_codec import dumps, loads
 from models import Base
 
 DATABASE_URL = "sqlite:///app.db"
 
+# Ключи Session.info для выбора движка (см. RoutingSession)
+ROUTE_KEY = "route"
+WROTE_KEY = "wrote"
+
+
+def _is_sqlite_file(url) -> bool:
+    return url.get_backend_name() == "sqlite" and url.database not in (
+        None,
+        "",
+        ":memory:",
+    )
+
+
+def _enable_wal(dbapi_connection, connection_record):
+    """Включить WAL, чтобы читатели не ждали писателя и наоборот."""
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.close()
+
+
+def _enable_query_only(dbapi_connection, connection_record):
+    """Запретить запись в соединениях пула чтения."""
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA query_only=ON")
+    cursor.close()
+
+
+def create_engines(url: str, read_url: str = ""):
+    """Создать движок записи и движок чтения для базы данных.
+
+    Для файла SQLite писатель — пул из одного соединения (записи выполняются
+    по очереди внутри процесса, без ожидания блокировки файла), а читатели —
+    отдельный пул соединений query_only; в режиме WAL чтение не ждёт записи.
+    Для других СУБД read_url может указывать на реплику.
+    :param url: адрес базы данных
+    :param read_url: адрес базы для чтения (пусто — та же база)
+    :return: кортеж (писатель, читатель); читатель None, если разделения нет
+    """
+    url = make_url(url)
+    read_url = make_url(read_url) if read_url else None
+    if _is_sqlite_file(url):
+        writer = create_engine(
+            url,
+            echo=False,
+            pool_size=1,
+            max_overflow=0,
+            json_serializer=dumps,
+            json_deserializer=loads,
+        )
+        event.listen(writer, "connect", _enable_wal)
+        read_url = read_url or url
+    else:
+        writer = create_engine(
+            url, echo=False, json_serializer=dumps, json_deserializer=loads
+        )
+    if read_url is None:
+        return writer, None
+    reader = create_engine(
+        read_url,
+        echo=False,
+        pool_size=READER_POOL_SIZE,
+        json_serializer=dumps,
+        json_deserializer=loads,
+    )
+    if read_url.get_backend_name() == "sqlite":
+        event.listen(reader, "connect", _enable_query_only)
+    return writer, reader
+
+
+class RoutingSession(Session):
+    """
+    Сессия, выполняющая запросы функций @reads через движок чтения.
+
+    Запись (flush, INSERT/UPDATE/DELETE), функции @writes и все запросы после
+    первой записи в транзакции идут через движок записи, поэтому транзакция
+    видит собственные изменения. Если читатель открывает ту же базу (SQLite в
+    режиме WAL), через него идут и чтения вне @reads/@writes: иначе долгая сессия,
+    которая только читает, держала бы единственное соединение писателя до commit.
+    Реплика отстаёт от писателя, поэтому с ней такие чтения остаются на писателе.
+    """
+
+    def __init__(self, *args, reader=None, shared_reader=False, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.reader = reader
+        self.shared_reader = shared_reader
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        if getattr(clause, "is_dml", False):
+            self.info[WROTE_KEY] = True
+        elif self.reader is not None and not self.info.get(WROTE_KEY):
+            route = self.info.get(ROUTE_KEY)
+            if route == "reader" or (route is None and self.shared_reader):
+                return self.reader
+        return super().get_bind(mapper=mapper, clause=clause, **kwargs)
+
+
+@event.listens_for(RoutingSession, "before_flush")
+def _mark_written(session, flush_context, instances):
+    session.info[WROTE_KEY] = True
+
+
+@event.listens_for(RoutingSession, "after_transaction_end")
+def _reset_written(session, transaction):
+    if transaction.parent is None:
+        session.info.pop(WROTE_KEY, None)
+
+
+def _route(route: str):
+    def decorator(func):
+        if inspect.isgeneratorfunction(func):
+            # Запросы генератора выполняются при переборе, а не при вызове,
+            # поэтому маршрут действует до конца перебора (или закрытия генератора)
+            @functools.wraps(func)
+            def generator_wrapper(db, *args, **kwargs):
+                previous = db.info.get(ROUTE_KEY)
+                db.info[ROUTE_KEY] = "writer" if previous == "writer" else route
+                try:
+                    yield from func(db, *args, **kwargs)
+                finally:
+                    db.info[ROUTE_KEY] = previous
+
+            return generator_wrapper
+
+        @functools.wraps(func)
+        def wrapper(db, *args, **kwargs):
+            previous = db.info.get(ROUTE_KEY)
+            # Внешняя функция @writes сохраняет движок записи для вложенных чтений
+            db.info[ROUTE_KEY] = "writer" if previous == "writer" else route
+            try:
+                return func(db, *args, **kwargs)
+            finally:
+                db.info[ROUTE_KEY] = previous
+
+        return wrapper
+
+    return decorator
+
+
+# Функция только читает: запросы идут в пул чтения (или реплику)
+reads = _route("reader")
+# Функция читает и изменяет данные: все её запросы идут через писателя
+writes = _route("writer")
+
+
+def _session_factory(writer, reader) -> sessionmaker:
+    return sessionmaker(
+        bind=writer,
+        class_=RoutingSession,
+        reader=reader,
+        shared_reader=reader is not None and reader.url == writer.url,
+    )
+
+
+engine, reader_engine = create_engines(DATABASE_URL, READ_DATABASE_URL)
+
+# Движки ресторанов (арендаторов) создаются при первом обращении и кэшируются.
+# Ключ None — основная база app.db: ресторан по умолчанию и реестр ресторанов.
+_engines = {None: engine}
+_readers = {None: reader_engine}
+_session_factories = {None: _session_factory(engine, reader_engine)}
+_engines_lock = threading.Lock()
+_tenant_state = threading.local()
+
+
+def current_tenant() -> Optional[str]:
+    """Получить ресторан, с базой которого работает текущий поток (None — основная)."""
+    return getattr(_tenant_state, "slug", None)
+
+
+@contextmanager
+def use_tenant(slug: Optional[str]):
+    """Направить сессии SessionLocal в текущем потоке в базу ресторана slug."""
+    previous = current_tenant()
+    _tenant_state.slug = slug
+    try:
+        yield
+    finally:
+        _tenant_state.slug = previous
+
+
+def tenant_database_url(slug: str) -> str:
+    """Получить адрес базы данных ресторана по шаблону TENANT_DATABASE_URL."""
+    return TENANT_DATABASE_URL.format(tenant=slug)
+
+
+def tenant_file_path(path: str) -> str:
+    """Получить путь к локальному файлу текущего ресторана ("forecast.npz" -> "forecast.north.npz")."""
+    slug = current_tenant()
+    if slug is None:
+        return path
+    root, extension = os.path.splitext(path)
+    return f"{root}.{slug}{extension}"
+
+
+def get_engine(slug: Optional[str] = None):
+    """Получить движок записи базы ресторана, создав его и схему при первом обращении."""
+    cached = _engines.get(slug)
+    if cached is not None:
+        return cached
+    with _engines_lock:
+        if slug not in _engines:
+            url = make_url(tenant_database_url(slug))
+            if url.get_backend_name() == "sqlite" and url.database:
+                os.makedirs(os.path.dirname(url.database) or ".", exist_ok=True)
+            read_url = TENANT_READ_DATABASE_URL.format(tenant=slug)
+            tenant_engine, tenant_reader = create_engines(url, read_url)
+            init_db(tenant_engine)
+            _readers[slug] = tenant_reader
+            _session_factories[slug] = _session_factory(tenant_engine, tenant_reader)
+            _engines[slug] = tenant_engine
+        return _engines[slug]
+
+
+def get_reader_engine(slug: Optional[str] = None):
+    """Получить движок чтения базы ресторана (None, если чтение идёт через писателя)."""
+    get_engine(slug)
+    return _readers[slug]
+
+
+def get_session_factory(slug: Optional[str] = None) -> sessionmaker:
+    """Получить фабрику сессий базы ресторана."""
+    get_engine(slug)
+    return _session_factories[slug]
+
+
+class TenantSessionFactory:
+    """
+    Фабрика сессий, открывающая сессию в базе текущего ресторана (см. use_tenant).
+    """
+
+    def __call__(self, **kwargs):
+        return get_session_factory(current_tenant())(**kwargs)
+
+
+SessionLocal = TenantSessionFactory()
+
+
+def dispose_engines():
+    """Закрыть соединения всех созданных движков."""
+    for cached in list(_engines.values()) + list(_readers.values()):
+        if cached is not None:
+            cached.dispose()
+
+
+def init_db(target_engine=None, force: bool = False):
+    """Инициализировать базу данных путём создания всех таблиц, определённых в метаданных.
+
+    В режиме FAST_START проверка схемы пропускается, если сохранённая в app_meta
+    версия схемы совпадает с текущей (см. schema_version).
+    :param target_engine: движок базы (по умолчанию основная база)
+    :param force: проверить схему независимо от сохранённой версии
+    """
+    target_engine = target_engine or engine
+    version = schema_version()
+    if FAST_START and not force and stored_schema_version(target_engine) == version:
+        return
+    Base.metadata.create_all(bind=target_engine)
+    if update_schema(target_engine):
+        store_schema_version(target_engine, version)
+
+
+# Ключ app_meta с версией схемы, для которой база уже проверена
+SCHEMA_VERSION_KEY = "schema_version"
+
+# Столбцы, добавленные после первого выпуска: (таблица, столбец, определение)
+SCHEMA_COLUMNS = [
+    ("orders", "created_at", "TEXT"),
+    ("products", "image_path", "VARCHAR DEFAULT ''"),
+    ("products", "image_hash", "VARCHAR DEFAULT ''"),
+    ("products", "photo_file_id", "VARCHAR DEFAULT ''"),
+    ("carts", "updated_at", "DATETIME"),
+    ("orders", "latitude", "FLOAT"),
+    ("orders", "longitude", "FLOAT"),
+    ("orders", "delivery_zone_id", "INTEGER"),
+    ("orders", "kitchen", "VARCHAR DEFAULT ''"),
+    ("orders", "delivery_fee", "FLOAT DEFAULT 0"),
+    ("orders_archive", "latitude", "FLOAT"),
+    ("orders_archive", "longitude", "FLOAT"),
+    ("orders_archive", "delivery_zone_id", "INTEGER"),
+    ("orders_archive", "kitchen", "VARCHAR DEFAULT ''"),
+    ("orders_archive", "delivery_fee", "FLOAT DEFAULT 0"),
+    ("orders", "discount", "FLOAT DEFAULT 0"),
+    ("orders", "promotions", "JSON"),
+    ("orders_archive", "discount", "FLOAT DEFAULT 0"),
+    ("orders_archive", "promotions", "JSON"),
+]
+
+# Индексы, добавленные после первого выпуска: (имя, таблица, столбцы)
+SCHEMA_INDEXES = [
+    ("ix_orders_user_id", "orders", "user_id"),
+]
+
+
+def schema_version() -> str:
+    """Версия схемы: хеш таблиц и столбцов моделей и списков SCHEMA_COLUMNS/SCHEMA_INDEXES."""
+    parts = []
+    for table in sorted(Base.metadata.tables.values(), key=lambda t: t.name):
+        parts.append(table.name)
+        parts.extend(f"{c.name}:{c.type}:{c.nullable}" for c in table.columns)
+        parts.extend(sorted(index.name for index in table.indexes))
+    parts.extend(repr(item) for item in SCHEMA_COLUMNS + SCHEMA_INDEXES)
+    return hashlib.sha1("\n".join(parts).encode()).hexdigest()[:16]
+
+
+def stored_schema_version(target_engine=None) -> str:
+    """Получить версию схемы, сохранённую в app_meta ("" для новой базы)."""
+    try:
+        with (target_engine or engine).connect() as conn:
+            value = conn.execute(
+                text("SELECT value FROM app_meta WHERE key = :key"),
+                {"key": SCHEMA_VERSION_KEY},
+            ).scalar()
+    except SQLAlchemyError:
+        return ""
+    return value or ""
+
+
+def store_schema_version(target_engine, version: str):
+    """Сохранить версию схемы в app_meta."""
+    with target_engine.begin() as conn:
+        conn.execute(
+            text("DELETE FROM app_meta WHERE key = :key"), {"key": SCHEMA_VERSION_KEY}
+        )
+        conn.execute(
+            text("INSERT INTO app_meta (key, value) VALUES (:key, :value)"),
+            {"key": SCHEMA_VERSION_KEY, "value": version},
+        )
 
-engine = create_engine(
-    DATABASE_URL, echo=False
-)  # echo=False для продакшен-окружения, чтобы уменьшить логи
-SessionLocal = sessionmaker(bind=engine)
 
+def warm_engines(slug: Optional[str] = None):
+    """Открыть соединения пулов записи и чтения базы заранее, до первого запроса."""
+    reader = get_reader_engine(slug)
+    for target_engine, size in ((get_engine(slug), 1), (reader, READER_POOL_SIZE)):
+        if target_engine is None:
+            continue
+        connections = [target_engine.connect() for _ in range(size)]
+        for connection in connections:
+            connection.close()
 
-def init_db():
-    """Инициализировать базу данных путём создания всех таблиц, определённых в метаданных."""
-    Base.metadata.create_all(bind=engine)
-    update_schema()
 
+def update_schema(target_engine=None) -> bool:
+    """Обновить схему базы данных, добавляя новые столбцы и индексы при необходимости.
 
-def update_schema():
-    """Обновить схему базы данных, добавляя новые столбцы при необходимости."""
+    :return: True, если схема обновлена без ошибок
+    """
     try:
-        with engine.connect() as conn:
-            # Проверяем, существует ли столбец created_at в таблице orders
-            result = conn.execute(text("PRAGMA table_info(orders)"))
-            columns = [row[1] for row in result]
-            if "created_at" not in columns:
-                conn.execute(text("ALTER TABLE orders ADD COLUMN created_at TEXT"))
-                print("Added created_at column to orders table.")
+        with (target_engine or engine).begin() as conn:
+            existing = {}
+            for table, column, definition in SCHEMA_COLUMNS:
+                if table not in existing:
+                    result = conn.execute(text(f"PRAGMA table_info({table})"))
+                    existing[table] = {row[1] for row in result}
+                if column not in existing[table]:
+                    conn.execute(
+                        text(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+                    )
+                    print(f"Added {column} column to {table} table.")
+            for name, table, columns in SCHEMA_INDEXES:
+                conn.execute(
+                    text(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({columns})")
+                )
     except SQLAlchemyError as e:
         print(f"Error updating schema: {e}")
+        return False
+    return True
 
 
 if __name__ == "__main__":
@@ -0,0 +1,311 @@
+"""
+Зоны доставки TeleFood.
+
+Зона — многоугольник на карте (вершины в градусах широты и долготы), кухня, которая
+её обслуживает, и стоимость доставки. Зоны редактируются в панели администратора
+и хранятся в таблице delivery_zones базы ресторана.
+
+Для поиска зоны по точке, присланной пользователем при оформлении заказа, зоны
+раскладываются по равномерной сетке. Для каждой ячейки заранее известно, какие
+зоны её касаются и лежит ли ячейка внутри зоны целиком. Проверка точки в
+многоугольнике (луч через рёбра) нужна, только если через ячейку проходит граница
+зоны. Поэтому поиск занимает микросекунды и при тысячах зон.
+
+Индекс перестраивается, когда меняется версия зон в app_meta
+(см. bump_zones_version). Версию процесс бота сверяет не чаще раза в
+DELIVERY_ZONES_REFRESH_INTERVAL секунд при очередном поиске.
+"""
+
+import logging
+import math
+import re
+import statistics
+import threading
+import time
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from config import DELIVERY_GRID_CELL, DELIVERY_ZONES_REFRESH_INTERVAL
+from database import current_tenant, reads, writes
+from models import DeliveryZone
+from services import get_meta, set_meta
+
+logger = logging.getLogger("TeleFoodBot")
+
+ZONES_VERSION_KEY = "delivery_zones_version"
+# При автоматическом выборе размера ячейки типичная зона занимает столько ячеек в ширину
+CELLS_PER_ZONE = 8
+
+
+class Zone:
+    """
+    Зона доставки в индексе.
+    """
+
+    __slots__ = (
+        "id",
+        "name",
+        "kitchen",
+        "fee",
+        "free_from",
+        "priority",
+        "points",
+        "bounds",
+    )
+
+    def __init__(
+        self,
+        id: int,
+        name: str,
+        kitchen: str,
+        points,
+        fee: float = 0.0,
+        free_from: float = 0.0,
+        priority: int = 0,
+    ):
+        self.id = id
+        self.name = name
+        self.kitchen = kitchen
+        self.fee = fee
+        self.free_from = free_from
+        self.priority = priority
+        self.points = [(float(lat), float(lon)) for lat, lon in points]
+        lats = [lat for lat, _ in self.points]
+        lons = [lon for _, lon in self.points]
+        # (мин. широта, мин. долгота, макс. широта, макс. долгота)
+        self.bounds = (min(lats), min(lons), max(lats), max(lons))
+
+    @classmethod
+    def from_model(cls, zone: DeliveryZone) -> "Zone":
+        return cls(
+            zone.id,
+            zone.name,
+            zone.kitchen or "",
+            zone.polygon,
+            zone.fee or 0.0,
+            zone.free_from or 0.0,
+            zone.priority or 0,
+        )
+
+    def contains(self, lat: float, lon: float) -> bool:
+        """Проверить, лежит ли точка внутри многоугольника зоны."""
+        min_lat, min_lon, max_lat, max_lon = self.bounds
+        if not (min_lat <= lat <= max_lat and min_lon <= lon <= max_lon):
+            return False
+        inside = False
+        points = self.points
+        prev_lat, prev_lon = points[-1]
+        for cur_lat, cur_lon in points:
+            # Ребро пересекает горизонталь точки правее неё
+            if (cur_lat > lat) != (prev_lat > lat) and lon < (prev_lon - cur_lon) * (
+                lat - cur_lat
+            ) / (prev_lat - cur_lat) + cur_lon:
+                inside = not inside
+            prev_lat, prev_lon = cur_lat, cur_lon
+        return inside
+
+    def fee_for(self, total: float) -> float:
+        """Стоимость доставки заказа на сумму total."""
+        if self.free_from and total >= self.free_from:
+            return 0.0
+        return self.fee
+
+
+class ZoneIndex:
+    """
+    Равномерная сетка зон доставки.
+
+    В ячейке хранится список пар (зона, ячейка целиком внутри зоны) по убыванию
+    приоритета зон, поэтому первая подходящая зона и есть результат поиска.
+    """
+
+    def __init__(self, zones: List[Zone], cell_size: float = DELIVERY_GRID_CELL):
+        self.zones = zones
+        self.cell_size = cell_size or self.auto_cell_size(zones)
+        self._cells: Dict[Tuple[int, int], List[Tuple[Zone, bool]]] = {}
+        for zone in sorted(zones, key=lambda z: (-z.priority, z.id)):
+            self._add(zone)
+
+    def __len__(self):
+        return len(self.zones)
+
+    @staticmethod
+    def auto_cell_size(zones: List[Zone]) -> float:
+        """Размер ячейки, при котором типичная зона занимает CELLS_PER_ZONE ячеек в ширину."""
+        extents = [
+            max(max_lat - min_lat, max_lon - min_lon)
+            for min_lat, min_lon, max_lat, max_lon in (zone.bounds for zone in zones)
+        ]
+        extent = statistics.median(extents) if extents else 0.0
+        return extent / CELLS_PER_ZONE if extent > 0 else 0.01
+
+    def _cell(self, lat: float, lon: float) -> Tuple[int, int]:
+        return math.floor(lat / self.cell_size), math.floor(lon / self.cell_size)
+
+    def _boundary_cells(self, zone: Zone) -> set:
+        """Ячейки, через которые проходят рёбра многоугольника зоны."""
+        size = self.cell_size
+        # Запас на погрешность: ребро через угол ячейки задевает и соседние
+        eps = size * 1e-9
+        cells = set()
+        points = zone.points
+        for (a_lat, a_lon), (b_lat, b_lon) in zip(points, points[1:] + points[:1]):
+            low_lat, high_lat = min(a_lat, b_lat), max(a_lat, b_lat)
+            first = math.floor((low_lat - eps) / size)
+            last = math.floor((high_lat + eps) / size)
+            for row in range(first, last + 1):
+                if a_lat == b_lat:
+                    lon_from, lon_to = a_lon, b_lon
+                else:
+                    # Часть ребра внутри полосы широт этой строки ячеек
+                    lat_from = max(low_lat, row * size)
+                    lat_to = min(high_lat, (row + 1) * size)
+                    slope = (b_lon - a_lon) / (b_lat - a_lat)
+                    lon_from = a_lon + (lat_from - a_lat) * slope
+                    lon_to = a_lon + (lat_to - a_lat) * slope
+                if lon_from > lon_to:
+                    lon_from, lon_to = lon_to, lon_from
+                for column in range(
+                    math.floor((lon_from - eps) / size),
+                    math.floor((lon_to + eps) / size) + 1,
+                ):
+                    cells.add((row, column))
+        return cells
+
+    def _add(self, zone: Zone):
+        """Разложить зону по ячейкам: граничные и лежащие внутри целиком."""
+        size = self.cell_size
+        min_lat, min_lon, max_lat, max_lon = zone.bounds
+        first_row, first_column = self._cell(min_lat, min_lon)
+        last_row, last_column = self._cell(max_lat, max_lon)
+        boundary = self._boundary_cells(zone)
+        for row in range(first_row, last_row + 1):
+            for column in range(first_column, last_column + 1):
+                cell = (row, column)
+                if cell in boundary:
+                    self._cells.setdefault(cell, []).append((zone, False))
+                elif zone.contains((row + 0.5) * size, (column + 0.5) * size):
+                    # Граница через ячейку не проходит: вся ячейка внутри, как её центр
+                    self._cells.setdefault(cell, []).append((zone, True))
+
+    def lookup(self, lat: float, lon: float) -> Optional[Zone]:
+        """Найти зону доставки точки.
+
+        :param lat: широта
+        :param lon: долгота
+        :return: зона с наибольшим приоритетом, содержащая точку, или None
+        """
+        for zone, inside in self._cells.get(self._cell(lat, lon), ()):
+            if inside or zone.contains(lat, lon):
+                return zone
+        return None
+
+
+def parse_polygon(text: str) -> List[List[float]]:
+    """Разобрать вершины многоугольника, введённые администратором.
+
+    Вершины разделяются переводом строки или точкой с запятой; в вершине широта
+    и долгота через запятую или пробел, как их копируют из онлайн-карт.
+    :param text: текст с вершинами
+    :return: список пар [широта, долгота]
+    """
+    points = []
+    for part in re.split(r"[;\n]", text):
+        part = part.strip()
+        if not part:
+            continue
+        values = [value for value in re.split(r"[,\s]+", part) if value]
+        if len(values) != 2:
+            raise ValueError(f"Вершина «{part}»: нужны широта и долгота")
+        lat, lon = float(values[0]), float(values[1])
+        if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+            raise ValueError(f"Вершина «{part}»: координаты вне допустимых значений")
+        points.append([lat, lon])
+    if len({tuple(point) for point in points}) < 3:
+        raise ValueError("Многоугольник должен иметь не меньше трёх вершин")
+    return points
+
+
+def format_polygon(points) -> str:
+    """Вершины многоугольника в виде текста для редактирования (по вершине в строке)."""
+    return "\n".join(f"{lat:.6f}, {lon:.6f}" for lat, lon in points or [])
+
+
+@reads
+def load_zones(db: Session) -> List[Zone]:
+    """Получить активные зоны доставки.
+    :param db: SQLAlchemy сессия
+    :return: список зон
+    """
+    zones = db.query(DeliveryZone).filter(DeliveryZone.active.is_(True)).all()
+    return [Zone.from_model(zone) for zone in zones if len(zone.polygon or []) >= 3]
+
+
+@reads
+def get_zones_version(db: Session) -> int:
+    """Получить текущую версию зон доставки.
+    :param db: SQLAlchemy сессия
+    :return: номер версии, 0 если зоны ещё не менялись
+    """
+    return int(get_meta(db, ZONES_VERSION_KEY, "0"))
+
+
+@writes
+def bump_zones_version(db: Session) -> int:
+    """Увеличить версию зон доставки после их изменения (без commit).
+    :param db: SQLAlchemy сессия
+    :return: новый номер версии
+    """
+    version = get_zones_version(db) + 1
+    set_meta(db, ZONES_VERSION_KEY, str(version))
+    return version
+
+
+class _LoadedIndex(NamedTuple):
+    index: ZoneIndex
+    version: int
+    checked: float
+
+
+class DeliveryZones:
+    """
+    Индексы зон доставки ресторанов; индекс ресторана строится при первом поиске.
+    """
+
+    def __init__(self, refresh_interval: float = DELIVERY_ZONES_REFRESH_INTERVAL):
+        self.refresh_interval = refresh_interval
+        self._indexes: Dict[Optional[str], _LoadedIndex] = {}
+        self._lock = threading.Lock()
+
+    def get(self, db: Session) -> ZoneIndex:
+        """Получить индекс зон текущего ресторана, перестроив его, если зоны изменились.
+
+        :param db: SQLAlchemy сессия базы текущего ресторана
+        :return: индекс зон
+        """
+        tenant = current_tenant()
+        loaded = self._indexes.get(tenant)
+        now = time.monotonic()
+        if loaded is not None and now < loaded.checked + self.refresh_interval:
+            return loaded.index
+        with self._lock:
+            loaded = self._indexes.get(tenant)
+            if loaded is not None and now < loaded.checked + self.refresh_interval:
+                return loaded.index
+            version = get_zones_version(db)
+            if loaded is not None and loaded.version == version:
+                index = loaded.index
+            else:
+                started = time.perf_counter()
+                index = ZoneIndex(load_zones(db))
+                logger.info(
+                    f"Delivery zones index built: {len(index)} zones, v{version},"
+                    f" {time.perf_counter() - started:.3f}s"
+                )
+            self._indexes[tenant] = _LoadedIndex(index, version, now)
+            return index
+
+    def lookup(self, db: Session, lat: float, lon: float) -> Optional[Zone]:
+        """Найти зону доставки точки в текущем ресторане (см. ZoneIndex.lookup)."""
+        return self.get(db).lookup(lat, lon)
@@ -0,0 +1,175 @@
+"""
+Слой диспетчеризации обновлений для Telegram-бота TeleFood.
+
+Модуль содержит DispatchTeleBot — TeleBot с цепочкой фильтров, которые получают
+каждое обновление до передачи в хендлеры и могут его отбросить, — и фильтры,
+отбрасывающие повторно доставленные обновления и слишком частые действия одного
+пользователя.
+"""
+
+import logging
+import re
+import threading
+from collections import OrderedDict
+from typing import Dict, Tuple
+
+import telebot
+
+from config import MENU
+from idempotency import TTLCache
+from metrics import metrics
+from ratelimit import TokenBucket
+from transport import non_critical
+
+logger = logging.getLogger("TeleFoodBot")
+
+
+class DispatchTeleBot(telebot.TeleBot):
+    """
+    TeleBot с фильтрами обновлений на входе диспетчера.
+
+    Фильтр — вызываемый объект, принимающий telebot.types.Update и возвращающий
+    False, если обновление нужно пропустить. Отброшенные обновления всё равно
+    сдвигают last_update_id, чтобы Telegram не доставил их снова.
+    """
+
+    def __init__(self, token, **kwargs):
+        super().__init__(token, **kwargs)
+        self.update_filters = []
+        # Функция update -> контекстный менеджер, в котором выполняются хендлеры
+        # обновления (например, выбор базы ресторана отправителя)
+        self.update_context = None
+
+    def add_update_filter(self, update_filter):
+        """Добавить фильтр в конец цепочки."""
+        self.update_filters.append(update_filter)
+
+    def process_new_updates(self, updates):
+        accepted = []
+        for update in updates:
+            if all(update_filter(update) for update_filter in self.update_filters):
+                accepted.append(update)
+            elif update.update_id > self.last_update_id:
+                self.last_update_id = update.update_id
+        if self.update_context is None:
+            super().process_new_updates(accepted)
+            return
+        for update in accepted:
+            with self.update_context(update):
+                super().process_new_updates([update])
+
+
+class DuplicateUpdateFilter:
+    """
+    Фильтр повторных обновлений по update_id и id callback-запроса.
+    """
+
+    def __init__(self, max_size: int = 10000, ttl: float = 600.0):
+        self.seen = TTLCache(max_size, ttl)
+        self.dropped = 0
+
+    def __call__(self, update) -> bool:
+        is_new = self.seen.add(("update", update.update_id))
+        if update.callback_query is not None:
+            # Оба ключа запоминаются всегда, поэтому без короткого замыкания
+            is_new = self.seen.add(("callback", update.callback_query.id)) and is_new
+        if not is_new:
+            self.dropped += 1
+            logger.info(f"Duplicate update {update.update_id} dropped")
+        return is_new
+
+
+_ROUTE_SUFFIX_RE = re.compile(r"_\d+$")
+_MENU_ROUTES = {text: route for route, text in MENU.items()}
+
+
+def parse_limits(spec: str) -> Dict[str, Tuple[float, float]]:
+    """Разобрать лимиты вида "default=2/10,add=4/15".
+
+    :param spec: строка с парами маршрут=скорость/всплеск
+    :return: словарь {маршрут: (токенов в секунду, ёмкость ведра)}
+    """
+    limits = {}
+    for part in spec.split(","):
+        if not part.strip():
+            continue
+        route, value = part.split("=")
+        rate, burst = value.split("/")
+        limits[route.strip()] = (float(rate), float(burst))
+    return limits
+
+
+def update_route(update):
+    """Определить маршрут обновления для выбора лимита.
+
+    :return: кортеж (id пользователя или None, маршрут)
+    """
+    if update.callback_query is not None:
+        data = update.callback_query.data or ""
+        return update.callback_query.from_user.id, _ROUTE_SUFFIX_RE.sub("", data)
+    if update.inline_query is not None:
+        return update.inline_query.from_user.id, "inline"
+    message = update.message
+    if message is not None and message.from_user is not None:
+        text = message.text or ""
+        if text in _MENU_ROUTES:
+            return message.from_user.id, _MENU_ROUTES[text]
+        if text.startswith("/"):
+            return message.from_user.id, text[1:].split()[0].split("@")[0]
+        return message.from_user.id, "message"
+    return None, "default"
+
+
+class FloodControlFilter:
+    """
+    Фильтр, ограничивающий частоту действий каждого пользователя по маршрутам.
+
+    Для каждой пары (пользователь, маршрут) хранится TokenBucket; вёдра неактивных
+    пользователей вытесняются (LRU), так что память ограничена max_users записями
+    на маршрут. Отброшенные callback-запросы получают короткое всплывающее
+    уведомление, чтобы у пользователя не «зависла» кнопка; в базу данных такие
+    обновления не попадают.
+    """
+
+    THROTTLED_TEXT = "Слишком часто, подождите немного…"
+
+    def __init__(self, bot, limits: Dict[str, Tuple[float, float]], max_users=10000):
+        self.bot = bot
+        self.limits = limits
+        self.default_limit = limits.get("default", (2.0, 10.0))
+        self.max_users = max_users
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _bucket(self, user_id, route) -> TokenBucket:
+        """Получить ведро пары (пользователь, маршрут), создав его при необходимости."""
+        key = (user_id, route)
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is not None:
+                self._buckets.move_to_end(key)
+                return bucket
+            rate, burst = self.limits.get(route, self.default_limit)
+            bucket = self._buckets[key] = TokenBucket(rate, burst)
+            if len(self._buckets) > self.max_users * max(len(self.limits), 1):
+                self._buckets.popitem(last=False)
+            return bucket
+
+    def __call__(self, update) -> bool:
+        user_id, route = update_route(update)
+        if user_id is None or self._bucket(user_id, route).try_acquire():
+            return True
+        metrics.incr("dispatch.throttled")
+        # Маршрут берётся из данных обновления, поэтому отдельный счётчик заводится
+        # только для маршрутов с настроенным лимитом
+        label = route if route in self.limits else "other"
+        metrics.incr(f"dispatch.throttled.{label}")
+        if update.callback_query is not None:
+            try:
+                with non_critical():
+                    self.bot.answer_callback_query(
+                        update.callback_query.id, self.THROTTLED_TEXT
+                    )
+            except Exception as e:
+                logger.debug(f"Throttle notice failed: {str(e)}")
+        return False
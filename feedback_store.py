@@ -0,0 +1,142 @@
+"""
+Буферизованная запись обратной связи и отзывов для Telegram-бота TeleFood.
+
+Хендлеры не открывают транзакцию на каждый отзыв: записи добавляются в буфер в памяти,
+а фоновый поток сбрасывает его в базу пакетной вставкой (services.save_feedback_batch)
+раз в flush_interval секунд или при накоплении max_batch записей. При остановке бота
+буфер сбрасывается принудительно. Запись попадает в базу того ресторана, в контексте
+которого она была добавлена (см. database.use_tenant).
+
+Если база отклоняет пакет из-за данных (например, нарушение внешнего ключа), записи
+пакета сохраняются по одной, чтобы ошибочная не задерживала остальные; запись, так
+и не сохранённая за MAX_ATTEMPTS попыток, пишется в лог и удаляется из буфера.
+"""
+
+import datetime
+import logging
+import threading
+from collections import defaultdict
+from typing import List, Optional
+
+from sqlalchemy.exc import DataError, IntegrityError
+
+from database import current_tenant, use_tenant
+from services import save_feedback_batch
+
+logger = logging.getLogger("TeleFoodBot")
+
+# Предел буфера на случай длительной недоступности БД
+MAX_BUFFERED = 10000
+# Попыток сохранить запись, отклонённую базой из-за данных
+MAX_ATTEMPTS = 5
+
+
+class FeedbackBuffer:
+    """
+    Буфер обратной связи с пакетной записью в базу данных.
+    """
+
+    def __init__(
+        self, session_factory, max_batch: int = 100, flush_interval: float = 2.0
+    ):
+        self.session_factory = session_factory
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self._entries = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def append(self, user_id: int, text: str, order_id: Optional[int] = None):
+        """Добавить обратную связь (order_id=None) или отзыв о заказе в буфер."""
+        entry = {
+            "tenant": current_tenant(),
+            "user_id": user_id,
+            "order_id": order_id,
+            "text": text or "",
+            "created_at": datetime.datetime.utcnow(),
+        }
+        with self._lock:
+            self._entries.append(entry)
+            full = len(self._entries) >= self.max_batch
+        if full:
+            self._wakeup.set()
+
+    def flush(self) -> int:
+        """Записать накопленные записи в базу данных.
+
+        :return: количество записанных записей
+        """
+        with self._flush_lock:
+            with self._lock:
+                entries, self._entries = self._entries, []
+            if not entries:
+                return 0
+            batches = defaultdict(list)
+            for entry in entries:
+                batches[entry["tenant"]].append(entry)
+            saved, failed = 0, []
+            for tenant, batch in batches.items():
+                try:
+                    self._save(tenant, batch)
+                    saved += len(batch)
+                except (IntegrityError, DataError) as e:
+                    logger.error(f"Feedback batch rejected: {str(e)}")
+                    for entry in batch:
+                        try:
+                            self._save(tenant, [entry])
+                            saved += 1
+                        except Exception as e:
+                            entry["attempts"] = entry.get("attempts", 0) + 1
+                            if entry["attempts"] < MAX_ATTEMPTS:
+                                failed.append(entry)
+                                continue
+                            logger.error(
+                                f"Feedback dropped after {MAX_ATTEMPTS} attempts: "
+                                f"{entry!r}: {str(e)}"
+                            )
+                except Exception as e:
+                    logger.error(f"Feedback flush error: {str(e)}")
+                    failed.extend(batch)
+            if failed:
+                with self._lock:
+                    # Возвращаем записи в начало буфера для следующей попытки
+                    self._entries = (failed + self._entries)[-MAX_BUFFERED:]
+            return saved
+
+    def _save(self, tenant: Optional[str], batch: List[dict]):
+        """Записать пакет записей ресторана одной транзакцией."""
+        rows = [
+            {
+                key: value
+                for key, value in entry.items()
+                if key not in ("tenant", "attempts")
+            }
+            for entry in batch
+        ]
+        with use_tenant(tenant), self.session_factory() as db:
+            save_feedback_batch(db, rows)
+
+    def start(self):
+        """Запустить фоновый поток периодического сброса."""
+
+        def worker():
+            while not self._stop_event.is_set():
+                self._wakeup.wait(self.flush_interval)
+                self._wakeup.clear()
+                self.flush()
+
+        self._thread = threading.Thread(
+            target=worker, name="feedback-flush", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        """Остановить фоновый поток и сбросить оставшиеся записи."""
+        self._stop_event.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        self.flush()
@@ -0,0 +1,353 @@
+"""
+Прогноз спроса по продуктам и часам для подготовки кухни TeleFood.
+
+История заказов хранится по неделям: для каждой недели с заказами — массив NumPy
+продукт × час недели (168 часов, понедельник 00:00 — нулевой час, время местное).
+Новая неделя добавляет один такой массив и не копирует остальную историю; недели без
+заказов не хранятся. Заказы читаются из базы пачками по возрастанию id и добавляются
+векторно; id последнего учтённого заказа сохраняется вместе с историей, поэтому
+повторный запуск дочитывает только новые заказы.
+
+Прогноз на час недели строится по тем же часам предыдущих полных недель (текущая,
+ещё не завершённая неделя в прогноз не входит):
+- скользящее среднее за последние window недель (method="ma");
+- простое экспоненциальное сглаживание с коэффициентом alpha (method="ses"),
+  вычисляемое как взвешенная сумма по неделям (без рекурсии по времени).
+
+    python forecasting.py --date 2026-10-20 --hour 12
+"""
+
+import argparse
+import datetime
+import os
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from archive import order_batches
+from config import FORECAST_PATH, LOCAL_TIMEZONE
+from content_codec import product_ids
+from database import reads, tenant_file_path
+from models import Product
+
+HOURS_PER_WEEK = 168
+BATCH_SIZE = 20000
+DEFAULT_WINDOW = 4
+DEFAULT_ALPHA = 0.3
+
+# 1970-01-01 — четверг; сдвиг на 3 дня даёт недели, начинающиеся с понедельника
+_EPOCH_WEEKDAY_SHIFT = 3
+_EPOCH = datetime.datetime(1970, 1, 1)
+_SECOND = datetime.timedelta(seconds=1)
+
+
+def week_slot(moment: datetime.date) -> Tuple[int, int]:
+    """Получить номер недели и номер дня недели (0 — понедельник) для даты."""
+    days = (moment - datetime.date(1970, 1, 1)).days + _EPOCH_WEEKDAY_SHIFT
+    return days // 7, days % 7
+
+
+def _local_slots(timestamps: List[int]) -> Tuple[np.ndarray, np.ndarray]:
+    """Векторно вычислить номер недели и час недели для времени заказов.
+
+    :param timestamps: время оформления заказов в секундах Unix (UTC)
+    :return: кортеж массивов (недели, часы недели)
+    """
+    offset = int(LOCAL_TIMEZONE.utcoffset(None).total_seconds())
+    seconds = np.asarray(timestamps, dtype=np.int64) + offset
+    days = seconds // 86400 + _EPOCH_WEEKDAY_SHIFT
+    hours = (seconds % 86400) // 3600
+    return days // 7, (days % 7) * 24 + hours
+
+
+class DemandHistory:
+    """
+    Почасовая история продаж продуктов, пополняемая пачками заказов.
+    """
+
+    def __init__(self, product_ids: Iterable[int] = ()):
+        self.product_ids: List[int] = []
+        self.index: Dict[int, int] = {}
+        # Неделя -> продажи продукт × 168; строки продуктов, появившихся после
+        # этой недели, при чтении дополняются нулями
+        self.chunks: Dict[int, np.ndarray] = {}
+        self.last_order_id = 0
+        self._lock = threading.Lock()
+        self._ensure_products(product_ids)
+
+    @property
+    def first_week(self) -> Optional[int]:
+        return min(self.chunks) if self.chunks else None
+
+    @property
+    def weeks(self) -> int:
+        return max(self.chunks) - min(self.chunks) + 1 if self.chunks else 0
+
+    @property
+    def units(self) -> np.ndarray:
+        """Вся история одним массивом продукт × неделя × час."""
+        first = self.first_week
+        if first is None:
+            return self._dense(0, 0)
+        return self._dense(first, first + self.weeks)
+
+    def _dense(self, start: int, stop: int) -> np.ndarray:
+        """Недели start..stop-1 массивом продукт × неделя × час."""
+        result = np.zeros(
+            (len(self.product_ids), max(0, stop - start), HOURS_PER_WEEK), np.float32
+        )
+        for week, chunk in self.chunks.items():
+            if start <= week < stop:
+                result[: len(chunk), week - start] = chunk
+        return result
+
+    def _ensure_products(self, product_ids: Iterable[int]):
+        """Добавить номера строк для новых продуктов."""
+        for pid in dict.fromkeys(product_ids):
+            if pid not in self.index:
+                self.index[pid] = len(self.product_ids)
+                self.product_ids.append(pid)
+
+    def _chunk(self, week: int) -> np.ndarray:
+        """Массив продаж недели со строками всех известных продуктов."""
+        chunk = self.chunks.get(week)
+        size = len(self.product_ids)
+        if chunk is None:
+            chunk = np.zeros((size, HOURS_PER_WEEK), np.float32)
+        elif len(chunk) < size:
+            chunk = np.pad(chunk, ((0, size - len(chunk)), (0, 0)))
+        self.chunks[week] = chunk
+        return chunk
+
+    def add_orders(self, orders: Iterable[Tuple[int, datetime.datetime, dict]]):
+        """Учесть заказы (id, время оформления, содержимое).
+
+        :param orders: заказы в порядке возрастания id
+        """
+        last_order_id = None
+        timestamps, products, lengths = [], [], []
+        for order_id, created_at, content in orders:
+            last_order_id = order_id
+            if created_at is None:
+                continue
+            items = product_ids(content)
+            products.extend(items)
+            lengths.append(len(items))
+            timestamps.append((created_at - _EPOCH) // _SECOND)
+        if last_order_id is None:
+            return
+        with self._lock:
+            if products:
+                self._ensure_products(products)
+                weeks, slots = _local_slots(timestamps)
+                # Каждая позиция корзины — одна единица продукта в часе заказа
+                owners = np.repeat(np.arange(len(lengths)), lengths)
+                weeks, slots = weeks[owners], slots[owners]
+                rows = np.fromiter(
+                    (self.index[pid] for pid in products), np.int64, len(products)
+                )
+                for week in np.unique(weeks).tolist():
+                    mask = weeks == week
+                    np.add.at(self._chunk(week), (rows[mask], slots[mask]), 1)
+            self.last_order_id = max(self.last_order_id, last_order_id)
+
+    def _weeks_before(
+        self, week: int, now: Optional[datetime.datetime] = None
+    ) -> Tuple[int, int]:
+        """Границы [first, stop) полных недель истории до указанной.
+
+        :param now: текущее время (naive UTC); неделя, которая к этому времени
+            не завершилась, не входит в историю
+        """
+        now = now or datetime.datetime.utcnow()
+        current = int(_local_slots([(now - _EPOCH) // _SECOND])[0][0])
+        first = self.first_week
+        if first is None:
+            return 0, 0
+        return first, max(first, min(week, current))
+
+    def forecast_week(
+        self,
+        week: int,
+        method: str = "ses",
+        window: int = DEFAULT_WINDOW,
+        alpha: float = DEFAULT_ALPHA,
+        now: Optional[datetime.datetime] = None,
+    ) -> np.ndarray:
+        """Спрогнозировать продажи каждого продукта по часам недели.
+
+        Недели истории складываются с весами по одной, поэтому память прогноза —
+        один массив продукт × 168 независимо от длины истории.
+        :param week: номер прогнозируемой недели (см. week_slot)
+        :param method: "ma" — скользящее среднее, "ses" — экспоненциальное сглаживание
+        :param window: число недель для скользящего среднего
+        :param alpha: коэффициент сглаживания (0 < alpha <= 1)
+        :param now: текущее время (naive UTC, по умолчанию — сейчас)
+        :return: массив продукт × 168 с ожидаемым количеством
+        """
+        if method not in ("ma", "ses"):
+            raise ValueError(f"Unknown forecast method: {method}")
+        forecast = np.zeros((len(self.product_ids), HOURS_PER_WEEK), np.float32)
+        with self._lock:
+            first, stop = self._weeks_before(week, now)
+            count = stop - first
+            if count == 0:
+                return forecast
+            if method == "ma":
+                # Только последние window недель
+                first = max(first, stop - window)
+                weights = np.full(stop - first, 1.0 / (stop - first))
+            else:
+                # level_t = alpha * x_t + (1 - alpha) * level_{t-1}, level_0 = x_0
+                powers = (1.0 - alpha) ** np.arange(count - 1, -1, -1)
+                weights = alpha * powers
+                weights[0] = powers[0]
+            for chunk_week, chunk in self.chunks.items():
+                if first <= chunk_week < stop:
+                    forecast[: len(chunk)] += (
+                        np.float32(weights[chunk_week - first]) * chunk
+                    )
+        return forecast
+
+    def forecast_day(self, day: datetime.date, **kwargs) -> np.ndarray:
+        """Спрогнозировать продажи на день: массив продукт × 24 часа."""
+        week, weekday = week_slot(day)
+        forecast = self.forecast_week(week, **kwargs)
+        return forecast[:, weekday * 24 : weekday * 24 + 24]
+
+    def save(self, path: str):
+        """Сохранить историю в файл .npz."""
+        with self._lock:
+            weeks = sorted(self.chunks)
+            chunks = np.zeros(
+                (len(weeks), len(self.product_ids), HOURS_PER_WEEK), np.float32
+            )
+            for i, week in enumerate(weeks):
+                chunk = self.chunks[week]
+                chunks[i, : len(chunk)] = chunk
+            data = dict(
+                product_ids=np.asarray(self.product_ids, dtype=np.int64),
+                weeks=np.asarray(weeks, dtype=np.int64),
+                chunks=chunks,
+                last_order_id=np.int64(self.last_order_id),
+            )
+        tmp_path = f"{path}.tmp.npz"
+        np.savez_compressed(tmp_path, **data)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "DemandHistory":
+        """Загрузить историю, сохранённую методом save."""
+        history = cls()
+        with np.load(path) as data:
+            history.product_ids = data["product_ids"].tolist()
+            history.last_order_id = int(data["last_order_id"])
+            if "chunks" in data:
+                weeks, chunks = data["weeks"].tolist(), data["chunks"]
+            else:
+                # Файл прежнего формата: сплошной массив продукт × неделя × час
+                units, first_week = data["units"], int(data["first_week"])
+                weeks = [
+                    first_week + i for i in range(units.shape[1]) if units[:, i].any()
+                ]
+                chunks = [units[:, week - first_week] for week in weeks]
+        history.index = {pid: i for i, pid in enumerate(history.product_ids)}
+        history.chunks = {
+            week: np.array(chunk, np.float32) for week, chunk in zip(weeks, chunks)
+        }
+        return history
+
+
+@reads
+def update_from_db(db: Session, history: DemandHistory, batch_size=BATCH_SIZE) -> int:
+    """Дочитать заказы с id больше history.last_order_id.
+
+    :param db: SQLAlchemy сессия
+    :param history: история продаж
+    :param batch_size: количество заказов в одной пачке
+    :return: количество учтённых заказов
+    """
+    processed = 0
+    columns = ("id", "created_at", "content")
+    for batch in order_batches(db, columns, history.last_order_id, batch_size):
+        history.add_orders(batch)
+        processed += len(batch)
+    return processed
+
+
+def load_or_build(db: Session, path: Optional[str] = None) -> DemandHistory:
+    """Загрузить историю из файла (или начать с нуля), дочитать новые заказы и сохранить.
+
+    По умолчанию используется файл FORECAST_PATH текущего ресторана.
+    """
+    path = path or tenant_file_path(FORECAST_PATH)
+    history = None
+    if os.path.exists(path):
+        try:
+            history = DemandHistory.load(path)
+        except Exception as e:
+            print(f"[forecasting] Не удалось загрузить {path}: {str(e)}")
+    if history is None:
+        history = DemandHistory()
+    if update_from_db(db, history):
+        history.save(path)
+    return history
+
+
+def get_day_forecast(
+    db: Session, day: datetime.date, method: str = "ses", path: Optional[str] = None
+) -> List[Tuple[str, List[float]]]:
+    """Получить прогноз на день по продуктам каталога.
+
+    :param db: SQLAlchemy сессия
+    :param day: прогнозируемый день (местное время)
+    :param method: "ses" или "ma"
+    :param path: файл истории
+    :return: список (название продукта, 24 значения по часам), по убыванию суммы за день
+    """
+    history = load_or_build(db, path)
+    forecast = history.forecast_day(day, method=method)
+    names = dict(db.query(Product.id, Product.name))
+    rows = [
+        (names[pid], forecast[i].round(1).tolist())
+        for i, pid in enumerate(history.product_ids)
+        if pid in names and forecast[i].sum() > 0
+    ]
+    rows.sort(key=lambda row: -sum(row[1]))
+    return rows
+
+
+if __name__ == "__main__":
+    from database import SessionLocal, init_db
+
+    parser = argparse.ArgumentParser(description="Прогноз спроса TeleFood")
+    parser.add_argument(
+        "--date",
+        type=datetime.date.fromisoformat,
+        default=None,
+        help="прогнозируемый день ГГГГ-ММ-ДД (по умолчанию завтра)",
+    )
+    parser.add_argument("--hour", type=int, default=None, help="только этот час")
+    parser.add_argument("--method", choices=("ses", "ma"), default="ses")
+    parser.add_argument(
+        "--rebuild", action="store_true", help="перечитать всю историю заказов"
+    )
+    parser.add_argument("--path", default=FORECAST_PATH, help="файл истории")
+    args = parser.parse_args()
+
+    init_db()
+    if args.rebuild and os.path.exists(args.path):
+        os.remove(args.path)
+    target = args.date or (
+        datetime.datetime.now(LOCAL_TIMEZONE).date() + datetime.timedelta(days=1)
+    )
+    with SessionLocal() as session:
+        report = get_day_forecast(session, target, args.method, args.path)
+    print(f"Прогноз на {target} ({args.method}):")
+    for name, hourly in report:
+        if args.hour is not None:
+            print(f"{name}: {hourly[args.hour]:.1f} шт. в {args.hour:02d}:00")
+        else:
+            print(f"{name}: {sum(hourly):.1f} шт. за день")
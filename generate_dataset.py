@@ -0,0 +1,339 @@
+"""
+Генератор синтетической базы TeleFood промышленного размера.
+
+Заполняет файл SQLite по схеме models.py: пользователи с корзинами, категории,
+продукты и заказы. Популярность продуктов и активность пользователей подчиняются
+закону Ципфа, время заказов — суточному профилю с пиками в обед и ужин (местное
+время), недельной сезонности и росту числа заказов со временем. Заказы
+генерируются по дням, поэтому id заказов возрастают вместе со временем оформления.
+
+Результат детерминирован: одинаковые параметры и --seed дают одинаковую базу.
+Данные вставляются пакетами executemany, по транзакции на пакет; на время
+загрузки журнал и синхронизация SQLite отключаются.
+
+    python generate_dataset.py --path dataset.db --orders 10000000
+    python reporting.py --backfill  # агрегаты продаж, после копирования в app.db
+"""
+
+import argparse
+import datetime
+import os
+import time
+from typing import Dict, Iterator, List, Optional
+
+import numpy as np
+from sqlalchemy import create_engine
+
+from config import CART_CONTENT_FORMAT, LOCAL_TIMEZONE
+from content_codec import PRODUCTS_KEY, dumps, encode_counts
+from database import init_db
+from models import AppMeta, Cart, Order, Product, ProductType, User
+
+USER_ID_BASE = 100_000_000  # id пользователей похожи на id Telegram
+CATEGORY_NAMES = [
+    "Пицца",
+    "Бургеры",
+    "Суши",
+    "Роллы",
+    "Салаты",
+    "Супы",
+    "Паста",
+    "Завтраки",
+    "Шаурма",
+    "Гарниры",
+    "Десерты",
+    "Напитки",
+]
+REVIEWS = [
+    "Очень вкусно!",
+    "Доставили быстро",
+    "Остыло в дороге",
+    "Всё отлично, спасибо",
+    "Порция могла быть больше",
+]
+# Относительная доля заказов по часам местного времени: пики в обед и ужин
+HOURLY_PROFILE = np.array(
+    [1, 0.5, 0.3, 0.2, 0.2, 0.3, 1, 2, 3, 3, 4, 8]  # 00–11
+    + [12, 11, 6, 4, 4, 6, 10, 12, 10, 6, 3, 2]  # 12–23
+)
+# Относительная доля заказов по дням недели (0 — понедельник)
+WEEKDAY_PROFILE = np.array([0.9, 0.9, 0.95, 1.0, 1.2, 1.3, 1.1])
+REVIEW_SHARE = 0.03
+PAID_SHARE = 0.7
+FILLED_CART_SHARE = 0.05
+
+LOAD_PRAGMAS = (
+    "PRAGMA journal_mode=OFF",
+    "PRAGMA synchronous=OFF",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-262144",
+)
+RESTORE_PRAGMAS = ("PRAGMA journal_mode=WAL", "PRAGMA synchronous=NORMAL")
+
+
+def zipf_weights(size: int, exponent: float) -> np.ndarray:
+    """Получить вероятности рангов 1..size по закону Ципфа."""
+    weights = 1.0 / np.arange(1, size + 1) ** exponent
+    return weights / weights.sum()
+
+
+def _insert_sql(table, columns: List[str]) -> str:
+    placeholders = ", ".join("?" for _ in columns)
+    names = ", ".join(columns)
+    return f"INSERT INTO {table.__tablename__} ({names}) VALUES ({placeholders})"
+
+
+class DatasetGenerator:
+    """
+    Генератор синтетических данных с общим генератором случайных чисел.
+    """
+
+    def __init__(
+        self,
+        users: int,
+        products: int,
+        categories: int,
+        orders: int,
+        days: int,
+        start: datetime.date,
+        seed: int = 42,
+        zipf: float = 1.1,
+        compact: Optional[bool] = None,
+    ):
+        self.users = users
+        self.products = products
+        self.categories = categories
+        self.orders = orders
+        self.days = days
+        self.start = start
+        self.zipf = zipf
+        if compact is None:
+            compact = CART_CONTENT_FORMAT == "compact"
+        self.compact = compact
+        self.rng = np.random.default_rng(seed)
+        # Ранг популярности не связан с id: самый популярный продукт — случайный
+        self.product_ids = self.rng.permutation(products) + 1
+        self.product_weights = zipf_weights(products, zipf)
+        self.user_ids = self.rng.permutation(users) + USER_ID_BASE
+        self.user_weights = zipf_weights(users, zipf * 0.6)
+        self.costs = np.round(self.rng.uniform(90, 1500, products), -1)
+
+    def category_rows(self) -> List[tuple]:
+        names = [
+            CATEGORY_NAMES[i % len(CATEGORY_NAMES)]
+            + ("" if i < len(CATEGORY_NAMES) else f" {i // len(CATEGORY_NAMES) + 1}")
+            for i in range(self.categories)
+        ]
+        return [(i + 1, name, "") for i, name in enumerate(names)]
+
+    def product_rows(self) -> List[tuple]:
+        types = self.rng.integers(1, self.categories + 1, self.products)
+        return [
+            (pid, f"Блюдо {pid}", float(self.costs[pid - 1]), int(types[pid - 1]))
+            + ("", "", "", "")
+            for pid in range(1, self.products + 1)
+        ]
+
+    def user_rows(self, chunk_size: int) -> Iterator[List[tuple]]:
+        for first in range(1, self.users + 1, chunk_size):
+            last = min(first + chunk_size, self.users + 1)
+            yield [(USER_ID_BASE + i, f"User{i}", "") for i in range(first, last)]
+
+    def cart_rows(self, chunk_size: int) -> Iterator[List[tuple]]:
+        empty = dumps(encode_counts({}, self.compact))
+        for first in range(1, self.users + 1, chunk_size):
+            last = min(first + chunk_size, self.users + 1)
+            filled = (self.rng.random(last - first) < FILLED_CART_SHARE).tolist()
+            contents = iter(self.encoded_baskets(sum(filled), 5))
+            yield [
+                (
+                    cart_id,
+                    USER_ID_BASE + cart_id,
+                    next(contents) if is_filled else empty,
+                )
+                for cart_id, is_filled in zip(range(first, last), filled)
+            ]
+
+    def encoded_baskets(self, count: int, max_size: int) -> List[str]:
+        """Сгенерировать count корзин из 1..max_size позиций в виде JSON."""
+        sizes = self.rng.integers(1, max_size + 1, count).tolist()
+        items = self.rng.choice(
+            self.product_ids, sum(sizes), p=self.product_weights
+        ).tolist()
+        contents = []
+        position = 0
+        for size in sizes:
+            basket = items[position : position + size]
+            position += size
+            if self.compact:
+                counts: Dict[int, int] = {}
+                for pid in basket:
+                    counts[pid] = counts.get(pid, 0) + 1
+                contents.append(dumps(encode_counts(counts, compact=True)))
+            else:
+                contents.append(dumps({PRODUCTS_KEY: basket}))
+        return contents
+
+    def orders_per_day(self) -> np.ndarray:
+        """Распределить заказы по дням: недельная сезонность и рост на 50% за период."""
+        weekday = (np.arange(self.days) + self.start.weekday()) % 7
+        weights = WEEKDAY_PROFILE[weekday] * np.linspace(1.0, 1.5, self.days)
+        return self.rng.multinomial(self.orders, weights / weights.sum())
+
+    def order_rows(self, chunk_size: int) -> Iterator[List[tuple]]:
+        """Сгенерировать заказы пакетами по дням в порядке времени оформления."""
+        per_day = self.orders_per_day()
+        hour_weights = HOURLY_PROFILE / HOURLY_PROFILE.sum()
+        offset = int(LOCAL_TIMEZONE.utcoffset(None).total_seconds())
+        start = np.datetime64(self.start, "s") - np.timedelta64(offset, "s")
+        order_id = 1
+        day = 0
+        while day < self.days:
+            # Дни пакета: набираем до chunk_size заказов
+            last_day = day + 1
+            while last_day < self.days and per_day[day:last_day].sum() < chunk_size:
+                last_day += 1
+            counts = per_day[day:last_day]
+            total = int(counts.sum())
+            if total:
+                order_day = np.repeat(np.arange(day, last_day), counts)
+                seconds = (
+                    order_day * 86400
+                    + self.rng.choice(24, total, p=hour_weights) * 3600
+                    + self.rng.integers(0, 3600, total)
+                )
+                seconds.sort()
+                created = np.datetime_as_string(start + seconds.astype("m8[s]"))
+                users = self.rng.choice(self.user_ids, total, p=self.user_weights)
+                contents = self.encoded_baskets(total, 6)
+                has_review = self.rng.random(total) < REVIEW_SHARE
+                review_texts = self.rng.integers(0, len(REVIEWS), total)
+                reviews = np.where(has_review, np.array(REVIEWS)[review_texts], "")
+                paid = self.rng.random(total) < PAID_SHARE
+                rows = list(
+                    zip(
+                        range(order_id, order_id + total),
+                        contents,
+                        np.char.replace(created, "T", " ").tolist(),
+                        reviews.tolist(),
+                        users.tolist(),
+                        paid.tolist(),
+                        [""] * total,
+                    )
+                )
+                order_id += total
+                yield rows
+            day = last_day
+
+
+def generate(path: str, generator: DatasetGenerator, chunk_size: int = 100_000):
+    """Создать базу в файле path и заполнить её данными генератора.
+
+    :param path: путь к новому файлу SQLite
+    :param generator: генератор данных
+    :param chunk_size: количество строк в одной транзакции
+    :return: словарь {таблица: количество вставленных строк}
+    """
+    engine = create_engine(f"sqlite:///{path}", echo=False)
+    init_db(engine)
+    inserted = {}
+    tables = [
+        (ProductType, ["id", "name", "description"], [generator.category_rows()]),
+        (
+            Product,
+            ["id", "name", "cost", "product_type"]
+            + ["description", "image_path", "image_hash", "photo_file_id"],
+            [generator.product_rows()],
+        ),
+        (User, ["id", "name", "description"], generator.user_rows(chunk_size)),
+        (Cart, ["id", "user_id", "content"], generator.cart_rows(chunk_size)),
+        (
+            Order,
+            ["id", "content", "created_at", "review", "user_id", "pay_status"]
+            + ["description"],
+            generator.order_rows(chunk_size),
+        ),
+    ]
+    try:
+        with engine.connect() as conn:
+            for pragma in LOAD_PRAGMAS:
+                conn.exec_driver_sql(pragma)
+            for table, columns, chunks in tables:
+                sql = _insert_sql(table, columns)
+                started = time.perf_counter()
+                count = 0
+                for rows in chunks:
+                    conn.exec_driver_sql(sql, rows)
+                    conn.commit()
+                    count += len(rows)
+                inserted[table.__tablename__] = count
+                print(
+                    f"[generate_dataset] {table.__tablename__}: {count} строк "
+                    f"за {time.perf_counter() - started:.1f} с"
+                )
+            conn.exec_driver_sql(
+                _insert_sql(AppMeta, ["key", "value"]), [("catalog_version", "1")]
+            )
+            conn.commit()
+            for pragma in RESTORE_PRAGMAS:
+                conn.exec_driver_sql(pragma)
+    finally:
+        engine.dispose()
+    return inserted
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Генератор синтетической базы TeleFood"
+    )
+    parser.add_argument("--path", default="dataset.db", help="файл создаваемой базы")
+    parser.add_argument("--users", type=int, default=1_000_000)
+    parser.add_argument("--products", type=int, default=20_000)
+    parser.add_argument("--categories", type=int, default=40)
+    parser.add_argument("--orders", type=int, default=10_000_000)
+    parser.add_argument("--days", type=int, default=730, help="период заказов в днях")
+    parser.add_argument(
+        "--start",
+        type=datetime.date.fromisoformat,
+        default=datetime.date(2024, 1, 1),
+        help="первый день заказов ГГГГ-ММ-ДД",
+    )
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument(
+        "--zipf", type=float, default=1.1, help="показатель закона Ципфа"
+    )
+    parser.add_argument("--chunk-size", type=int, default=100_000)
+    parser.add_argument(
+        "--format",
+        choices=("list", "compact"),
+        default=CART_CONTENT_FORMAT,
+        help="формат содержимого корзин и заказов",
+    )
+    parser.add_argument(
+        "--force", action="store_true", help="перезаписать существующий файл"
+    )
+    args = parser.parse_args()
+
+    if os.path.exists(args.path):
+        if not args.force:
+            parser.error(f"{args.path} уже существует; используйте --force")
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(args.path + suffix):
+                os.remove(args.path + suffix)
+    started_at = time.perf_counter()
+    generate(
+        args.path,
+        DatasetGenerator(
+            users=args.users,
+            products=args.products,
+            categories=args.categories,
+            orders=args.orders,
+            days=args.days,
+            start=args.start,
+            seed=args.seed,
+            zipf=args.zipf,
+            compact=args.format == "compact",
+        ),
+        args.chunk_size,
+    )
+    print(f"Готово за {time.perf_counter() - started_at:.1f} с: {args.path}")
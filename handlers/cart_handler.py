@@ -5,18 +5,139 @@
 включая отображение содержимого корзины, очистку корзины, оформление заказа и добавление товаров.
 """
 
-from collections import Counter
+import logging
+import threading
+import time
 
 from telebot import types
+from telebot.apihelper import ApiTelegramException
 
-from database import SessionLocal
+from config import (
+    CART_LIVE_SUMMARY,
+    CART_REMINDER_DELAY,
+    CART_SUMMARY_DEBOUNCE,
+    CHECKOUT_LOCK_TTL,
+    MENU,
+    REMINDER_RATE,
+    USER_STATE_TTL,
+)
+from content_codec import product_counts
+from database import SessionLocal, current_tenant, use_tenant
+from idempotency import InFlightLock
 from services import (
     add_product_to_cart,
     checkout_cart,
+    clear_cart,
     create_user_if_not_exists,
-    get_all_categories,
     get_cart,
+    get_cart_summary,
+    get_products_by_ids,
 )
+from transport import non_critical
+
+logger = logging.getLogger("TeleFoodBot")
+
+# Имя задания планировщика (scheduler.Scheduler) для напоминаний о корзине
+CART_REMINDER_JOB = "cart_reminder"
+
+
+def cart_reminder_key(user_id: int) -> str:
+    """Ключ напоминания о корзине пользователя в текущем ресторане."""
+    return f"cart_reminder:{current_tenant() or ''}:{user_id}"
+
+
+def cart_actions_markup():
+    """Кнопки оформления и очистки корзины."""
+    markup = types.InlineKeyboardMarkup()
+    markup.add(
+        types.InlineKeyboardButton("✅ Оформить заказ", callback_data="checkout"),
+        types.InlineKeyboardButton("🗑 Очистить корзину", callback_data="clear_cart"),
+    )
+    return markup
+
+
+class LiveCartSummary:
+    """
+    Одно закреплённое сообщение-сводка корзины на чат, обновляемое редактированием.
+
+    Нажатия в пределах окна debounce объединяются в одно редактирование: таймер
+    заводится при первом нажатии, а при срабатывании читает актуальное состояние корзины.
+    """
+
+    def __init__(self, bot, debounce: float = 1.0):
+        self.bot = bot
+        self.debounce = debounce
+        self._message_ids = {}
+        self._timers = {}
+        self._lock = threading.Lock()
+
+    def schedule(self, chat_id: int, user_id: int):
+        """Запланировать обновление сводки (повторные вызовы в окне игнорируются)."""
+        with self._lock:
+            if chat_id in self._timers:
+                return
+            # Таймер срабатывает в другом потоке — передаём ему ресторан пользователя
+            timer = threading.Timer(
+                self.debounce, self.flush, args=(chat_id, user_id, current_tenant())
+            )
+            timer.daemon = True
+            self._timers[chat_id] = timer
+        timer.start()
+
+    def flush_pending(self):
+        """Немедленно выполнить все запланированные обновления (при остановке бота)."""
+        with self._lock:
+            timers = list(self._timers.values())
+        for timer in timers:
+            timer.cancel()
+            self.flush(*timer.args)
+
+    def flush(self, chat_id: int, user_id: int, tenant=None):
+        """Отредактировать сводку или отправить новую, если редактировать нечего."""
+        with self._lock:
+            self._timers.pop(chat_id, None)
+            message_id = self._message_ids.get(chat_id)
+        try:
+            with use_tenant(tenant), SessionLocal() as db:
+                count, total = get_cart_summary(db, user_id)
+            if count:
+                text = f"🛒 <b>Корзина:</b> {count} шт. на {total:.2f}₽"
+                markup = cart_actions_markup()
+            else:
+                text, markup = "🛒 Корзина пуста.", None
+            with non_critical():
+                self._publish(chat_id, message_id, text, markup)
+        except Exception as e:
+            logger.error(f"Cart summary update error for chat {chat_id}: {str(e)}")
+
+    def _publish(self, chat_id, message_id, text, markup):
+        """Отредактировать существующую сводку или отправить и закрепить новую."""
+        if message_id is not None:
+            try:
+                self.bot.edit_message_text(
+                    text,
+                    chat_id,
+                    message_id,
+                    parse_mode="HTML",
+                    reply_markup=markup,
+                )
+                return
+            except ApiTelegramException as e:
+                if "message is not modified" in e.description:
+                    return
+                # Сообщение удалено или слишком старое — отправляем новое
+                message_id = None
+        message = self.bot.send_message(
+            chat_id, text, parse_mode="HTML", reply_markup=markup
+        )
+        with self._lock:
+            self._message_ids[chat_id] = message.message_id
+        try:
+            self.bot.pin_chat_message(
+                chat_id, message.message_id, disable_notification=True
+            )
+        except ApiTelegramException:
+            pass
 
 
 class CartHandler:
@@ -24,9 +145,39 @@ class CartHandler:
     Обработчик корзины: показывает корзину, оформляет и очищает её, добавляет товары.
     """
 
-    def __init__(self, bot, main_menu):
+    def __init__(
+        self,
+        bot,
+        main_menu,
+        recommender=None,
+        scheduler=None,
+        delivery_zones=None,
+        promotions=None,
+        notifier=None,
+    ):
         self.bot = bot
         self.main_menu = main_menu
+        # Модель совместных покупок (recommendations.CooccurrenceModel) или None
+        self.recommender = recommender
+        # Планировщик напоминаний о брошенной корзине или None
+        self.scheduler = scheduler if CART_REMINDER_DELAY > 0 else None
+        if self.scheduler is not None:
+            self.scheduler.register(CART_REMINDER_JOB, self.remind_abandoned_cart)
+        # Зоны доставки ресторанов (delivery.DeliveryZones) или None — без доставки
+        self.delivery_zones = delivery_zones
+        # Акции ресторанов (promotions.Promotions) или None — цены без скидок
+        self.promotions = promotions
+        # Уведомления персонала (notifications.StaffNotifier) или None
+        self.notifier = notifier
+        # Ближайшее время отправки следующего напоминания (time.monotonic)
+        self._next_reminder = 0.0
+        self.checkout_lock = InFlightLock(CHECKOUT_LOCK_TTL)
+        # Чат -> момент (time.monotonic), до которого ждём местоположение для заказа
+        self._awaiting_location = {}
+        self._location_lock = threading.Lock()
+        self.live_summary = (
+            LiveCartSummary(bot, CART_SUMMARY_DEBOUNCE) if CART_LIVE_SUMMARY else None
+        )
 
     def show_cart(self, message):
         """Отображает содержимое корзины пользователя."""
@@ -35,50 +186,91 @@ class CartHandler:
                 db, message.from_user.id, message.from_user.first_name
             )
             cart = get_cart(db, user_id)
-            if not cart or not cart.content.get("products"):
+            counts = product_counts(cart.content if cart else None)
+            if not counts:
                 self.bot.send_message(
                     message.chat.id, "Корзина пуста.", reply_markup=self.main_menu
                 )
                 return
-            counts = Counter(cart.content["products"])
             text = "<b>Корзина:</b>\n"
-            total = 0
+            products = get_products_by_ids(db, counts)
+            priced = self.price_cart(db, counts)
+            total = priced.total if priced else 0
             for pid, count in counts.items():
-                prod = db.query(get_all_categories.__globals__["Product"]).get(pid)
+                prod = products.get(pid)
                 if prod:
                     subtotal = prod.cost * count
-                    text += f"{prod.name} x{count} = {subtotal:.2f}₽\n"
-                    total += subtotal
+                    text += f"{prod.name} x{count} = {subtotal:.2f}₽"
+                    discount = priced.line_discounts.get(pid) if priced else None
+                    if discount:
+                        text += f" (−{discount:.2f}₽)"
+                    text += "\n"
+                    if priced is None:
+                        total += subtotal
+            if priced and priced.applied:
+                for promo in priced.applied:
+                    text += f"\n🏷 {promo.name}: −{promo.amount:.2f}₽"
+                text += "\n"
             text += f"\n<b>Итого: {total:.2f}₽</b>"
-            markup = types.InlineKeyboardMarkup()
-            markup.add(
-                types.InlineKeyboardButton(
-                    "✅ Оформить заказ", callback_data="checkout"
-                ),
-                types.InlineKeyboardButton(
-                    "🗑 Очистить корзину", callback_data="clear_cart"
-                ),
-            )
+            markup = cart_actions_markup()
+            suggestions = self.get_suggestions(db, counts)
+            if suggestions:
+                names = ", ".join(prod.name for prod in suggestions)
+                text += f"\n\nС этим также заказывают: {names}"
+                for prod in suggestions:
+                    markup.add(
+                        types.InlineKeyboardButton(
+                            f"➕ {prod.name}", callback_data=f"add_{prod.id}"
+                        )
+                    )
             self.bot.send_message(
-                message.chat.id, text, parse_mode="HTML", reply_markup=markup
+                message.chat.id,
+                text,
+                parse_mode="HTML",
+                reply_markup=markup,
             )
 
+    def price_cart(self, db, counts):
+        """Рассчитывает корзину с учётом акций (None, если акции не подключены)."""
+        if self.promotions is None:
+            return None
+        return self.promotions.price(db, counts)
+
+    def cart_total(self, db, user_id):
+        """Возвращает сумму корзины пользователя с учётом акций."""
+        if self.promotions is None:
+            return get_cart_summary(db, user_id)[1]
+        cart = get_cart(db, user_id)
+        return self.price_cart(db, product_counts(cart.content if cart else None)).total
+
+    def get_suggestions(self, db, counts, limit=3):
+        """Возвращает продукты, которые часто заказывают вместе с содержимым корзины."""
+        if self.recommender is None or current_tenant() is not None:
+            # Модель строится по заказам основной базы
+            return []
+        product_ids = self.recommender.recommend(counts.keys(), limit)
+        if not product_ids:
+            return []
+        products = get_products_by_ids(db, product_ids)
+        return [products[pid] for pid in product_ids if pid in products]
+
     def clear_cart(self, call):
         """Очищает корзину пользователя."""
         with SessionLocal() as db:
             user_id, user_name = create_user_if_not_exists(
                 db, call.from_user.id, call.from_user.first_name
             )
-            cart = get_cart(db, user_id)
-            if cart:
-                cart.content = {"products": []}
-                db.commit()
+            clear_cart(db, user_id)
+        if self.scheduler is not None:
+            self.scheduler.cancel(cart_reminder_key(user_id))
         self.bot.answer_callback_query(call.id, "Корзина очищена.")
+        if self.live_summary and call.message:
+            self.live_summary.schedule(call.message.chat.id, call.from_user.id)
         self.bot.send_message(
             call.message.chat.id, "Корзина очищена.", reply_markup=self.main_menu
         )
 
-    def ask_payment_method(self, call, order_id):
+    def ask_payment_method(self, chat_id, order_id):
         """Отображает выбор способа оплаты с номером заказа."""
         markup = types.InlineKeyboardMarkup()
         markup.add(
@@ -90,27 +282,157 @@ class CartHandler:
             ),
         )
         self.bot.send_message(
-            call.message.chat.id,
+            chat_id,
             f"Выберите способ оплаты для заказа №{order_id}:",
             reply_markup=markup,
         )
 
-    def checkout(self, call):
-        """Оформляет заказ из корзины пользователя и предлагает выбрать способ оплаты."""
+    def ask_location(self, chat_id):
+        """Просит прислать местоположение для выбора зоны доставки."""
+        markup = types.ReplyKeyboardMarkup(resize_keyboard=True, one_time_keyboard=True)
+        markup.add(
+            types.KeyboardButton("📍 Отправить местоположение", request_location=True)
+        )
+        markup.add(MENU["cart"])
+        self.bot.send_message(
+            chat_id,
+            "Пришлите местоположение доставки — по нему определим кухню"
+            " и стоимость доставки.",
+            reply_markup=markup,
+        )
+
+    def delivery_zones_enabled(self) -> bool:
+        """Заданы ли зоны доставки у ресторана текущего потока."""
+        if self.delivery_zones is None:
+            return False
         with SessionLocal() as db:
-            user_id, user_name = create_user_if_not_exists(
-                db, call.from_user.id, call.from_user.first_name
-            )
-            order = checkout_cart(db, user_id)
-        if order:
+            return len(self.delivery_zones.get(db)) > 0
+
+    def checkout(self, call):
+        """Оформляет заказ из корзины пользователя и предлагает выбрать способ оплаты.
+
+        Если у ресторана заданы зоны доставки, сначала запрашивает местоположение:
+        заказ оформляется, когда оно придёт (см. checkout_at_location).
+        """
+        if self.delivery_zones_enabled():
+            self.bot.answer_callback_query(call.id)
+            self.expect_location(call.message.chat.id)
+            self.ask_location(call.message.chat.id)
+            return
+        self.place_order(call.message.chat.id, call.from_user, call_id=call.id)
+
+    def expect_location(self, chat_id):
+        """Запоминает, что чат ждёт местоположение для заказа (USER_STATE_TTL секунд)."""
+        now = time.monotonic()
+        with self._location_lock:
+            # Просроченные ожидания удаляются при добавлении нового
+            expired = [k for k, d in self._awaiting_location.items() if d <= now]
+            for key in expired:
+                del self._awaiting_location[key]
+            self._awaiting_location[chat_id] = now + USER_STATE_TTL
+
+    def awaits_location(self, chat_id) -> bool:
+        """Ждёт ли чат местоположение для оформления заказа."""
+        with self._location_lock:
+            deadline = self._awaiting_location.get(chat_id)
+        return deadline is not None and deadline > time.monotonic()
+
+    def checkout_at_location(self, message):
+        """Оформляет заказ с доставкой в присланное пользователем местоположение.
+
+        Местоположение принимается, только если его запросило оформление заказа
+        (см. checkout) не раньше USER_STATE_TTL секунд назад.
+        """
+        if self.delivery_zones is None:
+            return
+        chat_id = message.chat.id
+        if not self.awaits_location(chat_id):
             self.bot.send_message(
-                call.message.chat.id,
-                f"✅ Заказ №{order.id} оформлен!",
+                chat_id,
+                "Чтобы оформить заказ с доставкой, откройте корзину"
+                " и нажмите «✅ Оформить заказ».",
                 reply_markup=self.main_menu,
             )
-            self.ask_payment_method(call, order.id)
+            return
+        location = message.location
+        order = self.place_order(
+            chat_id,
+            message.from_user,
+            location=(location.latitude, location.longitude),
+        )
+        if order is not None:
+            with self._location_lock:
+                self._awaiting_location.pop(chat_id, None)
+
+    def place_order(self, chat_id, from_user, location=None, call_id=None):
+        """Оформляет заказ из корзины пользователя.
+
+        :param chat_id: чат для ответа
+        :param from_user: пользователь Telegram
+        :param location: пара (широта, долгота) для доставки или None
+        :param call_id: id callback-запроса, на который нужно ответить при повторном нажатии
+        :return: оформленный заказ или None
+        """
+        if not self.checkout_lock.acquire(from_user.id):
+            # Повторное нажатие, пока первое оформление ещё выполняется
+            if call_id is not None:
+                self.bot.answer_callback_query(call_id, "Заказ уже оформляется…")
+            return None
+        order = zone = None
+        try:
+            with SessionLocal() as db:
+                user_id, user_name = create_user_if_not_exists(
+                    db, from_user.id, from_user.first_name
+                )
+                delivery = None
+                if location is not None and self.delivery_zones is not None:
+                    zone = self.delivery_zones.lookup(db, *location)
+                    if zone is not None:
+                        total = self.cart_total(db, user_id)
+                        delivery = {
+                            "latitude": location[0],
+                            "longitude": location[1],
+                            "delivery_zone_id": zone.id,
+                            "kitchen": zone.kitchen,
+                            "delivery_fee": zone.fee_for(total),
+                        }
+                if location is None or zone is not None:
+                    order = checkout_cart(db, user_id, delivery, self.promotions)
+        finally:
+            # Короткая задержка гасит двойное нажатие, пришедшее сразу после оформления
+            self.checkout_lock.release(from_user.id, linger=2.0)
+        if location is not None and zone is None:
+            self.bot.send_message(
+                chat_id,
+                "К сожалению, по этому адресу мы не доставляем."
+                " Пришлите другое местоположение.",
+            )
+            return None
+        if self.live_summary:
+            self.live_summary.schedule(chat_id, from_user.id)
+        if order and self.scheduler is not None:
+            self.scheduler.cancel(cart_reminder_key(user_id))
+        if order and self.notifier is not None:
+            self.notifier.order_created(order.id)
+        if order and self.recommender is not None and current_tenant() is None:
+            self.recommender.add_order(order.id, list(product_counts(order.content)))
+        if order:
+            text = f"✅ Заказ №{order.id} оформлен!"
+            if order.discount:
+                text += f"\nСкидка по акциям: {order.discount:.2f}₽"
+            if zone is not None:
+                fee = (
+                    f"{order.delivery_fee:.2f}₽" if order.delivery_fee else "бесплатно"
+                )
+                text += f"\nДоставка: {fee} ({zone.name}"
+                text += f", кухня {zone.kitchen})" if zone.kitchen else ")"
+            self.bot.send_message(chat_id, text, reply_markup=self.main_menu)
+            self.ask_payment_method(chat_id, order.id)
         else:
-            self.bot.send_message(call.message.chat.id, "Ошибка при оформлении заказа.")
+            self.bot.send_message(
+                chat_id, "Ошибка при оформлении заказа.", reply_markup=self.main_menu
+            )
+        return order
 
     def add_to_cart(self, call):
         """Добавляет товар в корзину пользователя."""
@@ -120,12 +442,70 @@ class CartHandler:
                 db, call.from_user.id, call.from_user.first_name
             )
             add_product_to_cart(db, user_id, product_id)
+        if self.scheduler is not None:
+            # Каждое добавление откладывает напоминание (чат с ботом — id пользователя)
+            self.scheduler.schedule(
+                cart_reminder_key(user_id),
+                CART_REMINDER_DELAY,
+                CART_REMINDER_JOB,
+                {"chat_id": call.from_user.id, "user_id": user_id},
+            )
         self.bot.answer_callback_query(call.id, "Добавлено в корзину.")
+        if call.message is None:
+            # Кнопка из inline-результата поиска: чата с ботом может не быть
+            return
+        if self.live_summary:
+            # Вместо нового сообщения — отложенное редактирование сводки
+            self.live_summary.schedule(call.message.chat.id, call.from_user.id)
+            return
         self.bot.send_message(
             call.message.chat.id,
             "Добавлено. Продолжайте выбор или откройте 🛒 Корзину.",
         )
 
+    def reminder_delay(self) -> float:
+        """Занимает ближайшее окно отправки напоминания с учётом REMINDER_RATE.
+
+        Вызывается только из потока планировщика.
+        :return: задержка в секундах до занятого окна (0 — отправлять сейчас)
+        """
+        now = time.monotonic()
+        slot = max(now, self._next_reminder)
+        self._next_reminder = slot + 1.0 / REMINDER_RATE
+        return slot - now
+
+    def remind_abandoned_cart(self, chat_id, user_id):
+        """Напоминает о товарах, оставленных в корзине (задание планировщика).
+
+        :return: задержка повтора в секундах или None, если задание выполнено
+        """
+        delay = self.reminder_delay()
+        if delay > 0:
+            # Напоминания сверх лимита разносятся по свободным окнам отправки
+            return delay
+        with SessionLocal() as db:
+            count, total = get_cart_summary(db, user_id)
+        if not count:
+            return None
+        try:
+            with non_critical():
+                self.bot.send_message(
+                    chat_id,
+                    f"🛒 В корзине осталось {count} шт. на {total:.2f}₽. "
+                    "Оформить заказ?",
+                    reply_markup=cart_actions_markup(),
+                )
+        except ApiTelegramException as e:
+            if e.error_code == 429:
+                retry_after = (e.result_json.get("parameters") or {}).get(
+                    "retry_after", 1
+                )
+                self._next_reminder = time.monotonic() + retry_after
+                return retry_after
+            # Бот заблокирован или чат не найден — напоминание не нужно
+            logger.info(f"Cart reminder to {chat_id} skipped: {e.description}")
+        return None
+
     def pay_online(self, call):
         """Обрабатывает выбор онлайн-оплаты для заказа."""
         order_id = call.data.split("_")[-1]
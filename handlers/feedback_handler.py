@@ -7,8 +7,10 @@
 
 from telebot import types
 
-from database import SessionLocal
-from services import add_review_to_order
+from config import USER_STATE_TTL
+
+# Имя задания планировщика (scheduler.Scheduler) для сброса незавершённого ввода
+STATE_EXPIRY_JOB = "state_expiry"
 
 
 class FeedbackHandler:
@@ -16,22 +18,51 @@ class FeedbackHandler:
     Обработчик обратной связи и отзывов по заказам.
     """
 
-    def __init__(self, bot, main_menu, user_states):
+    def __init__(self, bot, main_menu, user_states, feedback_buffer, scheduler=None):
         self.bot = bot
         self.main_menu = main_menu
         self.user_states = user_states
+        self.feedback_buffer = feedback_buffer
+        self.scheduler = scheduler
+        if scheduler is not None:
+            scheduler.register(STATE_EXPIRY_JOB, self.expire_state)
+
+    def set_state(self, chat_id, state):
+        """Запоминает ожидаемый ввод пользователя и планирует его сброс."""
+        self.user_states[chat_id] = state
+        if self.scheduler is not None:
+            # Состояния живут только в памяти, поэтому и таймер не сохраняется
+            self.scheduler.schedule(
+                f"state:{chat_id}",
+                USER_STATE_TTL,
+                STATE_EXPIRY_JOB,
+                {"chat_id": chat_id, "state": state},
+                persist=False,
+            )
+
+    def pop_state(self, chat_id):
+        """Забирает ожидаемый ввод пользователя (None, если он уже сброшен)
+        и отменяет его сброс."""
+        if self.scheduler is not None:
+            self.scheduler.cancel(f"state:{chat_id}")
+        return self.user_states.pop(chat_id, None)
+
+    def expire_state(self, chat_id, state):
+        """Сбрасывает незавершённый ввод, если он не менялся (задание планировщика)."""
+        if self.user_states.get(chat_id) == state:
+            self.user_states.pop(chat_id, None)
 
     def handle_feedback(self, message):
         """Запрашивает у пользователя текст обратной связи."""
         self.bot.send_message(
             message.chat.id, "Напишите ваш отзыв. Он будет отправлен администратору."
         )
-        self.user_states[message.chat.id] = "awaiting_feedback"
+        self.set_state(message.chat.id, "awaiting_feedback")
 
     def save_feedback(self, message):
         """Сохраняет обратную связь пользователя."""
-        text = message.text
-        self.user_states.pop(message.chat.id)
+        self.pop_state(message.chat.id)
+        self.feedback_buffer.append(message.from_user.id, message.text)
         self.bot.send_message(
             message.chat.id, "Спасибо за отзыв!", reply_markup=self.main_menu
         )
@@ -40,7 +71,7 @@ class FeedbackHandler:
         """Запрашивает отзыв по заказу."""
         try:
             order_id = int(message.text.split()[1])
-            self.user_states[message.chat.id] = f"review_{order_id}"
+            self.set_state(message.chat.id, f"review_{order_id}")
             self.bot.send_message(
                 message.chat.id, f"Напишите отзыв для заказа №{order_id}:"
             )
@@ -49,10 +80,18 @@ class FeedbackHandler:
 
     def save_review(self, message):
         """Сохраняет отзыв пользователя по заказу."""
-        order_id = int(self.user_states.pop(message.chat.id).split("_")[1])
-        review_text = message.text
-        with SessionLocal() as db:
-            add_review_to_order(db, order_id, review_text)
+        state = self.pop_state(message.chat.id)
+        if state is None or not state.startswith("review_"):
+            # Ожидание отзыва сброшено по таймеру между фильтром и обработчиком
+            self.bot.send_message(
+                message.chat.id,
+                "Время ожидания отзыва истекло. Начните заново.",
+                reply_markup=self.main_menu,
+            )
+            return
+        order_id = int(state.split("_")[1])
+        # Запись в БД выполняется пакетно фоновым сбросом буфера
+        self.feedback_buffer.append(message.from_user.id, message.text, order_id)
         self.bot.send_message(
             message.chat.id, "Спасибо за отзыв!", reply_markup=self.main_menu
         )
@@ -60,7 +99,7 @@ class FeedbackHandler:
     def review_callback(self, call):
         """Обрабатывает callback для начала написания отзыва к заказу."""
         order_id = int(call.data.split("_")[1])
-        self.user_states[call.message.chat.id] = f"review_{order_id}"
+        self.set_state(call.message.chat.id, f"review_{order_id}")
         self.bot.send_message(
             call.message.chat.id, f"Напишите отзыв для заказа №{order_id}:"
         )
@@ -0,0 +1,63 @@
+"""
+Обработчик inline-режима для Telegram-бота TeleFood.
+
+Этот модуль содержит класс InlineHandler, отвечающий за поиск блюд через
+inline-запросы (`@bot пицца`). Поиск выполняется по индексу в памяти, без запросов к базе.
+"""
+
+from telebot import types
+
+INLINE_PAGE_SIZE = 20
+INLINE_CACHE_TIME = 300  # секунд; каталог меняется редко
+
+
+class InlineHandler:
+    """
+    Обработчик inline-запросов: ищет продукты и возвращает их карточки с кнопкой добавления.
+    """
+
+    def __init__(self, bot, catalog_search, personal=False):
+        self.bot = bot
+        self.catalog_search = catalog_search
+        # Результаты зависят от ресторана пользователя — общий кэш Telegram недопустим
+        self.personal = personal
+
+    def answer_query(self, inline_query):
+        """Отвечает на inline-запрос страницей найденных продуктов."""
+        try:
+            offset = int(inline_query.offset or 0)
+        except ValueError:
+            offset = 0
+        items, next_offset = self.catalog_search.search(
+            inline_query.query, offset, INLINE_PAGE_SIZE
+        )
+        results = []
+        for item in items:
+            price = f"{item.cost:.2f}" if item.cost else "-"
+            markup = types.InlineKeyboardMarkup()
+            markup.add(
+                types.InlineKeyboardButton(
+                    f"➕ {item.name}", callback_data=f"add_{item.id}"
+                )
+            )
+            text = f"<b>{item.category}</b>\n{item.name}: {price}₽"
+            if item.description:
+                text += f"\n<i>{item.description}</i>"
+            results.append(
+                types.InlineQueryResultArticle(
+                    id=str(item.id),
+                    title=f"{item.name} — {price}₽",
+                    description=item.description or item.category,
+                    input_message_content=types.InputTextMessageContent(
+                        text, parse_mode="HTML"
+                    ),
+                    reply_markup=markup,
+                )
+            )
+        self.bot.answer_inline_query(
+            inline_query.id,
+            results,
+            cache_time=INLINE_CACHE_TIME,
+            is_personal=self.personal,
+            next_offset=str(next_offset) if next_offset is not None else "",
+        )
@@ -3,12 +3,23 @@
 
 Этот модуль содержит класс MenuHandler, отвечающий за отображение меню
 с категориями и товарами, а также кнопками для добавления товаров в корзину.
+Фото товаров категории отправляются медиагруппой перед её списком.
 """
 
+import logging
+
 from telebot import types
 
+from catalog_snapshot import catalog_snapshots
 from database import SessionLocal
-from services import get_all_categories, get_products_by_category
+from media import has_photo, send_product_photos
+from models import Product
+from services import get_all_categories, get_products_by_category, get_products_by_ids
+
+logger = logging.getLogger("TeleFoodBot")
+
+# Максимальный размер медиагруппы в Telegram
+MEDIA_GROUP_SIZE = 10
 
 
 class MenuHandler:
@@ -19,14 +30,24 @@ class MenuHandler:
     def __init__(self, bot):
         self.bot = bot
 
+    @staticmethod
+    def load_sections(db):
+        """Возвращает пары (категория, товары) из снимка каталога или из базы."""
+        snapshot = catalog_snapshots.get()
+        if snapshot is not None:
+            return [(cat, snapshot.products(cat)) for cat in snapshot.categories()]
+        return [
+            (cat, get_products_by_category(db, cat.id))
+            for cat in get_all_categories(db)
+        ]
+
     def show_menu(self, message):
         """Отображает меню с категориями и товарами."""
         with SessionLocal() as db:
-            categories = get_all_categories(db)
-            for cat in categories:
-                products = get_products_by_category(db, cat.id)
+            for cat, products in self.load_sections(db):
                 if not products:
                     continue
+                self.send_photos(db, message.chat.id, products)
                 text = f"<b>{cat.name}</b>\n"
                 markup = types.InlineKeyboardMarkup()
                 for prod in products:
@@ -40,3 +61,30 @@ class MenuHandler:
                 self.bot.send_message(
                     message.chat.id, text, parse_mode="HTML", reply_markup=markup
                 )
+
+    def warm_up(self):
+        """Читает категории и товары заранее, чтобы первый показ меню не ждал базу."""
+        with SessionLocal() as db:
+            self.load_sections(db)
+
+    def send_photos(self, db, chat_id, products):
+        """Отправляет фото товаров медиагруппами и сохраняет новые file_id."""
+        with_photos = [prod for prod in products if has_photo(prod)]
+        if with_photos and not isinstance(with_photos[0], Product):
+            # В снимке каталога нет file_id: фото отправляются по объектам из базы
+            loaded = get_products_by_ids(db, [prod.id for prod in with_photos])
+            with_photos = [loaded[prod.id] for prod in with_photos if prod.id in loaded]
+        for start in range(0, len(with_photos), MEDIA_GROUP_SIZE):
+            chunk = with_photos[start : start + MEDIA_GROUP_SIZE]
+            try:
+                if send_product_photos(self.bot, chat_id, chunk, self.photo_caption):
+                    db.commit()
+            except Exception as e:
+                db.rollback()
+                logger.error(f"Error sending product photos: {str(e)}")
+
+    @staticmethod
+    def photo_caption(prod):
+        """Подпись к фото товара."""
+        price = f"{prod.cost:.2f}" if prod.cost else "-"
+        return f"{prod.name}: {price}₽"
@@ -6,12 +6,17 @@
 """
 
 import datetime
-from collections import Counter
 
 from telebot import types
 
+from config import LOCAL_TIMEZONE, ORDERS_PAGE_SIZE
+from content_codec import product_counts
 from database import SessionLocal
-from services import create_user_if_not_exists, get_all_categories, get_orders_by_user
+from services import (
+    create_user_if_not_exists,
+    get_orders_by_user,
+    get_products_by_ids,
+)
 
 
 class OrderHandler:
@@ -19,40 +24,63 @@ class OrderHandler:
     Обработчик заказов: показывает список заказов пользователя.
     """
 
-    def __init__(self, bot, main_menu):
+    def __init__(self, bot, main_menu, session_factory=SessionLocal):
         self.bot = bot
         self.main_menu = main_menu
+        self.session_factory = session_factory
 
     def show_orders(self, message):
-        """Отображает все оформленные заказы пользователя."""
-        with SessionLocal() as db:
+        """Отображает первую страницу заказов пользователя."""
+        self.send_page(message.chat.id, message.from_user, 0)
+
+    def more_orders(self, call):
+        """Отображает следующую страницу заказов (callback orders_more_<смещение>)."""
+        self.bot.answer_callback_query(call.id)
+        offset = int(call.data.split("_")[-1])
+        self.send_page(call.message.chat.id, call.from_user, offset)
+
+    def send_page(self, chat_id, from_user, offset):
+        """Отправляет страницу заказов, начиная с offset; старые заказы читаются из архива."""
+        with self.session_factory() as db:
             user_id, user_name = create_user_if_not_exists(
-                db, message.from_user.id, message.from_user.first_name
+                db, from_user.id, from_user.first_name
             )
-            orders = get_orders_by_user(db, user_id)
+            # Лишний заказ показывает, есть ли следующая страница
+            orders = get_orders_by_user(db, user_id, offset, ORDERS_PAGE_SIZE + 1)
+            has_more = len(orders) > ORDERS_PAGE_SIZE
+            orders = orders[:ORDERS_PAGE_SIZE]
             if not orders:
-                self.bot.send_message(message.chat.id, "У вас нет заказов.")
+                text = "Больше заказов нет." if offset else "У вас нет заказов."
+                self.bot.send_message(chat_id, text)
                 return
             for order in orders:
-                counts = Counter(order.content.get("products", []))
+                counts = product_counts(order.content)
                 created_at_str = "неизвестно"
                 if order.created_at:
                     try:
-                        # Convert UTC to Moscow time (UTC+3)
+                        # Convert UTC to local restaurant time (Moscow by default)
                         moscow_time = order.created_at.replace(
                             tzinfo=datetime.timezone.utc
-                        ).astimezone(datetime.timezone(datetime.timedelta(hours=3)))
+                        ).astimezone(LOCAL_TIMEZONE)
                         created_at_str = moscow_time.strftime("%d.%m.%Y %H:%M")
                     except (AttributeError, ValueError):
                         pass
                 text = f"<b>Заказ №{order.id}</b> от {created_at_str} (мск)\n"
                 total = 0
+                products = get_products_by_ids(db, counts)
                 for pid, count in counts.items():
-                    prod = db.query(get_all_categories.__globals__["Product"]).get(pid)
+                    prod = products.get(pid)
                     if prod:
                         subtotal = prod.cost * count
                         text += f"{prod.name} x{count} = {subtotal:.2f}₽\n"
                         total += subtotal
+                # Скидка и доставка сохранены в заказе при оформлении
+                if order.discount:
+                    text += f"Скидка по акциям: −{order.discount:.2f}₽\n"
+                    total -= order.discount
+                if order.delivery_fee:
+                    text += f"Доставка: {order.delivery_fee:.2f}₽\n"
+                    total += order.delivery_fee
                 text += f"Итого: {total:.2f}₽\n"
                 if order.review:
                     text += f"💬 <b>Отзыв:</b>\n<i>«{order.review}»</i>\n"
@@ -65,5 +93,14 @@ class OrderHandler:
                     )
                 )
                 self.bot.send_message(
-                    message.chat.id, text, parse_mode="HTML", reply_markup=markup
+                    chat_id, text, parse_mode="HTML", reply_markup=markup
                 )
+        if has_more:
+            markup = types.InlineKeyboardMarkup()
+            next_offset = offset + ORDERS_PAGE_SIZE
+            markup.add(
+                types.InlineKeyboardButton(
+                    "Показать ещё", callback_data=f"orders_more_{next_offset}"
+                )
+            )
+            self.bot.send_message(chat_id, "Более ранние заказы:", reply_markup=markup)
@@ -0,0 +1,49 @@
+"""
+Обработчик действий персонала ресторана для Telegram-бота TeleFood.
+
+Этот модуль содержит класс StaffHandler: команда /chatid сообщает id чата для
+подписки на заказы в панели администратора, а кнопка «оплачен» в карточке заказа
+(см. notifications.py) отмечает заказ оплаченным.
+"""
+
+from database import use_tenant
+from notifications import PAID_CALLBACK, get_message_tenant
+from services import set_order_paid
+
+
+class StaffHandler:
+    """
+    Обработчик чатов персонала: id чата и отметка оплаты заказа из карточки.
+    """
+
+    def __init__(self, bot, notifier):
+        self.bot = bot
+        self.notifier = notifier
+
+    def show_chat_id(self, message):
+        """Отправляет id чата для подписки на уведомления о заказах."""
+        self.bot.send_message(
+            message.chat.id,
+            f"ID этого чата: <code>{message.chat.id}</code>\n"
+            "Укажите его в панели администратора, чтобы получать новые заказы.",
+            parse_mode="HTML",
+        )
+
+    def mark_paid(self, call):
+        """Отмечает заказ из карточки оплаченным; карточки обновятся при следующей сводке."""
+        order_id = int(call.data[len(PAID_CALLBACK) :])
+        message = call.message
+        # Кнопка действует только в карточке, отправленной этому чату
+        with self.notifier.staff_session_factory() as staff_db:
+            tenant = get_message_tenant(
+                staff_db, message.chat.id, message.message_id, order_id
+            )
+        if tenant is None:
+            self.bot.answer_callback_query(call.id, "Карточка заказа не найдена.")
+            return
+        with use_tenant(tenant or None):
+            with self.notifier.session_factory() as db:
+                changed = set_order_paid(db, order_id)
+            if changed is not None:
+                self.notifier.order_changed(order_id)
+        self.bot.answer_callback_query(call.id, f"Заказ №{order_id} оплачен.")
@@ -0,0 +1,59 @@
+"""
+Обработчик выбора ресторана для Telegram-бота TeleFood.
+
+Этот модуль содержит класс TenantHandler, который показывает список ресторанов
+из реестра и сохраняет выбор пользователя. После выбора все действия пользователя
+выполняются с базой данных выбранного ресторана.
+"""
+
+from telebot import types
+
+
+class TenantHandler:
+    """
+    Обработчик выбора ресторана: выводит список ресторанов и сохраняет выбор.
+    """
+
+    def __init__(self, bot, main_menu, registry):
+        self.bot = bot
+        self.main_menu = main_menu
+        self.registry = registry
+
+    def has_choice(self) -> bool:
+        """Проверяет, зарегистрировано ли несколько ресторанов."""
+        return bool(self.registry.tenants())
+
+    def needs_choice(self, user_id) -> bool:
+        """Проверяет, нужно ли предложить пользователю выбрать ресторан."""
+        return self.has_choice() and self.registry.tenant_for_user(user_id) is None
+
+    def choose(self, message):
+        """Отображает список ресторанов для выбора."""
+        tenants = self.registry.tenants()
+        if not tenants:
+            self.bot.send_message(
+                message.chat.id, "Доступен один ресторан.", reply_markup=self.main_menu
+            )
+            return
+        markup = types.InlineKeyboardMarkup()
+        for slug, name in tenants.items():
+            markup.add(types.InlineKeyboardButton(name, callback_data=f"tenant_{slug}"))
+        self.bot.send_message(
+            message.chat.id, "Выберите ресторан:", reply_markup=markup
+        )
+
+    def select(self, call):
+        """Сохраняет выбранный пользователем ресторан."""
+        slug = call.data[len("tenant_") :]
+        try:
+            self.registry.set_user_tenant(call.from_user.id, slug)
+        except ValueError:
+            self.bot.answer_callback_query(call.id, "Ресторан недоступен.")
+            return
+        name = self.registry.tenants()[slug]
+        self.bot.answer_callback_query(call.id, f"Выбран ресторан {name}")
+        self.bot.send_message(
+            call.message.chat.id,
+            f"Вы выбрали ресторан «{name}». Откройте меню, чтобы сделать заказ.",
+            reply_markup=self.main_menu,
+        )
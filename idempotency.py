@@ -0,0 +1,102 @@
+"""
+Защита от повторной обработки для Telegram-бота TeleFood.
+
+Модуль содержит ограниченный по памяти кэш с истечением по времени (для отбрасывания
+повторно доставленных обновлений и callback-запросов) и короткую блокировку «операция
+уже выполняется» для отдельных пользователей (например, для оформления заказа).
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Hashable
+
+
+class TTLCache:
+    """
+    Множество недавно увиденных ключей с фиксированным размером и временем жизни.
+
+    Ключи хранятся в порядке добавления; при переполнении вытесняются самые старые,
+    просроченные ключи удаляются с головы очереди при каждом добавлении.
+    """
+
+    def __init__(self, max_size: int = 10000, ttl: float = 600.0):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _evict(self, now: float):
+        """Удалить просроченные ключи и ключи сверх лимита размера."""
+        while self._entries:
+            key, expires_at = next(iter(self._entries.items()))
+            if expires_at > now and len(self._entries) <= self.max_size:
+                break
+            self._entries.popitem(last=False)
+
+    def add(self, key: Hashable) -> bool:
+        """Запомнить ключ.
+
+        :param key: ключ (например, update_id)
+        :return: True, если ключ новый; False, если он уже встречался и ещё не истёк
+        """
+        now = time.monotonic()
+        with self._lock:
+            expires_at = self._entries.get(key)
+            if expires_at is not None and expires_at > now:
+                return False
+            self._entries.pop(key, None)
+            self._entries[key] = now + self.ttl
+            self._evict(now)
+            return True
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            expires_at = self._entries.get(key)
+            return expires_at is not None and expires_at > time.monotonic()
+
+
+class InFlightLock:
+    """
+    Неблокирующая блокировка по ключу с автоматическим истечением.
+
+    Истечение страхует от «вечной» блокировки, если обработчик упал, не освободив её.
+    """
+
+    def __init__(self, ttl: float = 30.0):
+        self.ttl = ttl
+        self._held = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, key: Hashable) -> bool:
+        """Попытаться захватить блокировку.
+
+        :param key: ключ (например, id пользователя)
+        :return: True, если блокировка захвачена; False, если операция уже выполняется
+        """
+        now = time.monotonic()
+        with self._lock:
+            expires_at = self._held.get(key)
+            if expires_at is not None and expires_at > now:
+                return False
+            self._held[key] = now + self.ttl
+            # Попутно чистим истёкшие записи, чтобы словарь не рос
+            if len(self._held) > 1024:
+                for stale in [k for k, exp in self._held.items() if exp <= now]:
+                    del self._held[stale]
+            return True
+
+    def release(self, key: Hashable, linger: float = 0.0):
+        """Освободить блокировку.
+
+        :param key: ключ
+        :param linger: сколько секунд ещё отклонять повторные попытки (гасит двойные нажатия)
+        """
+        with self._lock:
+            if linger > 0:
+                self._held[key] = time.monotonic() + linger
+            else:
+                self._held.pop(key, None)
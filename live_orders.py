@@ -0,0 +1,404 @@
+"""
+Живая лента заказов для панели администратора TeleFood.
+
+Фоновый поток раз в LIVE_ORDERS_POLL_INTERVAL секунд читает только заказы с id
+больше последнего увиденного (id заказов возрастают, поэтому запрос идёт по
+первичному ключу и не зависит от размера таблицы) и кладёт их в очередь вместе
+со счётчиками: заказов в минуту, заказов и выручки за сегодня, заказов, ожидающих
+оплаты. Счётчики обновляются только по новым заказам; базой для выручки за день
+служит агрегат продаж (см. reporting.py), поэтому выручка совпадает с отчётом.
+Оплата отслеживается по id для заказов ленты; неоплаченные заказы старше неё
+подсчитываются одним COUNT при открытии и раз в LIVE_ORDERS_RECOUNT_INTERVAL секунд.
+
+Окно панели забирает обновления из очереди в потоке интерфейса (Tk не допускает
+обращений из других потоков) и приостанавливает опрос, пока окно скрыто.
+"""
+
+import collections
+import datetime
+import logging
+import queue
+import threading
+import time
+from typing import Iterable, List, NamedTuple, Optional, Set
+
+from sqlalchemy import func, select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from config import (
+    LIVE_ORDERS_BACKLOG,
+    LIVE_ORDERS_BATCH_SIZE,
+    LIVE_ORDERS_POLL_INTERVAL,
+    LIVE_ORDERS_RATE_WINDOW,
+    LIVE_ORDERS_RECOUNT_INTERVAL,
+)
+from content_codec import product_counts
+from database import SessionLocal, current_tenant, reads, use_tenant
+from models import DailySales, Order
+from reporting import product_revenue, to_local_time
+from services import get_products_by_ids
+
+logger = logging.getLogger("TeleFoodBot")
+
+# Количество id в одном запросе проверки оплаты
+PAID_CHECK_CHUNK_SIZE = 500
+
+
+class LiveOrder(NamedTuple):
+    """Заказ в живой ленте."""
+
+    id: int
+    # Время оформления (naive UTC, как в базе)
+    created_at: datetime.datetime
+    user_id: int
+    units: int
+    # Выручка: стоимость продуктов по ценам каталога за вычетом скидки (как в отчётах)
+    amount: float
+    # К оплате: с учётом скидки и стоимости доставки
+    total: float
+    paid: bool
+    kitchen: str
+
+
+class LiveStats(NamedTuple):
+    """Значения счётчиков живой ленты."""
+
+    orders_per_minute: float
+    orders_today: int
+    revenue_today: float
+    pending: int
+
+
+class LiveUpdate(NamedTuple):
+    """Изменения с предыдущего опроса."""
+
+    # Новые заказы по возрастанию id
+    orders: List[LiveOrder]
+    # Заказы, которые больше не ждут оплаты (оплачены или перенесены в архив)
+    resolved: List[int]
+    stats: LiveStats
+
+
+def _live_orders(db: Session, rows) -> List[LiveOrder]:
+    """Собрать заказы ленты из строк (id, created_at, user_id, content, ...)."""
+    rows = [(row, product_counts(row.content)) for row in rows]
+    products = get_products_by_ids(
+        db, {pid for _, counts in rows for pid in counts.keys()}
+    )
+    orders = []
+    prices = {pid: product.cost or 0.0 for pid, product in products.items()}
+    for row, counts in rows:
+        amount = sum(product_revenue(counts, prices, row.discount).values())
+        orders.append(
+            LiveOrder(
+                row.id,
+                row.created_at,
+                row.user_id,
+                sum(counts.values()),
+                amount,
+                amount + (row.delivery_fee or 0.0),
+                bool(row.pay_status),
+                row.kitchen or "",
+            )
+        )
+    return orders
+
+
+def _order_rows():
+    return select(
+        Order.id,
+        Order.created_at,
+        Order.user_id,
+        Order.content,
+        Order.pay_status,
+        Order.discount,
+        Order.delivery_fee,
+        Order.kitchen,
+    )
+
+
+@reads
+def fetch_orders_after(
+    db: Session, after_id: int, limit: int = LIVE_ORDERS_BATCH_SIZE
+) -> List[LiveOrder]:
+    """Получить заказы с id больше after_id.
+
+    :param db: SQLAlchemy сессия
+    :param after_id: последний увиденный id заказа
+    :param limit: максимальное количество заказов
+    :return: заказы по возрастанию id
+    """
+    rows = db.execute(
+        _order_rows().where(Order.id > after_id).order_by(Order.id).limit(limit)
+    ).all()
+    return _live_orders(db, rows)
+
+
+@reads
+def fetch_latest_orders(
+    db: Session, limit: int = LIVE_ORDERS_BACKLOG
+) -> List[LiveOrder]:
+    """Получить последние limit заказов по возрастанию id.
+    :param db: SQLAlchemy сессия
+    :param limit: количество заказов
+    :return: заказы по возрастанию id
+    """
+    rows = db.execute(_order_rows().order_by(Order.id.desc()).limit(limit)).all()
+    return _live_orders(db, rows[::-1])
+
+
+@reads
+def get_last_order_id(db: Session) -> int:
+    """Получить наибольший id оперативной таблицы заказов (0, если заказов нет).
+    :param db: SQLAlchemy сессия
+    :return: id последнего заказа
+    """
+    return db.scalar(select(func.max(Order.id))) or 0
+
+
+@reads
+def get_day_sales(db: Session, day: datetime.date) -> tuple[int, float]:
+    """Получить количество заказов и выручку за местный день из агрегата продаж.
+    :param db: SQLAlchemy сессия
+    :param day: день по местному времени ресторана
+    :return: (количество заказов, выручка)
+    """
+    row = db.get(DailySales, day)
+    if row is None:
+        return 0, 0.0
+    return row.orders_count, row.revenue
+
+
+@reads
+def get_unpaid(db: Session, order_ids: Iterable[int]) -> Set[int]:
+    """Отобрать из order_ids неоплаченные заказы оперативной таблицы.
+    :param db: SQLAlchemy сессия
+    :param order_ids: id проверяемых заказов
+    :return: id заказов, которые всё ещё ждут оплаты
+    """
+    order_ids = sorted(order_ids)
+    unpaid = set()
+    for start in range(0, len(order_ids), PAID_CHECK_CHUNK_SIZE):
+        chunk = order_ids[start : start + PAID_CHECK_CHUNK_SIZE]
+        unpaid.update(
+            db.scalars(
+                select(Order.id).where(Order.id.in_(chunk), Order.pay_status.is_(False))
+            )
+        )
+    return unpaid
+
+
+@reads
+def count_unpaid(db: Session, max_id: int) -> int:
+    """Получить количество неоплаченных заказов оперативной таблицы.
+    :param db: SQLAlchemy сессия
+    :param max_id: учитывать только заказы с id не больше этого
+    :return: количество заказов, ожидающих оплаты
+    """
+    return db.scalar(
+        select(func.count())
+        .select_from(Order)
+        .where(Order.id <= max_id, Order.pay_status.is_(False))
+    )
+
+
+class LiveCounters:
+    """
+    Счётчики живой ленты, обновляемые по каждому новому заказу за O(1).
+
+    Заказы в минуту считаются по скользящему окну rate_window секунд: времена
+    заказов хранятся в очереди, устаревшие снимаются с её начала.
+    """
+
+    def __init__(
+        self,
+        day: datetime.date,
+        orders_today: int = 0,
+        revenue_today: float = 0.0,
+        rate_window: float = LIVE_ORDERS_RATE_WINDOW,
+    ):
+        self.day = day
+        self.orders_today = orders_today
+        self.revenue_today = revenue_today
+        self.rate_window = rate_window
+        self.pending: Set[int] = set()
+        # Неоплаченные заказы старше ленты: их оплата не отслеживается по id
+        self.untracked_pending = 0
+        self._recent = collections.deque()
+
+    def _roll(self, now: datetime.datetime):
+        """Начать новый день, если наступили следующие местные сутки."""
+        day = to_local_time(now).date()
+        if day > self.day:
+            self.day = day
+            self.orders_today = 0
+            self.revenue_today = 0.0
+
+    def add(self, order: LiveOrder, count_today: bool = True):
+        """Учесть заказ.
+
+        :param order: заказ ленты
+        :param count_today: учитывать ли заказ в счётчиках дня (False — он уже
+            вошёл в базовые значения из агрегата)
+        """
+        self._roll(order.created_at)
+        if count_today and to_local_time(order.created_at).date() == self.day:
+            self.orders_today += 1
+            self.revenue_today += order.amount
+        self._recent.append(order.created_at)
+        if not order.paid:
+            self.pending.add(order.id)
+
+    def resolve(self, order_ids: Iterable[int]):
+        """Снять заказы с ожидания оплаты."""
+        self.pending.difference_update(order_ids)
+
+    def orders_per_minute(self, now: Optional[datetime.datetime] = None) -> float:
+        """Среднее количество заказов в минуту за последние rate_window секунд."""
+        now = now or datetime.datetime.utcnow()
+        since = now - datetime.timedelta(seconds=self.rate_window)
+        while self._recent and self._recent[0] < since:
+            self._recent.popleft()
+        return len(self._recent) * 60 / self.rate_window
+
+    def snapshot(self, now: Optional[datetime.datetime] = None) -> LiveStats:
+        """Текущие значения счётчиков."""
+        now = now or datetime.datetime.utcnow()
+        self._roll(now)
+        return LiveStats(
+            round(self.orders_per_minute(now), 2),
+            self.orders_today,
+            round(self.revenue_today, 2),
+            len(self.pending) + self.untracked_pending,
+        )
+
+
+class LiveOrdersPoller:
+    """
+    Опрос новых заказов в фоновом потоке с отметкой последнего увиденного id.
+
+    Обновления (LiveUpdate) складываются в очередь updates; их забирает поток
+    интерфейса. Поток работает с базой ресторана, в контексте которого создан опросчик.
+    """
+
+    def __init__(
+        self,
+        interval: float = LIVE_ORDERS_POLL_INTERVAL,
+        backlog: int = LIVE_ORDERS_BACKLOG,
+        batch_size: int = LIVE_ORDERS_BATCH_SIZE,
+        session_factory=SessionLocal,
+        recount_interval: float = LIVE_ORDERS_RECOUNT_INTERVAL,
+    ):
+        self.interval = interval
+        self.backlog = backlog
+        self.batch_size = batch_size
+        self.recount_interval = recount_interval
+        self._next_recount = 0.0
+        self.session_factory = session_factory
+        self.tenant = current_tenant()
+        self.updates: "queue.Queue[LiveUpdate]" = queue.Queue()
+        self.last_seen: Optional[int] = None
+        self.counters: Optional[LiveCounters] = None
+        self._active = threading.Event()
+        self._active.set()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def prime(self, db: Session) -> LiveUpdate:
+        """Загрузить последние заказы и базовые значения счётчиков дня.
+        :param db: SQLAlchemy сессия
+        :return: обновление с последними backlog заказами
+        """
+        self.last_seen = get_last_order_id(db)
+        today = to_local_time(None).date()
+        self.counters = LiveCounters(today, *get_day_sales(db, today))
+        orders = [
+            order
+            for order in fetch_latest_orders(db, self.backlog)
+            if order.id <= self.last_seen
+        ]
+        for order in orders:
+            # Эти заказы уже учтены в агрегате продаж за день
+            self.counters.add(order, count_today=False)
+        self.recount(db)
+        return LiveUpdate(orders, [], self.counters.snapshot())
+
+    def recount(self, db: Session):
+        """Пересчитать неоплаченные заказы, которые старше ленты."""
+        unpaid = count_unpaid(db, self.last_seen)
+        self.counters.untracked_pending = max(0, unpaid - len(self.counters.pending))
+        self._next_recount = time.monotonic() + self.recount_interval
+
+    def poll(self, db: Session) -> LiveUpdate:
+        """Прочитать заказы после последнего увиденного и обновить счётчики.
+
+        Стоимость опроса зависит от количества новых заказов и заказов, ожидающих
+        оплаты, а не от размера таблицы.
+        :param db: SQLAlchemy сессия
+        :return: обновление с новыми заказами
+        """
+        if self.counters is None:
+            return self.prime(db)
+        pending = set(self.counters.pending)
+        resolved = pending - get_unpaid(db, pending) if pending else set()
+        self.counters.resolve(resolved)
+        orders = []
+        while True:
+            batch = fetch_orders_after(db, self.last_seen, self.batch_size)
+            for order in batch:
+                self.counters.add(order)
+            orders.extend(batch)
+            if batch:
+                self.last_seen = batch[-1].id
+            if len(batch) < self.batch_size:
+                break
+        if time.monotonic() >= self._next_recount:
+            self.recount(db)
+        return LiveUpdate(orders, sorted(resolved), self.counters.snapshot())
+
+    @property
+    def paused(self) -> bool:
+        return not self._active.is_set()
+
+    def pause(self):
+        """Приостановить опрос (окно скрыто)."""
+        self._active.clear()
+
+    def resume(self):
+        """Возобновить опрос."""
+        self._active.set()
+
+    def start(self):
+        """Запустить поток опроса."""
+
+        def worker():
+            with use_tenant(self.tenant):
+                while not self._stop_event.is_set():
+                    if not self._active.wait(timeout=0.5):
+                        continue
+                    try:
+                        with self.session_factory() as db:
+                            self.updates.put(self.poll(db))
+                    except SQLAlchemyError as e:
+                        logger.error(f"Live orders poll failed: {str(e)}")
+                    self._stop_event.wait(self.interval)
+
+        self._thread = threading.Thread(target=worker, name="live-orders", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Остановить поток опроса."""
+        self._stop_event.set()
+        self._active.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def drain(self) -> List[LiveUpdate]:
+        """Забрать накопившиеся обновления (вызывается из потока интерфейса)."""
+        updates = []
+        while True:
+            try:
+                updates.append(self.updates.get_nowait())
+            except queue.Empty:
+                return updates
@@ -0,0 +1,132 @@
+"""
+Фотографии продуктов для Telegram-бота TeleFood.
+
+Изображения хранятся на локальном диске (config.MEDIA_DIR). При первой отправке
+фото загружается в Telegram, а полученный file_id сохраняется в продукте: дальнейшие
+отправки ссылаются на file_id и не передают байты файла. Вместе с file_id хранится
+хэш содержимого файла; если файл на диске изменился, хэш не совпадёт и фото будет
+загружено заново.
+"""
+
+import hashlib
+import os
+import shutil
+import threading
+from typing import Dict, List, Tuple
+
+from telebot import types
+
+from config import MEDIA_DIR
+from database import current_tenant
+from models import Product
+
+# Кэш хэшей по (путь, mtime, размер): файл перечитывается только после изменения
+_hash_cache: Dict[str, Tuple[float, int, str]] = {}
+_hash_lock = threading.Lock()
+
+
+def file_hash(path: str) -> str:
+    """Вычислить SHA-256 содержимого файла.
+
+    :param path: путь к файлу
+    :return: хэш в шестнадцатеричном виде
+    """
+    stat = os.stat(path)
+    with _hash_lock:
+        cached = _hash_cache.get(path)
+    if cached and cached[0] == stat.st_mtime and cached[1] == stat.st_size:
+        return cached[2]
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(65536), b""):
+            digest.update(chunk)
+    result = digest.hexdigest()
+    with _hash_lock:
+        _hash_cache[path] = (stat.st_mtime, stat.st_size, result)
+    return result
+
+
+def store_product_image(product: Product, source_path: str, media_dir: str = None):
+    """Скопировать изображение в каталог медиа и привязать его к продукту.
+
+    Если содержимое изменилось, сохранённый file_id сбрасывается. Сессию не фиксирует.
+
+    :param product: продукт (должен иметь id)
+    :param source_path: путь к выбранному файлу
+    :param media_dir: каталог хранения (по умолчанию config.MEDIA_DIR или его
+        подкаталог текущего ресторана)
+    """
+    if media_dir is None:
+        tenant = current_tenant()
+        media_dir = MEDIA_DIR if tenant is None else os.path.join(MEDIA_DIR, tenant)
+    os.makedirs(media_dir, exist_ok=True)
+    extension = os.path.splitext(source_path)[1].lower() or ".jpg"
+    target = os.path.join(media_dir, f"product_{product.id}{extension}")
+    if os.path.abspath(source_path) != os.path.abspath(target):
+        shutil.copyfile(source_path, target)
+    content_hash = file_hash(target)
+    if product.image_path != target or product.image_hash != content_hash:
+        product.image_path = target
+        product.image_hash = content_hash
+        product.photo_file_id = ""
+
+
+def has_photo(product: Product) -> bool:
+    """Проверить, есть ли у продукта доступный файл изображения."""
+    return bool(product.image_path) and os.path.isfile(product.image_path)
+
+
+def cached_file_id(product: Product) -> str:
+    """Получить file_id продукта, если он соответствует текущему файлу, иначе ""."""
+    if not product.photo_file_id or not has_photo(product):
+        return ""
+    if file_hash(product.image_path) != product.image_hash:
+        return ""
+    return product.photo_file_id
+
+
+def send_product_photos(bot, chat_id: int, products: List[Product], caption) -> bool:
+    """Отправить фото продуктов одной медиагруппой (или одним фото).
+
+    Продукты без сохранённого file_id загружаются с диска, полученные file_id
+    записываются в объекты продуктов; фиксация сессии — на вызывающем коде.
+
+    :param bot: экземпляр telebot.TeleBot
+    :param chat_id: идентификатор чата
+    :param products: продукты с изображениями (до 10 штук)
+    :param caption: функция, возвращающая подпись к фото продукта
+    :return: True, если были получены новые file_id
+    """
+    uploads = []
+    media = []
+    try:
+        for product in products:
+            file_id = cached_file_id(product)
+            if file_id:
+                media.append(file_id)
+            else:
+                handle = open(product.image_path, "rb")
+                uploads.append(handle)
+                media.append(handle)
+        if len(products) == 1:
+            messages = [bot.send_photo(chat_id, media[0], caption=caption(products[0]))]
+        else:
+            messages = bot.send_media_group(
+                chat_id,
+                [
+                    types.InputMediaPhoto(item, caption=caption(product))
+                    for item, product in zip(media, products)
+                ],
+            )
+    finally:
+        for handle in uploads:
+            handle.close()
+
+    if not uploads:
+        return False
+    for product, message in zip(products, messages):
+        if message.photo and not cached_file_id(product):
+            # Самый крупный размер фото идёт последним
+            product.photo_file_id = message.photo[-1].file_id
+            product.image_hash = file_hash(product.image_path)
+    return True
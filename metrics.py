@@ -0,0 +1,87 @@
+"""
+Счётчики работы приложения TeleFood.
+
+Минимальный потокобезопасный реестр именованных счётчиков. Компоненты увеличивают
+счётчики через общий объект metrics, а MetricsReporter периодически и при остановке
+бота пишет их снимок в лог. Имена счётчиков задаются в коде, а не берутся из данных
+пользователя, поэтому их число ограничено.
+"""
+
+import logging
+import threading
+from typing import Dict
+
+logger = logging.getLogger("TeleFoodBot")
+
+
+class Metrics:
+    """
+    Реестр счётчиков и текущих значений.
+    """
+
+    def __init__(self):
+        self._values: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def incr(self, name: str, value: float = 1):
+        """Увеличить счётчик на value."""
+        with self._lock:
+            self._values[name] = self._values.get(name, 0) + value
+
+    def set(self, name: str, value: float):
+        """Установить текущее значение показателя."""
+        with self._lock:
+            self._values[name] = value
+
+    def get(self, name: str) -> float:
+        """Получить значение счётчика (0, если он ещё не менялся)."""
+        with self._lock:
+            return self._values.get(name, 0)
+
+    def snapshot(self) -> Dict[str, float]:
+        """Получить копию всех значений."""
+        with self._lock:
+            return dict(self._values)
+
+
+metrics = Metrics()
+
+
+class MetricsReporter:
+    """
+    Фоновая запись снимка счётчиков в лог раз в interval секунд и при остановке.
+    """
+
+    def __init__(self, registry: Metrics = metrics, interval: float = 300.0):
+        self.registry = registry
+        self.interval = interval
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def report(self):
+        """Записать текущие значения счётчиков в лог (если они есть)."""
+        values = self.registry.snapshot()
+        if values:
+            text = ", ".join(f"{name}={values[name]:g}" for name in sorted(values))
+            logger.info(f"Metrics: {text}")
+
+    def start(self):
+        """Запустить фоновый поток (ничего не делает при interval <= 0)."""
+        if self.interval <= 0:
+            return
+
+        def worker():
+            while not self._stop_event.wait(self.interval):
+                self.report()
+
+        self._thread = threading.Thread(
+            target=worker, name="metrics-reporter", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        """Остановить фоновый поток и записать итоговый снимок."""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        self.report()
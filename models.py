@@ -1,7 +1,16 @@
 import datetime
 
-from sqlalchemy import JSON, Boolean, DateTime, Float, ForeignKey, Integer, String
-from sqlalchemy.ext.mutable import MutableDict
+from sqlalchemy import (
+    JSON,
+    BigInteger,
+    Boolean,
+    Date,
+    DateTime,
+    Float,
+    ForeignKey,
+    Integer,
+    String,
+)
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
 
 
@@ -17,8 +26,8 @@ class User(Base):
     description: Mapped[str] = mapped_column(String, default="")
 
 
-class Order(Base):
-    __tablename__ = "orders"
+class OrderFields:
+    """Столбцы заказа, общие для оперативной таблицы и архива."""
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     content: Mapped[dict] = mapped_column(JSON)
@@ -26,9 +35,34 @@ class Order(Base):
         DateTime, default=datetime.datetime.utcnow
     )
     review: Mapped[str] = mapped_column(String, default="")
-    user_id: Mapped[int] = mapped_column(Integer, ForeignKey("users.id"))
+    user_id: Mapped[int] = mapped_column(Integer, ForeignKey("users.id"), index=True)
     pay_status: Mapped[bool] = mapped_column(Boolean, default=False)
     description: Mapped[str] = mapped_column(String, default="")
+    # Доставка: точка, присланная при оформлении, выбранная зона и кухня
+    # и стоимость доставки на момент оформления (см. delivery.py)
+    latitude: Mapped[float] = mapped_column(Float, nullable=True)
+    longitude: Mapped[float] = mapped_column(Float, nullable=True)
+    delivery_zone_id: Mapped[int] = mapped_column(Integer, nullable=True)
+    kitchen: Mapped[str] = mapped_column(String, default="", nullable=True)
+    delivery_fee: Mapped[float] = mapped_column(Float, default=0.0, nullable=True)
+    # Скидка по акциям и применённые акции [{"id", "name", "amount"}] на момент
+    # оформления (см. promotions.py)
+    discount: Mapped[float] = mapped_column(Float, default=0.0, nullable=True)
+    promotions: Mapped[list] = mapped_column(JSON, nullable=True)
+
+
+class Order(OrderFields, Base):
+    __tablename__ = "orders"
+
+
+class ArchivedOrder(OrderFields, Base):
+    """Заказ, перенесённый из orders в архив (см. archive.py)."""
+
+    __tablename__ = "orders_archive"
+
+    archived_at: Mapped[datetime.datetime] = mapped_column(
+        DateTime, default=datetime.datetime.utcnow
+    )
 
 
 class Product(Base):
@@ -39,6 +73,11 @@ class Product(Base):
     cost: Mapped[float] = mapped_column(Float)
     product_type: Mapped[int] = mapped_column(Integer, ForeignKey("product_types.id"))
     description: Mapped[str] = mapped_column(String, default="")
+    # Фото продукта: путь к файлу на диске, хэш его содержимого и file_id,
+    # полученный от Telegram при первой загрузке (действителен, пока хэш совпадает)
+    image_path: Mapped[str] = mapped_column(String, default="")
+    image_hash: Mapped[str] = mapped_column(String, default="")
+    photo_file_id: Mapped[str] = mapped_column(String, default="")
 
     # Добавляем связь с типом продукта
     type_rel: Mapped["ProductType"] = relationship("ProductType", backref="products")
@@ -57,6 +96,197 @@ class Cart(Base):
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     user_id: Mapped[int] = mapped_column(Integer, ForeignKey("users.id"))
-    content: Mapped[dict] = mapped_column(
-        MutableDict.as_mutable(JSON), default={"products": []}
+    # Изменяется только присваиванием нового словаря (см. content_codec.add_product)
+    content: Mapped[dict] = mapped_column(JSON, default={"products": []})
+    # Время последнего изменения; пустые корзины удаляются по нему (см. compact_empty_carts)
+    updated_at: Mapped[datetime.datetime] = mapped_column(
+        DateTime,
+        default=datetime.datetime.utcnow,
+        onupdate=datetime.datetime.utcnow,
+        nullable=True,
+    )
+
+
+class AppMeta(Base):
+    """Служебные значения приложения (ключ-значение), например версия каталога."""
+
+    __tablename__ = "app_meta"
+
+    key: Mapped[str] = mapped_column(String, primary_key=True)
+    value: Mapped[str] = mapped_column(String, default="")
+
+
+class DailySales(Base):
+    """Агрегат продаж за день (по местному времени ресторана)."""
+
+    __tablename__ = "sales_daily"
+
+    day: Mapped[datetime.date] = mapped_column(Date, primary_key=True)
+    orders_count: Mapped[int] = mapped_column(Integer, default=0)
+    revenue: Mapped[float] = mapped_column(Float, default=0.0)
+
+
+class ProductSales(Base):
+    """Агрегат продаж продукта за день: количество и выручка."""
+
+    __tablename__ = "sales_products"
+
+    day: Mapped[datetime.date] = mapped_column(Date, primary_key=True)
+    product_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    units: Mapped[int] = mapped_column(Integer, default=0)
+    revenue: Mapped[float] = mapped_column(Float, default=0.0)
+
+
+class HourlySales(Base):
+    """Агрегат нагрузки: число заказов и выручка за час дня."""
+
+    __tablename__ = "sales_hourly"
+
+    day: Mapped[datetime.date] = mapped_column(Date, primary_key=True)
+    hour: Mapped[int] = mapped_column(Integer, primary_key=True)
+    orders_count: Mapped[int] = mapped_column(Integer, default=0)
+    revenue: Mapped[float] = mapped_column(Float, default=0.0)
+
+
+class Broadcast(Base):
+    """Массовая рассылка по всем пользователям с контрольной точкой прогресса."""
+
+    __tablename__ = "broadcasts"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    text: Mapped[str] = mapped_column(String)
+    # pending, running, paused (сообщение отклонено, ждёт оператора) или finished
+    status: Mapped[str] = mapped_column(String, default="pending")
+    # id последнего пользователя, рассылка которому завершена (keyset-курсор)
+    last_user_id: Mapped[int] = mapped_column(Integer, default=0)
+    delivered: Mapped[int] = mapped_column(Integer, default=0)
+    blocked: Mapped[int] = mapped_column(Integer, default=0)
+    failed: Mapped[int] = mapped_column(Integer, default=0)
+    created_at: Mapped[datetime.datetime] = mapped_column(
+        DateTime, default=datetime.datetime.utcnow
+    )
+    finished_at: Mapped[datetime.datetime] = mapped_column(DateTime, nullable=True)
+
+
+class Feedback(Base):
+    """Обратная связь пользователя или отзыв о заказе (журнал только на добавление)."""
+
+    __tablename__ = "feedback"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    user_id: Mapped[int] = mapped_column(Integer, ForeignKey("users.id"), index=True)
+    # Для отзыва о заказе — id заказа, для общей обратной связи — None
+    order_id: Mapped[int] = mapped_column(Integer, nullable=True)
+    text: Mapped[str] = mapped_column(String)
+    # Текст в нижнем регистре для поиска: LIKE в SQLite не различает регистр только для ASCII
+    search_text: Mapped[str] = mapped_column(String, default="")
+    created_at: Mapped[datetime.datetime] = mapped_column(
+        DateTime, default=datetime.datetime.utcnow, index=True
+    )
+
+
+class Tenant(Base):
+    """Ресторан (арендатор) со своей базой данных; реестр хранится в основной базе."""
+
+    __tablename__ = "tenants"
+
+    slug: Mapped[str] = mapped_column(String, primary_key=True)
+    name: Mapped[str] = mapped_column(String)
+    active: Mapped[bool] = mapped_column(Boolean, default=True)
+    created_at: Mapped[datetime.datetime] = mapped_column(
+        DateTime, default=datetime.datetime.utcnow
+    )
+
+
+class UserTenant(Base):
+    """Выбранный пользователем ресторан; хранится в основной базе."""
+
+    __tablename__ = "user_tenants"
+
+    user_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    tenant_slug: Mapped[str] = mapped_column(String, ForeignKey("tenants.slug"))
+
+
+class ScheduledJob(Base):
+    """Отложенное задание планировщика (scheduler.py); хранится в основной базе."""
+
+    __tablename__ = "scheduled_jobs"
+
+    key: Mapped[str] = mapped_column(String, primary_key=True)
+    job: Mapped[str] = mapped_column(String)
+    # Время запуска, Unix time (секунды)
+    due_at: Mapped[float] = mapped_column(Float)
+    payload: Mapped[dict] = mapped_column(JSON, nullable=True)
+    tenant: Mapped[str] = mapped_column(String, nullable=True)
+
+
+class DeliveryZone(Base):
+    """Зона доставки: многоугольник на карте, обслуживающая его кухня и стоимость."""
+
+    __tablename__ = "delivery_zones"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    name: Mapped[str] = mapped_column(String)
+    kitchen: Mapped[str] = mapped_column(String, default="")
+    # Вершины многоугольника: список пар [широта, долгота]
+    polygon: Mapped[list] = mapped_column(JSON)
+    fee: Mapped[float] = mapped_column(Float, default=0.0)
+    # Сумма заказа, начиная с которой доставка бесплатна (0 — всегда платная)
+    free_from: Mapped[float] = mapped_column(Float, default=0.0)
+    # При пересечении зон выбирается зона с наибольшим приоритетом
+    priority: Mapped[int] = mapped_column(Integer, default=0)
+    active: Mapped[bool] = mapped_column(Boolean, default=True)
+
+
+class Promotion(Base):
+    """Акция: скидка на продукты и категории, цена в часы акции или комбо-набор."""
+
+    __tablename__ = "promotions"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    name: Mapped[str] = mapped_column(String)
+    # percent — скидка value процентов, price — цена value за штуку,
+    # combo — набор product_ids (с повторами) за value
+    kind: Mapped[str] = mapped_column(String, default="percent")
+    value: Mapped[float] = mapped_column(Float, default=0.0)
+    product_ids: Mapped[list] = mapped_column(JSON, default=list)
+    category_ids: Mapped[list] = mapped_column(JSON, default=list)
+    # Часы действия по местному времени [start_hour, end_hour); None — весь день
+    start_hour: Mapped[int] = mapped_column(Integer, nullable=True)
+    end_hour: Mapped[int] = mapped_column(Integer, nullable=True)
+    # Дни недели цифрами (1 — понедельник, 7 — воскресенье); пусто — все дни
+    weekdays: Mapped[str] = mapped_column(String, default="")
+    valid_from: Mapped[datetime.date] = mapped_column(Date, nullable=True)
+    valid_to: Mapped[datetime.date] = mapped_column(Date, nullable=True)
+    active: Mapped[bool] = mapped_column(Boolean, default=True)
+
+
+class StaffSubscription(Base):
+    """Подписка чата персонала на новые заказы ресторана; хранится в основной базе."""
+
+    __tablename__ = "staff_subscriptions"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    # id чата Telegram (у групп отрицательный и длиннее 32 бит)
+    chat_id: Mapped[int] = mapped_column(BigInteger, index=True)
+    # Код ресторана; "" — основная база
+    tenant: Mapped[str] = mapped_column(String, default="")
+    # Заказы кухни (пусто — любой) и/или с продуктами категории (None — любой)
+    kitchen: Mapped[str] = mapped_column(String, default="")
+    category_id: Mapped[int] = mapped_column(Integer, nullable=True)
+    title: Mapped[str] = mapped_column(String, default="")
+
+
+class StaffMessage(Base):
+    """Заказ в отправленном чату персонала сообщении (для правки карточки)."""
+
+    __tablename__ = "staff_messages"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    tenant: Mapped[str] = mapped_column(String, default="")
+    order_id: Mapped[int] = mapped_column(Integer, index=True)
+    chat_id: Mapped[int] = mapped_column(BigInteger)
+    message_id: Mapped[int] = mapped_column(Integer)
+    created_at: Mapped[datetime.datetime] = mapped_column(
+        DateTime, default=datetime.datetime.utcnow
     )
@@ -0,0 +1,450 @@
+"""
+Уведомления персонала ресторана о новых заказах TeleFood.
+
+Чаты персонала (кухни, администраторы) подписываются в панели администратора на
+заказы ресторана: все, определённой кухни (см. delivery.py) или с продуктами
+определённой категории. Подписки и отправленные карточки хранятся в основной базе.
+
+Оформление заказа только ставит его в очередь (StaffNotifier.order_created). Фоновый
+поток раз в STAFF_DIGEST_WINDOW секунд разбирает очередь: заказы, пришедшие за это
+время, объединяются в одно сообщение каждому подписанному чату, поэтому в час пик
+число сообщений зависит от числа чатов, а не заказов. Когда меняется статус оплаты,
+заказ снова ставится в очередь (order_changed), и сообщения с ним редактируются,
+а не отправляются заново. Все запросы к Bot API идут через RateLimitedSender:
+общий лимит бота, лимит на чат и пауза по retry_after из ответов 429.
+"""
+
+import datetime
+import html
+import logging
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, FrozenSet, Iterable, List, NamedTuple, Optional, Tuple
+
+import requests
+from sqlalchemy import delete, select
+from sqlalchemy.orm import Session
+from telebot import types
+from telebot.apihelper import ApiTelegramException
+
+from config import (
+    STAFF_CHAT_RATE,
+    STAFF_DIGEST_MAX_ORDERS,
+    STAFF_DIGEST_WINDOW,
+    STAFF_MESSAGE_TTL_DAYS,
+    STAFF_SEND_RATE,
+)
+from content_codec import product_counts
+from database import (
+    SessionLocal,
+    current_tenant,
+    get_session_factory,
+    reads,
+    use_tenant,
+    writes,
+)
+from models import ArchivedOrder, Order, StaffMessage, StaffSubscription
+from ratelimit import TokenBucket
+from reporting import to_local_time
+from services import get_products_by_ids
+from transport import non_critical
+
+logger = logging.getLogger("TeleFoodBot")
+
+MAX_ATTEMPTS = 5
+# Префикс callback-данных кнопки «оплачен» в карточке заказа
+PAID_CALLBACK = "staff_paid_"
+# Записи об отправленных карточках чистятся не чаще раза в столько секунд
+PRUNE_INTERVAL = 3600
+
+
+class OrderCard(NamedTuple):
+    """Данные заказа для карточки в чате персонала."""
+
+    id: int
+    created_at: datetime.datetime
+    # Позиции заказа: (название продукта, количество)
+    lines: List[Tuple[str, int]]
+    total: float
+    paid: bool
+    kitchen: str
+    categories: FrozenSet[int]
+
+
+@reads
+def load_order_cards(db: Session, order_ids: Iterable[int]) -> Dict[int, OrderCard]:
+    """Получить данные карточек заказов (из оперативной таблицы или архива).
+    :param db: SQLAlchemy сессия базы ресторана
+    :param order_ids: ID заказов
+    :return: словарь {ID заказа: OrderCard} для найденных заказов
+    """
+    ids = set(order_ids)
+    if not ids:
+        return {}
+    orders = db.query(Order).filter(Order.id.in_(ids)).all()
+    missing = ids - {order.id for order in orders}
+    if missing:
+        orders += db.query(ArchivedOrder).filter(ArchivedOrder.id.in_(missing)).all()
+    counts = {order.id: product_counts(order.content) for order in orders}
+    products = get_products_by_ids(db, {pid for c in counts.values() for pid in c})
+    cards = {}
+    for order in orders:
+        lines, total, categories = [], 0.0, set()
+        for pid, units in counts[order.id].items():
+            product = products.get(pid)
+            if product is None:
+                lines.append((f"Продукт #{pid}", units))
+                continue
+            lines.append((product.name, units))
+            total += product.cost * units
+            categories.add(product.product_type)
+        cards[order.id] = OrderCard(
+            order.id,
+            order.created_at,
+            lines,
+            total - (order.discount or 0.0) + (order.delivery_fee or 0.0),
+            bool(order.pay_status),
+            order.kitchen or "",
+            frozenset(categories),
+        )
+    return cards
+
+
+@reads
+def get_staff_subscriptions(db: Session, tenant: str) -> List[StaffSubscription]:
+    """Получить подписки чатов персонала на заказы ресторана.
+    :param db: SQLAlchemy сессия основной базы
+    :param tenant: код ресторана ("" — основная база)
+    :return: список подписок
+    """
+    return db.scalars(
+        select(StaffSubscription).where(StaffSubscription.tenant == tenant)
+    ).all()
+
+
+@reads
+def get_card_messages(
+    db: Session, tenant: str, order_ids: Iterable[int]
+) -> Dict[Tuple[int, int], List[int]]:
+    """Найти отправленные сообщения с карточками заказов.
+    :param db: SQLAlchemy сессия основной базы
+    :param tenant: код ресторана ("" — основная база)
+    :param order_ids: ID заказов
+    :return: словарь {(id чата, id сообщения): все ID заказов этого сообщения}
+    """
+    ids = set(order_ids)
+    messages = defaultdict(list)
+    if not ids:
+        return messages
+    affected = set(
+        db.execute(
+            select(StaffMessage.chat_id, StaffMessage.message_id).where(
+                StaffMessage.tenant == tenant, StaffMessage.order_id.in_(ids)
+            )
+        ).all()
+    )
+    chats = {chat_id for chat_id, _ in affected}
+    # Фильтр по id сообщений сужает выборку до затронутых карточек, а не всех
+    # карточек этих чатов; точное совпадение пары проверяется ниже
+    rows = db.execute(
+        select(
+            StaffMessage.chat_id, StaffMessage.message_id, StaffMessage.order_id
+        ).where(
+            StaffMessage.tenant == tenant,
+            StaffMessage.chat_id.in_(chats),
+            StaffMessage.message_id.in_({message_id for _, message_id in affected}),
+        )
+    )
+    for chat_id, message_id, order_id in rows:
+        if (chat_id, message_id) in affected:
+            messages[(chat_id, message_id)].append(order_id)
+    return messages
+
+
+@writes
+def save_staff_messages(
+    db: Session, tenant: str, rows: Iterable[Tuple[int, int, int]]
+) -> None:
+    """Сохранить отправленные карточки заказов для их последующей правки.
+    :param db: SQLAlchemy сессия основной базы
+    :param tenant: код ресторана ("" — основная база)
+    :param rows: кортежи (ID заказа, id чата, id сообщения)
+    """
+    db.add_all(
+        StaffMessage(
+            tenant=tenant, order_id=order_id, chat_id=chat_id, message_id=message_id
+        )
+        for order_id, chat_id, message_id in rows
+    )
+    db.commit()
+
+
+def subscribed_chats(
+    subscriptions: List[StaffSubscription], card: OrderCard
+) -> List[int]:
+    """Чаты, подписанные на заказ (каждый чат один раз)."""
+    chats = []
+    for subscription in subscriptions:
+        if subscription.kitchen and subscription.kitchen != card.kitchen:
+            continue
+        if (
+            subscription.category_id is not None
+            and subscription.category_id not in card.categories
+        ):
+            continue
+        if subscription.chat_id not in chats:
+            chats.append(subscription.chat_id)
+    return chats
+
+
+def render_cards(cards: List[OrderCard]) -> Tuple[str, types.InlineKeyboardMarkup]:
+    """Текст (HTML) и кнопки сообщения персоналу с одним или несколькими заказами."""
+    if len(cards) == 1:
+        text = ""
+    else:
+        text = f"🆕 <b>Новые заказы: {len(cards)}</b>\n\n"
+    markup = types.InlineKeyboardMarkup()
+    blocks = []
+    for card in cards:
+        header = (
+            f"🆕 <b>Заказ №{card.id}</b>" if len(cards) == 1 else f"<b>№{card.id}</b>"
+        )
+        header += f" · {to_local_time(card.created_at):%H:%M}"
+        if card.kitchen:
+            header += f" · кухня {html.escape(card.kitchen)}"
+        items = ", ".join(f"{html.escape(name)} ×{units}" for name, units in card.lines)
+        status = "✅ оплачен" if card.paid else "⏳ ждёт оплаты"
+        blocks.append(f"{header}\n{items}\nСумма: {card.total:.2f}₽ · {status}")
+        if not card.paid:
+            markup.add(
+                types.InlineKeyboardButton(
+                    f"✅ №{card.id} оплачен", callback_data=f"{PAID_CALLBACK}{card.id}"
+                )
+            )
+    return text + "\n\n".join(blocks), markup
+
+
+class RateLimitedSender:
+    """
+    Отправка и правка сообщений с общим лимитом бота и лимитом на каждый чат.
+    """
+
+    def __init__(
+        self,
+        bot,
+        rate: float = STAFF_SEND_RATE,
+        chat_rate: float = STAFF_CHAT_RATE,
+        retry_delay: float = 1.0,
+    ):
+        self.bot = bot
+        self.chat_rate = chat_rate
+        self.retry_delay = retry_delay
+        self.limiter = TokenBucket(rate)
+        self._chat_limiters: Dict[int, TokenBucket] = {}
+
+    def _call(self, chat_id: int, request):
+        """Выполнить запрос к чату с соблюдением лимитов и повторами.
+
+        :return: ответ Bot API или None при ошибке
+        """
+        limiter = self._chat_limiters.get(chat_id)
+        if limiter is None:
+            limiter = self._chat_limiters[chat_id] = TokenBucket(self.chat_rate, 3)
+        for attempt in range(1, MAX_ATTEMPTS + 1):
+            limiter.acquire()
+            self.limiter.acquire()
+            try:
+                with non_critical():
+                    return request()
+            except ApiTelegramException as e:
+                if e.error_code == 429:
+                    retry_after = (e.result_json.get("parameters") or {}).get(
+                        "retry_after", self.retry_delay
+                    )
+                    self.limiter.pause(retry_after)
+                    continue
+                if "message is not modified" in (e.description or ""):
+                    # Карточка уже показывает текущее состояние
+                    return True
+                if e.error_code < 500:
+                    logger.warning(
+                        f"Staff message to {chat_id} failed: {e.description}"
+                    )
+                    return None
+            except requests.RequestException as e:
+                logger.warning(f"Staff message to {chat_id} network error: {str(e)}")
+            time.sleep(self.retry_delay * attempt)
+        return None
+
+    def send(self, chat_id: int, text: str, markup=None) -> Optional[int]:
+        """Отправить сообщение; вернуть его id или None."""
+        message = self._call(
+            chat_id,
+            lambda: self.bot.send_message(
+                chat_id, text, parse_mode="HTML", reply_markup=markup
+            ),
+        )
+        return message.message_id if message is not None else None
+
+    def edit(self, chat_id: int, message_id: int, text: str, markup=None) -> bool:
+        """Заменить текст и кнопки отправленного сообщения."""
+        result = self._call(
+            chat_id,
+            lambda: self.bot.edit_message_text(
+                text, chat_id, message_id, parse_mode="HTML", reply_markup=markup
+            ),
+        )
+        return result is not None
+
+
+class StaffNotifier:
+    """
+    Очередь уведомлений персонала с отправкой сводок в фоновом потоке.
+    """
+
+    def __init__(
+        self,
+        bot,
+        session_factory=SessionLocal,
+        staff_session_factory=None,
+        window: float = STAFF_DIGEST_WINDOW,
+        max_orders: int = STAFF_DIGEST_MAX_ORDERS,
+        sender: Optional[RateLimitedSender] = None,
+    ):
+        self.session_factory = session_factory
+        # Подписки и карточки всех ресторанов хранятся в основной базе
+        self.staff_session_factory = staff_session_factory or get_session_factory(None)
+        self.window = window
+        self.max_orders = max_orders
+        self.sender = sender or RateLimitedSender(bot)
+        # Ресторан -> id заказов, ожидающих отправки или правки карточек
+        self._created: Dict[str, List[int]] = defaultdict(list)
+        self._changed: Dict[str, set] = defaultdict(set)
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._next_prune = 0.0
+
+    def order_created(self, order_id: int):
+        """Поставить новый заказ ресторана текущего потока в очередь уведомлений."""
+        with self._lock:
+            self._created[current_tenant() or ""].append(order_id)
+
+    def order_changed(self, order_id: int):
+        """Поставить в очередь правку карточек заказа (например, после оплаты)."""
+        with self._lock:
+            self._changed[current_tenant() or ""].add(order_id)
+
+    def flush(self) -> int:
+        """Отправить сводки новых заказов и править изменённые карточки.
+
+        :return: количество отправленных и исправленных сообщений
+        """
+        with self._flush_lock:
+            with self._lock:
+                created, self._created = self._created, defaultdict(list)
+                changed, self._changed = self._changed, defaultdict(set)
+            sent = 0
+            for tenant in set(created) | set(changed):
+                try:
+                    sent += self._flush_tenant(
+                        tenant, created.get(tenant, []), changed.get(tenant, set())
+                    )
+                except Exception as e:
+                    logger.error(f"Staff notifications for {tenant!r} failed: {e}")
+            return sent
+
+    def _flush_tenant(self, tenant: str, created: List[int], changed: set) -> int:
+        # Карточки новых заказов и так покажут текущий статус
+        changed = changed - set(created)
+        # Сессии закрываются до отправки: запросы к Bot API идут с паузами лимитов,
+        # и соединение с базой на это время не удерживается
+        with self.staff_session_factory() as staff_db:
+            subscriptions = get_staff_subscriptions(staff_db, tenant)
+            messages = get_card_messages(staff_db, tenant, changed)
+        with use_tenant(tenant or None), self.session_factory() as db:
+            needed = set(created).union(*messages.values())
+            cards = load_order_cards(db, needed)
+
+        digests = defaultdict(list)
+        for order_id in created:
+            card = cards.get(order_id)
+            if card is not None:
+                for chat_id in subscribed_chats(subscriptions, card):
+                    digests[chat_id].append(card)
+        sent, rows = 0, []
+        try:
+            for chat_id, chat_cards in digests.items():
+                for start in range(0, len(chat_cards), self.max_orders):
+                    part = chat_cards[start : start + self.max_orders]
+                    message_id = self.sender.send(chat_id, *render_cards(part))
+                    if message_id is None:
+                        continue
+                    sent += 1
+                    rows += [(card.id, chat_id, message_id) for card in part]
+        finally:
+            # Отправленные карточки сохраняются, даже если отправка прервалась
+            if rows:
+                with self.staff_session_factory() as staff_db:
+                    save_staff_messages(staff_db, tenant, rows)
+
+        for (chat_id, message_id), order_ids in messages.items():
+            part = [cards[order_id] for order_id in order_ids if order_id in cards]
+            if part and self.sender.edit(chat_id, message_id, *render_cards(part)):
+                sent += 1
+        return sent
+
+    def prune(self, ttl_days: int = STAFF_MESSAGE_TTL_DAYS) -> int:
+        """Удалить записи о карточках старше ttl_days дней (их больше не правят)."""
+        before = datetime.datetime.utcnow() - datetime.timedelta(days=ttl_days)
+        with self.staff_session_factory() as staff_db:
+            result = staff_db.execute(
+                delete(StaffMessage).where(StaffMessage.created_at < before)
+            )
+            staff_db.commit()
+            return result.rowcount
+
+    def start(self):
+        """Запустить фоновый поток отправки сводок."""
+
+        def worker():
+            while not self._stop_event.wait(self.window):
+                self.flush()
+                if time.monotonic() >= self._next_prune:
+                    self._next_prune = time.monotonic() + PRUNE_INTERVAL
+                    try:
+                        self.prune()
+                    except Exception as e:
+                        logger.error(f"Staff messages prune failed: {e}")
+
+        self._thread = threading.Thread(target=worker, name="staff-notify", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Остановить поток и отправить накопленные уведомления."""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        self.flush()
+
+
+@reads
+def get_message_tenant(
+    db: Session, chat_id: int, message_id: int, order_id: int
+) -> Optional[str]:
+    """Найти ресторан заказа в карточке, отправленной чату персонала.
+    :param db: SQLAlchemy сессия основной базы
+    :param chat_id: id чата
+    :param message_id: id сообщения с карточкой
+    :param order_id: id заказа
+    :return: код ресторана ("" — основная база) или None, если такой карточки нет
+    """
+    return db.scalar(
+        select(StaffMessage.tenant).where(
+            StaffMessage.chat_id == chat_id,
+            StaffMessage.message_id == message_id,
+            StaffMessage.order_id == order_id,
+        )
+    )
@@ -0,0 +1,264 @@
+"""
+Опрос обновлений Telegram с сохранением прогресса и мягкой остановкой.
+
+UpdatePoller заменяет стандартный bot.polling: получает обновления пачками,
+обрабатывает их в пуле потоков (обновления одного чата — по порядку) и сохраняет
+прогресс в таблицу app_meta после каждой пачки и не реже раза в save_interval секунд
+во время долгой пачки. Telegram получает подтверждение пачки (offset в следующем
+getUpdates) только после того, как вся пачка обработана, поэтому при аварийном
+завершении необработанные обновления будут доставлены снова, а уже обработанные —
+пропущены по сохранённому прогрессу (кроме обработанных после последнего сохранения).
+
+По SIGTERM/SIGINT опрос прекращается, текущие обновления дорабатываются до
+истечения drain_timeout; после этого обработчики заканчивают текущее обновление и
+не берут следующих. Когда все они остановлены, прогресс сохраняется и выполняются
+обработчики завершения (сброс буферов записи в БД, закрытие движков и т.п.).
+"""
+
+import json
+import logging
+import signal
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from sqlalchemy.exc import SQLAlchemyError
+
+from services import get_meta, set_meta
+
+logger = logging.getLogger("TeleFoodBot")
+
+UPDATE_OFFSET_KEY = "telegram_update_offset"
+
+
+class UpdateProgress:
+    """
+    Прогресс обработки обновлений: watermark и множество обработанных id выше него.
+
+    Все обновления с id <= watermark обработаны. Обновления выше watermark,
+    обработанные вне порядка, перечислены в done.
+    """
+
+    def __init__(self, session_factory, save_interval: float = 1.0):
+        self.session_factory = session_factory
+        self.save_interval = save_interval
+        self.watermark = 0
+        self.done = set()
+        self._pending = set()
+        self._dirty = False
+        self._next_save = 0.0
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+
+    def load(self):
+        """Загрузить сохранённый прогресс."""
+        with self.session_factory() as db:
+            raw = get_meta(db, UPDATE_OFFSET_KEY, "")
+        if raw:
+            state = json.loads(raw)
+            self.watermark = state.get("watermark", 0)
+            self.done = set(state.get("done", []))
+        return self
+
+    def is_done(self, update_id: int) -> bool:
+        with self._lock:
+            return update_id <= self.watermark or update_id in self.done
+
+    def start(self, update_ids):
+        """Отметить обновления как взятые в работу."""
+        with self._lock:
+            self._pending.update(update_ids)
+
+    def finish(self, update_id: int):
+        """Отметить обновление как обработанное; сохранить прогресс, если пора."""
+        with self._lock:
+            self._pending.discard(update_id)
+            self.done.add(update_id)
+            # Всё, что меньше самого раннего незавершённого обновления, обработано
+            limit = min(self._pending) - 1 if self._pending else max(self.done)
+            completed = [uid for uid in self.done if uid <= limit]
+            if completed:
+                self.watermark = max(self.watermark, max(completed))
+                self.done.difference_update(completed)
+            self._dirty = True
+            due = time.monotonic() >= self._next_save
+            if due:
+                self._next_save = time.monotonic() + self.save_interval
+        if due:
+            self.save()
+
+    def save(self) -> bool:
+        """Сохранить прогресс, если он изменился.
+
+        Ошибка записи попадает в лог: прогресс останется в памяти и будет сохранён
+        следующим вызовом.
+        :return: True, если сохранять было нечего или прогресс сохранён
+        """
+        # Снимок и запись под одной блокировкой: записи не обгоняют друг друга
+        with self._save_lock:
+            with self._lock:
+                if not self._dirty:
+                    return True
+                state = json.dumps(
+                    {"watermark": self.watermark, "done": sorted(self.done)}
+                )
+                self._dirty = False
+            try:
+                with self.session_factory() as db:
+                    set_meta(db, UPDATE_OFFSET_KEY, state)
+                    db.commit()
+                return True
+            except SQLAlchemyError as e:
+                with self._lock:
+                    self._dirty = True
+                logger.error(f"Failed to save update progress: {str(e)}")
+                return False
+
+
+class UpdatePoller:
+    """
+    Цикл длинного опроса с пулом обработчиков и мягкой остановкой.
+    """
+
+    def __init__(
+        self,
+        bot,
+        session_factory,
+        workers: int = 4,
+        drain_timeout: float = 25.0,
+        long_polling_timeout: int = 10,
+    ):
+        self.bot = bot
+        self.session_factory = session_factory
+        self.workers = workers
+        self.drain_timeout = drain_timeout
+        self.long_polling_timeout = long_polling_timeout
+        self.progress = UpdateProgress(session_factory)
+        self._stop_event = threading.Event()
+        # После истечения drain_timeout обработчики не берут следующих обновлений
+        self._abort = threading.Event()
+        self._stop_requested_at = None
+        self._shutdown_hooks = []
+        self._first_update_hooks = []
+
+    def on_shutdown(self, hook):
+        """Зарегистрировать функцию, вызываемую после остановки опроса."""
+        self._shutdown_hooks.append(hook)
+
+    def on_first_update(self, hook):
+        """Зарегистрировать функцию, вызываемую после обработки первой пачки обновлений."""
+        self._first_update_hooks.append(hook)
+
+    def _run_hooks(self, hooks, kind: str):
+        for hook in hooks:
+            try:
+                hook()
+            except Exception as e:
+                logger.error(f"{kind} hook error: {str(e)}")
+
+    def stop(self, *args):
+        """Прекратить получение новых обновлений (подходит как обработчик сигнала)."""
+        if not self._stop_event.is_set():
+            logger.info("Stop requested, draining in-flight updates...")
+            self._stop_requested_at = time.monotonic()
+            self._stop_event.set()
+
+    def install_signal_handlers(self):
+        """Останавливать опрос по SIGTERM и SIGINT (только из главного потока)."""
+        if threading.current_thread() is threading.main_thread():
+            signal.signal(signal.SIGTERM, self.stop)
+            signal.signal(signal.SIGINT, self.stop)
+
+    @staticmethod
+    def _chat_key(update):
+        """Ключ упорядочивания: обновления одного пользователя обрабатываются по порядку."""
+        for event in (update.message, update.edited_message):
+            if event is not None:
+                return event.chat.id
+        for event in (update.callback_query, update.inline_query):
+            if event is not None:
+                return event.from_user.id
+        return update.update_id
+
+    def _process_group(self, updates):
+        """Последовательно обработать обновления одного чата."""
+        for update in updates:
+            if self._abort.is_set():
+                # Оставшиеся обновления будут доставлены снова после перезапуска
+                return
+            try:
+                self.bot.process_new_updates([update])
+            except Exception as e:
+                # Ошибочное обновление не повторяется, иначе оно заблокирует очередь
+                logger.error(f"Update {update.update_id} handler error: {str(e)}")
+            finally:
+                self.progress.finish(update.update_id)
+
+    def _wait(self, futures):
+        """Дождаться обработки пачки; после запроса остановки — не дольше drain_timeout."""
+        pending = set(futures)
+        while pending:
+            _, pending = wait(pending, timeout=0.5)
+            if pending and self._stop_requested_at is not None:
+                if time.monotonic() - self._stop_requested_at > self.drain_timeout:
+                    logger.warning(
+                        f"Drain timeout: {len(pending)} update groups left unfinished"
+                    )
+                    return False
+        return True
+
+    def run(self):
+        """Запустить цикл опроса; возвращает управление после мягкой остановки."""
+        self.progress.load()
+        offset = self.progress.watermark + 1
+        logger.info(f"Polling from update offset {offset}")
+        executor = ThreadPoolExecutor(
+            max_workers=self.workers, thread_name_prefix="updates"
+        )
+        delay = 1
+        try:
+            while not self._stop_event.is_set():
+                try:
+                    updates = self.bot.get_updates(
+                        offset=offset,
+                        timeout=self.long_polling_timeout + 5,
+                        long_polling_timeout=self.long_polling_timeout,
+                    )
+                    delay = 1
+                except Exception as e:
+                    logger.error(f"Polling error: {str(e)}")
+                    self._stop_event.wait(delay)
+                    delay = min(delay * 2, 60)
+                    continue
+                if self._stop_event.is_set() or not updates:
+                    # Неподтверждённая пачка будет доставлена снова после перезапуска
+                    continue
+
+                groups = OrderedDict()
+                for update in updates:
+                    if not self.progress.is_done(update.update_id):
+                        groups.setdefault(self._chat_key(update), []).append(update)
+                self.progress.start(u.update_id for g in groups.values() for u in g)
+                futures = [
+                    executor.submit(self._process_group, group)
+                    for group in groups.values()
+                ]
+                if not self._wait(futures):
+                    break
+                self.progress.save()
+                if self._first_update_hooks:
+                    hooks, self._first_update_hooks = self._first_update_hooks, []
+                    self._run_hooks(hooks, "First update")
+                offset = max(update.update_id for update in updates) + 1
+        finally:
+            # Движки и буферы закрываются обработчиками завершения только после того,
+            # как потоки пула закончили текущие обновления
+            self._abort.set()
+            executor.shutdown(wait=True, cancel_futures=True)
+            self.progress.save()
+            self._run_hooks(self._shutdown_hooks, "Shutdown")
+            logger.info(
+                f"Polling stopped at update {self.progress.watermark}"
+                f" (+{len(self.progress.done)} out of order)"
+            )
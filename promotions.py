@@ -0,0 +1,395 @@
+"""
+Акции и скидки TeleFood.
+
+Виды акций (models.Promotion.kind):
+    percent — скидка value процентов на продукты и категории акции
+              (без продуктов и категорий — на весь каталог)
+    price   — цена value за штуку продуктов и категорий акции
+              (например, «счастливые часы»)
+    combo   — набор product_ids (продукт может повторяться) за value
+
+У акции могут быть часы действия по местному времени, дни недели и период дат.
+
+Активные акции компилируются один раз на версию акций (см. bump_promotions_version)
+в индексы: скидки — по продукту и по категории, комбо — по одному из продуктов
+набора. При расчёте корзины просматриваются только акции, привязанные к её
+продуктам и их категориям, поэтому время расчёта зависит от числа позиций
+корзины, а не от числа акций.
+
+Правила расчёта: сначала применяются комбо, начиная с наибольшей выгоды, и
+каждый набор забирает свои позиции. К оставшимся позициям применяется лучшая
+для покупателя из действующих скидок; скидки на одну позицию не суммируются.
+"""
+
+import datetime
+import logging
+import threading
+import time
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from config import PROMOTIONS_REFRESH_INTERVAL
+from database import current_tenant, reads, writes
+from models import Product, Promotion
+from reporting import to_local_time
+from services import get_meta, set_meta
+
+logger = logging.getLogger("TeleFoodBot")
+
+PROMOTIONS_VERSION_KEY = "promotions_version"
+KINDS = ("percent", "price", "combo")
+
+
+class Window(NamedTuple):
+    """Время действия акции."""
+
+    valid_from: Optional[datetime.date]
+    valid_to: Optional[datetime.date]
+    weekdays: frozenset
+    start_hour: Optional[int]
+    end_hour: Optional[int]
+
+    def active(self, moment: datetime.datetime) -> bool:
+        """Проверить, действует ли акция в момент moment (местное время)."""
+        if self.valid_from is not None or self.valid_to is not None:
+            day = moment.date()
+            if self.valid_from is not None and day < self.valid_from:
+                return False
+            if self.valid_to is not None and day > self.valid_to:
+                return False
+        if self.weekdays and moment.isoweekday() not in self.weekdays:
+            return False
+        if self.start_hour is None or self.end_hour is None:
+            return True
+        hour = moment.hour
+        if self.start_hour <= self.end_hour:
+            return self.start_hour <= hour < self.end_hour
+        # Интервал через полночь, например 22–2
+        return hour >= self.start_hour or hour < self.end_hour
+
+
+class Rule:
+    """Скомпилированная скидка (percent или price)."""
+
+    __slots__ = ("id", "name", "kind", "value", "window")
+
+    def __init__(self, id: int, name: str, kind: str, value: float, window: Window):
+        self.id = id
+        self.name = name
+        self.kind = kind
+        self.value = value
+        self.window = window
+
+    def unit_discount(self, price: float) -> float:
+        """Скидка на одну штуку продукта с ценой price."""
+        if self.kind == "percent":
+            return price * self.value / 100
+        return max(price - self.value, 0.0)
+
+
+class Combo:
+    """Скомпилированный комбо-набор: {id продукта: количество в наборе} за value."""
+
+    __slots__ = ("id", "name", "value", "components", "window")
+
+    def __init__(self, id: int, name: str, value: float, components, window: Window):
+        self.id = id
+        self.name = name
+        self.value = value
+        self.components: Dict[int, int] = dict(components)
+        self.window = window
+
+
+class AppliedPromotion(NamedTuple):
+    """Применённая к корзине акция и сумма скидки по ней."""
+
+    id: int
+    name: str
+    amount: float
+
+
+class PricedCart(NamedTuple):
+    """Корзина с учётом акций."""
+
+    subtotal: float
+    discount: float
+    applied: List[AppliedPromotion]
+    # Скидка по каждому продукту корзины (для показа по строкам)
+    line_discounts: Dict[int, float]
+
+    @property
+    def total(self) -> float:
+        return self.subtotal - self.discount
+
+    def snapshot(self) -> Optional[list]:
+        """Применённые акции для сохранения в заказе (None — акций не было)."""
+        if not self.applied:
+            return None
+        return [
+            {"id": promo.id, "name": promo.name, "amount": promo.amount}
+            for promo in self.applied
+        ]
+
+
+def window_of(promotion: Promotion) -> Window:
+    """Время действия акции из её полей."""
+    return Window(
+        promotion.valid_from,
+        promotion.valid_to,
+        frozenset(int(day) for day in promotion.weekdays or "" if day.isdigit()),
+        promotion.start_hour,
+        promotion.end_hour,
+    )
+
+
+class PromotionRules:
+    """
+    Акции, скомпилированные в индексы по продукту и категории.
+    """
+
+    def __init__(self, promotions: Iterable[Promotion] = ()):
+        self._by_product: Dict[int, List[Rule]] = defaultdict(list)
+        self._by_category: Dict[int, List[Rule]] = defaultdict(list)
+        self._everything: List[Rule] = []
+        self._combos: Dict[int, List[Combo]] = defaultdict(list)
+        self.count = 0
+        for promotion in promotions:
+            self.add(promotion)
+
+    def __len__(self):
+        return self.count
+
+    def add(self, promotion: Promotion):
+        """Скомпилировать акцию и добавить её в индексы."""
+        window = window_of(promotion)
+        value = promotion.value or 0.0
+        if promotion.kind == "combo":
+            components = Counter(promotion.product_ids or [])
+            if not components:
+                return
+            # Набор срабатывает, только если в корзине есть все его продукты, поэтому
+            # достаточно индексировать его по одному — с самым коротким списком
+            key = min(components, key=lambda pid: (len(self._combos[pid]), pid))
+            self._combos[key].append(
+                Combo(promotion.id, promotion.name, value, components, window)
+            )
+        elif promotion.kind in KINDS:
+            rule = Rule(promotion.id, promotion.name, promotion.kind, value, window)
+            products = promotion.product_ids or []
+            categories = promotion.category_ids or []
+            for pid in products:
+                self._by_product[pid].append(rule)
+            for category in categories:
+                self._by_category[category].append(rule)
+            if not products and not categories:
+                self._everything.append(rule)
+        else:
+            logger.error(f"Unknown promotion kind {promotion.kind} ({promotion.id})")
+            return
+        self.count += 1
+
+    def evaluate(
+        self,
+        counts: Dict[int, int],
+        catalog: Dict[int, Tuple[float, int]],
+        moment: Optional[datetime.datetime] = None,
+    ) -> PricedCart:
+        """Рассчитать корзину с учётом акций.
+
+        :param counts: количества продуктов корзины {id: количество}
+        :param catalog: цены и категории продуктов корзины {id: (цена, id категории)}
+        :param moment: местное время расчёта (по умолчанию текущее)
+        :return: корзина с суммой, скидкой и применёнными акциями
+        """
+        moment = moment or to_local_time(None)
+        remaining = {pid: qty for pid, qty in counts.items() if pid in catalog}
+        subtotal = sum(catalog[pid][0] * qty for pid, qty in remaining.items())
+        amounts: Dict[int, float] = defaultdict(float)
+        names: Dict[int, str] = {}
+        line_discounts: Dict[int, float] = defaultdict(float)
+
+        offers = []
+        for pid in remaining:
+            for combo in self._combos.get(pid, ()):
+                base = 0.0
+                for component, qty in combo.components.items():
+                    if remaining.get(component, 0) < qty:
+                        break
+                    base += catalog[component][0] * qty
+                else:
+                    saving = base - combo.value
+                    if saving > 0 and combo.window.active(moment):
+                        offers.append((-saving, combo.id, combo, base))
+        for negative_saving, _, combo, base in sorted(offers, key=lambda o: o[:2]):
+            times = min(
+                remaining[component] // qty
+                for component, qty in combo.components.items()
+            )
+            if times <= 0:
+                continue
+            saving = -negative_saving * times
+            for component, qty in combo.components.items():
+                remaining[component] -= qty * times
+                # Выгода набора делится между его продуктами пропорционально цене
+                share = catalog[component][0] * qty / base
+                line_discounts[component] += saving * share
+            amounts[combo.id] += saving
+            names[combo.id] = combo.name
+
+        for pid, qty in remaining.items():
+            if qty <= 0:
+                continue
+            price, category = catalog[pid]
+            best, best_discount = None, 0.0
+            for rules in (
+                self._by_product.get(pid),
+                self._by_category.get(category),
+                self._everything,
+            ):
+                for rule in rules or ():
+                    discount = rule.unit_discount(price)
+                    if discount > best_discount and rule.window.active(moment):
+                        best, best_discount = rule, discount
+            if best is not None:
+                amounts[best.id] += best_discount * qty
+                names[best.id] = best.name
+                line_discounts[pid] += best_discount * qty
+
+        applied = [
+            AppliedPromotion(promo_id, names[promo_id], round(amount, 2))
+            for promo_id, amount in sorted(amounts.items())
+        ]
+        discount = min(round(sum(promo.amount for promo in applied), 2), subtotal)
+        return PricedCart(subtotal, discount, applied, dict(line_discounts))
+
+
+def parse_ids(text: str) -> List[int]:
+    """Разобрать список id продуктов через запятую или пробел (повторы сохраняются)."""
+    try:
+        return [int(part) for part in text.replace(",", " ").split()]
+    except ValueError:
+        raise ValueError("ID продуктов должны быть целыми числами") from None
+
+
+def parse_hours(text: str) -> Tuple[Optional[int], Optional[int]]:
+    """Разобрать часы действия "12-16" (пусто — весь день).
+
+    :return: пара (начальный час, конечный час) или (None, None)
+    """
+    text = text.strip()
+    if not text:
+        return None, None
+    try:
+        start, end = (int(part) for part in text.split("-"))
+    except ValueError:
+        raise ValueError("Часы действия указываются как 12-16") from None
+    if not (0 <= start <= 23 and 0 <= end <= 24) or start == end:
+        raise ValueError("Часы действия должны быть от 0 до 24 и не совпадать")
+    return start, end % 24
+
+
+@reads
+def load_promotions(db: Session) -> List[Promotion]:
+    """Получить активные акции.
+    :param db: SQLAlchemy сессия
+    :return: список объектов Promotion
+    """
+    return db.query(Promotion).filter(Promotion.active.is_(True)).all()
+
+
+@reads
+def get_promotions_version(db: Session) -> int:
+    """Получить текущую версию акций.
+    :param db: SQLAlchemy сессия
+    :return: номер версии, 0 если акции ещё не менялись
+    """
+    return int(get_meta(db, PROMOTIONS_VERSION_KEY, "0"))
+
+
+@writes
+def bump_promotions_version(db: Session) -> int:
+    """Увеличить версию акций после их изменения (без commit).
+    :param db: SQLAlchemy сессия
+    :return: новый номер версии
+    """
+    version = get_promotions_version(db) + 1
+    set_meta(db, PROMOTIONS_VERSION_KEY, str(version))
+    return version
+
+
+@reads
+def load_catalog(db: Session, product_ids) -> Dict[int, Tuple[float, int]]:
+    """Получить цены и категории продуктов.
+    :param db: SQLAlchemy сессия
+    :param product_ids: ID продуктов
+    :return: словарь {id: (цена, id категории)}
+    """
+    ids = set(product_ids)
+    if not ids:
+        return {}
+    rows = db.query(Product.id, Product.cost, Product.product_type).filter(
+        Product.id.in_(ids)
+    )
+    return {pid: (cost or 0.0, category) for pid, cost, category in rows}
+
+
+class _CompiledRules(NamedTuple):
+    rules: PromotionRules
+    version: int
+    checked: float
+
+
+class Promotions:
+    """
+    Скомпилированные акции ресторанов; акции ресторана компилируются при первом расчёте.
+    """
+
+    def __init__(self, refresh_interval: float = PROMOTIONS_REFRESH_INTERVAL):
+        self.refresh_interval = refresh_interval
+        self._compiled: Dict[Optional[str], _CompiledRules] = {}
+        self._lock = threading.Lock()
+
+    def get(self, db: Session) -> PromotionRules:
+        """Получить акции текущего ресторана, перекомпилировав их, если они изменились.
+
+        :param db: SQLAlchemy сессия базы текущего ресторана
+        :return: скомпилированные акции
+        """
+        tenant = current_tenant()
+        compiled = self._compiled.get(tenant)
+        now = time.monotonic()
+        if compiled is not None and now < compiled.checked + self.refresh_interval:
+            return compiled.rules
+        with self._lock:
+            compiled = self._compiled.get(tenant)
+            if compiled is not None and now < compiled.checked + self.refresh_interval:
+                return compiled.rules
+            version = get_promotions_version(db)
+            if compiled is not None and compiled.version == version:
+                rules = compiled.rules
+            else:
+                started = time.perf_counter()
+                rules = PromotionRules(load_promotions(db))
+                logger.info(
+                    f"Promotions compiled: {len(rules)} rules, v{version},"
+                    f" {time.perf_counter() - started:.3f}s"
+                )
+            self._compiled[tenant] = _CompiledRules(rules, version, now)
+            return rules
+
+    def price(
+        self,
+        db: Session,
+        counts: Dict[int, int],
+        moment: Optional[datetime.datetime] = None,
+    ) -> PricedCart:
+        """Рассчитать корзину текущего ресторана с учётом акций.
+
+        :param db: SQLAlchemy сессия
+        :param counts: количества продуктов корзины {id: количество}
+        :param moment: местное время расчёта (по умолчанию текущее)
+        :return: корзина с суммой, скидкой и применёнными акциями
+        """
+        return self.get(db).evaluate(counts, load_catalog(db, counts), moment)
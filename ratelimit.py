@@ -0,0 +1,81 @@
+"""
+Ограничение частоты операций для приложения TeleFood.
+
+Модуль содержит потокобезопасный TokenBucket («ведро токенов»), который используется
+для соблюдения лимитов Telegram Bot API при массовых рассылках и других отправках.
+"""
+
+import threading
+import time
+from typing import Optional
+
+
+class TokenBucket:
+    """
+    Потокобезопасное ведро токенов.
+
+    Токены пополняются со скоростью rate в секунду до ёмкости capacity. Метод pause
+    позволяет приостановить выдачу токенов, например, на время retry_after из ответа 429.
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else max(rate, 1.0))
+        self._tokens = self.capacity
+        self._updated_at = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        """Пополнить токены за время, прошедшее с прошлого обращения."""
+        elapsed = now - self._updated_at
+        if elapsed > 0:
+            self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+            self._updated_at = now
+
+    def try_acquire(self, tokens: float = 1.0) -> bool:
+        """Взять токены без ожидания.
+
+        :param tokens: количество токенов
+        :return: True, если токены выданы
+        """
+        with self._lock:
+            now = time.monotonic()
+            if now < self._paused_until:
+                return False
+            self._refill(now)
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return True
+            return False
+
+    def acquire(self, tokens: float = 1.0, timeout: Optional[float] = None) -> bool:
+        """Взять токены, при необходимости дождавшись их пополнения.
+
+        :param tokens: количество токенов
+        :param timeout: максимальное время ожидания в секундах (None — без ограничения)
+        :return: True, если токены выданы, False при истечении timeout
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                if now < self._paused_until:
+                    wait = self._paused_until - now
+                else:
+                    self._refill(now)
+                    if self._tokens >= tokens:
+                        self._tokens -= tokens
+                        return True
+                    wait = (tokens - self._tokens) / self.rate
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                wait = min(wait, remaining)
+            time.sleep(wait)
+
+    def pause(self, seconds: float):
+        """Приостановить выдачу токенов на указанное время."""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
@@ -0,0 +1,292 @@
+"""
+Рекомендации «С этим также заказывают» для Telegram-бота TeleFood.
+
+Модуль строит матрицу совместных покупок продукт × продукт по истории заказов:
+ячейка (i, j) — число заказов, в которых были оба продукта. Пары считаются
+векторно средствами NumPy; для небольшого каталога матрица плотная, для большого
+(больше DENSE_PRODUCT_LIMIT продуктов) хранятся только ненулевые ячейки.
+Для каждого продукта заранее вычисляется список лучших соседей, поэтому подбор
+рекомендаций к корзине выполняется в памяти без обращения к базе данных.
+
+Модель обновляется инкрементально при оформлении заказа и сохраняется в файл вместе
+с id последнего учтённого заказа; при запуске бот загружает файл и доучитывает
+заказы, оформленные после сохранения. Полный пересчёт:
+
+    python recommendations.py --rebuild
+"""
+
+import argparse
+import heapq
+import os
+import threading
+from collections import defaultdict
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from archive import order_batches
+from config import RECOMMENDATIONS_PATH
+from content_codec import product_counts
+from database import reads
+from models import Product
+
+# Каталог большего размера хранится разреженно
+DENSE_PRODUCT_LIMIT = 2048
+# Сколько соседей хранится для каждого продукта
+NEIGHBOURS = 20
+REBUILD_BATCH_SIZE = 10000
+
+
+def _pair_keys(baskets: List[List[int]], size: int) -> np.ndarray:
+    """Получить ключи i * size + j всех упорядоченных пар продуктов в корзинах.
+
+    Корзины группируются по длине, и пары каждой группы строятся одной операцией
+    индексирования по np.triu_indices.
+
+    :param baskets: корзины из уникальных индексов продуктов
+    :param size: размер стороны матрицы
+    :return: массив ключей (каждая пара встречается в обоих направлениях)
+    """
+    by_length = defaultdict(list)
+    for basket in baskets:
+        if len(basket) > 1:
+            by_length[len(basket)].append(basket)
+    keys = []
+    for length, group in by_length.items():
+        matrix = np.asarray(group, dtype=np.int64)
+        first, second = np.triu_indices(length, 1)
+        a = matrix[:, first].ravel()
+        b = matrix[:, second].ravel()
+        keys.append(a * size + b)
+        keys.append(b * size + a)
+    if not keys:
+        return np.empty(0, dtype=np.int64)
+    return np.concatenate(keys)
+
+
+class CooccurrenceModel:
+    """
+    Матрица совместных покупок со списками лучших соседей.
+
+    Запись выполняется под блокировкой; чтение списков соседей — без неё
+    (каждый список заменяется целиком одним присваиванием).
+    """
+
+    def __init__(
+        self, product_ids: Iterable[int] = (), dense_limit=DENSE_PRODUCT_LIMIT
+    ):
+        self.dense_limit = dense_limit
+        self.product_ids: List[int] = []
+        self.index: Dict[int, int] = {}
+        self.dense = True
+        self.counts = np.zeros((0, 0), dtype=np.int32)
+        self.rows: Dict[int, Dict[int, int]] = {}
+        self.neighbours: Dict[int, Tuple[Tuple[int, int], ...]] = {}
+        self.last_order_id = 0
+        self._lock = threading.Lock()
+        self._ensure(product_ids)
+
+    def __len__(self):
+        return len(self.product_ids)
+
+    def _ensure(self, product_ids: Iterable[int]):
+        """Добавить в матрицу отсутствующие продукты."""
+        new = [pid for pid in dict.fromkeys(product_ids) if pid not in self.index]
+        if not new:
+            return
+        for pid in new:
+            self.index[pid] = len(self.product_ids)
+            self.product_ids.append(pid)
+        size = len(self.product_ids)
+        if self.dense and size > self.dense_limit:
+            # Переход на разреженное хранение
+            for i, j in zip(*np.nonzero(self.counts)):
+                self.rows.setdefault(int(i), {})[int(j)] = int(self.counts[i, j])
+            self.counts = np.zeros((0, 0), dtype=np.int32)
+            self.dense = False
+        elif self.dense:
+            grow = size - self.counts.shape[0]
+            self.counts = np.pad(self.counts, ((0, grow), (0, grow)))
+
+    def add_baskets(self, baskets: Iterable[Sequence[int]]):
+        """Учесть корзины (списки id продуктов) и обновить списки соседей.
+
+        :param baskets: корзины заказов; повторы продукта в корзине не учитываются
+        """
+        baskets = [list(dict.fromkeys(basket)) for basket in baskets]
+        with self._lock:
+            self._ensure(pid for basket in baskets for pid in basket)
+            size = len(self.product_ids)
+            keys = _pair_keys(
+                [[self.index[pid] for pid in basket] for basket in baskets], size
+            )
+            if not len(keys):
+                return
+            unique, counts = np.unique(keys, return_counts=True)
+            if self.dense:
+                flat = self.counts.reshape(-1)
+                flat[unique] += counts.astype(np.int32)
+            else:
+                for key, count in zip(unique.tolist(), counts.tolist()):
+                    row = self.rows.setdefault(key // size, {})
+                    row[key % size] = row.get(key % size, 0) + count
+            self._refresh_neighbours(np.unique(unique // size))
+
+    def _refresh_neighbours(self, rows: np.ndarray):
+        """Пересчитать списки лучших соседей для указанных строк матрицы."""
+        if not len(rows):
+            return
+        ids = self.product_ids
+        if self.dense:
+            block = self.counts[rows]
+            limit = min(NEIGHBOURS, block.shape[1])
+            top = np.argpartition(-block, limit - 1, axis=1)[:, :limit]
+            for row, candidates, values in zip(
+                rows.tolist(), top, np.take_along_axis(block, top, axis=1)
+            ):
+                order = np.argsort(-values, kind="stable")
+                self.neighbours[ids[row]] = tuple(
+                    (ids[j], int(v))
+                    for j, v in zip(candidates[order].tolist(), values[order].tolist())
+                    if v > 0
+                )
+        else:
+            for row in rows.tolist():
+                best = heapq.nlargest(
+                    NEIGHBOURS, self.rows.get(row, {}).items(), key=lambda x: x[1]
+                )
+                self.neighbours[ids[row]] = tuple((ids[j], v) for j, v in best)
+
+    def add_order(self, order_id: int, product_ids: Sequence[int]):
+        """Учесть оформленный заказ."""
+        self.add_baskets([product_ids])
+        self.last_order_id = max(self.last_order_id, order_id)
+
+    def count(self, first: int, second: int) -> int:
+        """Число заказов, в которых были оба продукта."""
+        i, j = self.index.get(first), self.index.get(second)
+        if i is None or j is None:
+            return 0
+        if self.dense:
+            return int(self.counts[i, j])
+        return self.rows.get(i, {}).get(j, 0)
+
+    def recommend(self, product_ids: Iterable[int], k: int = 3) -> List[int]:
+        """Подобрать продукты, которые чаще всего заказывают вместе с корзиной.
+
+        :param product_ids: id продуктов в корзине
+        :param k: количество рекомендаций
+        :return: id рекомендованных продуктов по убыванию силы связи
+        """
+        in_cart = set(product_ids)
+        scores: Dict[int, int] = {}
+        for pid in in_cart:
+            for other, value in self.neighbours.get(pid, ()):
+                if other not in in_cart:
+                    scores[other] = scores.get(other, 0) + value
+        return [pid for pid, _ in heapq.nlargest(k, scores.items(), key=lambda x: x[1])]
+
+    def save(self, path: str):
+        """Сохранить модель в файл .npz (ненулевые ячейки и id последнего заказа)."""
+        with self._lock:
+            if self.dense:
+                rows, cols = np.nonzero(self.counts)
+                values = self.counts[rows, cols]
+            else:
+                cells = np.array(
+                    [(i, j, v) for i, row in self.rows.items() for j, v in row.items()],
+                    dtype=np.int64,
+                ).reshape(-1, 3)
+                rows, cols, values = cells.T
+            data = dict(
+                product_ids=np.asarray(self.product_ids, dtype=np.int64),
+                rows=rows,
+                cols=cols,
+                values=values,
+                last_order_id=np.int64(self.last_order_id),
+            )
+        tmp_path = f"{path}.tmp.npz"
+        np.savez_compressed(tmp_path, **data)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str, dense_limit=DENSE_PRODUCT_LIMIT) -> "CooccurrenceModel":
+        """Загрузить модель, сохранённую методом save."""
+        with np.load(path) as data:
+            model = cls(data["product_ids"].tolist(), dense_limit)
+            rows, cols, values = data["rows"], data["cols"], data["values"]
+            model.last_order_id = int(data["last_order_id"])
+        if model.dense:
+            model.counts[rows, cols] = values
+        else:
+            for i, j, v in zip(rows.tolist(), cols.tolist(), values.tolist()):
+                model.rows.setdefault(i, {})[j] = v
+        model._refresh_neighbours(np.unique(rows))
+        return model
+
+
+@reads
+def apply_orders(db: Session, model: CooccurrenceModel, batch_size=REBUILD_BATCH_SIZE):
+    """Учесть в модели заказы с id больше model.last_order_id.
+
+    :param db: SQLAlchemy сессия
+    :param model: модель совместных покупок
+    :param batch_size: количество заказов в одной пачке
+    :return: количество учтённых заказов
+    """
+    processed = 0
+    batches = order_batches(db, ("id", "content"), model.last_order_id, batch_size)
+    for batch in batches:
+        model.add_baskets(list(product_counts(content)) for _, content in batch)
+        model.last_order_id = max(model.last_order_id, batch[-1][0])
+        processed += len(batch)
+    return processed
+
+
+@reads
+def build_from_db(db: Session) -> CooccurrenceModel:
+    """Построить модель заново по всей истории заказов."""
+    model = CooccurrenceModel(
+        pid for (pid,) in db.query(Product.id).order_by(Product.id)
+    )
+    apply_orders(db, model)
+    return model
+
+
+def load_or_build(db: Session, path: str = RECOMMENDATIONS_PATH) -> CooccurrenceModel:
+    """Загрузить модель из файла и доучесть новые заказы, либо построить её заново."""
+    if os.path.exists(path):
+        try:
+            model = CooccurrenceModel.load(path)
+        except Exception as e:
+            print(f"[recommendations] Не удалось загрузить {path}: {str(e)}")
+        else:
+            apply_orders(db, model)
+            return model
+    return build_from_db(db)
+
+
+if __name__ == "__main__":
+    from database import SessionLocal, init_db
+
+    parser = argparse.ArgumentParser(description="Модель рекомендаций TeleFood")
+    parser.add_argument(
+        "--rebuild",
+        action="store_true",
+        help="пересчитать матрицу совместных покупок по всей истории заказов",
+    )
+    parser.add_argument("--path", default=RECOMMENDATIONS_PATH, help="файл модели")
+    args = parser.parse_args()
+
+    init_db()
+    with SessionLocal() as session:
+        if args.rebuild:
+            result = build_from_db(session)
+        else:
+            result = load_or_build(session, args.path)
+    result.save(args.path)
+    print(
+        f"Модель сохранена в {args.path}: {len(result)} продуктов, "
+        f"последний заказ №{result.last_order_id}"
+    )
@@ -0,0 +1,326 @@
+"""
+Отчёты о продажах для приложения TeleFood.
+
+Модуль поддерживает материализованные агрегаты (выручка за день, продажи по продуктам,
+нагрузка по часам), которые обновляются в той же транзакции, что и оформление заказа
+в services.checkout_cart. Отчёты читают только агрегаты, поэтому их стоимость зависит
+от числа дней в периоде, а не от числа заказов.
+
+Для заказов, оформленных до появления агрегатов, предусмотрен разовый пересчёт:
+    python reporting.py --backfill
+"""
+
+import argparse
+import datetime
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from archive import order_batches
+from config import LOCAL_TIMEZONE
+from content_codec import product_counts
+from models import DailySales, HourlySales, Order, Product, ProductSales
+
+BACKFILL_BATCH_SIZE = 1000
+
+# INSERT с ON CONFLICT DO UPDATE для атомарного прибавления к агрегатам
+_UPSERT_INSERTS = {"sqlite": sqlite.insert, "postgresql": postgresql.insert}
+
+
+class _Aggregates:
+    """Накопитель приращений агрегатов для одного или нескольких заказов."""
+
+    def __init__(self):
+        self.daily = defaultdict(lambda: [0, 0.0])
+        self.products = defaultdict(lambda: [0, 0.0])
+        self.hourly = defaultdict(lambda: [0, 0.0])
+
+    def add_order(
+        self,
+        created_at: Optional[datetime.datetime],
+        counts: Dict[int, int],
+        prices: Dict[int, float],
+        discount: Optional[float] = 0.0,
+    ):
+        """Учесть один заказ: counts — количество каждого продукта, prices — цены,
+        discount — скидка заказа по акциям."""
+        local_time = to_local_time(created_at)
+        day, hour = local_time.date(), local_time.hour
+        revenues = product_revenue(counts, prices, discount)
+        for product_id, revenue in revenues.items():
+            stat = self.products[(day, product_id)]
+            stat[0] += counts[product_id]
+            stat[1] += revenue
+        total = sum(revenues.values())
+        self.daily[day][0] += 1
+        self.daily[day][1] += total
+        self.hourly[(day, hour)][0] += 1
+        self.hourly[(day, hour)][1] += total
+
+    def apply(self, db: Session):
+        """Прибавить накопленные значения к строкам агрегатов (без commit)."""
+        _add_to_rows(
+            db,
+            DailySales,
+            ("day",),
+            [
+                {"day": day, "orders_count": orders_count, "revenue": revenue}
+                for day, (orders_count, revenue) in self.daily.items()
+            ],
+        )
+        _add_to_rows(
+            db,
+            ProductSales,
+            ("day", "product_id"),
+            [
+                {
+                    "day": day,
+                    "product_id": product_id,
+                    "units": units,
+                    "revenue": revenue,
+                }
+                for (day, product_id), (units, revenue) in self.products.items()
+            ],
+        )
+        _add_to_rows(
+            db,
+            HourlySales,
+            ("day", "hour"),
+            [
+                {
+                    "day": day,
+                    "hour": hour,
+                    "orders_count": orders_count,
+                    "revenue": revenue,
+                }
+                for (day, hour), (orders_count, revenue) in self.hourly.items()
+            ],
+        )
+
+
+def _add_to_rows(db: Session, model, keys: Tuple[str, ...], rows: List[dict]):
+    """Прибавить значения к строкам агрегата, создавая недостающие строки.
+
+    В SQLite и PostgreSQL это один INSERT … ON CONFLICT DO UPDATE SET col = col + …:
+    одновременные заказы не теряют приращений и не создают одну строку дважды.
+    """
+    if not rows:
+        return
+    table = model.__table__
+    insert = _UPSERT_INSERTS.get(db.get_bind().dialect.name)
+    if insert is None:
+        # Другие СУБД: чтение и изменение строки в транзакции заказа
+        for values in rows:
+            row = db.get(model, tuple(values[key] for key in keys))
+            if row is None:
+                db.add(model(**values))
+                continue
+            for column, value in values.items():
+                if column not in keys:
+                    setattr(row, column, getattr(row, column) + value)
+        return
+    statement = insert(table)
+    statement = statement.on_conflict_do_update(
+        index_elements=list(keys),
+        set_={
+            column: table.c[column] + statement.excluded[column]
+            for column in rows[0]
+            if column not in keys
+        },
+    )
+    db.execute(statement, rows)
+
+
+def to_local_time(moment: Optional[datetime.datetime]) -> datetime.datetime:
+    """Перевести время заказа (naive UTC) в местное время ресторана."""
+    if moment is None:
+        moment = datetime.datetime.utcnow()
+    return moment.replace(tzinfo=datetime.timezone.utc).astimezone(LOCAL_TIMEZONE)
+
+
+def product_revenue(
+    counts: Dict[int, int], prices: Dict[int, float], discount: Optional[float] = 0.0
+) -> Dict[int, float]:
+    """Выручка заказа по продуктам: цены каталога за вычетом скидки заказа.
+
+    Скидка распределяется между продуктами пропорционально их стоимости; продукты,
+    удалённые из каталога (цену восстановить невозможно), не учитываются.
+    :param counts: количество каждого продукта
+    :param prices: цены продуктов
+    :param discount: скидка заказа по акциям
+    :return: словарь {ID продукта: выручка}
+    """
+    subtotals = {
+        product_id: prices[product_id] * units
+        for product_id, units in counts.items()
+        if product_id in prices
+    }
+    total = sum(subtotals.values())
+    if not total:
+        return subtotals
+    share = 1.0 - min(discount or 0.0, total) / total
+    return {product_id: subtotal * share for product_id, subtotal in subtotals.items()}
+
+
+def _load_prices(db: Session, product_ids: Iterable[int]) -> Dict[int, float]:
+    """Получить текущие цены продуктов одним запросом."""
+    product_ids = set(product_ids)
+    if not product_ids:
+        return {}
+    rows = db.query(Product.id, Product.cost).filter(Product.id.in_(product_ids))
+    return {product_id: cost or 0.0 for product_id, cost in rows}
+
+
+def record_order(db: Session, order: Order):
+    """Учесть новый заказ в агрегатах.
+
+    Вызывается из checkout_cart до commit, поэтому заказ и агрегаты
+    фиксируются одной транзакцией.
+    :param db: SQLAlchemy сессия
+    :param order: только что созданный заказ
+    """
+    counts = product_counts(order.content)
+    aggregates = _Aggregates()
+    aggregates.add_order(
+        order.created_at, counts, _load_prices(db, counts), order.discount
+    )
+    aggregates.apply(db)
+
+
+def backfill(db: Session, batch_size: int = BACKFILL_BATCH_SIZE) -> int:
+    """Пересчитать агрегаты по всем существующим заказам.
+
+    Старые значения агрегатов удаляются, затем заказы читаются пачками по
+    возрастанию id (keyset-пагинация), каждая пачка фиксируется отдельной транзакцией.
+    Запускать следует при остановленном боте, иначе заказы, оформленные во время
+    пересчёта, могут быть учтены дважды.
+    :param db: SQLAlchemy сессия
+    :param batch_size: количество заказов в одной пачке
+    :return: количество обработанных заказов
+    """
+    db.query(DailySales).delete()
+    db.query(ProductSales).delete()
+    db.query(HourlySales).delete()
+    db.commit()
+
+    prices = {
+        product_id: cost or 0.0
+        for product_id, cost in db.query(Product.id, Product.cost)
+    }
+    processed = 0
+    columns = ("id", "created_at", "content", "discount")
+    for batch in order_batches(db, columns, batch_size=batch_size):
+        aggregates = _Aggregates()
+        for order_id, created_at, content, discount in batch:
+            counts = product_counts(content)
+            aggregates.add_order(created_at, counts, prices, discount)
+        aggregates.apply(db)
+        db.commit()
+        processed += len(batch)
+        print(f"[reporting.backfill] Обработано заказов: {processed}")
+    return processed
+
+
+def get_daily_revenue(
+    db: Session, date_from: datetime.date, date_to: datetime.date
+) -> List[DailySales]:
+    """Получить выручку и число заказов по дням за период (включительно).
+    :param db: SQLAlchemy сессия
+    :param date_from: первый день периода
+    :param date_to: последний день периода
+    :return: Список объектов DailySales, отсортированных по дате
+    """
+    return (
+        db.query(DailySales)
+        .filter(DailySales.day >= date_from, DailySales.day <= date_to)
+        .order_by(DailySales.day)
+        .all()
+    )
+
+
+def get_top_products(
+    db: Session, date_from: datetime.date, date_to: datetime.date, limit: int = 10
+) -> List[Tuple[int, str, int, float]]:
+    """Получить самые продаваемые продукты за период.
+    :param db: SQLAlchemy сессия
+    :param date_from: первый день периода
+    :param date_to: последний день периода
+    :param limit: максимальное количество продуктов
+    :return: Список кортежей (product_id, название, количество, выручка) по убыванию количества
+    """
+    units = func.sum(ProductSales.units).label("units")
+    revenue = func.sum(ProductSales.revenue).label("revenue")
+    rows = (
+        db.query(ProductSales.product_id, Product.name, units, revenue)
+        .outerjoin(Product, Product.id == ProductSales.product_id)
+        .filter(ProductSales.day >= date_from, ProductSales.day <= date_to)
+        .group_by(ProductSales.product_id, Product.name)
+        .order_by(units.desc(), revenue.desc())
+        .limit(limit)
+        .all()
+    )
+    return [
+        (product_id, name or f"#{product_id}", int(total_units), float(total_revenue))
+        for product_id, name, total_units, total_revenue in rows
+    ]
+
+
+def get_hourly_load(
+    db: Session, date_from: datetime.date, date_to: datetime.date
+) -> List[Tuple[int, int, float]]:
+    """Получить распределение заказов по часам дня за период.
+    :param db: SQLAlchemy сессия
+    :param date_from: первый день периода
+    :param date_to: последний день периода
+    :return: Список из 24 кортежей (час, число заказов, выручка)
+    """
+    rows = (
+        db.query(
+            HourlySales.hour,
+            func.sum(HourlySales.orders_count),
+            func.sum(HourlySales.revenue),
+        )
+        .filter(HourlySales.day >= date_from, HourlySales.day <= date_to)
+        .group_by(HourlySales.hour)
+        .all()
+    )
+    load = {
+        hour: (int(orders_count), float(revenue))
+        for hour, orders_count, revenue in rows
+    }
+    return [(hour, *load.get(hour, (0, 0.0))) for hour in range(24)]
+
+
+if __name__ == "__main__":
+    from database import SessionLocal, init_db
+
+    parser = argparse.ArgumentParser(description="Агрегаты продаж TeleFood")
+    parser.add_argument(
+        "--backfill",
+        action="store_true",
+        help="пересчитать агрегаты по всей истории заказов",
+    )
+    parser.add_argument("--batch-size", type=int, default=BACKFILL_BATCH_SIZE)
+    parser.add_argument(
+        "--days", type=int, default=7, help="период отчёта в днях (по умолчанию 7)"
+    )
+    args = parser.parse_args()
+
+    init_db()
+    with SessionLocal() as session:
+        if args.backfill:
+            total = backfill(session, args.batch_size)
+            print(f"Агрегаты пересчитаны, заказов: {total}")
+        today = to_local_time(None).date()
+        start = today - datetime.timedelta(days=args.days - 1)
+        for stat in get_daily_revenue(session, start, today):
+            print(
+                f"{stat.day}: заказов {stat.orders_count}, выручка {stat.revenue:.2f}₽"
+            )
+        for product_id, name, total_units, total_revenue in get_top_products(
+            session, start, today
+        ):
+            print(f"{name}: {total_units} шт., {total_revenue:.2f}₽")
@@ -0,0 +1,335 @@
+"""
+Планировщик отложенных заданий TeleFood.
+
+Все таймеры бота (напоминания о брошенных корзинах, сброс незавершённого ввода,
+периодическая очистка пустых корзин) обслуживает один поток с двоичной кучей
+по времени запуска, а не поток на каждый таймер. Задание идентифицируется ключом:
+повторное планирование с тем же ключом заменяет прежнее (например, напоминание
+сдвигается при каждом добавлении товара), отмена — O(1): запись помечается
+отменённой и выбрасывается из кучи при извлечении, а когда отменённых записей
+становится больше живых, куча перестраивается.
+
+Задания с persist=True сохраняются в таблицу scheduled_jobs основной базы
+отложенной записью: изменения копятся в памяти и сбрасываются одной транзакцией
+раз в SCHEDULER_FLUSH_INTERVAL секунд и при остановке, поэтому частое
+перепланирование не нагружает базу. При запуске задания загружаются обратно;
+просроченные за время простоя выполняются сразу.
+
+Обработчик задания получает payload как именованные аргументы и выполняется
+в контексте ресторана, в котором задание было запланировано. Если обработчик
+возвращает число, задание планируется повторно через столько секунд
+(периодические задания, повтор при превышении лимита отправки).
+"""
+
+import heapq
+import itertools
+import logging
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy import delete, insert
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from config import SCHEDULER_FLUSH_INTERVAL
+from database import current_tenant, reads, use_tenant, writes
+from models import ScheduledJob
+
+logger = logging.getLogger("TeleFoodBot")
+
+# Куча перестраивается, только если в ней не меньше стольких записей
+COMPACT_MIN_SIZE = 1024
+# Количество ключей в одном DELETE при сохранении заданий
+SAVE_CHUNK_SIZE = 500
+
+
+class _Entry:
+    """Запланированное задание в памяти."""
+
+    __slots__ = ("key", "due", "job", "payload", "tenant", "persist", "cancelled")
+
+    def __init__(self, key, due, job, payload, tenant, persist):
+        self.key = key
+        self.due = due
+        self.job = job
+        self.payload = payload
+        self.tenant = tenant
+        self.persist = persist
+        self.cancelled = False
+
+    def row(self) -> dict:
+        return {
+            "key": self.key,
+            "job": self.job,
+            "due_at": self.due,
+            "payload": self.payload,
+            "tenant": self.tenant,
+        }
+
+
+@reads
+def load_jobs(db: Session) -> List[ScheduledJob]:
+    """Получить все сохранённые задания.
+    :param db: SQLAlchemy сессия
+    :return: Список объектов ScheduledJob
+    """
+    return db.query(ScheduledJob).all()
+
+
+@writes
+def save_jobs(db: Session, keys: List[str], rows: List[dict]):
+    """Заменить сохранённые задания: удалить ключи keys и вставить строки rows.
+    :param db: SQLAlchemy сессия
+    :param keys: ключи изменённых и удалённых заданий
+    :param rows: строки заданий, которые нужно сохранить
+    """
+    for start in range(0, len(keys), SAVE_CHUNK_SIZE):
+        chunk = keys[start : start + SAVE_CHUNK_SIZE]
+        db.execute(delete(ScheduledJob).where(ScheduledJob.key.in_(chunk)))
+    if rows:
+        db.execute(insert(ScheduledJob), rows)
+    db.commit()
+
+
+class Scheduler:
+    """
+    Планировщик отложенных заданий на одном потоке.
+    """
+
+    def __init__(self, session_factory=None, flush_interval=SCHEDULER_FLUSH_INTERVAL):
+        # Фабрика сессий основной базы; None — задания не сохраняются
+        self.session_factory = session_factory
+        self.flush_interval = flush_interval
+        self._jobs: Dict[str, Callable] = {}
+        self._heap: list = []
+        self._entries: Dict[str, _Entry] = {}
+        self._cancelled = 0
+        # Ключ → запись для сохранения или None для удаления из базы
+        self._dirty: Dict[str, Optional[_Entry]] = {}
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def register(self, name: str, func: Callable):
+        """Зарегистрировать обработчик задания.
+
+        :param name: имя задания
+        :param func: функция, принимающая payload как именованные аргументы
+        """
+        self._jobs[name] = func
+
+    def schedule(
+        self,
+        key: str,
+        delay: float,
+        job: str,
+        payload: Optional[dict] = None,
+        persist: bool = True,
+    ):
+        """Запланировать задание, заменив запланированное ранее с тем же ключом.
+
+        :param key: ключ задания
+        :param delay: задержка до запуска в секундах
+        :param job: имя зарегистрированного обработчика
+        :param payload: именованные аргументы обработчика (сериализуемые в JSON)
+        :param persist: сохранять задание в базу, чтобы оно пережило перезапуск
+        """
+        entry = _Entry(
+            key, time.time() + delay, job, payload, current_tenant(), persist
+        )
+        with self._cond:
+            self._push(entry)
+
+    def _push(self, entry: _Entry, dirty: bool = True):
+        """Добавить запись в кучу (вызывается под блокировкой)."""
+        previous = self._entries.get(entry.key)
+        if previous is not None:
+            self._discard(previous)
+        self._entries[entry.key] = entry
+        heapq.heappush(self._heap, (entry.due, next(self._seq), entry))
+        if dirty and entry.persist:
+            self._dirty[entry.key] = entry
+        elif dirty and previous is not None and previous.persist:
+            self._dirty[entry.key] = None
+        if self._heap[0][2] is entry:
+            # Новое задание раньше всех: поток должен проснуться раньше
+            self._cond.notify()
+
+    def _discard(self, entry: _Entry):
+        """Пометить запись отменённой (вызывается под блокировкой)."""
+        entry.cancelled = True
+        self._cancelled += 1
+        if (
+            len(self._heap) >= COMPACT_MIN_SIZE
+            and self._cancelled > len(self._heap) // 2
+        ):
+            self._heap = [item for item in self._heap if not item[2].cancelled]
+            heapq.heapify(self._heap)
+            self._cancelled = 0
+
+    def cancel(self, key: str) -> bool:
+        """Отменить задание.
+
+        :param key: ключ задания
+        :return: True, если задание было запланировано
+        """
+        with self._cond:
+            entry = self._entries.pop(key, None)
+            if entry is None:
+                return False
+            self._discard(entry)
+            if entry.persist:
+                self._dirty[key] = None
+            return True
+
+    def scheduled(self, key: str) -> bool:
+        """Проверить, запланировано ли задание с ключом key."""
+        with self._cond:
+            return key in self._entries
+
+    def pending(self) -> int:
+        """Количество запланированных заданий."""
+        with self._cond:
+            return len(self._entries)
+
+    def next_due(self) -> Optional[float]:
+        """Время запуска ближайшего задания (Unix time) или None."""
+        with self._cond:
+            return self._next_due()
+
+    def _next_due(self) -> Optional[float]:
+        while self._heap and self._heap[0][2].cancelled:
+            heapq.heappop(self._heap)
+            self._cancelled -= 1
+        return self._heap[0][0] if self._heap else None
+
+    def run_due(self, now: Optional[float] = None) -> int:
+        """Выполнить все задания, время которых наступило.
+
+        :param now: текущее время (Unix time), по умолчанию time.time()
+        :return: количество выполненных заданий
+        """
+        now = time.time() if now is None else now
+        due = []
+        with self._cond:
+            while self._heap and self._heap[0][0] <= now:
+                entry = heapq.heappop(self._heap)[2]
+                if entry.cancelled:
+                    self._cancelled -= 1
+                    continue
+                del self._entries[entry.key]
+                if entry.persist:
+                    self._dirty[entry.key] = None
+                due.append(entry)
+        for entry in due:
+            self._execute(entry)
+        return len(due)
+
+    def _execute(self, entry: _Entry):
+        """Выполнить задание и запланировать повтор, если обработчик его запросил."""
+        func = self._jobs.get(entry.job)
+        if func is None:
+            logger.error(f"Unknown scheduled job {entry.job} ({entry.key})")
+            return
+        try:
+            with use_tenant(entry.tenant):
+                delay = func(**(entry.payload or {}))
+        except Exception as e:
+            logger.error(f"Scheduled job {entry.key} failed: {str(e)}")
+            return
+        if delay is None:
+            return
+        repeat = _Entry(
+            entry.key,
+            time.time() + delay,
+            entry.job,
+            entry.payload,
+            entry.tenant,
+            entry.persist,
+        )
+        with self._cond:
+            # Обработчик мог сам запланировать задание с этим ключом
+            if entry.key not in self._entries:
+                self._push(repeat)
+
+    def flush(self) -> int:
+        """Сохранить изменённые задания в базу.
+
+        :return: количество сохранённых изменений
+        """
+        if self.session_factory is None:
+            return 0
+        with self._cond:
+            dirty, self._dirty = self._dirty, {}
+        if not dirty:
+            return 0
+        rows = [entry.row() for entry in dirty.values() if entry is not None]
+        try:
+            with self.session_factory() as db:
+                save_jobs(db, list(dirty), rows)
+        except SQLAlchemyError as e:
+            logger.error(f"Saving scheduled jobs failed: {str(e)}")
+            with self._cond:
+                # Более поздние изменения тех же ключей важнее несохранённых
+                for key, entry in dirty.items():
+                    self._dirty.setdefault(key, entry)
+            return 0
+        return len(dirty)
+
+    def load(self) -> int:
+        """Загрузить сохранённые задания; уже запланированные ключи не заменяются.
+
+        :return: количество загруженных заданий
+        """
+        if self.session_factory is None:
+            return 0
+        with self.session_factory() as db:
+            rows = load_jobs(db)
+        loaded = 0
+        with self._cond:
+            for row in rows:
+                if row.key in self._entries:
+                    continue
+                entry = _Entry(
+                    row.key, row.due_at, row.job, row.payload, row.tenant, True
+                )
+                self._push(entry, dirty=False)
+                loaded += 1
+        return loaded
+
+    def start(self):
+        """Загрузить сохранённые задания и запустить поток планировщика."""
+        loaded = self.load()
+        if loaded:
+            logger.info(f"Loaded {loaded} scheduled jobs")
+
+        def worker():
+            next_flush = time.monotonic() + self.flush_interval
+            while not self._stop_event.is_set():
+                with self._cond:
+                    wait = max(next_flush - time.monotonic(), 0.0)
+                    due = self._next_due()
+                    if due is not None:
+                        wait = min(wait, max(due - time.time(), 0.0))
+                    if wait > 0 and not self._stop_event.is_set():
+                        self._cond.wait(wait)
+                if self._stop_event.is_set():
+                    break
+                self.run_due()
+                if time.monotonic() >= next_flush:
+                    self.flush()
+                    next_flush = time.monotonic() + self.flush_interval
+
+        self._thread = threading.Thread(target=worker, name="scheduler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Остановить поток и сохранить несохранённые изменения."""
+        self._stop_event.set()
+        with self._cond:
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        self.flush()
@@ -0,0 +1,276 @@
+"""
+Поиск продуктов для inline-режима Telegram-бота TeleFood.
+
+Модуль строит в памяти индекс по названиям и описаниям продуктов: отсортированный
+словарь слов для поиска по префиксу и таблицу триграмм для поиска по части слова.
+Поиск выполняется без обращения к базе данных; индекс перестраивается целиком,
+когда в базе меняется версия каталога (см. services.bump_catalog_version). Продукты
+для индекса читаются из снимка каталога (catalog_snapshot); отставший снимок
+перезаписывается из базы.
+"""
+
+import bisect
+import logging
+import re
+import threading
+from collections import OrderedDict, defaultdict
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from catalog_snapshot import current_snapshot
+from database import current_tenant, get_session_factory
+from models import Product, ProductType
+from services import fold_search_text, get_catalog_version
+
+logger = logging.getLogger("TeleFoodBot")
+
+_WORD_RE = re.compile(r"\w+")
+QUERY_CACHE_SIZE = 256
+
+
+class SearchItem(NamedTuple):
+    """Продукт в том виде, в котором он хранится в индексе."""
+
+    id: int
+    name: str
+    description: str
+    cost: float
+    category: str
+
+
+def fold(text: str) -> str:
+    """Привести текст к нижнему регистру и заменить «ё» на «е»."""
+    return fold_search_text(text or "")
+
+
+def tokenize(text: str) -> List[str]:
+    """Разбить текст на нормализованные слова."""
+    return _WORD_RE.findall(fold(text))
+
+
+def trigrams(word: str) -> set:
+    """Получить множество триграмм слова."""
+    return {word[i : i + 3] for i in range(len(word) - 2)}
+
+
+class ProductSearchIndex:
+    """
+    Неизменяемый индекс продуктов с поиском по префиксу и по триграммам.
+
+    Каждое слово запроса должно совпасть с продуктом: по префиксу слова из названия
+    (самый высокий вес), по префиксу слова из описания или как подстрока слова
+    (через триграммы). Результаты упорядочиваются по весу, затем по названию.
+    """
+
+    def __init__(self, items: List[SearchItem]):
+        self.items: Dict[int, SearchItem] = {item.id: item for item in items}
+        self._name_postings = defaultdict(set)
+        self._description_postings = defaultdict(set)
+        self._trigram_postings = defaultdict(set)
+        for item in items:
+            for word in tokenize(item.name):
+                self._name_postings[word].add(item.id)
+            for word in tokenize(item.description):
+                self._description_postings[word].add(item.id)
+            for word in tokenize(f"{item.name} {item.description}"):
+                for trigram in trigrams(word):
+                    self._trigram_postings[trigram].add(item.id)
+        self._vocabulary = sorted(
+            set(self._name_postings) | set(self._description_postings)
+        )
+        self._default_order = tuple(
+            item.id for item in sorted(items, key=lambda i: fold(i.name))
+        )
+        self._cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.items)
+
+    def _prefix_matches(self, token: str) -> Tuple[set, set]:
+        """Найти продукты, у которых слово названия или описания начинается с token."""
+        name_hits, description_hits = set(), set()
+        position = bisect.bisect_left(self._vocabulary, token)
+        while position < len(self._vocabulary):
+            word = self._vocabulary[position]
+            if not word.startswith(token):
+                break
+            name_hits |= self._name_postings.get(word, set())
+            description_hits |= self._description_postings.get(word, set())
+            position += 1
+        return name_hits, description_hits
+
+    def _trigram_matches(self, token: str) -> set:
+        """Найти продукты, содержащие все триграммы token."""
+        postings = [self._trigram_postings.get(t, set()) for t in trigrams(token)]
+        if not postings:
+            return set()
+        postings.sort(key=len)
+        return set.intersection(*postings)
+
+    def _rank(self, query: str) -> Tuple[int, ...]:
+        """Вычислить упорядоченный список id продуктов для запроса."""
+        tokens = tokenize(query)
+        if not tokens:
+            return self._default_order
+        scores: Dict[int, int] = {}
+        candidates: Optional[set] = None
+        for token in tokens:
+            name_hits, description_hits = self._prefix_matches(token)
+            substring_hits = self._trigram_matches(token)
+            matched = name_hits | description_hits | substring_hits
+            candidates = matched if candidates is None else candidates & matched
+            if not candidates:
+                return ()
+            for product_id in matched:
+                if product_id in name_hits:
+                    weight = 3
+                elif product_id in description_hits:
+                    weight = 2
+                else:
+                    weight = 1
+                scores[product_id] = scores.get(product_id, 0) + weight
+        return tuple(
+            sorted(
+                candidates,
+                key=lambda pid: (-scores[pid], fold(self.items[pid].name)),
+            )
+        )
+
+    def search(
+        self, query: str, offset: int = 0, limit: int = 20
+    ) -> Tuple[List[SearchItem], Optional[int]]:
+        """Найти продукты по запросу.
+
+        :param query: текст запроса пользователя
+        :param offset: смещение для пагинации
+        :param limit: размер страницы
+        :return: кортеж (продукты страницы, смещение следующей страницы или None)
+        """
+        key = " ".join(tokenize(query))
+        with self._cache_lock:
+            ranked = self._cache.get(key)
+            if ranked is not None:
+                self._cache.move_to_end(key)
+        if ranked is None:
+            ranked = self._rank(key)
+            with self._cache_lock:
+                self._cache[key] = ranked
+                if len(self._cache) > QUERY_CACHE_SIZE:
+                    self._cache.popitem(last=False)
+        page = [self.items[pid] for pid in ranked[offset : offset + limit]]
+        next_offset = offset + limit if offset + limit < len(ranked) else None
+        return page, next_offset
+
+
+def load_search_items(db: Session) -> List[SearchItem]:
+    """Загрузить все продукты с названиями категорий одним запросом."""
+    rows = db.query(
+        Product.id,
+        Product.name,
+        Product.description,
+        Product.cost,
+        ProductType.name,
+    ).outerjoin(ProductType, ProductType.id == Product.product_type)
+    return [
+        SearchItem(pid, name or "", description or "", cost or 0.0, category or "")
+        for pid, name, description, cost, category in rows
+    ]
+
+
+class CatalogSearch:
+    """
+    Держатель актуального индекса каталога.
+
+    Индекс заменяется атомарно (присваиванием ссылки), поэтому поиск не блокируется
+    на время перестроения. Проверка версии каталога выполняется в фоновом потоке.
+    """
+
+    def __init__(self):
+        self.index = ProductSearchIndex([])
+        self.version: Optional[int] = None
+        self._refresh_lock = threading.Lock()
+        self._stop_event = threading.Event()
+
+    def search(self, query: str, offset: int = 0, limit: int = 20):
+        """Выполнить поиск по текущему индексу (см. ProductSearchIndex.search)."""
+        return self.index.search(query, offset, limit)
+
+    def refresh(self, db: Session, force: bool = False) -> bool:
+        """Перестроить индекс, если версия каталога в базе изменилась.
+
+        :param db: SQLAlchemy сессия
+        :param force: перестроить индекс независимо от версии
+        :return: True, если индекс был перестроен
+        """
+        with self._refresh_lock:
+            version = get_catalog_version(db)
+            if not force and version == self.version:
+                return False
+            snapshot = current_snapshot(db, version)
+            if snapshot is not None and snapshot.version == version:
+                items = [SearchItem(*row) for row in snapshot.search_rows()]
+            else:
+                items = load_search_items(db)
+            self.index = ProductSearchIndex(items)
+            self.version = version
+        logger.info(
+            f"Search index rebuilt: {len(self.index)} products, catalog v{version}"
+        )
+        return True
+
+    def start_auto_refresh(self, session_factory, interval: float = 60.0):
+        """Запустить фоновый поток, периодически сверяющий версию каталога."""
+
+        def worker():
+            while not self._stop_event.wait(interval):
+                try:
+                    with session_factory() as db:
+                        self.refresh(db)
+                except Exception as e:
+                    logger.error(f"Search index refresh error: {str(e)}")
+
+        threading.Thread(target=worker, name="catalog-search", daemon=True).start()
+
+    def stop(self):
+        """Остановить фоновое обновление индекса."""
+        self._stop_event.set()
+
+
+class TenantCatalogSearch:
+    """
+    Индексы каталогов всех ресторанов; индекс ресторана строится при первом поиске.
+
+    Поиск выполняется по каталогу ресторана текущего потока (database.use_tenant).
+    """
+
+    def __init__(self, refresh_interval: float = 60.0):
+        self.refresh_interval = refresh_interval
+        self._searches: Dict[Optional[str], CatalogSearch] = {}
+        self._lock = threading.Lock()
+
+    def get(self, tenant: Optional[str] = None) -> CatalogSearch:
+        """Получить индекс каталога ресторана, построив его при необходимости."""
+        with self._lock:
+            catalog_search = self._searches.get(tenant)
+            if catalog_search is None:
+                session_factory = get_session_factory(tenant)
+                catalog_search = CatalogSearch()
+                with session_factory() as db:
+                    catalog_search.refresh(db)
+                catalog_search.start_auto_refresh(
+                    session_factory, self.refresh_interval
+                )
+                self._searches[tenant] = catalog_search
+            return catalog_search
+
+    def search(self, query: str, offset: int = 0, limit: int = 20):
+        """Выполнить поиск по каталогу текущего ресторана."""
+        return self.get(current_tenant()).search(query, offset, limit)
+
+    def stop(self):
+        """Остановить фоновое обновление всех индексов."""
+        with self._lock:
+            for catalog_search in self._searches.values():
+                catalog_search.stop()
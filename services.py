@@ -1,20 +1,41 @@
 import datetime
 from typing import List, Optional
 
+from sqlalchemy import delete, insert, or_, update
 from sqlalchemy.orm import Session
 
-from models import Cart, Order, Product, ProductType, User
+from catalog_snapshot import catalog_snapshots
+from config import CART_COMPACT_BATCH_SIZE
+from content_codec import add_product, empty_content, product_counts
+from database import reads, writes
+from models import (
+    AppMeta,
+    ArchivedOrder,
+    Cart,
+    Feedback,
+    Order,
+    Product,
+    ProductType,
+    User,
+)
+from reporting import record_order
 
+CATALOG_VERSION_KEY = "catalog_version"
 
+
+@writes
 def create_user_if_not_exists(db: Session, tg_id: int, tg_name: str) -> tuple[int, str]:
-    """Получить или создать пользователя по телеграмм ID и имени."""
+    """Получить или создать пользователя по телеграмм ID и имени.
+
+    Создание и переименование сразу фиксируются.
+    """
     user = db.query(User).filter_by(id=tg_id).first()
     if not user:
         user = User(id=tg_id, name=tg_name, description="")
         db.add(user)
         db.commit()
         db.refresh(user)
-        cart = Cart(user_id=user.id, content={"products": []})
+        cart = Cart(user_id=user.id, content=empty_content())
         db.add(cart)
         db.commit()
     elif user.name != tg_name:
@@ -23,6 +44,7 @@ def create_user_if_not_exists(db: Session, tg_id: int, tg_name: str) -> tuple[in
     return user.id, user.name
 
 
+@reads
 def get_all_categories(db: Session) -> List[ProductType]:
     """Получить все категории из базы данных.
     :param db: SQLAlchemy сессия
@@ -31,6 +53,7 @@ def get_all_categories(db: Session) -> List[ProductType]:
     return db.query(ProductType).order_by(ProductType.name).all()
 
 
+@reads
 def get_products_by_category(db: Session, category_id: int) -> List[Product]:
     """Получить все продукты в категории.
     :param db: SQLAlchemy сессия
@@ -40,6 +63,7 @@ def get_products_by_category(db: Session, category_id: int) -> List[Product]:
     return db.query(Product).filter(Product.product_type == category_id).all()
 
 
+@reads
 def get_cart(db: Session, user_id: int) -> Optional[Cart]:
     """Получить корзину пользователя из базы данных.
 
@@ -50,6 +74,7 @@ def get_cart(db: Session, user_id: int) -> Optional[Cart]:
     return db.query(Cart).filter(Cart.user_id == user_id).first()
 
 
+@writes
 def add_product_to_cart(db: Session, user_id: int, product_id: int):
     """Добавляет продукт в корзину пользователя.
     :param db: SQLAlchemy сессия
@@ -58,27 +83,124 @@ def add_product_to_cart(db: Session, user_id: int, product_id: int):
     """
     cart = get_cart(db, user_id)
     if cart:
-        cart.content.setdefault("products", []).append(product_id)
+        cart.content = add_product(cart.content, product_id)
+    else:
+        # Пустая корзина могла быть удалена при очистке (compact_empty_carts)
+        db.add(Cart(user_id=user_id, content=add_product(empty_content(), product_id)))
+    db.commit()
+
+
+@writes
+def clear_cart(db: Session, user_id: int):
+    """Очищает корзину пользователя.
+    :param db: SQLAlchemy сессия
+    :param user_id: ID пользователя
+    """
+    cart = get_cart(db, user_id)
+    if cart:
+        cart.content = empty_content()
+        db.commit()
+
+
+@writes
+def compact_empty_carts(
+    db: Session,
+    cutoff: datetime.datetime,
+    batch_size: int = CART_COMPACT_BATCH_SIZE,
+) -> int:
+    """Удаляет пустые корзины, не изменявшиеся с cutoff, пачками по id.
+
+    Корзины без времени изменения (созданные до появления updated_at) тоже удаляются,
+    если пусты; при следующем добавлении товара корзина создаётся заново.
+    :param db: SQLAlchemy сессия
+    :param cutoff: граница по времени последнего изменения (UTC)
+    :param batch_size: количество корзин, проверяемых в одной транзакции
+    :return: количество удалённых корзин
+    """
+    stale = or_(Cart.updated_at < cutoff, Cart.updated_at.is_(None))
+    removed = 0
+    last_id = 0
+    while True:
+        batch = (
+            db.query(Cart.id, Cart.content)
+            .filter(Cart.id > last_id, stale)
+            .order_by(Cart.id)
+            .limit(batch_size)
+            .all()
+        )
+        if not batch:
+            break
+        last_id = batch[-1][0]
+        empty = [cart_id for cart_id, content in batch if not product_counts(content)]
+        if empty:
+            # Повторное условие по времени не даст удалить корзину, изменённую только что
+            result = db.execute(
+                delete(Cart).where(Cart.id.in_(empty), stale),
+                execution_options={"synchronize_session": False},
+            )
+            removed += result.rowcount
         db.commit()
+    return removed
 
 
-def checkout_cart(db: Session, user_id: int) -> Optional[Order]:
+@reads
+def get_products_by_ids(db: Session, product_ids) -> dict:
+    """Получить продукты по списку ID.
+    :param db: SQLAlchemy сессия
+    :param product_ids: ID продуктов
+    :return: Словарь {ID: объект Product} для найденных продуктов
+    """
+    ids = set(product_ids)
+    if not ids:
+        return {}
+    return {prod.id: prod for prod in db.query(Product).filter(Product.id.in_(ids))}
+
+
+@reads
+def get_cart_summary(db: Session, user_id: int) -> tuple[int, float]:
+    """Получить количество товаров в корзине и её сумму.
+    :param db: SQLAlchemy сессия
+    :param user_id: ID пользователя
+    :return: Кортеж (количество товаров, сумма)
+    """
+    cart = get_cart(db, user_id)
+    counts = product_counts(cart.content if cart else None)
+    if not counts:
+        return 0, 0.0
+    prices = dict(db.query(Product.id, Product.cost).filter(Product.id.in_(counts)))
+    total = sum((prices.get(pid) or 0.0) * qty for pid, qty in counts.items())
+    return sum(counts.values()), total
+
+
+@writes
+def checkout_cart(
+    db: Session, user_id: int, delivery: Optional[dict] = None, promotions=None
+) -> Optional[Order]:
     """Оформляет заказ из корзины пользователя и возвращает его, или возвращает None, если корзина пуста или не найдена.
     :param db: SQLAlchemy session
     :param user_id: ID пользователя для оформления корзины
+    :param delivery: поля доставки заказа (latitude, longitude, delivery_zone_id, kitchen, delivery_fee)
+    :param promotions: акции ресторанов (promotions.Promotions) или None — без скидок
     :return: Объект Order, если он был создан, иначе None
     """
     cart = get_cart(db, user_id)
     print(f"[checkout_cart] Корзина до оформления: {cart.content if cart else None}")
-    if cart and cart.content.get("products"):
+    counts = product_counts(cart.content if cart else None)
+    if counts:
         try:
+            # Скидка фиксируется в заказе: последующие изменения акций его не меняют
+            priced = promotions.price(db, counts) if promotions is not None else None
             order = Order(
                 user_id=user_id,
                 content=cart.content.copy(),
                 created_at=datetime.datetime.utcnow(),
+                discount=priced.discount if priced else 0.0,
+                promotions=priced.snapshot() if priced else None,
+                **(delivery or {}),
             )
-            cart.content = {"products": []}
+            cart.content = empty_content()
             db.add(order)
+            record_order(db, order)
             db.commit()
             db.refresh(order)
             print(
@@ -93,28 +215,48 @@ def checkout_cart(db: Session, user_id: int) -> Optional[Order]:
     return None
 
 
-def get_orders_by_user(db: Session, user_id: int) -> List[Order]:
-    """Получение всех заказов для конкретного пользователя из базы данных.
+@reads
+def get_orders_by_user(
+    db: Session, user_id: int, offset: int = 0, limit: Optional[int] = None
+) -> List[Order]:
+    """Получение заказов пользователя, новые первыми.
 
+    Сначала читается оперативная таблица orders; архив (orders_archive) читается,
+    только если запрошенная страница выходит за пределы оперативной таблицы.
     :param db: сессия SQLAlchemy
     :param user_id: ID пользователя, чьи заказы нужно получить
-    :return: Список объектов Order, связанных с пользователем, отсортированный по ID заказа в порядке убывания
+    :param offset: количество пропускаемых заказов
+    :param limit: размер страницы (None — все заказы)
+    :return: Список объектов Order (и ArchivedOrder для архивных заказов), отсортированный по ID заказа в порядке убывания
     """
-
-    return (
-        db.query(Order).filter(Order.user_id == user_id).order_by(Order.id.desc()).all()
+    hot = db.query(Order).filter(Order.user_id == user_id)
+    orders = hot.order_by(Order.id.desc()).offset(offset).limit(limit).all()
+    if limit is not None and len(orders) >= limit:
+        return orders
+    # Смещение в архиве: сколько заказов страницы приходится на архив
+    archive_offset = 0 if orders else max(0, offset - hot.count())
+    archived = (
+        db.query(ArchivedOrder)
+        .filter(ArchivedOrder.user_id == user_id)
+        .order_by(ArchivedOrder.id.desc())
+        .offset(archive_offset)
+        .limit(None if limit is None else limit - len(orders))
+        .all()
     )
+    return orders + archived
 
 
+@reads
 def get_order_by_id(db: Session, order_id: int) -> Optional[Order]:
     """Получить заказ по его ID из базы данных.
     :param db: SQLAlchemy сессия
     :param order_id: ID заказа для получения
-    :return: Объект Order, если он существует, иначе None
+    :return: Объект Order (или ArchivedOrder из архива), если он существует, иначе None
     """
-    return db.query(Order).get(order_id)
+    return db.get(Order, order_id) or db.get(ArchivedOrder, order_id)
 
 
+@writes
 def add_review_to_order(db: Session, order_id: int, text: str):
     """Добавьте отзыв к заказу в базе данных.
 
@@ -123,37 +265,163 @@ def add_review_to_order(db: Session, order_id: int, text: str):
     :param text: Текст отзыва для добавления
     :return: None
     """
-    order = db.query(Order).get(order_id)
+    order = get_order_by_id(db, order_id)
     if order:
-        # Базовая санитизация ввода: ограничиваем длину и удаляем потенциально опасные символы
-        sanitized_text = text.strip()[:500]  # Ограничение длины до 500 символов
-        order.review = sanitized_text
+        order.review = sanitize_review(text)
         db.commit()
 
 
+@writes
+def set_order_paid(db: Session, order_id: int, paid: bool = True) -> Optional[Order]:
+    """Изменить статус оплаты заказа.
+
+    :param db: Сессия SQLAlchemy
+    :param order_id: ID заказа
+    :param paid: новый статус оплаты
+    :return: Объект Order (или ArchivedOrder), если статус изменился, иначе None
+    """
+    order = get_order_by_id(db, order_id)
+    if order is None or bool(order.pay_status) == paid:
+        return None
+    order.pay_status = paid
+    db.commit()
+    return order
+
+
+def sanitize_review(text: str) -> str:
+    """Базовая санитизация ввода: убираем пробелы по краям и ограничиваем длину до 500 символов."""
+    return text.strip()[:500]
+
+
+def fold_search_text(text: str) -> str:
+    """Привести текст к виду для поиска: нижний регистр, «ё» заменена на «е»."""
+    return text.casefold().replace("ё", "е")
+
+
+@writes
+def save_feedback_batch(db: Session, entries: List[dict]):
+    """Сохранить пачку обратной связи и отзывов одной транзакцией.
+
+    Все записи добавляются в таблицу feedback одним пакетным INSERT, а отзывы
+    о заказах дополнительно записываются в orders.review (или orders_archive.review)
+    пакетным UPDATE.
+    :param db: SQLAlchemy сессия
+    :param entries: Список словарей с ключами user_id, order_id, text, created_at
+    """
+    if not entries:
+        return
+    rows = []
+    for entry in entries:
+        text = sanitize_review(entry["text"])
+        rows.append(dict(entry, text=text, search_text=fold_search_text(text)))
+    db.execute(insert(Feedback), rows)
+    reviews = {}
+    for row in rows:
+        if row.get("order_id") is not None:
+            reviews[row["order_id"]] = row["text"]  # последний отзыв побеждает
+    for model in (Order, ArchivedOrder):
+        if not reviews:
+            break
+        existing = {
+            order_id for (order_id,) in db.query(model.id).filter(model.id.in_(reviews))
+        }
+        params = [
+            {"id": order_id, "review": reviews.pop(order_id)} for order_id in existing
+        ]
+        if params:
+            db.execute(update(model), params)
+    db.commit()
+
+
+@reads
+def search_feedback(
+    db: Session, query: str = "", offset: int = 0, limit: int = 50
+) -> tuple[List[Feedback], int]:
+    """Найти обратную связь по тексту, новые записи первыми.
+    :param db: SQLAlchemy сессия
+    :param query: подстрока для поиска (пустая строка — все записи)
+    :param offset: смещение для пагинации
+    :param limit: размер страницы
+    :return: Кортеж (записи страницы, общее количество найденных)
+    """
+    feedback_query = db.query(Feedback)
+    if query:
+        feedback_query = feedback_query.filter(
+            Feedback.search_text.contains(fold_search_text(query), autoescape=True)
+        )
+    total = feedback_query.count()
+    page = feedback_query.order_by(Feedback.id.desc()).offset(offset).limit(limit).all()
+    return page, total
+
+
+@reads
+def get_meta(db: Session, key: str, default: str = "") -> str:
+    """Получить служебное значение по ключу.
+    :param db: SQLAlchemy сессия
+    :param key: ключ значения
+    :param default: значение по умолчанию, если ключ не найден
+    :return: строковое значение
+    """
+    meta = db.get(AppMeta, key)
+    return meta.value if meta else default
+
+
+@writes
+def set_meta(db: Session, key: str, value: str):
+    """Сохранить служебное значение по ключу (без commit).
+    :param db: SQLAlchemy сессия
+    :param key: ключ значения
+    :param value: строковое значение
+    """
+    meta = db.get(AppMeta, key)
+    if meta:
+        meta.value = value
+    else:
+        db.add(AppMeta(key=key, value=value))
+
+
+@reads
+def get_catalog_version(db: Session) -> int:
+    """Получить текущую версию каталога (продуктов и категорий).
+    :param db: SQLAlchemy сессия
+    :return: номер версии, 0 если каталог ещё не менялся
+    """
+    return int(get_meta(db, CATALOG_VERSION_KEY, "0"))
+
+
+@writes
+def bump_catalog_version(db: Session) -> int:
+    """Увеличить версию каталога после изменения продуктов или категорий (без commit).
+
+    Версию сверяют процессы бота, чтобы перестроить свои кэши каталога.
+    :param db: SQLAlchemy сессия
+    :return: новый номер версии
+    """
+    version = get_catalog_version(db) + 1
+    set_meta(db, CATALOG_VERSION_KEY, str(version))
+    return version
+
+
+@reads
 def get_menu_messages(db) -> list:
     """
     Возвращает список кортежей (текст, product_id) для меню.
     text — строка для отправки пользователю,
     product_id — id товара (для callback-кнопки).
-    Использует простой кэш для уменьшения запросов к базе данных.
+    Читает снимок каталога, общий для процессов бота, а без снимка — базу данных.
     """
-    # Простой кэш в памяти (можно заменить на Redis или другой механизм кэширования)
-    if not hasattr(get_menu_messages, "_menu_messages_cache"):
-        get_menu_messages._menu_messages_cache = None
-
-    if get_menu_messages._menu_messages_cache is not None:
-        return get_menu_messages._menu_messages_cache
-
+    snapshot = catalog_snapshots.get()
+    if snapshot is not None:
+        sections = [(cat.name, snapshot.products(cat)) for cat in snapshot.categories()]
+    else:
+        sections = [
+            (cat.name, get_products_by_category(db, cat.id))
+            for cat in get_all_categories(db)
+        ]
     messages = []
-    categories = get_all_categories(db)
-    for cat in categories:
-        products = get_products_by_category(db, cat.id)
-        if not products:
-            continue
+    for category_name, products in sections:
         for prod in products:
             price = f"{prod.cost:.2f}" if prod.cost else "-"
-            text = f"<b>{cat.name}</b>\n{prod.name}: {price}₽"
+            text = f"<b>{category_name}</b>\n{prod.name}: {price}₽"
             messages.append((text, prod.id))
-    get_menu_messages._menu_messages_cache = messages
     return messages
@@ -0,0 +1,114 @@
+"""
+Профиль запуска бота TeleFood.
+
+StartupProfile замеряет фазы запуска (импорт модулей, инициализация базы,
+создание обработчиков, фоновый прогрев) и отметки времени (начало опроса, первое
+обработанное обновление). Отчёт пишется в лог в стиле python -X importtime:
+собственное время фазы, время от запуска процесса до её окончания и имя фазы;
+фазы фонового прогрева помечаются именем потока. Если первое обновление
+обработано позже STARTUP_TARGET секунд, в лог пишется предупреждение.
+"""
+
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import List, Optional, Tuple
+
+from config import STARTUP_TARGET
+
+logger = logging.getLogger("TeleFoodBot")
+
+_IMPORTED_AT = time.perf_counter()
+
+
+def process_started() -> float:
+    """Время запуска процесса по часам time.perf_counter.
+
+    На Linux берётся из /proc/self/stat (в тиках с загрузки системы, как и монотонные
+    часы), иначе — время импорта этого модуля.
+    """
+    try:
+        with open("/proc/self/stat") as f:
+            # Имя процесса в скобках может содержать пробелы
+            fields = f.read().rsplit(")", 1)[1].split()
+        started = int(fields[19]) / os.sysconf("SC_CLK_TCK")
+    except (OSError, ValueError, IndexError, AttributeError):
+        return _IMPORTED_AT
+    return started if started <= _IMPORTED_AT else _IMPORTED_AT
+
+
+class StartupProfile:
+    """
+    Замеры фаз запуска бота.
+    """
+
+    def __init__(self, started: Optional[float] = None, target: float = STARTUP_TARGET):
+        self.started = process_started() if started is None else started
+        self.target = target
+        # (имя, собственное время, время окончания от запуска, поток)
+        self._phases: List[Tuple[str, float, float, str]] = []
+        self._marks = {}
+        self._lock = threading.Lock()
+        # Всё, что произошло до создания профиля: интерпретатор и импорт модулей
+        self._record("interpreter + imports", time.perf_counter() - self.started)
+
+    def _record(self, name: str, duration: float):
+        offset = time.perf_counter() - self.started
+        thread = threading.current_thread()
+        where = "" if thread is threading.main_thread() else thread.name
+        with self._lock:
+            self._phases.append((name, duration, offset, where))
+
+    @contextmanager
+    def phase(self, name: str):
+        """Замерить фазу запуска (можно вызывать из любого потока)."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._record(name, time.perf_counter() - started)
+
+    def mark(self, name: str) -> float:
+        """Отметить событие, если оно ещё не отмечено.
+
+        :param name: имя события
+        :return: время от запуска процесса до события в секундах
+        """
+        with self._lock:
+            if name not in self._marks:
+                self._marks[name] = time.perf_counter() - self.started
+            return self._marks[name]
+
+    def elapsed(self, name: str) -> Optional[float]:
+        """Время от запуска процесса до события или None, если его ещё не было."""
+        with self._lock:
+            return self._marks.get(name)
+
+    def report(self) -> str:
+        """Сформировать отчёт: фазы и события в порядке окончания, время в мс."""
+        with self._lock:
+            rows = [
+                (offset, f"{duration * 1000:10.1f}", where, name)
+                for name, duration, offset, where in self._phases
+            ]
+            rows += [
+                (offset, f"{'':>10}", "", f"* {name}")
+                for name, offset in self._marks.items()
+            ]
+        lines = ["startup:   self [ms] |  since start [ms] | phase"]
+        for offset, duration, where, name in sorted(rows, key=lambda row: row[0]):
+            label = f"{name} [{where}]" if where else name
+            lines.append(f"startup: {duration} | {offset * 1000:17.1f} | {label}")
+        return "\n".join(lines)
+
+    def log(self):
+        """Записать отчёт в лог и предупредить о превышении целевого времени."""
+        logger.info("Startup profile:\n" + self.report())
+        first_update = self.elapsed("first update")
+        if first_update is not None and self.target and first_update > self.target:
+            logger.warning(
+                f"First update handled {first_update:.2f}s after start"
+                f" (target {self.target:.2f}s)"
+            )
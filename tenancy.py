@@ -0,0 +1,197 @@
+"""
+Несколько ресторанов (арендаторов) с отдельными базами данных для TeleFood.
+
+Каждый ресторан хранит пользователей, корзины, заказы и меню в своей базе
+(по умолчанию отдельный файл SQLite, см. config.TENANT_DATABASE_URL), поэтому
+блокировка записи SQLite делится между ресторанами, а не общая для всех.
+Основная база app.db содержит реестр ресторанов и выбор ресторана пользователями;
+пользователи без выбора работают с основной базой, как и раньше.
+
+Бот направляет каждое обновление в базу ресторана пользователя (TenantRegistry.
+update_context), а отчёты головного офиса опрашивают базы параллельно (fan_out).
+
+    python tenancy.py --add center "TeleFood Центр"
+    python tenancy.py --list
+    python tenancy.py --report 7
+"""
+
+import argparse
+import datetime
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from database import get_engine, get_session_factory, use_tenant
+from dispatch import update_route
+from models import Tenant, UserTenant
+from reporting import get_daily_revenue, to_local_time
+
+SLUG_RE = re.compile(r"^[a-z0-9][a-z0-9_-]{0,31}$")
+
+
+class TenantRegistry:
+    """
+    Реестр ресторанов и кэш выбора ресторана пользователями.
+    """
+
+    def __init__(self, session_factory=None):
+        # Реестр всегда хранится в основной базе, независимо от текущего ресторана
+        self.session_factory = session_factory or get_session_factory(None)
+        self._user_tenants: Dict[int, Optional[str]] = {}
+        self._tenants: Optional[Dict[str, str]] = None
+        self._lock = threading.Lock()
+
+    def tenants(self) -> Dict[str, str]:
+        """Получить активные рестораны: {код: название}."""
+        with self._lock:
+            cached = self._tenants
+        if cached is None:
+            with self.session_factory() as db:
+                rows = db.query(Tenant.slug, Tenant.name).filter(Tenant.active)
+                cached = {slug: name for slug, name in rows.order_by(Tenant.name)}
+            with self._lock:
+                self._tenants = cached
+        return cached
+
+    def add_tenant(self, slug: str, name: str):
+        """Зарегистрировать ресторан и создать схему его базы данных.
+
+        :param slug: код ресторана (латиница в нижнем регистре, цифры, - и _)
+        :param name: название для пользователей
+        """
+        if not SLUG_RE.match(slug):
+            raise ValueError(f"Invalid tenant slug: {slug!r}")
+        get_engine(slug)
+        with self.session_factory() as db:
+            tenant = db.get(Tenant, slug) or Tenant(slug=slug)
+            tenant.name = name
+            tenant.active = True
+            db.add(tenant)
+            db.commit()
+        self.invalidate()
+
+    def invalidate(self):
+        """Сбросить кэши после изменения реестра."""
+        with self._lock:
+            self._tenants = None
+            self._user_tenants.clear()
+
+    def tenant_for_user(self, user_id: int) -> Optional[str]:
+        """Получить код ресторана пользователя (None — основная база)."""
+        with self._lock:
+            if user_id in self._user_tenants:
+                return self._user_tenants[user_id]
+        with self.session_factory() as db:
+            row = db.get(UserTenant, user_id)
+            slug = row.tenant_slug if row else None
+        if slug not in self.tenants():
+            slug = None  # ресторан отключён
+        with self._lock:
+            self._user_tenants[user_id] = slug
+        return slug
+
+    def set_user_tenant(self, user_id: int, slug: str):
+        """Сохранить выбор ресторана пользователем."""
+        if slug not in self.tenants():
+            raise ValueError(f"Unknown tenant: {slug!r}")
+        with self.session_factory() as db:
+            row = db.get(UserTenant, user_id) or UserTenant(user_id=user_id)
+            row.tenant_slug = slug
+            db.add(row)
+            db.commit()
+        with self._lock:
+            self._user_tenants[user_id] = slug
+
+    @contextmanager
+    def update_context(self, update):
+        """Обработать обновление в базе ресторана его отправителя."""
+        user_id, _ = update_route(update)
+        slug = self.tenant_for_user(user_id) if user_id is not None else None
+        with use_tenant(slug):
+            yield
+
+
+def fan_out(
+    func: Callable,
+    tenants: Iterable[Optional[str]],
+    max_workers: int = 8,
+) -> List[Tuple[Optional[str], object]]:
+    """Выполнить чтение во всех базах параллельно.
+
+    :param func: функция func(db), выполняемая в сессии базы каждого ресторана
+    :param tenants: коды ресторанов (None — основная база)
+    :param max_workers: максимальное число одновременных запросов
+    :return: список (код ресторана, результат) в порядке tenants
+    """
+    tenants = list(tenants)
+
+    def run(slug):
+        with get_session_factory(slug)() as db:
+            return func(db)
+
+    if not tenants:
+        return []
+    with ThreadPoolExecutor(
+        max_workers=min(max_workers, len(tenants)), thread_name_prefix="tenants"
+    ) as executor:
+        return list(zip(tenants, executor.map(run, tenants)))
+
+
+def get_network_revenue(
+    tenants: Iterable[Optional[str]], date_from: datetime.date, date_to: datetime.date
+) -> Dict[Optional[str], Tuple[int, float]]:
+    """Получить число заказов и выручку каждого ресторана за период.
+
+    :param tenants: коды ресторанов (None — основная база)
+    :param date_from: первый день периода
+    :param date_to: последний день периода
+    :return: словарь {код ресторана: (заказов, выручка)}
+    """
+
+    def totals(db):
+        stats = get_daily_revenue(db, date_from, date_to)
+        return (
+            sum(stat.orders_count for stat in stats),
+            sum(stat.revenue for stat in stats),
+        )
+
+    return dict(fan_out(totals, tenants))
+
+
+if __name__ == "__main__":
+    from database import init_db
+
+    parser = argparse.ArgumentParser(description="Рестораны TeleFood")
+    parser.add_argument(
+        "--add", nargs=2, metavar=("SLUG", "NAME"), help="зарегистрировать ресторан"
+    )
+    parser.add_argument("--list", action="store_true", help="показать рестораны")
+    parser.add_argument(
+        "--report",
+        type=int,
+        metavar="DAYS",
+        help="выручка всех ресторанов за DAYS дней",
+    )
+    args = parser.parse_args()
+
+    init_db()
+    registry = TenantRegistry()
+    if args.add:
+        registry.add_tenant(*args.add)
+        print(f"Ресторан {args.add[0]} зарегистрирован.")
+    if args.list or not (args.add or args.report):
+        for code, title in registry.tenants().items():
+            print(f"{code}: {title}")
+    if args.report:
+        today = to_local_time(None).date()
+        start = today - datetime.timedelta(days=args.report - 1)
+        names = {None: "Основная база", **registry.tenants()}
+        network = get_network_revenue(names, start, today)
+        for code, (orders_count, revenue) in network.items():
+            print(f"{names[code]}: заказов {orders_count}, выручка {revenue:.2f}₽")
+        print(
+            f"Итого: заказов {sum(o for o, _ in network.values())}, "
+            f"выручка {sum(r for _, r in network.values()):.2f}₽"
+        )
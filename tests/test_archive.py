@@ -0,0 +1,114 @@
+"""
+Модульные тесты для модуля archive в приложении TeleFood.
+
+Проверяют перенос старых заказов в архив пачками, постраничную историю заказов
+с переходом в архив и чтение всей истории для пересчётов.
+"""
+
+import datetime
+import unittest
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from archive import OrderArchiver, archive_orders, order_batches
+from models import ArchivedOrder, Base, Order, Product, ProductType, User
+from reporting import backfill, get_top_products
+from services import get_order_by_id, get_orders_by_user, save_feedback_batch
+
+NOW = datetime.datetime.utcnow()
+
+
+class TestOrderArchive(unittest.TestCase):
+    """
+    Класс тестовых случаев для архивации заказов.
+    """
+
+    def setUp(self):
+        """
+        Создание базы в памяти: 5 старых и 3 свежих заказа пользователя 1001.
+        """
+        self.engine = create_engine("sqlite:///:memory:", echo=False)
+        Base.metadata.create_all(self.engine)
+        self.session_factory = sessionmaker(bind=self.engine)
+        self.db = self.session_factory()
+        self.db.add(ProductType(id=1, name="Pizza"))
+        self.db.add(Product(id=1, name="Margherita", cost=10.0, product_type=1))
+        self.db.add(User(id=1001, name="TestUser1"))
+        for order_id in range(1, 9):
+            age = datetime.timedelta(days=400 - order_id if order_id <= 5 else 1)
+            self.db.add(
+                Order(
+                    id=order_id,
+                    user_id=1001,
+                    created_at=NOW - age,
+                    content={"products": [1]},
+                )
+            )
+        self.db.commit()
+        self.cutoff = NOW - datetime.timedelta(days=180)
+
+    def tearDown(self):
+        """
+        Закрытие сессии и освобождение движка.
+        """
+        self.db.close()
+        self.engine.dispose()
+
+    def test_old_orders_are_moved_in_batches(self):
+        """
+        Тестирование переноса только старых заказов пачками.
+        """
+        self.assertEqual(archive_orders(self.db, self.cutoff, batch_size=2), 5)
+        self.assertEqual([o.id for o in self.db.query(Order)], [6, 7, 8])
+        archived = self.db.query(ArchivedOrder).order_by(ArchivedOrder.id).all()
+        self.assertEqual([o.id for o in archived], [1, 2, 3, 4, 5])
+        self.assertEqual(archived[0].content, {"products": [1]})
+        self.assertIsNotNone(archived[0].archived_at)
+        self.assertEqual(archive_orders(self.db, self.cutoff), 0)
+
+        archiver = OrderArchiver(self.session_factory, interval=0)
+        self.assertEqual(archiver.run_once(), 0)
+
+    def test_history_pages_into_archive(self):
+        """
+        Тестирование постраничной истории: архив читается после оперативной таблицы.
+        """
+        archive_orders(self.db, self.cutoff)
+        pages = [
+            [o.id for o in get_orders_by_user(self.db, 1001, offset, 3)]
+            for offset in (0, 3, 6, 9)
+        ]
+        self.assertEqual(pages, [[8, 7, 6], [5, 4, 3], [2, 1], []])
+        self.assertEqual(
+            [o.id for o in get_orders_by_user(self.db, 1001, 2, 2)], [6, 5]
+        )
+        self.assertEqual(len(get_orders_by_user(self.db, 1001)), 8)
+
+        # Отзыв о заказе из архива сохраняется в архиве
+        save_feedback_batch(
+            self.db,
+            [{"user_id": 1001, "order_id": 2, "text": "Вкусно", "created_at": NOW}],
+        )
+        self.assertEqual(get_order_by_id(self.db, 2).review, "Вкусно")
+
+    def test_full_history_reads_both_tables(self):
+        """
+        Тестирование чтения всей истории из архива и оперативной таблицы.
+        """
+        archive_orders(self.db, self.cutoff)
+        ids = [
+            row[0]
+            for batch in order_batches(self.db, ("id",), batch_size=2)
+            for row in batch
+        ]
+        self.assertEqual(ids, [1, 2, 3, 4, 5, 6, 7, 8])
+        self.assertEqual(backfill(self.db), 8)
+        start = (NOW - datetime.timedelta(days=500)).date()
+        end = (NOW + datetime.timedelta(days=1)).date()
+        top = get_top_products(self.db, start, end)
+        self.assertEqual(top[0][2], 8)
+
+
+if __name__ == "__main__":
+    unittest.main()
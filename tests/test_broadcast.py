@@ -0,0 +1,240 @@
+"""
+Сквозные тесты для модуля broadcast в приложении TeleFood.
+
+Рассылка выполняется настоящим клиентом telebot против локального поддельного
+Bot API (http.server), который имитирует заблокированных и удалённых пользователей,
+ответы 429 с retry_after, временные ошибки сервера и отклонённое сообщение.
+"""
+
+import json
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import telebot
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from telebot import apihelper
+
+from broadcast import BroadcastEngine, create_broadcast, iter_recipient_pages
+from models import Base, Broadcast, User
+
+BLOCKED_USERS = {3}
+MISSING_USERS = {9}
+RATE_LIMITED_USERS = {5}
+FLAKY_USERS = {7}
+BROKEN_TEXT = "<b>Скидка"
+
+
+class FakeBotAPI(BaseHTTPRequestHandler):
+    """Поддельный Bot API, принимающий только sendMessage."""
+
+    sent = []
+    attempts = {}
+    lock = threading.Lock()
+
+    def do_POST(self):
+        params = parse_qs(urlparse(self.path).query)
+        chat_id = int(params["chat_id"][0])
+        with self.lock:
+            attempt = self.attempts.get(chat_id, 0) + 1
+            self.attempts[chat_id] = attempt
+            if params["text"][0] == BROKEN_TEXT:
+                status, body = 400, {
+                    "ok": False,
+                    "error_code": 400,
+                    "description": "Bad Request: can't parse entities",
+                }
+            elif chat_id in MISSING_USERS:
+                status, body = 400, {
+                    "ok": False,
+                    "error_code": 400,
+                    "description": "Bad Request: chat not found",
+                }
+            elif chat_id in BLOCKED_USERS:
+                status, body = 403, {
+                    "ok": False,
+                    "error_code": 403,
+                    "description": "Forbidden: bot was blocked by the user",
+                }
+            elif chat_id in RATE_LIMITED_USERS and attempt == 1:
+                status, body = 429, {
+                    "ok": False,
+                    "error_code": 429,
+                    "description": "Too Many Requests: retry after 1",
+                    "parameters": {"retry_after": 1},
+                }
+            elif chat_id in FLAKY_USERS and attempt == 1:
+                status, body = 502, {
+                    "ok": False,
+                    "error_code": 502,
+                    "description": "Bad Gateway",
+                }
+            else:
+                self.sent.append(chat_id)
+                status, body = 200, {
+                    "ok": True,
+                    "result": {
+                        "message_id": len(self.sent),
+                        "date": 0,
+                        "chat": {"id": chat_id, "type": "private"},
+                        "text": params["text"][0],
+                    },
+                }
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestBroadcast(unittest.TestCase):
+    """
+    Класс тестовых случаев для рассылок.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        """
+        Запуск поддельного Bot API и перенаправление telebot на него.
+        """
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), FakeBotAPI)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.previous_api_url = apihelper.API_URL
+        apihelper.API_URL = (
+            f"http://127.0.0.1:{cls.server.server_address[1]}/bot{{0}}/{{1}}"
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        """
+        Остановка поддельного Bot API.
+        """
+        apihelper.API_URL = cls.previous_api_url
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        """
+        Создание базы данных в памяти с десятью пользователями.
+        """
+        FakeBotAPI.sent = []
+        FakeBotAPI.attempts = {}
+        self.engine = create_engine(
+            "sqlite://",
+            connect_args={"check_same_thread": False},
+            poolclass=StaticPool,
+        )
+        Base.metadata.create_all(self.engine)
+        self.Session = sessionmaker(bind=self.engine)
+        with self.Session() as db:
+            db.add_all([User(id=i, name=f"User{i}") for i in range(1, 11)])
+            db.commit()
+        self.broadcast_engine = BroadcastEngine(
+            telebot.TeleBot("123:TEST"),
+            session_factory=self.Session,
+            concurrency=4,
+            rate=1000,
+            page_size=3,
+            retry_delay=0.01,
+        )
+
+    def tearDown(self):
+        """
+        Освобождение движка базы данных.
+        """
+        self.engine.dispose()
+
+    def test_iter_recipient_pages(self):
+        """
+        Тестирование keyset-пагинации получателей.
+        """
+        with self.Session() as db:
+            pages = list(iter_recipient_pages(db, after_id=2, page_size=4))
+        self.assertEqual(pages, [[3, 4, 5, 6], [7, 8, 9, 10]])
+
+    def test_broadcast_end_to_end(self):
+        """
+        Тестирование полной рассылки: доставка, блокировки, 429 и временные ошибки.
+        """
+        with self.Session() as db:
+            broadcast_id = create_broadcast(db, "Скидка 20%").id
+
+        result = self.broadcast_engine.run(broadcast_id)
+
+        self.assertEqual(result.status, "finished")
+        self.assertEqual(result.delivered, 8)
+        self.assertEqual(result.blocked, 2)
+        self.assertEqual(result.failed, 0)
+        self.assertEqual(result.last_user_id, 10)
+        self.assertEqual(sorted(FakeBotAPI.sent), [1, 2, 4, 5, 6, 7, 8, 10])
+        self.assertEqual(FakeBotAPI.attempts[5], 2)
+        self.assertEqual(FakeBotAPI.attempts[7], 2)
+
+    def test_resume_from_checkpoint(self):
+        """
+        Тестирование продолжения прерванной рассылки с сохранённого курсора.
+        """
+        with self.Session() as db:
+            broadcast = create_broadcast(db, "Кухня закрыта")
+            # Имитация сбоя после первых двух страниц
+            broadcast.status = "running"
+            broadcast.last_user_id = 6
+            broadcast.delivered = 5
+            broadcast.blocked = 1
+            db.commit()
+
+        results = self.broadcast_engine.resume_unfinished()
+
+        self.assertEqual(len(results), 1)
+        self.assertEqual(sorted(FakeBotAPI.sent), [7, 8, 10])
+        with self.Session() as db:
+            broadcast = db.query(Broadcast).one()
+            self.assertEqual(broadcast.status, "finished")
+            self.assertEqual(broadcast.delivered, 8)
+
+    def test_rejected_message_pauses_broadcast(self):
+        """
+        Тестирование приостановки рассылки, когда Telegram отклоняет само сообщение.
+        """
+        with self.Session() as db:
+            broadcast_id = create_broadcast(db, BROKEN_TEXT).id
+
+        result = self.broadcast_engine.run(broadcast_id)
+
+        self.assertEqual(result.status, "paused")
+        self.assertEqual((result.delivered, result.blocked, result.failed), (0, 0, 0))
+        self.assertEqual(result.last_user_id, 0)
+        self.assertEqual(FakeBotAPI.sent, [])
+        self.assertLessEqual(len(FakeBotAPI.attempts), 3)
+
+    def test_paused_broadcast_resumes_only_explicitly(self):
+        """
+        Тестирование приостановленной рассылки: она не продолжается при перезапуске,
+        а после исправления текста продолжается явным запуском по id.
+        """
+        with self.Session() as db:
+            broadcast_id = create_broadcast(db, BROKEN_TEXT).id
+        self.broadcast_engine.run(broadcast_id)
+        FakeBotAPI.attempts = {}
+
+        self.assertEqual(self.broadcast_engine.resume_unfinished(), [])
+        self.assertEqual(FakeBotAPI.attempts, {})
+
+        with self.Session() as db:
+            db.get(Broadcast, broadcast_id).text = "<b>Скидка</b>"
+            db.commit()
+        result = self.broadcast_engine.run(broadcast_id)
+
+        self.assertEqual(result.status, "finished")
+        self.assertEqual(result.delivered, 8)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,124 @@
+"""
+Модульные тесты для снимка каталога catalog_snapshot.
+
+Проверяют запись и чтение снимка через mmap, атомарную замену файла с повторным
+отображением при обращении и чтение меню из снимка вместо базы данных.
+"""
+
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from catalog_snapshot import (
+    CatalogSnapshot,
+    CatalogSnapshots,
+    SnapshotError,
+    build_snapshot,
+    write_snapshot,
+)
+from models import Base, Product, ProductType
+from services import get_menu_messages
+
+
+class TestCatalogSnapshot(unittest.TestCase):
+    """
+    Класс тестовых случаев для снимка каталога.
+    """
+
+    def setUp(self):
+        """
+        Создание каталога в памяти и временного каталога для файла снимка.
+        """
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "catalog.snapshot")
+        patcher = mock.patch("catalog_snapshot.CATALOG_SNAPSHOT_PATH", self.path)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.engine = create_engine("sqlite:///:memory:", echo=False)
+        Base.metadata.create_all(self.engine)
+        self.db = sessionmaker(bind=self.engine)()
+        self.db.add(ProductType(id=2, name="Суши"))
+        self.db.add(ProductType(id=1, name="Пицца"))
+        self.db.add(Product(id=5, name="Ролл", cost=380.0, product_type=2))
+        self.db.add(
+            Product(
+                id=3,
+                name="Маргарита",
+                description="Томаты",
+                cost=0.0,
+                product_type=1,
+            )
+        )
+        self.db.add(Product(id=4, name="Пепперони", cost=520.0, product_type=1))
+        self.db.add(Product(id=9, name="Без категории", cost=1.0, product_type=7))
+        self.db.commit()
+
+    def tearDown(self):
+        self.db.close()
+        self.engine.dispose()
+        self.tmp.cleanup()
+
+    def test_round_trip(self):
+        """
+        Тестирование чтения категорий и продуктов из записанного снимка.
+        """
+        write_snapshot(self.db, 3)
+        snapshot = CatalogSnapshot(self.path)
+        self.assertEqual(snapshot.version, 3)
+        self.assertEqual(len(snapshot), 4)
+        categories = snapshot.categories()
+        self.assertEqual(
+            [(c.id, c.name, c.count) for c in categories],
+            [(1, "Пицца", 2), (2, "Суши", 1)],
+        )
+        pizzas = snapshot.products(categories[0])
+        self.assertEqual([p.name for p in pizzas], ["Маргарита", "Пепперони"])
+        self.assertEqual(pizzas[0].description, "Томаты")
+        self.assertEqual(pizzas[0].cost, 0.0)
+        orphan = snapshot.products()[-1]
+        self.assertEqual((orphan.id, orphan.product_type), (9, None))
+        self.assertEqual(snapshot.search_rows()[-1][4], "")
+
+        with open(self.path, "r+b") as f:
+            f.write(b"XXXX")
+        with self.assertRaises(SnapshotError):
+            CatalogSnapshot(self.path)
+
+    def test_replaced_file_is_remapped(self):
+        """
+        Тестирование повторного отображения файла после атомарной замены.
+        """
+        snapshots = CatalogSnapshots()
+        self.assertIsNone(snapshots.get())
+        write_snapshot(self.db, 1)
+        first = snapshots.get()
+        self.assertIs(snapshots.get(), first)
+
+        self.db.add(Product(id=6, name="Кальцоне", cost=600.0, product_type=1))
+        self.db.commit()
+        write_snapshot(self.db, 2)
+        second = snapshots.get()
+        self.assertEqual(second.version, 2)
+        # Прежнее отображение остаётся читаемым у тех, кто его получил
+        self.assertEqual(len(first.products()), 4)
+        self.assertEqual(len(second.products()), 5)
+
+    def test_menu_messages_read_snapshot(self):
+        """
+        Тестирование меню из снимка и из базы, когда снимка нет.
+        """
+        from_db = get_menu_messages(self.db)
+        write_snapshot(self.db, 1)
+        self.db.query(Product).delete()
+        self.db.commit()
+        self.assertEqual(get_menu_messages(self.db), from_db)
+        self.assertEqual(from_db[0], ("<b>Пицца</b>\nМаргарита: -₽", 3))
+        self.assertEqual(len(build_snapshot([], [], 0)), 32)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,105 @@
+"""
+Модульные тесты для модуля content_codec в приложении TeleFood.
+
+Проверяют чтение содержимого корзин и заказов в исходном и компактном форматах,
+перевод корзины в выбранный формат при изменении и сериализацию JSON-столбцов.
+"""
+
+import unittest
+from unittest.mock import patch
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from content_codec import add_product, dumps, loads, product_counts, product_ids
+from models import Base, Cart, Order, Product, ProductType, User
+from services import add_product_to_cart, checkout_cart, get_cart_summary
+
+
+class TestContentCodec(unittest.TestCase):
+    """
+    Класс тестовых случаев для форматов содержимого корзины.
+    """
+
+    def test_both_formats_are_read(self):
+        """
+        Тестирование чтения списка id и словаря количеств.
+        """
+        self.assertEqual(product_counts({"products": [3, 3, 7]}), {3: 2, 7: 1})
+        self.assertEqual(product_counts({"items": {"3": 2, "7": 1}}), {3: 2, 7: 1})
+        self.assertEqual(product_ids({"items": {"3": 2, "7": 1}}), [3, 3, 7])
+        self.assertEqual(product_counts(None), {})
+        self.assertEqual(product_counts({"products": []}), {})
+
+    def test_add_product_keeps_or_converts_format(self):
+        """
+        Тестирование добавления продукта в исходном и компактном форматах.
+        """
+        content = {"products": [3]}
+        self.assertEqual(add_product(content, 3), {"products": [3, 3]})
+        self.assertEqual(content, {"products": [3]})  # исходный словарь не изменён
+        with patch("content_codec.CART_CONTENT_FORMAT", "compact"):
+            self.assertEqual(add_product(content, 3), {"items": {"3": 2}})
+            self.assertEqual(add_product(None, 5), {"items": {"5": 1}})
+        # После возврата к исходному формату компактная корзина читается и переводится
+        self.assertEqual(add_product({"items": {"3": 2}}, 7), {"products": [3, 3, 7]})
+
+    def test_json_round_trip(self):
+        """
+        Тестирование компактной сериализации JSON-столбцов.
+        """
+        value = {"items": {"3": 2}, "note": "Без лука"}
+        encoded = dumps(value)
+        self.assertNotIn(" ", encoded.replace("Без лука", ""))
+        self.assertEqual(loads(encoded), value)
+
+
+class TestCompactCart(unittest.TestCase):
+    """
+    Класс тестовых случаев для работы сервисов с компактными корзинами.
+    """
+
+    def setUp(self):
+        """
+        Создание базы данных в памяти с сериализатором content_codec.
+        """
+        self.engine = create_engine(
+            "sqlite:///:memory:", json_serializer=dumps, json_deserializer=loads
+        )
+        Base.metadata.create_all(self.engine)
+        self.db = sessionmaker(bind=self.engine)()
+        self.db.add(ProductType(id=1, name="Pizza"))
+        self.db.add(Product(id=1, name="Margherita", cost=10.0, product_type=1))
+        self.db.add(Product(id=2, name="Pepperoni", cost=12.0, product_type=1))
+        self.db.add(User(id=1001, name="TestUser1"))
+        # Корзина, сохранённая до перехода на компактный формат
+        self.db.add(Cart(user_id=1001, content={"products": [1]}))
+        self.db.commit()
+
+    def tearDown(self):
+        """
+        Закрытие сессии и освобождение движка.
+        """
+        self.db.close()
+        self.engine.dispose()
+
+    @patch("content_codec.CART_CONTENT_FORMAT", "compact")
+    def test_checkout_compact_cart(self):
+        """
+        Тестирование оформления заказа из корзины, переведённой в компактный формат.
+        """
+        add_product_to_cart(self.db, 1001, 1)
+        add_product_to_cart(self.db, 1001, 2)
+        self.db.expire_all()
+        cart = self.db.query(Cart).filter_by(user_id=1001).one()
+        self.assertEqual(cart.content, {"items": {"1": 2, "2": 1}})
+        self.assertEqual(get_cart_summary(self.db, 1001), (3, 32.0))
+
+        order = checkout_cart(self.db, 1001)
+        self.assertEqual(product_counts(order.content), {1: 2, 2: 1})
+        self.assertEqual(get_cart_summary(self.db, 1001), (0, 0.0))
+        self.assertEqual(self.db.query(Order).count(), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,147 @@
+"""
+Модульные тесты для разделения движков чтения и записи в database.py.
+
+Проверяют, что функции @reads выполняют запросы через пул соединений query_only,
+запись и функции @writes — через единственное соединение писателя, а чтение
+в режиме WAL не ждёт незавершённой записи; проверка схемы при запуске пропускается,
+если сохранённая версия схемы совпадает с текущей.
+"""
+
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from sqlalchemy import event, text
+
+from database import (
+    _session_factory,
+    create_engines,
+    init_db,
+    schema_version,
+    stored_schema_version,
+)
+from models import ProductType
+from services import add_product_to_cart, create_user_if_not_exists, get_all_categories
+
+
+class TestReadWriteEngines(unittest.TestCase):
+    """
+    Класс тестовых случаев для маршрутизации запросов между движками.
+    """
+
+    def setUp(self):
+        """
+        Создание файловой базы SQLite во временном каталоге.
+        """
+        self.tmp = tempfile.TemporaryDirectory()
+        url = "sqlite:///" + os.path.join(self.tmp.name, "app.db")
+        self.writer, self.reader = create_engines(url)
+        init_db(self.writer)
+        self.session_factory = _session_factory(self.writer, self.reader)
+        self.reader_statements = []
+        event.listen(self.reader, "before_cursor_execute", self.record_statement)
+
+    def tearDown(self):
+        """
+        Освобождение движков и удаление временной базы.
+        """
+        self.writer.dispose()
+        self.reader.dispose()
+        self.tmp.cleanup()
+
+    def record_statement(self, conn, cursor, statement, *args):
+        self.reader_statements.append(statement)
+
+    def test_engines_configuration(self):
+        """
+        Тестирование WAL, пула из одного писателя и запрета записи у читателя.
+        """
+        self.assertEqual(self.writer.pool.size(), 1)
+        with self.writer.connect() as conn:
+            mode = conn.execute(text("PRAGMA journal_mode")).scalar()
+        self.assertEqual(mode, "wal")
+        with self.reader.connect() as conn:
+            with self.assertRaises(Exception):
+                conn.execute(text("INSERT INTO product_types (name) VALUES ('x')"))
+
+    def test_reads_use_reader_until_session_writes(self):
+        """
+        Тестирование чтения через читателя и чтения собственных изменений через писателя.
+        """
+        with self.session_factory() as db:
+            db.add(ProductType(name="Pizza"))
+            db.commit()
+            self.reader_statements.clear()
+            self.assertEqual([t.name for t in get_all_categories(db)], ["Pizza"])
+            self.assertEqual(len(self.reader_statements), 1)
+
+            # Незафиксированная запись видна только через соединение писателя
+            db.add(ProductType(name="Burgers"))
+            db.flush()
+            self.reader_statements.clear()
+            self.assertEqual(len(get_all_categories(db)), 2)
+            self.assertEqual(self.reader_statements, [])
+            db.commit()
+
+    def test_untagged_reads_do_not_hold_writer(self):
+        """
+        Тестирование чтения вне @reads через читателя без занятия соединения писателя.
+        """
+        with self.session_factory() as db:
+            self.assertEqual(db.query(ProductType).count(), 0)
+            self.assertEqual(len(self.reader_statements), 1)
+            self.assertEqual(self.writer.pool.checkedout(), 0)
+            db.add(ProductType(name="Pizza"))
+            db.flush()
+            self.reader_statements.clear()
+            self.assertEqual(db.query(ProductType).count(), 1)
+            self.assertEqual(self.reader_statements, [])
+            db.commit()
+
+    def test_writes_keep_nested_reads_on_writer(self):
+        """
+        Тестирование того, что чтение внутри функции @writes идёт через писателя.
+        """
+        with self.session_factory() as db:
+            user_id, _ = create_user_if_not_exists(db, 1001, "TestUser1")
+            self.reader_statements.clear()
+            add_product_to_cart(db, user_id, 1)
+        self.assertEqual(self.reader_statements, [])
+
+    def test_reads_do_not_wait_for_open_write(self):
+        """
+        Тестирование чтения, пока другая сессия держит незафиксированную запись.
+        """
+        with self.session_factory() as db:
+            db.add(ProductType(name="Pizza"))
+            db.commit()
+        with self.session_factory() as writer_db, self.session_factory() as reader_db:
+            writer_db.add(ProductType(name="Burgers"))
+            writer_db.flush()  # блокировка записи SQLite удерживается
+            self.assertEqual(len(get_all_categories(reader_db)), 1)
+            writer_db.commit()
+            reader_db.commit()  # новый снимок WAL
+            self.assertEqual(len(get_all_categories(reader_db)), 2)
+
+    def test_schema_check_skipped_when_version_matches(self):
+        """
+        Тестирование пропуска проверки схемы при совпадении сохранённой версии.
+        """
+        self.assertEqual(stored_schema_version(self.writer), schema_version())
+        with mock.patch("database.FAST_START", True), mock.patch(
+            "database.update_schema"
+        ) as update:
+            init_db(self.writer)
+            update.assert_not_called()
+            init_db(self.writer, force=True)
+            update.assert_called_once()
+        with self.writer.begin() as conn:
+            conn.execute(text("UPDATE app_meta SET value = 'old'"))
+        with mock.patch("database.FAST_START", True):
+            init_db(self.writer)
+        self.assertEqual(stored_schema_version(self.writer), schema_version())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,220 @@
+"""
+Модульные тесты для модуля delivery в приложении TeleFood.
+
+Проверяют разбор вершин зоны, поиск зоны по точке в сеточном индексе (в том числе
+для невыпуклых и пересекающихся зон и тысяч зон), перестроение индекса по версии
+зон, сохранение зоны и стоимости доставки в заказе и оформление заказа только по
+запрошенному местоположению.
+"""
+
+import datetime
+import math
+import random
+import unittest
+from unittest import mock
+from unittest.mock import MagicMock
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from archive import archive_orders
+from delivery import (
+    DeliveryZones,
+    Zone,
+    ZoneIndex,
+    bump_zones_version,
+    parse_polygon,
+)
+from handlers.cart_handler import CartHandler
+from models import ArchivedOrder, Base, DeliveryZone, Product, ProductType, User
+from services import add_product_to_cart, checkout_cart
+
+# Г-образная (невыпуклая) зона: квадрат 0..2 без правого верхнего квадрата 1..2
+L_SHAPE = [(0, 0), (0, 2), (1, 2), (1, 1), (2, 1), (2, 0)]
+
+
+def random_zone(rng: random.Random, zone_id: int) -> Zone:
+    """Случайный звёздный многоугольник размером около 0.02° в квадрате 1° × 1°."""
+    lat, lon = 55 + rng.random(), 37 + rng.random()
+    points = []
+    for step in range(12):
+        radius = rng.uniform(0.004, 0.012)
+        angle = step * 2 * math.pi / 12
+        points.append((lat + radius * math.sin(angle), lon + radius * math.cos(angle)))
+    return Zone(zone_id, f"Zone{zone_id}", "", points, priority=rng.randint(0, 3))
+
+
+class TestZoneIndex(unittest.TestCase):
+    """
+    Класс тестовых случаев для индекса зон доставки.
+    """
+
+    def test_parse_polygon(self):
+        """
+        Тестирование разбора вершин из текста и ошибок ввода.
+        """
+        self.assertEqual(
+            parse_polygon("55.75, 37.61\n55.76 37.62; 55.74,37.63\n"),
+            [[55.75, 37.61], [55.76, 37.62], [55.74, 37.63]],
+        )
+        for text in ("55.75, 37.61\n55.76, 37.62", "55.75\n1,2\n3,4", "95,0;1,1;2,0"):
+            with self.assertRaises(ValueError):
+                parse_polygon(text)
+
+    def test_concave_zone_and_fee(self):
+        """
+        Тестирование невыпуклой зоны при разных размерах ячейки и бесплатной доставки.
+        """
+        zone = Zone(1, "L", "Кухня 1", L_SHAPE, fee=150.0, free_from=1000.0)
+        for cell_size in (0.3, 0.5, 1.0, 5.0):
+            index = ZoneIndex([zone], cell_size)
+            self.assertIs(index.lookup(0.5, 1.5), zone)
+            self.assertIs(index.lookup(1.5, 0.5), zone)
+            self.assertIsNone(index.lookup(1.5, 1.5))
+            self.assertIsNone(index.lookup(-0.1, 0.5))
+        self.assertEqual(zone.fee_for(999), 150.0)
+        self.assertEqual(zone.fee_for(1000), 0.0)
+
+    def test_overlapping_zones_use_priority(self):
+        """
+        Тестирование выбора зоны с наибольшим приоритетом в пересечении.
+        """
+        city = Zone(1, "Город", "", [(0, 0), (0, 10), (10, 10), (10, 0)])
+        center = Zone(2, "Центр", "", [(4, 4), (4, 6), (6, 6), (6, 4)], priority=1)
+        index = ZoneIndex([city, center])
+        self.assertIs(index.lookup(5, 5), center)
+        self.assertIs(index.lookup(1, 1), city)
+
+    def test_matches_brute_force_on_many_zones(self):
+        """
+        Тестирование двух тысяч зон: результат совпадает с перебором всех зон.
+        """
+        rng = random.Random(7)
+        zones = [random_zone(rng, zone_id) for zone_id in range(1, 2001)]
+        index = ZoneIndex(zones)
+        ranked = sorted(zones, key=lambda z: (-z.priority, z.id))
+        hits = 0
+        for _ in range(5000):
+            lat, lon = 55 + rng.random(), 37 + rng.random()
+            expected = next((z for z in ranked if z.contains(lat, lon)), None)
+            self.assertIs(index.lookup(lat, lon), expected)
+            hits += expected is not None
+        self.assertGreater(hits, 100)
+
+
+class TestDeliveryZones(unittest.TestCase):
+    """
+    Класс тестовых случаев для зон доставки в базе и заказов с доставкой.
+    """
+
+    def setUp(self):
+        """
+        Создание базы в памяти с одной зоной доставки и корзиной пользователя 1001.
+        """
+        self.engine = create_engine("sqlite:///:memory:", echo=False)
+        Base.metadata.create_all(self.engine)
+        self.db = sessionmaker(bind=self.engine)()
+        self.db.add(ProductType(id=1, name="Pizza"))
+        self.db.add(Product(id=1, name="Margherita", cost=10.0, product_type=1))
+        self.db.add(User(id=1001, name="TestUser1"))
+        self.db.add(
+            DeliveryZone(
+                id=1, name="Север", kitchen="Кухня 1", polygon=L_SHAPE, fee=99.0
+            )
+        )
+        bump_zones_version(self.db)
+        self.db.commit()
+
+    def tearDown(self):
+        self.db.close()
+        self.engine.dispose()
+
+    def test_index_follows_zones_version(self):
+        """
+        Тестирование перестроения индекса только после смены версии зон.
+        """
+        zones = DeliveryZones(refresh_interval=0)
+        self.assertEqual(zones.lookup(self.db, 0.5, 0.5).name, "Север")
+        index = zones.get(self.db)
+        self.assertIs(zones.get(self.db), index)
+
+        self.db.get(DeliveryZone, 1).active = False
+        self.db.commit()
+        # Версия не изменилась — индекс прежний
+        self.assertIsNotNone(zones.lookup(self.db, 0.5, 0.5))
+        bump_zones_version(self.db)
+        self.db.commit()
+        self.assertIsNone(zones.lookup(self.db, 0.5, 0.5))
+
+    def test_order_keeps_zone_and_fee(self):
+        """
+        Тестирование сохранения доставки в заказе и её переноса в архив.
+        """
+        add_product_to_cart(self.db, 1001, 1)
+        zone = DeliveryZones().lookup(self.db, 0.5, 0.5)
+        order = checkout_cart(
+            self.db,
+            1001,
+            {
+                "latitude": 0.5,
+                "longitude": 0.5,
+                "delivery_zone_id": zone.id,
+                "kitchen": zone.kitchen,
+                "delivery_fee": zone.fee_for(10.0),
+            },
+        )
+        self.assertEqual((order.delivery_zone_id, order.delivery_fee), (1, 99.0))
+        order_id = order.id
+        archive_orders(
+            self.db, datetime.datetime.utcnow() + datetime.timedelta(seconds=1)
+        )
+        archived = self.db.get(ArchivedOrder, order_id)
+        self.assertEqual((archived.kitchen, archived.latitude), ("Кухня 1", 0.5))
+
+
+class TestCheckoutAtLocation(unittest.TestCase):
+    """
+    Класс тестовых случаев для приёма местоположения при оформлении заказа.
+    """
+
+    def setUp(self):
+        self.bot = MagicMock()
+        self.handler = CartHandler(self.bot, None, delivery_zones=MagicMock())
+        self.handler.place_order = MagicMock(return_value=MagicMock(id=1))
+        self.message = MagicMock()
+        self.message.chat.id = 1001
+        self.message.location.latitude, self.message.location.longitude = 55.7, 37.6
+
+    def test_location_without_checkout_is_not_ordered(self):
+        """
+        Тестирование местоположения, которое не запрашивало оформление заказа.
+        """
+        self.handler.checkout_at_location(self.message)
+        self.handler.place_order.assert_not_called()
+        self.assertIn("Оформить заказ", self.bot.send_message.call_args.args[1])
+
+        self.handler.delivery_zones = None
+        self.handler.expect_location(1001)
+        self.handler.checkout_at_location(self.message)
+        self.handler.place_order.assert_not_called()
+
+    def test_location_after_checkout_places_order_once(self):
+        """
+        Тестирование оформления по запрошенному местоположению и срока ожидания.
+        """
+        self.handler.expect_location(1001)
+        self.handler.checkout_at_location(self.message)
+        self.handler.place_order.assert_called_once()
+        self.assertEqual(
+            self.handler.place_order.call_args.kwargs["location"], (55.7, 37.6)
+        )
+        self.handler.checkout_at_location(self.message)
+        self.handler.place_order.assert_called_once()
+
+        with mock.patch("handlers.cart_handler.USER_STATE_TTL", 0):
+            self.handler.expect_location(1001)
+        self.assertFalse(self.handler.awaits_location(1001))
+
+
+if __name__ == "__main__":
+    unittest.main()
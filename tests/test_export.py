@@ -0,0 +1,184 @@
+"""
+Модульные тесты для модуля export в приложении TeleFood.
+
+Проверяют построчную выгрузку позиций заказов из архива и оперативной таблицы,
+фильтр по местным дням, продолжение с последнего выгруженного заказа и запись
+в CSV (в том числе сжатый) и колоночный формат, а также чтение выгрузки через
+реплику.
+"""
+
+import csv
+import datetime
+import gzip
+import os
+import tempfile
+import unittest
+
+import numpy as np
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from archive import archive_orders
+from database import ROUTE_KEY, _session_factory
+from export import (
+    COLUMNS,
+    ColumnarExportWriter,
+    CsvExportWriter,
+    export_orders,
+    iter_order_lines,
+    read_columnar,
+)
+from models import Base, Order, Product, ProductType, User
+
+# 2026-03-01 12:00 UTC = 15:00 по Москве
+BASE = datetime.datetime(2026, 3, 1, 12, 0)
+
+
+class TestOrderExport(unittest.TestCase):
+    """
+    Класс тестовых случаев для выгрузки заказов.
+    """
+
+    def setUp(self):
+        """
+        Создание базы в памяти: 6 заказов по одному в день, первые 3 — в архиве.
+        """
+        self.engine = create_engine("sqlite:///:memory:", echo=False)
+        Base.metadata.create_all(self.engine)
+        self.db = sessionmaker(bind=self.engine)()
+        self.db.add(ProductType(id=1, name="Pizza"))
+        self.db.add(Product(id=1, name="Margherita", cost=10.0, product_type=1))
+        self.db.add(ProductType(id=2, name="Drinks"))
+        self.db.add(Product(id=2, name="Cola", cost=2.5, product_type=2))
+        self.db.add(User(id=1001, name="TestUser1"))
+        for order_id in range(1, 7):
+            self.db.add(
+                Order(
+                    id=order_id,
+                    user_id=1001,
+                    created_at=BASE + datetime.timedelta(days=order_id - 1),
+                    content={"items": {"1": 1, "2": order_id}},
+                    pay_status=order_id % 2 == 0,
+                )
+            )
+        self.db.commit()
+        archive_orders(self.db, BASE + datetime.timedelta(days=2, hours=1))
+        self.dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        """
+        Закрытие сессии, освобождение движка и удаление файлов выгрузки.
+        """
+        self.db.close()
+        self.engine.dispose()
+        self.dir.cleanup()
+
+    def test_lines_resolve_products(self):
+        """
+        Тестирование строк выгрузки: позиция на строку, цены из каталога, местное время.
+        """
+        lines = list(iter_order_lines(self.db, batch_size=2))
+        self.assertEqual(len(lines), 12)
+        self.assertEqual([line[0] for line in lines[::2]], [1, 2, 3, 4, 5, 6])
+        first = dict(zip(COLUMNS, lines[0]))
+        self.assertEqual(first["created_at"], datetime.datetime(2026, 3, 1, 15, 0))
+        self.assertEqual(first["product_name"], "Margherita")
+        self.assertEqual(first["category"], "Pizza")
+        self.assertFalse(first["paid"])
+        cola = dict(zip(COLUMNS, lines[11]))
+        self.assertEqual((cola["quantity"], cola["amount"]), (6, 15.0))
+        self.assertEqual(cola["category"], "Drinks")
+
+    def test_date_range_and_incremental(self):
+        """
+        Тестирование фильтра по местным дням и продолжения после заказа after_id.
+        """
+        lines = iter_order_lines(
+            self.db, datetime.date(2026, 3, 2), datetime.date(2026, 3, 4)
+        )
+        self.assertEqual(sorted({line[0] for line in lines}), [2, 3, 4])
+
+        path = os.path.join(self.dir.name, "orders.csv")
+        writer = CsvExportWriter(path)
+        self.assertEqual(export_orders(self.db, writer, after_id=4), (4, 6))
+        writer.close()
+        with open(path, encoding="utf-8") as f:
+            rows = list(csv.reader(f))
+        self.assertEqual(tuple(rows[0]), COLUMNS)
+        self.assertEqual([row[0] for row in rows[1:]], ["5", "5", "6", "6"])
+        self.assertEqual(rows[1][1], "2026-03-05 15:00:00")
+
+    def test_compressed_csv(self):
+        """
+        Тестирование сжатого CSV при окончании имени файла на .gz.
+        """
+        path = os.path.join(self.dir.name, "orders.csv.gz")
+        writer = CsvExportWriter(path)
+        export_orders(self.db, writer, batch_size=5)
+        writer.close()
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            self.assertEqual(len(list(csv.reader(f))), 13)
+
+    def test_columnar_row_groups(self):
+        """
+        Тестирование колоночного файла: группы строк и типы колонок.
+        """
+        path = os.path.join(self.dir.name, "orders.npz")
+        writer = ColumnarExportWriter(path, row_group_size=5)
+        self.assertEqual(export_orders(self.db, writer, batch_size=3), (12, 6))
+        writer.close()
+        groups = list(read_columnar(path))
+        self.assertEqual([len(group["order_id"]) for group in groups], [5, 5, 2])
+        amount = np.concatenate([group["amount"] for group in groups])
+        self.assertAlmostEqual(float(amount.sum()), 60 + 2.5 * 21)
+        self.assertEqual(groups[0]["created_at"].dtype, np.dtype("datetime64[s]"))
+        self.assertEqual(groups[0]["product_name"][0], "Margherita")
+        # Файл читается и стандартным np.load
+        with np.load(path) as data:
+            self.assertEqual(list(data["paid.00002"]), [True, True])
+
+        empty = os.path.join(self.dir.name, "empty.npz")
+        writer = ColumnarExportWriter(empty)
+        self.assertEqual(export_orders(self.db, writer, after_id=6), (0, 6))
+        writer.close()
+        self.assertEqual(len(next(read_columnar(empty))["order_id"]), 0)
+
+
+class TestExportRouting(unittest.TestCase):
+    """
+    Класс тестовых случаев для выбора движка при потоковой выгрузке.
+    """
+
+    def setUp(self):
+        """
+        Создание отдельных баз писателя и реплики; заказ есть только в реплике.
+        """
+        self.dir = tempfile.TemporaryDirectory()
+        self.writer = create_engine("sqlite:///" + os.path.join(self.dir.name, "w.db"))
+        self.reader = create_engine("sqlite:///" + os.path.join(self.dir.name, "r.db"))
+        for engine in (self.writer, self.reader):
+            Base.metadata.create_all(engine)
+        with sessionmaker(bind=self.reader)() as db:
+            db.add(User(id=1001, name="TestUser1"))
+            db.add(
+                Order(id=1, user_id=1001, created_at=BASE, content={"products": [1]})
+            )
+            db.commit()
+
+    def tearDown(self):
+        self.writer.dispose()
+        self.reader.dispose()
+        self.dir.cleanup()
+
+    def test_streaming_reads_use_reader(self):
+        """
+        Тестирование того, что перебор генератора @reads идёт через реплику.
+        """
+        with _session_factory(self.writer, self.reader)() as db:
+            lines = list(iter_order_lines(db))
+            self.assertEqual([line[0] for line in lines], [1])
+            self.assertIsNone(db.info.get(ROUTE_KEY))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,63 @@
+"""
+Модульные тесты для модуля feedback_store в приложении TeleFood.
+
+Проверяют, что запись, отклонённая базой (нарушение внешнего ключа), не задерживает
+остальные записи ресторана и удаляется из буфера после MAX_ATTEMPTS попыток.
+"""
+
+import unittest
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from feedback_store import MAX_ATTEMPTS, FeedbackBuffer
+from models import Base, Feedback, User
+
+
+class TestFeedbackBuffer(unittest.TestCase):
+    """
+    Класс тестовых случаев для буфера обратной связи.
+    """
+
+    def setUp(self):
+        """
+        Создание базы в памяти с проверкой внешних ключей и одним пользователем.
+        """
+        self.engine = create_engine("sqlite:///:memory:", echo=False)
+        event.listen(
+            self.engine,
+            "connect",
+            lambda conn, record: conn.execute("PRAGMA foreign_keys=ON"),
+        )
+        Base.metadata.create_all(self.engine)
+        self.Session = sessionmaker(bind=self.engine)
+        with self.Session() as db:
+            db.add(User(id=1001, name="TestUser1"))
+            db.commit()
+
+    def tearDown(self):
+        self.engine.dispose()
+
+    def test_rejected_entry_does_not_block_others(self):
+        """
+        Тестирование сохранения остальных записей и удаления ошибочной после попыток.
+        """
+        buffer = FeedbackBuffer(self.Session)
+        buffer.append(1001, "Спасибо!")
+        # Пользователя 999 нет: вставка нарушает внешний ключ
+        buffer.append(999, "Потерянный отзыв")
+        buffer.append(1001, "Вкусно")
+        with self.assertLogs("TeleFoodBot", level="ERROR"):
+            self.assertEqual(buffer.flush(), 2)
+            for _ in range(MAX_ATTEMPTS - 1):
+                self.assertEqual(buffer.flush(), 0)
+        self.assertEqual(buffer._entries, [])
+
+        buffer.append(1001, "Ещё отзыв")
+        self.assertEqual(buffer.flush(), 1)
+        with self.Session() as db:
+            self.assertEqual(db.query(Feedback).count(), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,170 @@
+"""
+Модульные тесты для модуля forecasting в приложении TeleFood.
+
+Проверяют раскладку заказов по часам недели и хранение истории по неделям, векторные
+скользящее среднее и экспоненциальное сглаживание без незавершённой текущей недели,
+а также инкрементальное чтение заказов из базы по id последнего учтённого заказа.
+"""
+
+import datetime
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from config import LOCAL_TIMEZONE
+from forecasting import DemandHistory, get_day_forecast, load_or_build, week_slot
+from models import Base, Order, Product, ProductType, User
+
+# Понедельник, 12:30 по местному времени
+MONDAY_NOON = (
+    datetime.datetime(2026, 9, 7, 12, 30, tzinfo=LOCAL_TIMEZONE)
+    .astimezone(datetime.timezone.utc)
+    .replace(tzinfo=None)
+)
+
+
+def weekly_orders(weekly_units, product_id=1, start_id=1, week=0):
+    """Создать заказы: weekly_units[i] штук продукта в понедельник 12:30 недели week + i."""
+    orders = []
+    for offset, units in enumerate(weekly_units):
+        created_at = MONDAY_NOON + datetime.timedelta(weeks=week + offset)
+        orders.append(
+            (start_id + offset, created_at, {"products": [product_id] * units})
+        )
+    return orders
+
+
+class TestDemandHistory(unittest.TestCase):
+    """
+    Класс тестовых случаев для истории продаж и прогноза.
+    """
+
+    def setUp(self):
+        self.history = DemandHistory()
+        self.units = [4, 2, 6, 8, 0, 10]
+        self.history.add_orders(weekly_orders(self.units))
+        self.target = MONDAY_NOON.date() + datetime.timedelta(weeks=len(self.units))
+
+    def test_orders_are_bucketed_by_local_hour_of_week(self):
+        """
+        Тестирование раскладки заказов по неделям и часам недели.
+        """
+        week, weekday = week_slot(MONDAY_NOON.date())
+        self.assertEqual(weekday, 0)
+        self.assertEqual(self.history.first_week, week)
+        self.assertEqual(self.history.units.shape, (1, 6, 168))
+        self.assertEqual(self.history.units[0, :, 12].tolist(), self.units)
+        self.assertEqual(self.history.units.sum(), sum(self.units))
+        self.assertEqual(self.history.last_order_id, 6)
+
+    def test_moving_average(self):
+        """
+        Тестирование скользящего среднего по тем же часам последних недель.
+        """
+        # Прогноз не строит плотный массив всей истории
+        with mock.patch.object(DemandHistory, "_dense", side_effect=AssertionError):
+            forecast = self.history.forecast_day(self.target, method="ma", window=4)
+        self.assertAlmostEqual(float(forecast[0, 12]), np.mean(self.units[-4:]))
+        self.assertEqual(float(forecast[0, 13]), 0.0)
+
+    def test_exponential_smoothing_matches_recursion(self):
+        """
+        Тестирование совпадения векторного сглаживания с рекуррентной формулой.
+        """
+        level = self.units[0]
+        for value in self.units[1:]:
+            level = 0.3 * value + 0.7 * level
+        forecast = self.history.forecast_day(self.target, method="ses", alpha=0.3)
+        self.assertAlmostEqual(float(forecast[0, 12]), level, places=4)
+
+    def test_current_week_is_excluded(self):
+        """
+        Тестирование того, что неполная текущая неделя не участвует в прогнозе.
+        """
+        last_week_day = self.target - datetime.timedelta(weeks=1)
+        forecast = self.history.forecast_day(last_week_day, method="ma", window=1)
+        self.assertEqual(float(forecast[0, 12]), 0.0)  # неделя с 0 заказов
+
+    def test_unfinished_week_is_excluded(self):
+        """
+        Тестирование прогноза на следующую неделю посреди текущей: её заказы не в счёт.
+        """
+        # Вторник недели 6: пока продано 3 штуки
+        now = MONDAY_NOON + datetime.timedelta(weeks=len(self.units), days=1)
+        self.history.add_orders(weekly_orders([3], start_id=7, week=len(self.units)))
+        next_week = self.target + datetime.timedelta(weeks=1)
+        forecast = self.history.forecast_day(next_week, method="ma", window=1, now=now)
+        self.assertEqual(float(forecast[0, 12]), self.units[-1])
+
+    def test_weeks_are_stored_separately(self):
+        """
+        Тестирование хранения по неделям: недели без заказов не хранятся.
+        """
+        self.assertEqual(len(self.history.chunks), 5)  # в неделе 4 заказов нет
+        self.history.add_orders(weekly_orders([2], product_id=2, start_id=7))
+        self.assertEqual(self.history.units.shape, (2, 6, 168))
+        self.assertEqual(self.history.units[1, 0, 12], 2)
+        # Строка нового продукта появилась только в той неделе, где он продан
+        self.assertEqual(len(self.history.chunks[self.history.first_week + 1]), 1)
+
+
+class TestForecastStorage(unittest.TestCase):
+    """
+    Класс тестовых случаев для инкрементального обновления из базы.
+    """
+
+    def setUp(self):
+        """
+        Создание базы данных в памяти и временного файла истории.
+        """
+        self.engine = create_engine("sqlite:///:memory:", echo=False)
+        Base.metadata.create_all(self.engine)
+        self.db = sessionmaker(bind=self.engine)()
+        self.db.add(ProductType(id=1, name="Pizza"))
+        self.db.add(Product(id=1, name="Margherita", cost=10.0, product_type=1))
+        self.db.add(User(id=1001, name="TestUser1"))
+        self.db.commit()
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "forecast.npz")
+
+    def tearDown(self):
+        """
+        Закрытие сессии и удаление временных файлов.
+        """
+        self.db.close()
+        self.engine.dispose()
+        self.tmp.cleanup()
+
+    def add_orders(self, weekly_units, start_id):
+        for order_id, created_at, content in weekly_orders(weekly_units, 1, start_id):
+            self.db.add(
+                Order(id=order_id, user_id=1001, created_at=created_at, content=content)
+            )
+        self.db.commit()
+
+    def test_incremental_update_from_high_water_mark(self):
+        """
+        Тестирование дочитывания только новых заказов после сохранения истории.
+        """
+        self.add_orders([3, 3], start_id=1)
+        self.assertEqual(load_or_build(self.db, self.path).last_order_id, 2)
+
+        # Заказы, уже учтённые в файле, не читаются повторно
+        self.add_orders([5], start_id=3)
+        history = load_or_build(self.db, self.path)
+        self.assertEqual(history.last_order_id, 3)
+        self.assertEqual(history.units.sum(), 11)
+
+        target = MONDAY_NOON.date() + datetime.timedelta(weeks=1)
+        rows = get_day_forecast(self.db, target, "ma", self.path)
+        self.assertEqual(rows[0][0], "Margherita")
+        self.assertEqual(rows[0][1][12], 8.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
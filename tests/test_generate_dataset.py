@@ -0,0 +1,102 @@
+"""
+Модульные тесты для генератора синтетической базы generate_dataset.
+
+Проверяют детерминированность по seed, порядок заказов по времени, неравномерную
+популярность продуктов и чтение сгенерированных данных через сервисы.
+"""
+
+import datetime
+import os
+import sqlite3
+import tempfile
+import unittest
+from collections import Counter
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from content_codec import dumps, loads, product_counts
+from generate_dataset import USER_ID_BASE, DatasetGenerator, generate
+from models import Order
+from services import get_cart_summary, get_orders_by_user
+
+PARAMS = dict(
+    users=200,
+    products=100,
+    categories=5,
+    orders=3000,
+    days=14,
+    start=datetime.date(2026, 1, 5),
+)
+
+
+class TestGenerateDataset(unittest.TestCase):
+    """
+    Класс тестовых случаев для генератора синтетической базы.
+    """
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def build(self, name, **overrides):
+        path = os.path.join(self.tmp.name, name)
+        inserted = generate(
+            path, DatasetGenerator(**dict(PARAMS, **overrides)), chunk_size=500
+        )
+        return path, inserted
+
+    def read_orders(self, path):
+        with sqlite3.connect(path) as conn:
+            return conn.execute(
+                "SELECT id, user_id, created_at, content FROM orders ORDER BY id"
+            ).fetchall()
+
+    def test_generation_is_deterministic_and_ordered(self):
+        """
+        Тестирование одинаковых данных при одном seed и роста времени вместе с id.
+        """
+        first, inserted = self.build("a.db", seed=7)
+        second, _ = self.build("b.db", seed=7)
+        other, _ = self.build("c.db", seed=8)
+        self.assertEqual(inserted["orders"], 3000)
+        self.assertEqual(inserted["users"], 200)
+        orders = self.read_orders(first)
+        self.assertEqual(orders, self.read_orders(second))
+        self.assertNotEqual(orders, self.read_orders(other))
+        times = [row[2] for row in orders]
+        self.assertEqual(times, sorted(times))
+
+        # Популярность продуктов неравномерна (закон Ципфа)
+        units = Counter()
+        for row in orders:
+            units.update(product_counts(loads(row[3])))
+        top = units.most_common(1)[0][1]
+        self.assertGreater(top, 5 * sum(units.values()) / PARAMS["products"])
+
+    def test_services_read_generated_data(self):
+        """
+        Тестирование чтения сгенерированной базы через ORM и сервисы.
+        """
+        path, _ = self.build("app.db", compact=True)
+        engine = create_engine(
+            f"sqlite:///{path}", json_serializer=dumps, json_deserializer=loads
+        )
+        try:
+            with sessionmaker(bind=engine)() as db:
+                user_id = db.query(Order.user_id).first()[0]
+                orders = get_orders_by_user(db, user_id)
+                self.assertTrue(orders)
+                self.assertIsInstance(orders[0].created_at, datetime.datetime)
+                self.assertIn("items", orders[0].content)
+                count, total = get_cart_summary(db, USER_ID_BASE + 1)
+                self.assertGreaterEqual(count, 0)
+                self.assertGreaterEqual(total, 0.0)
+        finally:
+            engine.dispose()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,192 @@
+"""
+Модульные тесты для модулей idempotency и dispatch в приложении TeleFood.
+
+Проверяют ограниченный кэш с истечением, блокировку повторного выполнения,
+отбрасывание повторных обновлений и ограничение частоты действий пользователя
+на входе диспетчера.
+"""
+
+import time
+import unittest
+from unittest.mock import MagicMock
+
+from telebot import types
+
+from dispatch import (
+    DispatchTeleBot,
+    DuplicateUpdateFilter,
+    FloodControlFilter,
+    parse_limits,
+    update_route,
+)
+from idempotency import InFlightLock, TTLCache
+from metrics import metrics
+
+
+def make_callback_update(update_id, callback_id, data="checkout", user_id=1001):
+    """Создать объект Update с callback-запросом."""
+    return types.Update.de_json(
+        {
+            "update_id": update_id,
+            "callback_query": {
+                "id": callback_id,
+                "from": {"id": user_id, "is_bot": False, "first_name": "Test"},
+                "chat_instance": "1",
+                "data": data,
+            },
+        }
+    )
+
+
+class TestTTLCache(unittest.TestCase):
+    """
+    Класс тестовых случаев для TTLCache.
+    """
+
+    def test_duplicates_are_detected(self):
+        """
+        Тестирование распознавания повторного ключа.
+        """
+        cache = TTLCache(max_size=10, ttl=60)
+        self.assertTrue(cache.add(1))
+        self.assertFalse(cache.add(1))
+        self.assertIn(1, cache)
+
+    def test_size_is_bounded(self):
+        """
+        Тестирование вытеснения самых старых ключей при переполнении.
+        """
+        cache = TTLCache(max_size=3, ttl=60)
+        for key in range(5):
+            cache.add(key)
+        self.assertEqual(len(cache), 3)
+        self.assertNotIn(0, cache)
+        self.assertIn(4, cache)
+
+    def test_keys_expire(self):
+        """
+        Тестирование истечения ключей по времени.
+        """
+        cache = TTLCache(max_size=10, ttl=0.01)
+        cache.add("a")
+        time.sleep(0.02)
+        self.assertTrue(cache.add("a"))
+
+
+class TestInFlightLock(unittest.TestCase):
+    """
+    Класс тестовых случаев для InFlightLock.
+    """
+
+    def test_second_acquire_is_rejected(self):
+        """
+        Тестирование отклонения повторного захвата до освобождения.
+        """
+        lock = InFlightLock(ttl=30)
+        self.assertTrue(lock.acquire(1001))
+        self.assertFalse(lock.acquire(1001))
+        self.assertTrue(lock.acquire(1002))
+        lock.release(1001)
+        self.assertTrue(lock.acquire(1001))
+
+    def test_linger_and_expiry(self):
+        """
+        Тестирование задержки после освобождения и автоматического истечения.
+        """
+        lock = InFlightLock(ttl=0.01)
+        lock.acquire(1)
+        lock.release(1, linger=60)
+        self.assertFalse(lock.acquire(1))
+        lock.acquire(2)
+        time.sleep(0.02)
+        self.assertTrue(lock.acquire(2))
+
+
+class TestDuplicateUpdateFilter(unittest.TestCase):
+    """
+    Класс тестовых случаев для фильтра повторных обновлений.
+    """
+
+    def test_redelivered_updates_are_dropped(self):
+        """
+        Тестирование того, что хендлер вызывается один раз для повторно доставленного обновления.
+        """
+        bot = DispatchTeleBot("123:TEST", threaded=False)
+        duplicate_filter = DuplicateUpdateFilter(max_size=100, ttl=60)
+        bot.add_update_filter(duplicate_filter)
+        handled = []
+        bot.callback_query_handler(func=lambda c: True)(
+            lambda call: handled.append(call.id)
+        )
+
+        bot.process_new_updates([make_callback_update(1, "cb1")])
+        bot.process_new_updates([make_callback_update(1, "cb1")])
+        # Тот же callback в другом обновлении тоже считается повтором
+        bot.process_new_updates([make_callback_update(2, "cb1")])
+        bot.process_new_updates([make_callback_update(3, "cb2")])
+
+        self.assertEqual(handled, ["cb1", "cb2"])
+        self.assertEqual(duplicate_filter.dropped, 2)
+        self.assertEqual(bot.last_update_id, 3)
+
+
+class TestFloodControlFilter(unittest.TestCase):
+    """
+    Класс тестовых случаев для ограничения частоты действий пользователя.
+    """
+
+    def setUp(self):
+        """
+        Создание бота с фильтром: не более двух добавлений в корзину подряд.
+        """
+        self.bot = DispatchTeleBot("123:TEST", threaded=False)
+        self.bot.answer_callback_query = MagicMock()
+        self.flood_filter = FloodControlFilter(
+            self.bot, parse_limits("default=100/100,add=0.001/2"), max_users=2
+        )
+        self.bot.add_update_filter(self.flood_filter)
+        self.handled = []
+        self.bot.callback_query_handler(func=lambda c: True)(
+            lambda call: self.handled.append(call.id)
+        )
+
+    def test_storm_is_throttled_per_user_and_route(self):
+        """
+        Тестирование отбрасывания лишних нажатий с уведомлением и учётом в метриках.
+        """
+        throttled = metrics.get("dispatch.throttled.add")
+        updates = [make_callback_update(i, f"a{i}", "add_7") for i in range(1, 6)]
+        updates.append(make_callback_update(6, "c1", "checkout"))
+        updates.append(make_callback_update(7, "b1", "add_7", user_id=2002))
+        self.bot.process_new_updates(updates)
+
+        self.assertEqual(self.handled, ["a1", "a2", "c1", "b1"])
+        self.assertEqual(self.bot.answer_callback_query.call_count, 3)
+        self.assertEqual(metrics.get("dispatch.throttled.add") - throttled, 3)
+        self.assertEqual(self.bot.last_update_id, 7)
+
+    def test_buckets_are_bounded(self):
+        """
+        Тестирование вытеснения вёдер неактивных пользователей.
+        """
+        for user_id in range(10):
+            self.flood_filter(make_callback_update(user_id, "x", "add_1", user_id))
+        # max_users * число маршрутов в лимитах
+        self.assertEqual(len(self.flood_filter._buckets), 4)
+
+    def test_routes(self):
+        """
+        Тестирование определения маршрута обновления.
+        """
+        self.assertEqual(
+            update_route(make_callback_update(1, "x", "pay_online_5")),
+            (1001, "pay_online"),
+        )
+        self.assertEqual(
+            update_route(make_callback_update(1, "x", "clear_cart")),
+            (1001, "clear_cart"),
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
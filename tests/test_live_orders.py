@@ -0,0 +1,145 @@
+"""
+Модульные тесты для модуля live_orders в приложении TeleFood.
+
+Проверяют чтение только новых заказов после последнего увиденного id, счётчики
+живой ленты (заказы в минуту, выручка за день, ожидающие оплаты, смена дня)
+и приостановку фонового опроса.
+"""
+
+import datetime
+import time
+import unittest
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from live_orders import LiveCounters, LiveOrder, LiveOrdersPoller, fetch_orders_after
+from models import Base, Order, Product, ProductType, User
+from services import add_product_to_cart, checkout_cart
+
+
+def live_order(order_id, created_at, amount=100.0, paid=False):
+    return LiveOrder(order_id, created_at, 1, 1, amount, amount, paid, "")
+
+
+class TestLiveCounters(unittest.TestCase):
+    """
+    Класс тестовых случаев для счётчиков живой ленты.
+    """
+
+    def test_rate_revenue_and_new_day(self):
+        """
+        Тестирование заказов в минуту, выручки за день и начала нового дня.
+        """
+        # 2026-03-01 12:00 UTC = 15:00 по Москве
+        now = datetime.datetime(2026, 3, 1, 12, 0)
+        counters = LiveCounters(datetime.date(2026, 3, 1), 10, 1000.0, rate_window=60)
+        counters.add(live_order(1, now - datetime.timedelta(days=1)), False)
+        counters.add(live_order(2, now - datetime.timedelta(seconds=90)))
+        for order_id in range(3, 6):
+            counters.add(live_order(order_id, now - datetime.timedelta(seconds=10)))
+        counters.resolve([1, 3])
+        self.assertEqual(counters.snapshot(now), (3.0, 14, 1400.0, 3))
+
+        # 21:00 UTC = полночь по Москве: счётчики дня начинаются заново
+        midnight = datetime.datetime(2026, 3, 1, 21, 0)
+        counters.add(live_order(6, midnight, 50.0, paid=True))
+        self.assertEqual(counters.snapshot(midnight), (1.0, 1, 50.0, 3))
+
+
+class TestLiveOrdersPoller(unittest.TestCase):
+    """
+    Класс тестовых случаев для опроса новых заказов.
+    """
+
+    def setUp(self):
+        """
+        Создание общей для потоков базы в памяти с двумя оформленными заказами.
+        """
+        self.engine = create_engine(
+            "sqlite://",
+            poolclass=StaticPool,
+            connect_args={"check_same_thread": False},
+        )
+        Base.metadata.create_all(self.engine)
+        self.Session = sessionmaker(bind=self.engine)
+        self.db = self.Session()
+        self.db.add(ProductType(id=1, name="Pizza"))
+        self.db.add(Product(id=1, name="Margherita", cost=10.0, product_type=1))
+        self.db.add(User(id=1001, name="TestUser1"))
+        self.db.commit()
+        for _ in range(2):
+            self.checkout()
+
+    def tearDown(self):
+        self.db.close()
+        self.engine.dispose()
+
+    def checkout(self, units=1):
+        for _ in range(units):
+            add_product_to_cart(self.db, 1001, 1)
+        return checkout_cart(self.db, 1001).id
+
+    def test_polls_only_new_orders(self):
+        """
+        Тестирование отметки последнего увиденного id и снятия оплаченных с ожидания.
+        """
+        poller = LiveOrdersPoller(backlog=1, batch_size=2, session_factory=self.Session)
+        update = poller.poll(self.db)
+        self.assertEqual([order.id for order in update.orders], [2])
+        # Заказы дня взяты из агрегата продаж, а ожидающие оплаты — из COUNT,
+        # а не только из последних заказов
+        self.assertEqual(update.stats[1:], (2, 20.0, 2))
+
+        self.assertEqual(poller.poll(self.db).orders, [])
+        new_ids = [self.checkout(units) for units in (1, 2, 3)]
+        self.db.get(Order, 2).pay_status = True
+        self.db.commit()
+        update = poller.poll(self.db)
+        self.assertEqual([order.id for order in update.orders], new_ids)
+        self.assertEqual([order.units for order in update.orders], [1, 2, 3])
+        self.assertEqual(update.resolved, [2])
+        self.assertEqual(update.stats[1:], (5, 80.0, 4))
+
+        # Оплата заказа старше ленты видна после пересчёта
+        self.db.get(Order, 1).pay_status = True
+        self.db.commit()
+        self.assertEqual(poller.poll(self.db).stats.pending, 4)
+        poller.recount(self.db)
+        self.assertEqual(poller.counters.snapshot().pending, 3)
+        self.assertEqual(poller.last_seen, new_ids[-1])
+        self.assertEqual(len(fetch_orders_after(self.db, 0, limit=10)), 5)
+
+    def test_background_thread_pauses(self):
+        """
+        Тестирование фонового опроса: обновления в очереди, пауза и остановка.
+        """
+        poller = LiveOrdersPoller(interval=0.01, session_factory=self.Session)
+        poller.start()
+        try:
+            deadline = time.monotonic() + 5
+            while not poller.updates.qsize() and time.monotonic() < deadline:
+                time.sleep(0.01)
+            self.assertEqual(len(poller.drain()[0].orders), 2)
+
+            poller.pause()
+            time.sleep(0.1)
+            poller.drain()
+            order_id = self.checkout()
+            time.sleep(0.1)
+            self.assertEqual(poller.drain(), [])
+
+            poller.resume()
+            deadline = time.monotonic() + 5
+            received = []
+            while not received and time.monotonic() < deadline:
+                time.sleep(0.01)
+                received = [o.id for u in poller.drain() for o in u.orders]
+            self.assertEqual(received, [order_id])
+        finally:
+            poller.stop()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,110 @@
+"""
+Модульные тесты для модуля media в приложении TeleFood.
+
+Проверяют загрузку фото при первой отправке, повторное использование file_id
+и сброс кэша file_id после изменения файла изображения.
+"""
+
+import os
+import tempfile
+import unittest
+from unittest.mock import MagicMock
+
+from media import cached_file_id, send_product_photos, store_product_image
+from models import Product
+
+
+def make_photo_message(file_id):
+    """Создать поддельное сообщение с фото."""
+    size = MagicMock()
+    size.file_id = file_id
+    message = MagicMock()
+    message.photo = [MagicMock(), size]
+    return message
+
+
+class TestProductMedia(unittest.TestCase):
+    """
+    Класс тестовых случаев для кэша file_id фотографий продуктов.
+    """
+
+    def setUp(self):
+        """
+        Создание временного каталога медиа и двух продуктов с изображениями.
+        """
+        self.tmp = tempfile.TemporaryDirectory()
+        self.media_dir = os.path.join(self.tmp.name, "media")
+        self.products = []
+        for product_id in (1, 2):
+            source = os.path.join(self.tmp.name, f"source{product_id}.jpg")
+            with open(source, "wb") as f:
+                f.write(b"image %d" % product_id)
+            product = Product(id=product_id, name=f"P{product_id}", cost=1.0)
+            product.image_path = product.image_hash = product.photo_file_id = ""
+            store_product_image(product, source, self.media_dir)
+            self.products.append(product)
+        self.bot = MagicMock()
+        self.bot.send_media_group.return_value = [
+            make_photo_message("file-1"),
+            make_photo_message("file-2"),
+        ]
+
+    def tearDown(self):
+        """
+        Удаление временного каталога.
+        """
+        self.tmp.cleanup()
+
+    def sent_media(self):
+        """Получить содержимое последней отправленной медиагруппы."""
+        return [item.media for item in self.bot.send_media_group.call_args[0][1]]
+
+    def test_first_send_uploads_and_caches_file_id(self):
+        """
+        Тестирование загрузки при первой отправке и повторного использования file_id.
+        """
+        self.assertTrue(
+            send_product_photos(self.bot, 42, self.products, lambda p: p.name)
+        )
+        self.assertFalse(any(isinstance(m, str) for m in self.sent_media()))
+        self.assertEqual([p.photo_file_id for p in self.products], ["file-1", "file-2"])
+
+        # Вторая отправка ссылается на file_id без загрузки файлов
+        self.assertFalse(
+            send_product_photos(self.bot, 42, self.products, lambda p: p.name)
+        )
+        self.assertEqual(self.sent_media(), ["file-1", "file-2"])
+
+    def test_changed_file_invalidates_file_id(self):
+        """
+        Тестирование сброса file_id после изменения содержимого изображения.
+        """
+        send_product_photos(self.bot, 42, self.products, lambda p: p.name)
+        product = self.products[0]
+        with open(product.image_path, "wb") as f:
+            f.write(b"a new, larger image")
+        self.assertEqual(cached_file_id(product), "")
+
+        self.bot.send_media_group.return_value = [
+            make_photo_message("file-3"),
+            make_photo_message("ignored"),
+        ]
+        send_product_photos(self.bot, 42, self.products, lambda p: p.name)
+        media = self.sent_media()
+        self.assertNotIsInstance(media[0], str)
+        self.assertEqual(media[1], "file-2")
+        self.assertEqual(product.photo_file_id, "file-3")
+        self.assertEqual(self.products[1].photo_file_id, "file-2")
+
+    def test_store_same_image_keeps_file_id(self):
+        """
+        Тестирование сохранения file_id при повторной привязке того же файла.
+        """
+        product = self.products[0]
+        product.photo_file_id = "file-1"
+        store_product_image(product, product.image_path, self.media_dir)
+        self.assertEqual(product.photo_file_id, "file-1")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,74 @@
+"""
+Модульные тесты для счётчиков metrics и фильтра частоты в приложении TeleFood.
+
+Проверяют, что счётчики отброшенных обновлений заводятся только для маршрутов
+с настроенным лимитом, а MetricsReporter пишет снимок счётчиков при остановке.
+"""
+
+import unittest
+from unittest.mock import MagicMock, patch
+
+from dispatch import FloodControlFilter
+from metrics import Metrics, MetricsReporter
+
+
+def callback_update(data, user_id=1001):
+    update = MagicMock(message=None, inline_query=None)
+    update.callback_query.data = data
+    update.callback_query.from_user.id = user_id
+    return update
+
+
+class TestThrottledCounters(unittest.TestCase):
+    """
+    Класс тестовых случаев для счётчиков фильтра частоты.
+    """
+
+    def setUp(self):
+        self.metrics = Metrics()
+        patcher = patch("dispatch.metrics", self.metrics)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.filter = FloodControlFilter(
+            MagicMock(), {"default": (0.0, 1.0), "add": (0.0, 1.0)}
+        )
+
+    def test_unknown_routes_share_one_counter(self):
+        """
+        Тестирование счётчиков: произвольные callback_data не создают новых имён.
+        """
+        for data in ["add_1", "add_2", "tenant_a", "tenant_a", "x_y", "x_y"]:
+            self.filter(callback_update(data))
+        self.assertEqual(self.metrics.get("dispatch.throttled"), 3)
+        self.assertEqual(
+            self.metrics.snapshot(),
+            {
+                "dispatch.throttled": 3,
+                "dispatch.throttled.add": 1,
+                "dispatch.throttled.other": 2,
+            },
+        )
+
+
+class TestMetricsReporter(unittest.TestCase):
+    """
+    Класс тестовых случаев для записи счётчиков в лог.
+    """
+
+    def test_stop_logs_snapshot(self):
+        """
+        Тестирование итогового снимка счётчиков при остановке.
+        """
+        registry = Metrics()
+        registry.incr("dispatch.throttled", 3)
+        reporter = MetricsReporter(registry, interval=60)
+        reporter.start()
+        with self.assertLogs("TeleFoodBot", level="INFO") as logs:
+            reporter.stop()
+        self.assertEqual(
+            logs.output[-1].split(":", 2)[2], "Metrics: dispatch.throttled=3"
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
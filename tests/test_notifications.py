@@ -0,0 +1,176 @@
+"""
+Модульные тесты для модуля notifications в приложении TeleFood.
+
+Проверяют выбор чатов по подпискам на кухню и категорию, объединение новых заказов
+в одну сводку на чат, правку карточек при оплате заказа кнопкой персонала вместо
+новых сообщений и повтор отправки после ответа 429.
+"""
+
+import json
+import unittest
+from itertools import count
+from unittest.mock import MagicMock
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from telebot.apihelper import ApiTelegramException
+
+from handlers.staff_handler import StaffHandler
+from models import Base, Order, Product, ProductType, StaffMessage, StaffSubscription
+from notifications import (
+    PAID_CALLBACK,
+    RateLimitedSender,
+    StaffNotifier,
+    get_card_messages,
+)
+from services import add_product_to_cart, checkout_cart
+
+
+def too_many_requests():
+    result = MagicMock(status_code=429)
+    result.text = json.dumps(
+        {
+            "ok": False,
+            "error_code": 429,
+            "description": "Too Many Requests: retry after 0",
+            "parameters": {"retry_after": 0},
+        }
+    )
+    return ApiTelegramException("sendMessage", result, json.loads(result.text))
+
+
+class TestStaffNotifier(unittest.TestCase):
+    """
+    Класс тестовых случаев для уведомлений персонала.
+    """
+
+    def setUp(self):
+        """
+        Создание базы в памяти: пицца и напитки, три подписанных чата.
+        """
+        self.engine = create_engine("sqlite:///:memory:", echo=False)
+        Base.metadata.create_all(self.engine)
+        self.Session = sessionmaker(bind=self.engine)
+        self.db = self.Session()
+        self.db.add(ProductType(id=1, name="Pizza"))
+        self.db.add(ProductType(id=2, name="Drinks"))
+        self.db.add(Product(id=1, name="Margherita", cost=10.0, product_type=1))
+        self.db.add(Product(id=2, name="Cola", cost=2.5, product_type=2))
+        self.db.add_all(
+            [
+                StaffSubscription(chat_id=-100, title="Все заказы"),
+                StaffSubscription(chat_id=-200, kitchen="Север"),
+                StaffSubscription(chat_id=-300, category_id=2),
+                # Подписка другого ресторана
+                StaffSubscription(chat_id=-400, tenant="south"),
+            ]
+        )
+        self.db.commit()
+        message_ids = count(1)
+        self.bot = MagicMock()
+        self.bot.send_message.side_effect = lambda *a, **k: MagicMock(
+            message_id=next(message_ids)
+        )
+        self.notifier = StaffNotifier(
+            self.bot,
+            self.Session,
+            self.Session,
+            sender=RateLimitedSender(self.bot, rate=1000, chat_rate=1000),
+        )
+
+    def tearDown(self):
+        self.db.close()
+        self.engine.dispose()
+
+    def checkout(self, products, kitchen=""):
+        for product_id in products:
+            add_product_to_cart(self.db, 1001, product_id)
+        delivery = {"kitchen": kitchen} if kitchen else None
+        order_id = checkout_cart(self.db, 1001, delivery).id
+        self.notifier.order_created(order_id)
+        return order_id
+
+    def sent(self):
+        return {c.args[0]: c.args[1] for c in self.bot.send_message.call_args_list}
+
+    def test_orders_coalesced_per_chat(self):
+        """
+        Тестирование одной сводки на чат и выбора чатов по подпискам.
+        """
+        first = self.checkout([1, 1, 2], kitchen="Север")
+        second = self.checkout([1], kitchen="Юг")
+        third = self.checkout([2])
+        self.assertEqual(self.notifier.flush(), 3)
+        sent = self.sent()
+        self.assertEqual(sorted(sent), [-300, -200, -100])
+        self.assertIn("Новые заказы: 3", sent[-100])
+        self.assertIn("Margherita ×2, Cola ×1", sent[-100])
+        self.assertIn(f"Заказ №{first}", sent[-200])
+        self.assertNotIn(f"№{second}", sent[-300])
+        self.assertIn(f"№{third}", sent[-300])
+        self.assertEqual(self.db.query(StaffMessage).count(), 3 + 1 + 2)
+        self.assertEqual(self.notifier.flush(), 0)
+
+    def test_paid_button_edits_cards(self):
+        """
+        Тестирование кнопки «оплачен»: статус заказа и правка всех его карточек.
+        """
+        order_id = self.checkout([2], kitchen="Север")
+        self.notifier.flush()
+        self.bot.send_message.reset_mock()
+
+        handler = StaffHandler(self.bot, self.notifier)
+        call = MagicMock(data=f"{PAID_CALLBACK}{order_id}")
+        # Сообщение 1 — карточка другого чата: кнопка не действует
+        call.message.chat.id, call.message.message_id = -200, 1
+        handler.mark_paid(call)
+        self.assertFalse(self.db.get(Order, order_id).pay_status)
+
+        call.message.message_id = 2
+        handler.mark_paid(call)
+        self.db.expire_all()
+        self.assertTrue(self.db.get(Order, order_id).pay_status)
+        self.assertEqual(self.notifier.flush(), 3)
+        self.bot.send_message.assert_not_called()
+        edits = self.bot.edit_message_text.call_args_list
+        self.assertEqual(
+            sorted((c.args[1], c.args[2]) for c in edits),
+            [(-300, 3), (-200, 2), (-100, 1)],
+        )
+        self.assertTrue(all("✅ оплачен" in c.args[0] for c in edits))
+
+    def test_card_messages_only_for_affected_cards(self):
+        """
+        Тестирование поиска карточек: все заказы затронутой карточки, без карточек
+        других сообщений того же чата и другого ресторана.
+        """
+        self.db.add_all(
+            [
+                StaffMessage(order_id=1, chat_id=-100, message_id=10),
+                StaffMessage(order_id=2, chat_id=-100, message_id=10),
+                StaffMessage(order_id=3, chat_id=-100, message_id=11),
+                StaffMessage(order_id=4, chat_id=-200, message_id=10),
+                StaffMessage(order_id=1, chat_id=-100, message_id=12, tenant="south"),
+            ]
+        )
+        self.db.commit()
+        messages = get_card_messages(self.db, "", [1])
+        self.assertEqual(
+            {key: sorted(ids) for key, ids in messages.items()}, {(-100, 10): [1, 2]}
+        )
+
+    def test_sender_retries_after_429(self):
+        """
+        Тестирование повторной отправки после ответа 429 с паузой отправки.
+        """
+        self.bot.send_message.side_effect = [
+            too_many_requests(),
+            MagicMock(message_id=7),
+        ]
+        sender = RateLimitedSender(self.bot, rate=1000, chat_rate=1000, retry_delay=0)
+        self.assertEqual(sender.send(-100, "text"), 7)
+        self.assertEqual(self.bot.send_message.call_count, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,111 @@
+"""
+Модульные тесты для обработчика заказов в приложении TeleFood.
+
+Проверяют первую страницу истории заказов по кнопке «Мои заказы» и следующую
+страницу по кнопке «Показать ещё», которая читается из архива заказов.
+"""
+
+import datetime
+import unittest
+from unittest.mock import MagicMock
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from archive import archive_orders
+from handlers.order_handler import OrderHandler
+from models import Base, Order, Product, ProductType, User
+
+NOW = datetime.datetime.utcnow()
+
+
+class TestOrderHandler(unittest.TestCase):
+    """
+    Класс тестовых случаев для истории заказов.
+    """
+
+    def setUp(self):
+        """
+        Создание базы в памяти: 8 заказов пользователя 1001, 5 старых — в архиве.
+        """
+        self.engine = create_engine("sqlite:///:memory:", echo=False)
+        Base.metadata.create_all(self.engine)
+        self.Session = sessionmaker(bind=self.engine)
+        with self.Session() as db:
+            db.add(ProductType(id=1, name="Pizza"))
+            db.add(Product(id=1, name="Margherita", cost=10.0, product_type=1))
+            db.add(User(id=1001, name="TestUser1"))
+            for order_id in range(1, 9):
+                age = datetime.timedelta(days=400 - order_id if order_id <= 5 else 1)
+                db.add(
+                    Order(
+                        id=order_id,
+                        user_id=1001,
+                        created_at=NOW - age,
+                        content={"products": [1]},
+                    )
+                )
+            db.commit()
+            archive_orders(db, NOW - datetime.timedelta(days=180))
+        self.bot = MagicMock()
+        self.handler = OrderHandler(self.bot, None, self.Session)
+
+    def tearDown(self):
+        self.engine.dispose()
+
+    def sent_orders(self):
+        return [
+            int(c.args[1].split("№")[1].split("<")[0])
+            for c in self.bot.send_message.call_args_list
+            if "Заказ №" in c.args[1]
+        ]
+
+    def test_first_page(self):
+        """
+        Тестирование первой страницы: новые заказы первыми и кнопка следующей страницы.
+        """
+        message = MagicMock()
+        message.chat.id, message.from_user.id = 1001, 1001
+        message.from_user.first_name = "TestUser1"
+        self.handler.show_orders(message)
+        self.assertEqual(self.sent_orders(), [8, 7, 6, 5, 4])
+        last = self.bot.send_message.call_args
+        self.assertEqual(last.args[0], 1001)
+        button = last.kwargs["reply_markup"].keyboard[0][0]
+        self.assertEqual(button.callback_data, "orders_more_5")
+
+    def test_more_orders_from_archive(self):
+        """
+        Тестирование кнопки «Показать ещё»: остаток истории читается из архива.
+        """
+        call = MagicMock(data="orders_more_5")
+        call.message.chat.id, call.from_user.id = 1001, 1001
+        call.from_user.first_name = "TestUser1"
+        self.handler.more_orders(call)
+        self.bot.answer_callback_query.assert_called_once_with(call.id)
+        self.assertEqual(self.sent_orders(), [3, 2, 1])
+        self.assertTrue(
+            all(c.args[0] == 1001 for c in self.bot.send_message.call_args_list)
+        )
+        self.assertNotIn("Более ранние заказы:", self.bot.send_message.call_args.args)
+
+    def test_total_includes_discount_and_delivery(self):
+        """
+        Тестирование итога заказа со скидкой и стоимостью доставки из заказа.
+        """
+        with self.Session() as db:
+            order = db.get(Order, 8)
+            order.discount, order.delivery_fee = 2.5, 4.0
+            db.commit()
+        message = MagicMock()
+        message.chat.id, message.from_user.id = 1001, 1001
+        message.from_user.first_name = "TestUser1"
+        self.handler.show_orders(message)
+        text = self.bot.send_message.call_args_list[0].args[1]
+        self.assertIn("Скидка по акциям: −2.50₽", text)
+        self.assertIn("Доставка: 4.00₽", text)
+        self.assertIn("Итого: 11.50₽", text)
+
+
+if __name__ == "__main__":
+    unittest.main()
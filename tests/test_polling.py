@@ -0,0 +1,155 @@
+"""
+Модульные тесты для модуля polling в приложении TeleFood.
+
+Проверяют сохранение прогресса обработки обновлений, продолжение после перезапуска
+без повторной обработки, обработку пачки при ошибке сохранения прогресса и мягкую
+остановку с дообработкой текущей пачки.
+"""
+
+import threading
+import unittest
+from unittest import mock
+
+from sqlalchemy import create_engine
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from telebot import types
+
+from models import Base
+from polling import UpdatePoller, UpdateProgress
+
+
+def make_message_update(update_id, chat_id):
+    """Создать объект Update с текстовым сообщением."""
+    return types.Update.de_json(
+        {
+            "update_id": update_id,
+            "message": {
+                "message_id": update_id,
+                "date": 0,
+                "chat": {"id": chat_id, "type": "private"},
+                "from": {"id": chat_id, "is_bot": False, "first_name": "Test"},
+                "text": f"msg {update_id}",
+            },
+        }
+    )
+
+
+class FakeBot:
+    """Бот, выдающий заранее заданные пачки обновлений."""
+
+    def __init__(self, batches, on_empty=None):
+        self.batches = list(batches)
+        self.offsets = []
+        self.processed = []
+        self.on_empty = on_empty
+        self.lock = threading.Lock()
+
+    def get_updates(self, offset=None, timeout=None, long_polling_timeout=None):
+        self.offsets.append(offset)
+        if not self.batches:
+            if self.on_empty:
+                self.on_empty()
+            return []
+        return [u for u in self.batches.pop(0) if u.update_id >= offset]
+
+    def process_new_updates(self, updates):
+        with self.lock:
+            self.processed.extend(u.update_id for u in updates)
+
+
+class TestUpdatePoller(unittest.TestCase):
+    """
+    Класс тестовых случаев для UpdatePoller.
+    """
+
+    def setUp(self):
+        """
+        Создание базы данных в памяти, доступной из потоков пула.
+        """
+        self.engine = create_engine(
+            "sqlite://",
+            connect_args={"check_same_thread": False},
+            poolclass=StaticPool,
+        )
+        Base.metadata.create_all(self.engine)
+        self.Session = sessionmaker(bind=self.engine)
+
+    def tearDown(self):
+        """
+        Освобождение движка базы данных.
+        """
+        self.engine.dispose()
+
+    def make_poller(self, bot):
+        poller = UpdatePoller(bot, self.Session, workers=3, long_polling_timeout=0)
+        bot.on_empty = poller.stop
+        return poller
+
+    def test_progress_is_persisted_and_resumed(self):
+        """
+        Тестирование сохранения прогресса и продолжения с сохранённого offset.
+        """
+        batch = [make_message_update(i, chat_id=i % 2) for i in range(10, 14)]
+        bot = FakeBot([batch])
+        hooks = []
+        poller = self.make_poller(bot)
+        poller.on_shutdown(lambda: hooks.append("flushed"))
+        poller.run()
+
+        self.assertEqual(sorted(bot.processed), [10, 11, 12, 13])
+        self.assertEqual(hooks, ["flushed"])
+        self.assertEqual(UpdateProgress(self.Session).load().watermark, 13)
+
+        # Telegram повторно доставляет ту же пачку — она уже обработана
+        restarted = FakeBot([batch + [make_message_update(14, chat_id=0)]])
+        self.make_poller(restarted).run()
+        self.assertEqual(restarted.offsets[0], 14)
+        self.assertEqual(restarted.processed, [14])
+
+    def test_out_of_order_completion_is_not_redone(self):
+        """
+        Тестирование пропуска обновлений, обработанных вне порядка до сбоя.
+        """
+        progress = UpdateProgress(self.Session)
+        progress.start([20, 21, 22])
+        progress.finish(22)
+        progress.finish(20)
+        progress.save()
+        # Обработка 21 прервалась сбоем
+        self.assertEqual(progress.watermark, 20)
+
+        bot = FakeBot([[make_message_update(i, chat_id=i) for i in (21, 22)]])
+        self.make_poller(bot).run()
+        self.assertEqual(bot.processed, [21])
+        self.assertEqual(UpdateProgress(self.Session).load().watermark, 22)
+
+    def test_progress_save_failure_does_not_stop_group(self):
+        """
+        Тестирование обработки всей группы, когда прогресс не удаётся сохранить.
+        """
+        bot = FakeBot([[make_message_update(i, chat_id=7) for i in range(1, 5)]])
+        poller = self.make_poller(bot)
+        error = OperationalError("UPDATE app_meta", {}, Exception("database is locked"))
+        with mock.patch("polling.set_meta", side_effect=error):
+            with self.assertLogs("TeleFoodBot", level="ERROR"):
+                poller.run()
+        self.assertEqual(bot.processed, [1, 2, 3, 4])
+        self.assertEqual(poller.progress.watermark, 4)
+        self.assertEqual(poller.progress.done, set())
+        # Прогресс из памяти сохраняется при следующей возможности
+        self.assertTrue(poller.progress.save())
+        self.assertEqual(UpdateProgress(self.Session).load().watermark, 4)
+
+    def test_updates_of_one_chat_keep_order(self):
+        """
+        Тестирование последовательной обработки обновлений одного чата.
+        """
+        bot = FakeBot([[make_message_update(i, chat_id=7) for i in range(1, 9)]])
+        self.make_poller(bot).run()
+        self.assertEqual(bot.processed, list(range(1, 9)))
+
+
+if __name__ == "__main__":
+    unittest.main()
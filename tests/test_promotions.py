@@ -0,0 +1,169 @@
+"""
+Модульные тесты для модуля promotions в приложении TeleFood.
+
+Проверяют скидки на продукты и категории (выбор лучшей без суммирования), время
+действия акций, комбо-наборы, перекомпиляцию по версии акций и сохранение
+скидки в заказе.
+"""
+
+import datetime
+import unittest
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from models import Base, Product, ProductType, Promotion, User
+from promotions import (
+    PromotionRules,
+    Promotions,
+    Window,
+    bump_promotions_version,
+    parse_hours,
+)
+from services import add_product_to_cart, checkout_cart
+
+# Понедельник, 13:30 по местному времени
+LUNCH = datetime.datetime(2026, 3, 2, 13, 30)
+# Цены и категории: 1 — пицца, 2 — напитки
+CATALOG = {1: (500.0, 1), 2: (400.0, 1), 3: (100.0, 2), 4: (150.0, 2)}
+
+
+def promo(id, kind="percent", value=10.0, products=(), categories=(), **fields):
+    return Promotion(
+        id=id,
+        name=f"Promo{id}",
+        kind=kind,
+        value=value,
+        product_ids=list(products),
+        category_ids=list(categories),
+        **fields,
+    )
+
+
+class TestPromotionRules(unittest.TestCase):
+    """
+    Класс тестовых случаев для расчёта корзины по акциям.
+    """
+
+    def test_best_discount_wins(self):
+        """
+        Тестирование выбора лучшей скидки на позицию: скидки не суммируются.
+        """
+        rules = PromotionRules(
+            [
+                promo(1, value=10, categories=[1]),
+                promo(2, value=30, products=[2]),
+                promo(3, "price", 80.0, products=[3]),
+                promo(4, value=5),
+            ]
+        )
+        priced = rules.evaluate({1: 1, 2: 2, 3: 3, 4: 1}, CATALOG, LUNCH)
+        self.assertEqual(priced.subtotal, 500 + 800 + 300 + 150)
+        self.assertEqual(priced.line_discounts, {1: 50, 2: 240, 3: 60, 4: 7.5})
+        self.assertEqual(
+            [(p.id, p.amount) for p in priced.applied],
+            [(1, 50.0), (2, 240.0), (3, 60.0), (4, 7.5)],
+        )
+        self.assertEqual(priced.total, 1750 - 357.5)
+
+    def test_time_windows(self):
+        """
+        Тестирование часов, дней недели, периода дат и интервала через полночь.
+        """
+        happy_hour = Window(None, None, frozenset({1, 2, 3, 4, 5}), 12, 15)
+        self.assertTrue(happy_hour.active(LUNCH))
+        self.assertFalse(happy_hour.active(LUNCH.replace(hour=15)))
+        self.assertFalse(happy_hour.active(LUNCH + datetime.timedelta(days=5)))
+        night = Window(None, None, frozenset(), 22, 2)
+        self.assertTrue(night.active(LUNCH.replace(hour=1)))
+        self.assertFalse(night.active(LUNCH))
+        march = Window(datetime.date(2026, 3, 1), datetime.date(2026, 3, 1), (), 0, 0)
+        self.assertFalse(march.active(LUNCH))
+        self.assertEqual(parse_hours("22-24"), (22, 0))
+        with self.assertRaises(ValueError):
+            parse_hours("12")
+
+        rules = PromotionRules(
+            [promo(1, "price", 300.0, [1], start_hour=12, end_hour=15)]
+        )
+        self.assertEqual(rules.evaluate({1: 1}, CATALOG, LUNCH).discount, 200)
+        evening = LUNCH.replace(hour=19)
+        self.assertEqual(rules.evaluate({1: 1}, CATALOG, evening).discount, 0)
+
+    def test_combo_takes_its_items(self):
+        """
+        Тестирование комбо: набор забирает позиции, остальные получают скидку.
+        """
+        rules = PromotionRules(
+            [
+                promo(1, "combo", 550.0, products=[1, 3]),
+                promo(2, "combo", 1000.0, products=[1, 1, 3]),
+                promo(3, value=10, categories=[2]),
+            ]
+        )
+        priced = rules.evaluate({1: 1, 3: 2}, CATALOG, LUNCH)
+        # Первый набор: 600 за 550; вторая штука напитка — со скидкой 10%
+        self.assertEqual([(p.id, p.amount) for p in priced.applied], [(1, 50), (3, 10)])
+        # Второй набор выгоднее, но для него не хватает пиццы
+        priced = rules.evaluate({1: 2, 3: 1}, CATALOG, LUNCH)
+        self.assertEqual([(p.id, p.amount) for p in priced.applied], [(2, 100)])
+        self.assertAlmostEqual(sum(priced.line_discounts.values()), 100)
+
+    def test_unrelated_rules_do_not_change_result(self):
+        """
+        Тестирование тысячи акций на другие продукты: результат тот же.
+        """
+        base = [promo(1, value=10, categories=[1])]
+        noise = [promo(i, value=50, products=[i]) for i in range(100, 1100)]
+        cart = {1: 2, 3: 1}
+        self.assertEqual(
+            PromotionRules(base).evaluate(cart, CATALOG, LUNCH),
+            PromotionRules(base + noise).evaluate(cart, CATALOG, LUNCH),
+        )
+
+
+class TestPromotionsCheckout(unittest.TestCase):
+    """
+    Класс тестовых случаев для акций при оформлении заказа.
+    """
+
+    def setUp(self):
+        """
+        Создание базы в памяти с продуктом, акцией на него и корзиной пользователя.
+        """
+        self.engine = create_engine("sqlite:///:memory:", echo=False)
+        Base.metadata.create_all(self.engine)
+        self.db = sessionmaker(bind=self.engine)()
+        self.db.add(ProductType(id=1, name="Pizza"))
+        self.db.add(Product(id=1, name="Margherita", cost=10.0, product_type=1))
+        self.db.add(User(id=1001, name="TestUser1"))
+        self.db.add(promo(1, value=20, categories=[1]))
+        bump_promotions_version(self.db)
+        self.db.commit()
+        add_product_to_cart(self.db, 1001, 1)
+        add_product_to_cart(self.db, 1001, 1)
+
+    def tearDown(self):
+        self.db.close()
+        self.engine.dispose()
+
+    def test_order_keeps_discount(self):
+        """
+        Тестирование скидки в заказе и перекомпиляции акций после смены версии.
+        """
+        promotions = Promotions(refresh_interval=0)
+        self.assertEqual(promotions.price(self.db, {1: 2}).discount, 4.0)
+        order = checkout_cart(self.db, 1001, promotions=promotions)
+        self.assertEqual(order.discount, 4.0)
+        self.assertEqual(order.promotions, [{"id": 1, "name": "Promo1", "amount": 4.0}])
+
+        self.db.get(Promotion, 1).value = 50
+        bump_promotions_version(self.db)
+        self.db.commit()
+        self.assertEqual(promotions.price(self.db, {1: 2}).discount, 10.0)
+        self.db.refresh(order)
+        self.assertEqual(order.discount, 4.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,111 @@
+"""
+Модульные тесты для модуля recommendations в приложении TeleFood.
+
+Проверяют подсчёт совместных покупок в плотном и разреженном режимах,
+инкрементальное обновление, подбор рекомендаций и сохранение модели
+с доучётом новых заказов.
+"""
+
+import os
+import tempfile
+import unittest
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from models import Base, Order, Product, ProductType, User
+from recommendations import CooccurrenceModel, build_from_db, load_or_build
+
+BASKETS = [[1, 2, 3], [1, 2], [2, 3, 3], [1, 4], [5], [1, 2, 4]]
+
+
+class TestCooccurrenceModel(unittest.TestCase):
+    """
+    Класс тестовых случаев для матрицы совместных покупок.
+    """
+
+    def assert_counts(self, model):
+        self.assertEqual(model.count(1, 2), 3)
+        self.assertEqual(model.count(2, 1), 3)
+        self.assertEqual(model.count(2, 3), 2)
+        self.assertEqual(model.count(1, 4), 2)
+        self.assertEqual(model.count(3, 3), 0)
+        self.assertEqual(model.count(5, 1), 0)
+
+    def test_dense_and_sparse_counts(self):
+        """
+        Тестирование одинаковых результатов плотного и разреженного хранения.
+        """
+        for dense_limit in (100, 2):
+            model = CooccurrenceModel([1, 2, 3, 4, 5], dense_limit=dense_limit)
+            model.add_baskets(BASKETS)
+            self.assertEqual(model.dense, dense_limit == 100)
+            self.assert_counts(model)
+            self.assertEqual(model.recommend([1]), [2, 4, 3])
+
+    def test_incremental_matches_batch(self):
+        """
+        Тестирование совпадения инкрементального обновления с пакетным построением.
+        """
+        model = CooccurrenceModel()
+        for order_id, basket in enumerate(BASKETS, start=1):
+            model.add_order(order_id, basket)
+        self.assert_counts(model)
+        self.assertEqual(model.last_order_id, len(BASKETS))
+        # Продукты корзины не рекомендуются
+        self.assertEqual(model.recommend([1, 3], k=5), [2, 4])
+        self.assertEqual(model.recommend([5]), [])
+
+
+class TestRecommendationsPersistence(unittest.TestCase):
+    """
+    Класс тестовых случаев для построения модели по базе и её сохранения.
+    """
+
+    def setUp(self):
+        """
+        Создание базы данных в памяти с заказами и временного каталога для модели.
+        """
+        self.engine = create_engine("sqlite:///:memory:", echo=False)
+        Base.metadata.create_all(self.engine)
+        self.db = sessionmaker(bind=self.engine)()
+        self.db.add(ProductType(id=1, name="Pizza"))
+        self.db.add_all(
+            [
+                Product(id=pid, name=f"P{pid}", cost=1.0, product_type=1)
+                for pid in range(1, 6)
+            ]
+        )
+        self.db.add(User(id=1001, name="TestUser1"))
+        for basket in BASKETS[:4]:
+            self.db.add(Order(user_id=1001, content={"products": basket}))
+        self.db.commit()
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "model.npz")
+
+    def tearDown(self):
+        """
+        Закрытие сессии и удаление временных файлов.
+        """
+        self.db.close()
+        self.engine.dispose()
+        self.tmp.cleanup()
+
+    def test_save_load_and_catch_up(self):
+        """
+        Тестирование загрузки сохранённой модели с доучётом заказов после сохранения.
+        """
+        build_from_db(self.db).save(self.path)
+        for basket in BASKETS[4:]:
+            self.db.add(Order(user_id=1001, content={"products": basket}))
+        self.db.commit()
+
+        model = load_or_build(self.db, self.path)
+        self.assertEqual(model.last_order_id, len(BASKETS))
+        self.assert_counts(model)
+
+    assert_counts = TestCooccurrenceModel.assert_counts
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,131 @@
+"""
+Модульные тесты для модуля reporting в приложении TeleFood.
+
+Проверяют инкрементальное обновление агрегатов при оформлении заказа,
+разовый пересчёт по истории заказов, учёт скидок в выручке и функции чтения отчётов.
+"""
+
+import datetime
+import unittest
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from models import (
+    Base,
+    Cart,
+    DailySales,
+    HourlySales,
+    Order,
+    Product,
+    ProductSales,
+    ProductType,
+    User,
+)
+from reporting import (
+    backfill,
+    get_daily_revenue,
+    get_hourly_load,
+    get_top_products,
+    product_revenue,
+    to_local_time,
+)
+from services import checkout_cart
+
+
+class TestReporting(unittest.TestCase):
+    """
+    Класс тестовых случаев для агрегатов продаж.
+    """
+
+    def setUp(self):
+        """
+        Создание чистой базы данных в памяти с каталогом и одним пользователем.
+        """
+        self.engine = create_engine("sqlite:///:memory:", echo=False)
+        Base.metadata.create_all(self.engine)
+        self.db = sessionmaker(bind=self.engine)()
+        self.db.add(ProductType(id=1, name="Pizza"))
+        self.db.add_all(
+            [
+                Product(id=1, name="Margherita", cost=10.0, product_type=1),
+                Product(id=2, name="Pepperoni", cost=12.5, product_type=1),
+            ]
+        )
+        self.db.add(User(id=1001, name="TestUser1"))
+        self.db.add(Cart(user_id=1001, content={"products": [1, 1, 2]}))
+        self.db.commit()
+
+    def tearDown(self):
+        """
+        Закрытие сессии и освобождение движка базы данных.
+        """
+        self.db.close()
+        self.engine.dispose()
+
+    def test_checkout_updates_aggregates(self):
+        """
+        Тестирование обновления агрегатов в транзакции оформления заказа.
+        """
+        order = checkout_cart(self.db, 1001)
+        self.assertIsNotNone(order)
+        day = to_local_time(order.created_at).date()
+
+        daily = self.db.get(DailySales, day)
+        self.assertEqual(daily.orders_count, 1)
+        self.assertAlmostEqual(daily.revenue, 32.5)
+        self.assertEqual(self.db.get(ProductSales, (day, 1)).units, 2)
+        self.assertEqual(self.db.query(HourlySales).count(), 1)
+
+    def test_backfill_matches_incremental(self):
+        """
+        Тестирование того, что пересчёт истории даёт те же агрегаты, что и инкрементальный учёт.
+        """
+        created_at = datetime.datetime(2025, 1, 10, 9, 30)  # 12:30 по Москве
+        self.db.add_all(
+            [
+                Order(user_id=1001, content={"products": [1]}, created_at=created_at),
+                # Скидка по акциям уменьшает выручку заказа и его продуктов
+                Order(
+                    user_id=1001,
+                    content={"products": [2, 2]},
+                    created_at=created_at,
+                    discount=5.0,
+                ),
+                Order(user_id=1001, content={"products": [99]}, created_at=created_at),
+            ]
+        )
+        self.db.commit()
+
+        processed = backfill(self.db, batch_size=2)
+        self.assertEqual(processed, 3)
+
+        day = datetime.date(2025, 1, 10)
+        revenue = get_daily_revenue(self.db, day, day)
+        self.assertEqual(len(revenue), 1)
+        self.assertEqual(revenue[0].orders_count, 3)
+        self.assertAlmostEqual(revenue[0].revenue, 30.0)
+
+        top = get_top_products(self.db, day, day)
+        self.assertEqual(top[0], (2, "Pepperoni", 2, 20.0))
+        self.assertEqual(top[1], (1, "Margherita", 1, 10.0))
+
+        load = get_hourly_load(self.db, day, day)
+        self.assertEqual(len(load), 24)
+        self.assertEqual(load[12], (12, 3, 30.0))
+
+        # Повторный пересчёт не должен удваивать значения
+        backfill(self.db)
+        self.assertEqual(get_daily_revenue(self.db, day, day)[0].orders_count, 3)
+
+    def test_discount_split_between_products(self):
+        """
+        Тестирование распределения скидки заказа между продуктами пропорционально стоимости.
+        """
+        revenues = product_revenue({1: 2, 2: 2, 99: 1}, {1: 10.0, 2: 15.0}, 10.0)
+        self.assertEqual(revenues, {1: 16.0, 2: 24.0})
+        self.assertEqual(product_revenue({1: 1}, {1: 10.0}, 50.0), {1: 0.0})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,165 @@
+"""
+Модульные тесты для планировщика scheduler и очистки пустых корзин.
+
+Проверяют порядок выполнения и замену заданий по ключу, повтор по возвращённой
+задержке, сохранение заданий между перезапусками, работу с большим числом таймеров
+и удаление давно не изменявшихся пустых корзин.
+"""
+
+import datetime
+import time
+import unittest
+
+from sqlalchemy import create_engine, update
+from sqlalchemy.orm import sessionmaker
+
+from models import Base, Cart, ScheduledJob, User
+from scheduler import Scheduler
+from services import add_product_to_cart, compact_empty_carts, get_cart
+
+
+class TestScheduler(unittest.TestCase):
+    """
+    Класс тестовых случаев для планировщика заданий.
+    """
+
+    def setUp(self):
+        """
+        Создание базы в памяти для сохранения заданий.
+        """
+        self.engine = create_engine("sqlite:///:memory:", echo=False)
+        Base.metadata.create_all(self.engine)
+        self.session_factory = sessionmaker(bind=self.engine)
+        self.calls = []
+
+    def tearDown(self):
+        self.engine.dispose()
+
+    def make_scheduler(self):
+        scheduler = Scheduler(self.session_factory)
+        scheduler.register("record", lambda name: self.calls.append(name))
+        return scheduler
+
+    def test_jobs_run_in_order_and_replace_by_key(self):
+        """
+        Тестирование порядка выполнения, замены и отмены заданий.
+        """
+        scheduler = self.make_scheduler()
+        now = time.time()
+        scheduler.schedule("b", 20, "record", {"name": "b"})
+        scheduler.schedule("a", 10, "record", {"name": "a"})
+        scheduler.schedule("c", 30, "record", {"name": "c"})
+        # Повторное планирование сдвигает задание, отмена убирает его
+        scheduler.schedule("a", 40, "record", {"name": "a2"})
+        scheduler.cancel("c")
+        self.assertEqual(scheduler.pending(), 2)
+
+        self.assertEqual(scheduler.run_due(now + 35), 1)
+        self.assertEqual(scheduler.run_due(now + 45), 1)
+        self.assertEqual(self.calls, ["b", "a2"])
+        self.assertIsNone(scheduler.next_due())
+
+    def test_returned_delay_reschedules_job(self):
+        """
+        Тестирование повтора задания через возвращённую обработчиком задержку.
+        """
+        scheduler = self.make_scheduler()
+        runs = []
+
+        def periodic():
+            runs.append(1)
+            return 60 if len(runs) < 2 else None
+
+        scheduler.register("periodic", periodic)
+        scheduler.schedule("tick", 0, "periodic")
+        scheduler.run_due()
+        self.assertTrue(scheduler.scheduled("tick"))
+        scheduler.run_due(time.time() + 61)
+        self.assertFalse(scheduler.scheduled("tick"))
+        self.assertEqual(len(runs), 2)
+
+    def test_jobs_survive_restart(self):
+        """
+        Тестирование сохранения заданий в базу и загрузки после перезапуска.
+        """
+        scheduler = self.make_scheduler()
+        scheduler.schedule("kept", 0, "record", {"name": "kept"})
+        scheduler.schedule("dropped", 0, "record", {"name": "dropped"})
+        scheduler.schedule("memory", 0, "record", {"name": "memory"}, persist=False)
+        self.assertEqual(scheduler.flush(), 2)
+        scheduler.cancel("dropped")
+        scheduler.flush()
+        with self.session_factory() as db:
+            self.assertEqual([job.key for job in db.query(ScheduledJob)], ["kept"])
+
+        restarted = self.make_scheduler()
+        self.assertEqual(restarted.load(), 1)
+        restarted.run_due()
+        self.assertEqual(self.calls, ["kept"])
+        # Выполненное задание удаляется из базы при следующем сохранении
+        restarted.flush()
+        with self.session_factory() as db:
+            self.assertEqual(db.query(ScheduledJob).count(), 0)
+
+    def test_many_timers(self):
+        """
+        Тестирование ста тысяч таймеров с частой заменой одних и тех же ключей.
+        """
+        scheduler = Scheduler()
+        fired = []
+        scheduler.register("fire", lambda user_id: fired.append(user_id))
+        for round_delay in (300, 200, 100):
+            for user_id in range(100000):
+                scheduler.schedule(
+                    f"cart:{user_id}", round_delay, "fire", {"user_id": user_id}
+                )
+        for user_id in range(0, 100000, 2):
+            scheduler.cancel(f"cart:{user_id}")
+        # Отменённые записи не копятся в куче
+        self.assertLess(len(scheduler._heap), 200000)
+        self.assertEqual(scheduler.pending(), 50000)
+        self.assertEqual(scheduler.run_due(time.time() + 150), 50000)
+        self.assertEqual(len(fired), 50000)
+        self.assertEqual(scheduler.run_due(time.time() + 1000), 0)
+
+
+class TestCartCompaction(unittest.TestCase):
+    """
+    Класс тестовых случаев для удаления пустых корзин.
+    """
+
+    def setUp(self):
+        self.engine = create_engine("sqlite:///:memory:", echo=False)
+        Base.metadata.create_all(self.engine)
+        self.db = sessionmaker(bind=self.engine)()
+        old = datetime.datetime.utcnow() - datetime.timedelta(days=60)
+        for user_id in range(1, 6):
+            self.db.add(User(id=user_id, name=f"User{user_id}"))
+        self.db.add(Cart(user_id=1, content={"products": []}, updated_at=old))
+        self.db.add(Cart(user_id=2, content={"products": [1]}, updated_at=old))
+        self.db.add(Cart(user_id=3, content={"products": []}))
+        self.db.add(Cart(user_id=4, content={"items": {}}))
+        self.db.commit()
+        # Корзина, созданная до появления столбца updated_at
+        self.db.execute(update(Cart).where(Cart.user_id == 4).values(updated_at=None))
+        self.db.commit()
+
+    def tearDown(self):
+        self.db.close()
+        self.engine.dispose()
+
+    def test_old_empty_carts_are_removed(self):
+        """
+        Тестирование удаления только старых пустых корзин и их пересоздания.
+        """
+        cutoff = datetime.datetime.utcnow() - datetime.timedelta(days=30)
+        self.assertEqual(compact_empty_carts(self.db, cutoff, batch_size=1), 2)
+        self.assertEqual(
+            sorted(user_id for (user_id,) in self.db.query(Cart.user_id)), [2, 3]
+        )
+        add_product_to_cart(self.db, 1, 7)
+        self.assertEqual(get_cart(self.db, 1).content, {"products": [7]})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,140 @@
+"""
+Модульные тесты для модуля search_index в приложении TeleFood.
+
+Проверяют нормализацию текста, поиск по префиксу и по части слова, пагинацию
+и перестроение индекса при изменении версии каталога.
+"""
+
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from models import Base, Product, ProductType
+from search_index import CatalogSearch, ProductSearchIndex, SearchItem, fold
+from services import bump_catalog_version
+
+
+class TestProductSearchIndex(unittest.TestCase):
+    """
+    Класс тестовых случаев для индекса продуктов.
+    """
+
+    def setUp(self):
+        """
+        Создание индекса по небольшому каталогу.
+        """
+        self.index = ProductSearchIndex(
+            [
+                SearchItem(1, "Пицца Маргарита", "Томаты и моцарелла", 450.0, "Пицца"),
+                SearchItem(2, "Пицца Пепперони", "Острая колбаса", 520.0, "Пицца"),
+                SearchItem(3, "Ролл с лососем", "Свёкла и лосось", 380.0, "Суши"),
+                SearchItem(4, "Сырники", "Со сметаной", 250.0, "Завтраки"),
+            ]
+        )
+
+    def test_fold(self):
+        """
+        Тестирование приведения регистра и замены «ё» на «е».
+        """
+        self.assertEqual(fold("Свёкла ЁЖ"), "свекла еж")
+
+    def test_prefix_search(self):
+        """
+        Тестирование поиска по префиксу слова названия.
+        """
+        items, next_offset = self.index.search("пиц")
+        self.assertEqual([item.id for item in items], [1, 2])
+        self.assertIsNone(next_offset)
+
+    def test_search_is_case_and_yo_insensitive(self):
+        """
+        Тестирование поиска без учёта регистра и различий «ё»/«е».
+        """
+        items, _ = self.index.search("СВЕКЛА")
+        self.assertEqual([item.id for item in items], [3])
+
+    def test_substring_search(self):
+        """
+        Тестирование поиска по части слова через триграммы.
+        """
+        items, _ = self.index.search("ппер")
+        self.assertEqual([item.id for item in items], [2])
+
+    def test_all_words_must_match(self):
+        """
+        Тестирование того, что каждое слово запроса должно совпасть.
+        """
+        items, _ = self.index.search("пицца колбаса")
+        self.assertEqual([item.id for item in items], [2])
+        items, _ = self.index.search("пицца лосось")
+        self.assertEqual(items, [])
+
+    def test_name_matches_rank_first(self):
+        """
+        Тестирование приоритета совпадений в названии над совпадениями в описании.
+        """
+        items, _ = self.index.search("лосос")
+        self.assertEqual(items[0].id, 3)
+
+    def test_pagination(self):
+        """
+        Тестирование постраничной выдачи с next_offset.
+        """
+        first, next_offset = self.index.search("", offset=0, limit=3)
+        self.assertEqual(len(first), 3)
+        self.assertEqual(next_offset, 3)
+        rest, next_offset = self.index.search("", offset=3, limit=3)
+        self.assertEqual(len(rest), 1)
+        self.assertIsNone(next_offset)
+
+
+class TestCatalogSearch(unittest.TestCase):
+    """
+    Класс тестовых случаев для перестроения индекса по версии каталога.
+    """
+
+    def setUp(self):
+        """
+        Снимок каталога пишется во временный каталог.
+        """
+        self.tmp = tempfile.TemporaryDirectory()
+        self.snapshot_path = os.path.join(self.tmp.name, "catalog.snapshot")
+        patcher = mock.patch(
+            "catalog_snapshot.CATALOG_SNAPSHOT_PATH", self.snapshot_path
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(self.tmp.cleanup)
+
+    def test_refresh_on_catalog_version_change(self):
+        """
+        Тестирование перестроения индекса только после изменения версии каталога.
+        """
+        engine = create_engine("sqlite:///:memory:", echo=False)
+        Base.metadata.create_all(engine)
+        with sessionmaker(bind=engine)() as db:
+            db.add(ProductType(id=1, name="Пицца"))
+            db.add(Product(id=1, name="Маргарита", cost=450.0, product_type=1))
+            db.commit()
+
+            catalog_search = CatalogSearch()
+            self.assertTrue(catalog_search.refresh(db))
+            self.assertFalse(catalog_search.refresh(db))
+            self.assertEqual(catalog_search.search("марг")[0][0].category, "Пицца")
+
+            db.add(Product(id=2, name="Маргарита двойная", cost=600.0, product_type=1))
+            bump_catalog_version(db)
+            db.commit()
+            self.assertTrue(catalog_search.refresh(db))
+            self.assertEqual(len(catalog_search.search("марг")[0]), 2)
+        engine.dispose()
+        # Индекс строится из снимка, который перезаписывается при смене версии
+        self.assertTrue(os.path.exists(self.snapshot_path))
+
+
+if __name__ == "__main__":
+    unittest.main()
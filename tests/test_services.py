@@ -11,7 +11,7 @@ from unittest.mock import patch
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 
-from models import Base, Cart, Order, Product, ProductType, User
+from models import Base, Cart, Feedback, Order, Product, ProductType, User
 from services import (
     add_product_to_cart,
     add_review_to_order,
@@ -19,8 +19,11 @@ from services import (
     create_user_if_not_exists,
     get_all_categories,
     get_cart,
+    get_cart_summary,
     get_orders_by_user,
     get_products_by_category,
+    save_feedback_batch,
+    search_feedback,
 )
 
 
@@ -110,6 +113,7 @@ class TestServices(unittest.TestCase):
         """
         self.db = self.Session()
         # Reset relevant tables to initial state before each test for isolation
+        self.db.query(Feedback).delete()
         self.db.query(Order).delete()
         self.db.query(Cart).delete()
         self.db.query(User).delete()
@@ -210,6 +214,15 @@ class TestServices(unittest.TestCase):
         if cart is not None:
             self.assertEqual(cart.content, {"products": [3]})
 
+    def test_get_cart_summary(self):
+        """
+        Тестирование подсчёта количества товаров и суммы корзины.
+        """
+        count, total = get_cart_summary(self.db, 1002)
+        self.assertEqual(count, 2)
+        self.assertAlmostEqual(total, 10.99 + 12.99)
+        self.assertEqual(get_cart_summary(self.db, 1001), (0, 0.0))
+
     def test_checkout_cart_empty(self):
         """
         Тестирование оформления заказа с пустой корзиной, ожидается, что заказ не будет создан.
@@ -258,6 +271,30 @@ class TestServices(unittest.TestCase):
         if order is not None:
             self.assertEqual(order.review, "Very tasty!")
 
+    def test_save_feedback_batch(self):
+        """
+        Тестирование пакетного сохранения обратной связи и отзывов о заказах.
+        """
+        order_id = get_orders_by_user(self.db, 1001)[-1].id
+        save_feedback_batch(
+            self.db,
+            [
+                {"user_id": 1001, "order_id": None, "text": " Спасибо! "},
+                {"user_id": 1001, "order_id": order_id, "text": "Вкусно"},
+                {"user_id": 1002, "order_id": 9999, "text": "Нет такого заказа"},
+            ],
+        )
+        self.assertEqual(self.db.query(Feedback).count(), 3)
+        self.db.expire_all()
+        self.assertEqual(self.db.query(Order).get(order_id).review, "Вкусно")
+
+        entries, total = search_feedback(self.db, "спасибо")
+        self.assertEqual(total, 1)
+        self.assertEqual(entries[0].text, "Спасибо!")
+        entries, total = search_feedback(self.db, offset=1, limit=1)
+        self.assertEqual(total, 3)
+        self.assertEqual(len(entries), 1)
+
 
 if __name__ == "__main__":
     unittest.main()
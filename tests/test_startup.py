@@ -0,0 +1,43 @@
+"""
+Модульные тесты для профиля запуска startup.
+
+Проверяют отчёт о фазах запуска в порядке их окончания, однократную отметку событий
+и предупреждение о превышении целевого времени до первого обновления.
+"""
+
+import time
+import unittest
+
+from startup import StartupProfile
+
+
+class TestStartupProfile(unittest.TestCase):
+    """
+    Класс тестовых случаев для профиля запуска.
+    """
+
+    def test_report_lists_phases_and_marks(self):
+        """
+        Тестирование отчёта с фазами и событиями в порядке окончания.
+        """
+        profile = StartupProfile(started=time.perf_counter(), target=0.001)
+        with profile.phase("init_db"):
+            time.sleep(0.01)
+        first = profile.mark("first update")
+        self.assertEqual(profile.mark("first update"), first)
+        with profile.phase("warm: catalog"):
+            pass
+        lines = profile.report().splitlines()
+        self.assertEqual(len(lines), 5)
+        names = [line.rsplit("| ", 1)[1] for line in lines[1:]]
+        self.assertEqual(
+            names,
+            ["interpreter + imports", "init_db", "* first update", "warm: catalog"],
+        )
+        self.assertGreaterEqual(float(lines[2].split("|")[0].split()[-1]), 10.0)
+        with self.assertLogs("TeleFoodBot", level="WARNING"):
+            profile.log()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,146 @@
+"""
+Модульные тесты для модуля tenancy в приложении TeleFood.
+
+Проверяют реестр ресторанов, направление обновлений бота в базу ресторана
+пользователя и параллельное чтение отчётов из баз всех ресторанов.
+"""
+
+import datetime
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from telebot import types
+
+import database
+from database import SessionLocal, get_session_factory, use_tenant
+from dispatch import DispatchTeleBot
+from models import Base, Cart, Product, ProductType, User
+from reporting import to_local_time
+from services import checkout_cart, create_user_if_not_exists
+from tenancy import TenantRegistry, fan_out, get_network_revenue
+
+
+def make_message_update(update_id, user_id, text="/start"):
+    """Создать объект Update с текстовым сообщением пользователя."""
+    return types.Update.de_json(
+        {
+            "update_id": update_id,
+            "message": {
+                "message_id": update_id,
+                "date": 0,
+                "chat": {"id": user_id, "type": "private"},
+                "from": {"id": user_id, "is_bot": False, "first_name": f"U{user_id}"},
+                "text": text,
+            },
+        }
+    )
+
+
+class TestTenancy(unittest.TestCase):
+    """
+    Класс тестовых случаев для работы с несколькими ресторанами.
+    """
+
+    def setUp(self):
+        """
+        Создание реестра в памяти и баз ресторанов во временном каталоге.
+        """
+        self.tmp = tempfile.TemporaryDirectory()
+        url = "sqlite:///" + os.path.join(self.tmp.name, "{tenant}.db")
+        self.patches = [
+            patch("database.TENANT_DATABASE_URL", url),
+            patch.dict(database._engines),
+            patch.dict(database._readers),
+            patch.dict(database._session_factories),
+        ]
+        for p in self.patches:
+            p.start()
+        self.registry_engine = create_engine("sqlite:///:memory:")
+        Base.metadata.create_all(self.registry_engine)
+        self.registry = TenantRegistry(sessionmaker(bind=self.registry_engine))
+        self.registry.add_tenant("north", "TeleFood Север")
+        self.registry.add_tenant("south", "TeleFood Юг")
+
+    def tearDown(self):
+        """
+        Освобождение движков и удаление временных баз.
+        """
+        for slug in ("north", "south"):
+            database.get_engine(slug).dispose()
+            database.get_reader_engine(slug).dispose()
+        for p in reversed(self.patches):
+            p.stop()
+        self.registry_engine.dispose()
+        self.tmp.cleanup()
+
+    def test_registry(self):
+        """
+        Тестирование регистрации ресторанов и выбора ресторана пользователем.
+        """
+        self.assertEqual(
+            self.registry.tenants(), {"north": "TeleFood Север", "south": "TeleFood Юг"}
+        )
+        self.assertTrue(os.path.exists(os.path.join(self.tmp.name, "north.db")))
+        self.assertIsNone(self.registry.tenant_for_user(1))
+        self.registry.set_user_tenant(1, "south")
+        self.registry.invalidate()
+        self.assertEqual(self.registry.tenant_for_user(1), "south")
+        with self.assertRaises(ValueError):
+            self.registry.set_user_tenant(1, "missing")
+        with self.assertRaises(ValueError):
+            self.registry.add_tenant("../etc", "Bad")
+
+    def test_updates_are_routed_to_user_tenant(self):
+        """
+        Тестирование обработки обновлений в базе ресторана отправителя.
+        """
+        self.registry.set_user_tenant(1, "north")
+        self.registry.set_user_tenant(2, "south")
+        bot = DispatchTeleBot("123:TEST", threaded=False)
+        bot.update_context = self.registry.update_context
+
+        def handle_start(message):
+            with SessionLocal() as db:
+                create_user_if_not_exists(db, message.from_user.id, "Test")
+
+        bot.message_handler(commands=["start"])(handle_start)
+        bot.process_new_updates([make_message_update(1, 1), make_message_update(2, 2)])
+
+        for slug, user_id in (("north", 1), ("south", 2)):
+            with get_session_factory(slug)() as db:
+                self.assertEqual([u.id for u in db.query(User)], [user_id])
+
+    def test_network_report_fans_out(self):
+        """
+        Тестирование параллельного сбора выручки из баз всех ресторанов.
+        """
+        for slug, orders in (("north", 2), ("south", 1)):
+            with use_tenant(slug), SessionLocal() as db:
+                db.add(ProductType(id=1, name="Pizza"))
+                db.add(Product(id=1, name="Margherita", cost=10.0, product_type=1))
+                db.add(User(id=1001, name="TestUser1"))
+                db.commit()
+                for _ in range(orders):
+                    db.add(Cart(user_id=1001, content={"products": [1, 1]}))
+                    db.commit()
+                    self.assertIsNotNone(checkout_cart(db, 1001))
+                    db.query(Cart).delete()
+                    db.commit()
+
+        today = to_local_time(None).date()
+        network = get_network_revenue(["north", "south"], today, today)
+        self.assertEqual(network, {"north": (2, 40.0), "south": (1, 20.0)})
+        counts = fan_out(lambda db: db.query(User).count(), ["north", "south"])
+        self.assertEqual(counts, [("north", 1), ("south", 1)])
+        yesterday = today - datetime.timedelta(days=1)
+        self.assertEqual(
+            get_network_revenue(["north"], yesterday, yesterday), {"north": (0, 0)}
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
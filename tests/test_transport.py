@@ -0,0 +1,109 @@
+"""
+Модульные тесты для модуля transport в приложении TeleFood.
+
+Проверяют повторные попытки при сетевых ошибках и ответах 5xx, отсутствие повторов
+при таймауте чтения и работу выключателя (circuit breaker).
+"""
+
+import unittest
+from unittest.mock import MagicMock, patch
+
+import requests
+
+from transport import BotTransport, CircuitOpenError, non_critical
+
+
+def make_response(status_code):
+    """Создать поддельный HTTP-ответ с заданным кодом."""
+    response = MagicMock()
+    response.status_code = status_code
+    return response
+
+
+class TestBotTransport(unittest.TestCase):
+    """
+    Класс тестовых случаев для BotTransport.
+    """
+
+    def setUp(self):
+        """
+        Создание транспорта без задержек между повторами.
+        """
+        self.transport = BotTransport(
+            max_retries=2, failure_threshold=3, recovery_time=60
+        )
+        self.transport.backoff = lambda attempt: 0
+        self.transport.session.request = MagicMock()
+
+    def test_retries_on_server_error(self):
+        """
+        Тестирование повтора запроса после ответа 502.
+        """
+        self.transport.session.request.side_effect = [
+            make_response(502),
+            make_response(200),
+        ]
+        response = self.transport.request("post", "http://api/sendMessage")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.transport.session.request.call_count, 2)
+
+    def test_retries_on_connection_error_then_gives_up(self):
+        """
+        Тестирование исчерпания повторов при постоянной сетевой ошибке.
+        """
+        self.transport.session.request.side_effect = requests.ConnectionError()
+        with self.assertRaises(requests.ConnectionError):
+            self.transport.request("post", "http://api/sendMessage")
+        self.assertEqual(self.transport.session.request.call_count, 3)
+
+    def test_read_timeout_is_not_retried(self):
+        """
+        Тестирование отсутствия повтора после таймаута чтения (запрос мог выполниться).
+        """
+        self.transport.session.request.side_effect = requests.ReadTimeout()
+        with self.assertRaises(requests.ReadTimeout):
+            self.transport.request("post", "http://api/sendMessage")
+        self.assertEqual(self.transport.session.request.call_count, 1)
+
+    def test_client_errors_are_returned_as_is(self):
+        """
+        Тестирование того, что ответы 4xx (в том числе 429) не повторяются транспортом.
+        """
+        self.transport.session.request.return_value = make_response(429)
+        response = self.transport.request("post", "http://api/sendMessage")
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(self.transport.session.request.call_count, 1)
+
+    def test_circuit_breaker_sheds_non_critical_requests(self):
+        """
+        Тестирование отбрасывания некритичных запросов при разомкнутом выключателе.
+        """
+        self.transport.session.request.return_value = make_response(503)
+        self.transport.request("post", "http://api/sendMessage")
+        self.assertTrue(self.transport.breaker.is_open)
+
+        calls = self.transport.session.request.call_count
+        with non_critical():
+            # Первый запрос после размыкания ждёт recovery_time, поэтому отбрасывается
+            with self.assertRaises(CircuitOpenError):
+                self.transport.request("post", "http://api/sendMessage")
+        self.assertEqual(self.transport.session.request.call_count, calls)
+
+        # Критичный запрос проходит и, получив успешный ответ, замыкает выключатель
+        self.transport.session.request.return_value = make_response(200)
+        self.transport.request("post", "http://api/sendMessage")
+        self.assertFalse(self.transport.breaker.is_open)
+        self.assertGreater(self.transport.breaker.open_seconds(), 0)
+        self.assertIn("circuit_open_seconds", self.transport.stats())
+
+    def test_install_sets_custom_sender(self):
+        """
+        Тестирование подключения транспорта к telebot.
+        """
+        with patch("transport.apihelper") as apihelper:
+            self.transport.install()
+            self.assertEqual(apihelper.CUSTOM_REQUEST_SENDER, self.transport.request)
+
+
+if __name__ == "__main__":
+    unittest.main()
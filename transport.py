@@ -0,0 +1,214 @@
+"""
+HTTP-транспорт для обращений к Telegram Bot API.
+
+Модуль подменяет способ отправки запросов telebot (apihelper.CUSTOM_REQUEST_SENDER):
+все запросы идут через один requests.Session с пулом keep-alive соединений нужного
+размера, явными таймаутами, повторными попытками с экспоненциальной задержкой и
+случайным разбросом (jitter) при сетевых ошибках и ответах 5xx, а также через
+автоматический выключатель (circuit breaker). Пока Telegram отвечает ошибками,
+выключатель разомкнут и некритичные отправки (рассылки, обновление сводок)
+отбрасываются сразу, не занимая соединения и потоки.
+"""
+
+import logging
+import random
+import threading
+import time
+from contextlib import contextmanager
+
+import requests
+from requests.adapters import HTTPAdapter
+from telebot import apihelper
+
+from metrics import metrics
+
+logger = logging.getLogger("TeleFoodBot")
+
+_context = threading.local()
+
+
+class CircuitOpenError(requests.ConnectionError):
+    """Некритичный запрос отклонён, потому что выключатель разомкнут."""
+
+
+@contextmanager
+def non_critical():
+    """Пометить запросы внутри блока как некритичные (их можно отбросить)."""
+    previous = getattr(_context, "non_critical", False)
+    _context.non_critical = True
+    try:
+        yield
+    finally:
+        _context.non_critical = previous
+
+
+def is_non_critical() -> bool:
+    """Проверить, помечен ли текущий поток как выполняющий некритичные запросы."""
+    return getattr(_context, "non_critical", False)
+
+
+class CircuitBreaker:
+    """
+    Выключатель по числу подряд идущих ошибок.
+
+    Замкнут — запросы проходят. После failure_threshold ошибок подряд размыкается
+    на recovery_time секунд: некритичные запросы отклоняются, критичные проходят.
+    По истечении времени пропускается один некритичный пробный запрос; любой
+    успешный ответ снова замыкает выключатель.
+    """
+
+    def __init__(self, failure_threshold: int = 5, recovery_time: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.recovery_time = recovery_time
+        self._failures = 0
+        self._opened_at = None
+        self._probe_at = 0.0
+        self._open_seconds = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def is_open(self) -> bool:
+        return self._opened_at is not None
+
+    def allow(self, critical: bool) -> bool:
+        """Решить, можно ли выполнить запрос."""
+        if critical:
+            return True
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            now = time.monotonic()
+            if now >= self._probe_at:
+                # Полуоткрытое состояние: один пробный запрос за recovery_time
+                self._probe_at = now + self.recovery_time
+                return True
+            return False
+
+    def record_success(self):
+        """Учесть успешный ответ."""
+        with self._lock:
+            self._failures = 0
+            if self._opened_at is not None:
+                self._open_seconds += time.monotonic() - self._opened_at
+                self._opened_at = None
+                logger.info("Telegram circuit breaker closed")
+
+    def record_failure(self):
+        """Учесть ошибку (сетевую или 5xx)."""
+        with self._lock:
+            self._failures += 1
+            if self._opened_at is None and self._failures >= self.failure_threshold:
+                now = time.monotonic()
+                self._opened_at = now
+                self._probe_at = now + self.recovery_time
+                metrics.incr("transport.circuit_opened")
+                logger.warning("Telegram circuit breaker opened")
+
+    def open_seconds(self) -> float:
+        """Суммарное время в разомкнутом состоянии, включая текущий период."""
+        with self._lock:
+            total = self._open_seconds
+            if self._opened_at is not None:
+                total += time.monotonic() - self._opened_at
+            return total
+
+
+class BotTransport:
+    """
+    Отправитель запросов к Bot API с пулом соединений, повторами и выключателем.
+    """
+
+    def __init__(
+        self,
+        pool_size: int = 8,
+        connect_timeout: float = 5.0,
+        read_timeout: float = 30.0,
+        max_retries: int = 3,
+        backoff_base: float = 0.5,
+        backoff_max: float = 8.0,
+        failure_threshold: int = 5,
+        recovery_time: float = 30.0,
+    ):
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.breaker = CircuitBreaker(failure_threshold, recovery_time)
+        self.session = requests.Session()
+        # pool_block: при исчерпании пула поток ждёт соединение, а не открывает лишнее
+        adapter = HTTPAdapter(
+            pool_connections=1, pool_maxsize=pool_size, pool_block=True
+        )
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def install(self):
+        """Подключить транспорт к telebot."""
+        apihelper.CUSTOM_REQUEST_SENDER = self.request
+
+    def backoff(self, attempt: int) -> float:
+        """Задержка перед повтором: экспонента с полным случайным разбросом."""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2**attempt))
+
+    def _timeout(self, timeout):
+        """Согласовать таймауты telebot (длинный опрос) с настройками транспорта."""
+        if isinstance(timeout, tuple):
+            connect, read = timeout
+            return min(connect, self.connect_timeout), max(read, self.read_timeout)
+        return self.connect_timeout, self.read_timeout
+
+    def request(self, method, url, params=None, files=None, timeout=None, proxies=None):
+        """Выполнить запрос; сигнатура совпадает с apihelper.CUSTOM_REQUEST_SENDER."""
+        if not self.breaker.allow(critical=not is_non_critical()):
+            metrics.incr("transport.shed")
+            raise CircuitOpenError("Telegram API is degraded, request shed")
+
+        timeout = self._timeout(timeout)
+        attempt = 0
+        while True:
+            metrics.incr("transport.requests")
+            error = None
+            try:
+                response = self.session.request(
+                    method,
+                    url,
+                    params=params,
+                    files=files,
+                    timeout=timeout,
+                    proxies=proxies,
+                )
+            except requests.ConnectionError as e:
+                # Соединение не установлено — запрос точно не дошёл, повтор безопасен
+                error = e
+            except requests.Timeout:
+                # Таймаут чтения: запрос мог быть выполнен, повтор может его задвоить
+                metrics.incr("transport.failures")
+                self.breaker.record_failure()
+                raise
+            else:
+                if response.status_code < 500:
+                    self.breaker.record_success()
+                    return response
+
+            metrics.incr("transport.failures")
+            self.breaker.record_failure()
+            # Файлы уже прочитаны из потоков, повторить их отправку нельзя
+            if attempt >= self.max_retries or files:
+                if error is not None:
+                    raise error
+                return response
+            metrics.incr("transport.retries")
+            time.sleep(self.backoff(attempt))
+            attempt += 1
+
+    def stats(self) -> dict:
+        """Счётчики транспорта для мониторинга."""
+        return {
+            "requests": metrics.get("transport.requests"),
+            "retries": metrics.get("transport.retries"),
+            "failures": metrics.get("transport.failures"),
+            "shed": metrics.get("transport.shed"),
+            "circuit_open": self.breaker.is_open,
+            "circuit_open_seconds": round(self.breaker.open_seconds(), 3),
+        }